@@ -14,12 +14,45 @@ def main() -> None:
 
     subparsers.add_parser("http", help="Start HTTP server")
 
+    reindex = subparsers.add_parser(
+        "email-reindex", help="Rebuild the email full-text search index"
+    )
+    reindex.add_argument("--user", help="User ID (default: every user)")
+
+    threads = subparsers.add_parser(
+        "email-threads", help="Build the email thread index for existing mail"
+    )
+    threads.add_argument("--user", help="User ID (default: every user)")
+    threads.add_argument(
+        "--no-fetch",
+        action="store_true",
+        help="Don't fetch missing Message-ID/References headers over IMAP",
+    )
+
     args = parser.parse_args()
 
     if args.command == "http" or args.command is None:
         from src.http.main import run as http_run
 
         http_run()
+    elif args.command == "email-reindex":
+        from src.sdk.tools_core.email_db import rebuild_search_index
+        from src.storage.user import get_all_user_ids
+
+        for user_id in [args.user] if args.user else get_all_user_ids():
+            count = rebuild_search_index(user_id)
+            print(f"{user_id}: indexed {count} emails")
+    elif args.command == "email-threads":
+        from src.sdk.tools_core.email_sync import backfill_thread_index
+        from src.storage.user import get_all_user_ids
+
+        for user_id in [args.user] if args.user else get_all_user_ids():
+            for account, stats in backfill_thread_index(user_id, not args.no_fetch).items():
+                print(
+                    f"{user_id}/{account}: threaded {stats['threaded']} emails "
+                    f"into {stats['threads']} threads "
+                    f"({stats['headers_fetched']} header sets fetched)"
+                )
     else:
         parser.print_help()
         sys.exit(1)
@@ -41,6 +41,17 @@ class AgentConfig(_BaseSettings):
     model_config = SettingsConfigDict(env_prefix="AGENT_")
 
 
+class ProvidersConfig(_BaseSettings):
+    """Shared LLM provider HTTP client pool."""
+
+    max_connections_per_host: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry_seconds: float = 60.0
+    http2: bool = True  # Used only when the h2 package is installed
+
+    model_config = SettingsConfigDict(env_prefix="PROVIDERS_")
+
+
 class MessagesConfig(_BaseSettings):
     """Messages (long-term) configuration using SQLite + FTS5 + ChromaDB."""
 
@@ -72,6 +83,8 @@ class SummarizationConfig(_BaseSettings):
     trigger_tokens: int = 50000
     keep_tokens: int = 1000
     model: str = Field(default="ollama:minimax-m2.5")
+    background: bool = False  # summarize speculatively past soft_trigger_tokens
+    soft_trigger_tokens: int | None = None  # default: 80% of trigger_tokens
 
     model_config = SettingsConfigDict(env_prefix="SUMMARY_")
 
@@ -150,6 +163,9 @@ class ToolsConfig(_BaseSettings):
     firecrawl_base_url: str = Field(default="", validation_alias="FIRECRAWL_BASE_URL")
     max_retries: int = 3
     timeout: int = 30
+    executor_max_threads: int = 16  # Thread pool for synchronous tools
+    executor_max_processes: int = 2  # Process pool for cpu_bound tools
+    executor_timeout_seconds: float = 0  # Default per-call timeout, 0=disabled
 
     model_config = SettingsConfigDict(env_prefix="TOOLS_")
 
@@ -183,6 +199,7 @@ class EmailConfig(_BaseSettings):
     gws_client_secret: str = Field(default="")
     m365_client_id: str = Field(default="")
     sync_interval_minutes: int = Field(default=15)
+    gmail_fetch_concurrency: int = 8  # parallel messages.get calls per Gmail sync
 
     model_config = SettingsConfigDict(env_prefix="EMAIL_")
 
@@ -207,6 +224,14 @@ class EmailSyncConfig(_BaseSettings):
     interval_minutes: int = 5
     batch_size: int = 100
     backfill_limit: int = 1000
+    fetch_batch_size: int = 50  # UIDs per pipelined UID FETCH
+    headers_first: bool = False  # store headers first, fetch bodies in a second pass
+    max_workers: int = 8  # accounts synced concurrently per interval pass
+    max_connections_per_host: int = 4  # open IMAP sessions per server
+    session_idle_seconds: float = 600.0  # log out pooled sessions unused this long
+    quiet_folder_multiplier: int = 6  # sync inactive non-INBOX folders every N intervals
+    idle_push: bool = False  # hold an IMAP IDLE connection per account and sync INBOX on push
+    idle_max_accounts: int = 20  # accounts watched with IDLE at once (one connection each)
 
     model_config = SettingsConfigDict(env_prefix="EMAIL_SYNC_")
 
@@ -232,6 +257,7 @@ class AppConfig(_BaseSettings):
     """Main application configuration."""
 
     agent: AgentConfig = Field(default_factory=AgentConfig)
+    providers: ProvidersConfig = Field(default_factory=ProvidersConfig)
     deployment: DeploymentConfig = Field(default_factory=DeploymentConfig)
     memory: MemoryConfig = Field(default_factory=MemoryConfig)
     observability: ObservabilityConfig = Field(default_factory=ObservabilityConfig)
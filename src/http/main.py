@@ -72,6 +72,14 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     except Exception:
         pass
 
+    # Watches start as workspaces' caches are used (see src.sdk.file_watcher).
+    try:
+        from src.sdk.file_watcher import get_file_watcher
+
+        get_file_watcher()
+    except Exception:
+        pass
+
     print("HTTP server ready (SDK runtime)")
     yield
 
@@ -85,6 +93,48 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     except Exception:
         pass
 
+    try:
+        from src.sdk.tool_executor import shutdown_tool_executor
+
+        shutdown_tool_executor(wait=False)
+    except Exception:
+        pass
+
+    try:
+        from src.storage.async_messages import shutdown_async_message_stores
+
+        shutdown_async_message_stores()
+    except Exception:
+        pass
+
+    try:
+        from src.sdk.tools_core.email_sync import stop_interval_sync
+
+        await stop_interval_sync()
+    except Exception:
+        pass
+
+    try:
+        from src.sdk.file_watcher import shutdown_file_watcher
+
+        shutdown_file_watcher()
+    except Exception:
+        pass
+
+    try:
+        from src.sdk.tools_core.imap_pool import shutdown_imap_pool
+
+        shutdown_imap_pool()
+    except Exception:
+        pass
+
+    try:
+        from src.sdk.providers.client_pool import shutdown_client_pool
+
+        await shutdown_client_pool()
+    except Exception:
+        pass
+
 
 app = FastAPI(
     title="Executive Assistant",
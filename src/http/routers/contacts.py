@@ -15,11 +15,13 @@ async def list_contacts(user_id: str = "default_user") -> dict[str, Any]:
 
 
 @router.get("/search")
-async def search_contacts(query: str, user_id: str = "default_user") -> dict[str, Any]:
-    """Search contacts."""
+async def search_contacts(
+    query: str, limit: int = 20, user_id: str = "default_user"
+) -> dict[str, Any]:
+    """Search contacts (typo-tolerant, most-emailed first among equal matches)."""
     from src.sdk.tools_core.contacts import contacts_search
 
-    result = contacts_search.invoke({"user_id": user_id, "query": query})
+    result = contacts_search.invoke({"user_id": user_id, "query": query, "limit": limit})
     return {"results": result}
 
 
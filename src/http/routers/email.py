@@ -3,6 +3,7 @@
 GET  /emails              — list emails
 GET  /emails/:id           — single email
 GET  /emails/search?q=...  — hybrid search
+GET  /emails/counts        — unread/flagged/last-24h counters of IMAP accounts
 POST /emails/sync          — trigger sync from Gmail/Outlook
 """
 
@@ -47,6 +48,19 @@ async def handle_search(q: str, user_id: str = "default_user", limit: int = 20)
     return {"emails": emails, "query": q}
 
 
+@router.get("/counts")
+async def handle_counts(
+    user_id: str = "default_user", account_id: str | None = None
+) -> dict[str, Any]:
+    from src.sdk.tools_core.email_db import email_counter_totals, get_email_counters, get_engine
+
+    engine = get_engine(user_id)
+    return {
+        "totals": email_counter_totals(engine, account_id),
+        "folders": get_email_counters(engine, account_id),
+    }
+
+
 @router.get("/{email_id}")
 async def handle_get(email_id: str, user_id: str = "default_user") -> dict[str, Any]:
     email = get_email(user_id, email_id)
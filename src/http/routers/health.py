@@ -7,8 +7,15 @@ router = APIRouter(tags=["health"])
 
 @router.get("/health")
 async def health() -> dict[str, Any]:
-    """Health check."""
-    return {"status": "healthy"}
+    """Health check, with LLM provider connection reuse and email sync lag stats."""
+    from src.sdk.providers.client_pool import get_client_pool
+    from src.sdk.tools_core.email_sync import get_sync_metrics
+
+    return {
+        "status": "healthy",
+        "provider_clients": get_client_pool().stats(),
+        "email_sync": get_sync_metrics(),
+    }
 
 
 @router.get("/health/ready")
@@ -70,8 +70,11 @@ async def clear_memories(
     workspace_id: str = "personal",
 ) -> dict[str, Any]:
     """Delete all messages, observations, and reflections for the user."""
-    core = _get_core(user_id, workspace_id)
-    core.clear()
+    from src.storage.messages import get_message_store
+
+    store = get_message_store(user_id, workspace_id)
+    store.clear()
+    core = store.core
     core._db.raw_query("DELETE FROM observations")
     core._db.raw_query("DELETE FROM reflections")
     return {"status": "cleared", "user_id": user_id, "workspace_id": workspace_id}
@@ -5,7 +5,7 @@ from pathlib import Path
 from typing import Any
 
 import yaml
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, Field
 
 from src.sdk.item_scopes import ItemScopeDB, ScopeKind
@@ -159,17 +159,26 @@ def _to_detail(skill: dict[str, Any] | Any, loaded_names: set[str]) -> SkillDeta
 
 
 @router.get("", response_model=SkillListResponse)
-async def list_skills(user_id: str = "default_user", workspace_id: str = "personal") -> SkillListResponse:
+async def list_skills(
+    user_id: str = "default_user",
+    workspace_id: str = "personal",
+    q: str | None = None,
+    limit: int | None = Query(default=None, ge=1),
+) -> SkillListResponse:
     _validate_user_id(user_id)
     _validate_workspace_id(workspace_id)
     registry = _get_registry(user_id, workspace_id)
+    if q is not None:
+        skills = registry.search_skills(q, limit)
+    else:
+        skills = registry.get_all_skills()[:limit]
     loaded_names = set(registry.get_loaded_skills())
     paths = get_paths(user_id)
     scope_db = ItemScopeDB(paths.base)
     all_scoped = scope_db.get_all_scoped(user_id, "skill")
 
     summaries = []
-    for skill in registry.get_all_skills():
+    for skill in skills:
         name = skill["name"]
         summary = _to_summary(skill, loaded_names)
         if name in all_scoped:
@@ -1,7 +1,6 @@
 import asyncio
 import json
 from collections.abc import AsyncGenerator
-from datetime import UTC, datetime
 from typing import Any
 
 from fastapi import APIRouter, Body
@@ -11,6 +10,8 @@ from src.storage.paths import get_paths
 
 router = APIRouter(tags=["workspace"])
 
+_KEEPALIVE_SECONDS = 30
+
 
 @router.get("/workspace/json")
 async def list_workspace_json(user_id: str = "default_user", workspace_id: str = "personal") -> dict[str, Any]:
@@ -125,77 +126,26 @@ async def mark_downloaded(path: str, user_id: str = "default_user", workspace_id
 
 @router.get("/sync/stream")
 async def sync_stream(user_id: str = "default_user", workspace_id: str = "personal") -> StreamingResponse:
-    """SSE stream for real-time file change notifications."""
+    """SSE stream for real-time file change notifications.
+
+    Events come from the shared FileWatcher, so any number of clients cost
+    one watch per (user, workspace) instead of one rescan loop each.
+    """
+    from src.sdk.file_watcher import get_file_watcher
 
     async def event_generator() -> AsyncGenerator[str, None]:
-        paths = get_paths(user_id, workspace_id=workspace_id)
-        workspace_path = paths.workspace_files_dir()
-
-        skills_path = get_paths(user_id).user_skills_dir()
-        subagents_path = get_paths(user_id).subagents_dir()
-
-        last_state: dict[str, Any] = {
-            "workspace": {},
-            "skills": {},
-            "subagents": {},
-        }
-
-        while True:
-            try:
-                current_state: dict[str, Any] = {
-                    "workspace": {},
-                    "skills": {},
-                    "subagents": {},
-                }
-
-                if workspace_path.exists():
-                    for f in workspace_path.rglob("*"):
-                        if f.is_file():
-                            rel_path = str(f.relative_to(workspace_path))
-                            mtime = str(f.stat().st_mtime)
-                            current_state["workspace"][rel_path] = mtime
-
-                if skills_path.exists():
-                    for f in skills_path.glob("*/SKILL.md"):
-                        skill_name = f.parent.name
-                        current_state["skills"][skill_name] = str(f.stat().st_mtime)
-
-                if subagents_path.exists():
-                    for f in subagents_path.glob("*/config.yaml"):
-                        agent_name = f.parent.name
-                        current_state["subagents"][agent_name] = str(f.stat().st_mtime)
-
-                for category in ["workspace", "skills", "subagents"]:
-                    new_items = set(current_state[category].keys()) - set(
-                        last_state[category].keys()
-                    )
-                    changed_items = []
-
-                    for path_item, mtime in current_state[category].items():
-                        if path_item not in last_state[category]:
-                            changed_items.append(path_item)
-                        elif last_state[category][path_item] != mtime:
-                            changed_items.append(path_item)
-
-                    if changed_items or new_items:
-                        all_changed = list(set(changed_items) | set(new_items))
-                        for item in all_changed:
-                            data = {
-                                "type": f"{category}_changed",
-                                "category": category,
-                                "path": item,
-                                "action": "created" if item in new_items else "modified",
-                                "timestamp": datetime.now(UTC).isoformat(),
-                            }
-                            yield f"data: {json.dumps(data)}\n\n"
-
-                last_state = current_state
-                await asyncio.sleep(3)
-
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
-                await asyncio.sleep(5)
+        try:
+            async with get_file_watcher().subscribe(user_id, workspace_id) as queue:
+                while True:
+                    try:
+                        event = await asyncio.wait_for(queue.get(), _KEEPALIVE_SECONDS)
+                    except TimeoutError:
+                        yield ": keepalive\n\n"
+                        continue
+                    yield f"data: {json.dumps(event.to_dict())}\n\n"
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
 
     return StreamingResponse(event_generator(), media_type="text/event-stream")
@@ -93,7 +93,10 @@ async def delete_workspace_endpoint(workspace_id: str, user_id: str = "default_u
     if ws is None or ws.id == "personal":
         return {"error": "Cannot delete"}, 400
 
+    from src.storage.async_messages import clear_async_message_store
     from src.storage.messages import clear_message_store, get_message_store
+
+    clear_async_message_store(user_id, workspace_id)
     store = get_message_store(user_id, workspace_id)
     _ = store.delete_messages_for_workspace(ws.id)
     clear_message_store(user_id, workspace_id)
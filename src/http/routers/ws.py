@@ -36,13 +36,14 @@ from src.http.ws_protocol import (
     RejectMessage,
     parse_client_message,
 )
+from src.http.ws_stream import StreamOptions, WsStreamWriter, send_frame
 from src.sdk.messages import Message
 from src.sdk.runner import (
     _messages_from_conversation,
     get_sdk_loop,
     run_sdk_agent_stream,
 )
-from src.storage.messages import get_message_store
+from src.storage.async_messages import get_async_message_store
 
 logger = get_logger()
 
@@ -59,12 +60,12 @@ async def _run_agent_stream(
     workspace_id: str = "personal",
     model: str | None = None,
     provider_keys: dict[str, str] | None = None,
+    stream_options: StreamOptions | None = None,
 ) -> None:
     """Run the agent streaming loop and handle all chunk types."""
     import uuid as _uuid
 
-    def _with_workspace(payload: dict[str, Any]) -> dict[str, Any]:
-        return {**payload, "workspace_id": workspace_id}
+    out = WsStreamWriter(websocket, workspace_id, session_id, stream_options)
 
     ai_content_parts: list[str] = []
     reasoning_parts: list[str] = []
@@ -72,6 +73,7 @@ async def _run_agent_stream(
     skill_load_names: dict[str, str] = {}
 
     try:
+        await out.start()
         async for chunk in run_sdk_agent_stream(
             user_id=user_id,
             messages=sdk_messages,
@@ -84,13 +86,13 @@ async def _run_agent_stream(
 
             if canonical == "text_delta" and chunk.content and not is_compat_alias:
                 ai_content_parts.append(chunk.content)
-                await websocket.send_json(_with_workspace(chunk.to_ws_message()))
+                await out.send_delta(chunk)
 
             elif canonical == "text_start" and not is_compat_alias:
-                await websocket.send_json(_with_workspace(chunk.to_ws_message()))
+                await out.send(chunk.to_ws_message())
 
             elif canonical == "text_end" and not is_compat_alias:
-                await websocket.send_json(_with_workspace(chunk.to_ws_message()))
+                await out.send(chunk.to_ws_message())
 
             elif canonical == "tool_input_start" and not is_compat_alias:
                 tool_name = chunk.tool or "unknown"
@@ -100,23 +102,23 @@ async def _run_agent_stream(
                 )
                 if tool_name == "skills_load":
                     skill_load_names[call_id] = (chunk.args or {}).get("name", "unknown")
-                await websocket.send_json(_with_workspace(chunk.to_ws_message()))
+                await out.send(chunk.to_ws_message())
 
             elif canonical == "tool_input_delta":
-                await websocket.send_json(_with_workspace(chunk.to_ws_message()))
+                await out.send_delta(chunk)
 
             elif canonical == "tool_input_end":
-                await websocket.send_json(_with_workspace(chunk.to_ws_message()))
+                await out.send(chunk.to_ws_message())
 
             elif canonical == "reasoning_start" and not is_compat_alias:
-                await websocket.send_json(_with_workspace(chunk.to_ws_message()))
+                await out.send(chunk.to_ws_message())
 
             elif canonical == "reasoning_delta" and not is_compat_alias:
                 reasoning_parts.append(chunk.content or "")
-                await websocket.send_json(_with_workspace(chunk.to_ws_message()))
+                await out.send_delta(chunk)
 
             elif canonical == "reasoning_end" and not is_compat_alias:
-                await websocket.send_json(_with_workspace(chunk.to_ws_message()))
+                await out.send(chunk.to_ws_message())
 
             elif canonical == "tool_result" or chunk.type == "tool_result":
                 tool_name = chunk.tool or "unknown"
@@ -124,20 +126,20 @@ async def _run_agent_stream(
                 result_preview = chunk.result_preview or ""
                 from src.http.ws_protocol import SkillsLoadMessage, ToolResultMessage
 
-                await websocket.send_json(
+                await out.send(
                     ToolResultMessage(
                         tool=tool_name,
                         call_id=call_id,
                         result_preview=result_preview[:500],
-                    ).model_dump() | {"workspace_id": workspace_id}
+                    ).model_dump()
                 )
 
                 if tool_name == "skills_load":
                     skill_name = skill_load_names.pop(call_id, "unknown")
-                    await websocket.send_json(
-                        SkillsLoadMessage(name=skill_name).model_dump()
-                        | {"workspace_id": workspace_id}
-                    )
+                    await out.send(SkillsLoadMessage(name=skill_name).model_dump())
+
+            elif chunk.type == "tool_progress":
+                await out.send(chunk.to_ws_message())
 
             elif chunk.type == "interrupt":
                 if pending_ref is not None:
@@ -146,38 +148,40 @@ async def _run_agent_stream(
                         "call_id": chunk.call_id or "unknown",
                         "args": chunk.args or {},
                     }
-                await websocket.send_json(_with_workspace(chunk.to_ws_message()))
+                await out.send(chunk.to_ws_message())
 
             elif chunk.type == "done":
                 response = "".join(ai_content_parts)
 
                 canvas_blocks = _extract_surfaces(response)
                 for surface in canvas_blocks:
-                    await _handle_canvas_update(
-                        websocket,
-                        surface_id=surface["surface_id"],
-                        action="create",
-                        html=surface["html"],
-                        workspace_id=workspace_id,
+                    await out.send(
+                        CanvasUpdateMessage(
+                            surface_id=surface["surface_id"],
+                            action="create",
+                            html=surface["html"],
+                        ).model_dump()
                     )
 
                 response = _strip_canvas_fences(response)
 
                 reasoning_content = "".join(reasoning_parts) if reasoning_parts else None
 
+                # Write-behind: these land in the same batch as the assistant
+                # message, which is awaited so everything is durable before done.
                 for tm in tool_metadata_list:
-                    conversation.add_message(
+                    conversation.add_message_nowait(
                         "tool", "", metadata={**tm, "workspace_id": workspace_id}
                     )
 
                 if reasoning_content:
-                    conversation.add_message(
+                    conversation.add_message_nowait(
                         "reasoning",
                         reasoning_content,
                         metadata={"session_id": session_id, "workspace_id": workspace_id},
                     )
 
-                msg_id = conversation.add_message(
+                msg_id = await conversation.add_message(
                     "assistant",
                     response,
                     metadata={
@@ -187,7 +191,7 @@ async def _run_agent_stream(
                     },
                 )
 
-                await websocket.send_json(
+                await out.send(
                     DoneMessage(
                         response=response,
                         message_id=str(msg_id),
@@ -195,15 +199,16 @@ async def _run_agent_stream(
                             {"tool": tm["tool_name"], "call_id": tm["tool_call_id"]}
                             for tm in tool_metadata_list
                         ],
-                    ).model_dump() | {"workspace_id": workspace_id}
+                    ).model_dump()
                 )
 
             elif chunk.type == "error":
-                await websocket.send_json(
+                await out.send(
                     ErrorMessage(message=str(chunk.content), code="AGENT_ERROR").model_dump()
-                    | {"workspace_id": workspace_id}
                 )
 
+        await out.flush()
+
     except Exception as e:
         logger.error(
             "ws.sdk_agent_error",
@@ -211,9 +216,7 @@ async def _run_agent_stream(
             user_id=user_id,
             channel="ws",
         )
-        await websocket.send_json(
-            ErrorMessage(message=str(e), code="AGENT_ERROR").model_dump()
-        )
+        await out.send(ErrorMessage(message=str(e), code="AGENT_ERROR").model_dump())
 
 
 async def _handle_canvas_update(
@@ -222,15 +225,18 @@ async def _handle_canvas_update(
     action: Literal["create", "update", "destroy"],
     html: str = "",
     workspace_id: str = "personal",
+    options: StreamOptions | None = None,
 ) -> None:
     """Broadcast a canvas_update event to the connected WebSocket client."""
-    await websocket.send_json(
+    await send_frame(
+        websocket,
         CanvasUpdateMessage(
             surface_id=surface_id,
             action=action,
             html=html,
         ).model_dump()
-        | {"workspace_id": workspace_id}
+        | {"workspace_id": workspace_id},
+        options,
     )
 
 
@@ -240,6 +246,7 @@ async def _handle_canvas_update_from_preview(
     workspace_id: str,
     websocket: WebSocket,
     tool_responses: dict[str, Any],
+    options: StreamOptions | None = None,
 ) -> None:
     """Extract HTML from canvas_paint result and broadcast as canvas_update."""
     html = tool_responses.pop(call_id, result_preview)
@@ -251,6 +258,7 @@ async def _handle_canvas_update_from_preview(
         action="create",
         html=html,
         workspace_id=workspace_id,
+        options=options,
     )
 
 
@@ -260,7 +268,8 @@ async def ws_conversation(websocket: WebSocket) -> None:
 
     Protocol:
     - Client sends JSON messages with a 'type' field
-    - Server streams back JSON messages with a 'type' field
+    - Server streams back messages with a 'type' field, as JSON text frames
+      or, when negotiated, MessagePack binary frames
     - See src/http/ws_protocol.py for all message types
 
     Client → Server:
@@ -270,11 +279,14 @@ async def ws_conversation(websocket: WebSocket) -> None:
         edit_and_approve: Edit tool args and approve (HITL)
         cancel: Cancel ongoing agent execution
         ping: Heartbeat
+        auth: API key and stream format (stream_mode="coalesced" batches
+              deltas, see src/http/ws_stream.py)
 
     Server → Client:
         ai_token: Streaming text token
         tool_start: Tool call started
         tool_end: Tool call completed
+        tool_progress: Long-running tool still executing
         interrupt: Agent requests human approval
         middleware: Middleware event (verbose mode)
         reasoning: Thinking token (reasoning models)
@@ -287,6 +299,7 @@ async def ws_conversation(websocket: WebSocket) -> None:
     # ── API key auth (first message after connect) ─────────────────────────
     settings = get_settings()
     needs_auth = bool(settings.auth.api_key)
+    stream_options = StreamOptions()
 
     # Check if this is a localhost WebSocket (bypass solo auth)
     if needs_auth and settings.auth.solo_bypass:
@@ -300,20 +313,33 @@ async def ws_conversation(websocket: WebSocket) -> None:
             data = json.loads(raw)
             auth_msg = AuthMessage.model_validate(data)
         except (json.JSONDecodeError, ValueError):
-            await websocket.send_json(
-                ErrorMessage(message="Authentication required", code="AUTH_FAILED").model_dump()
+            await send_frame(
+                websocket,
+                ErrorMessage(message="Authentication required", code="AUTH_FAILED").model_dump(),
+                stream_options,
             )
             await websocket.close()
             return
 
         if not verify_key(auth_msg.api_key):
-            await websocket.send_json(
-                ErrorMessage(message="Invalid API key", code="AUTH_FAILED").model_dump()
+            await send_frame(
+                websocket,
+                ErrorMessage(message="Invalid API key", code="AUTH_FAILED").model_dump(),
+                stream_options,
             )
             await websocket.close()
             return
 
-        await websocket.send_json(AuthOkMessage().model_dump())
+        stream_options = StreamOptions.negotiate(auth_msg.stream_mode, auth_msg.encoding)
+        await send_frame(
+            websocket,
+            AuthOkMessage(
+                stream_mode=stream_options.stream_mode,
+                encoding=stream_options.encoding,
+                warning=stream_options.warning,
+            ).model_dump(),
+            stream_options,
+        )
     # ── End auth ──────────────────────────────────────────────────────────
 
     session_id = str(uuid.uuid4())[:8]
@@ -334,24 +360,42 @@ async def ws_conversation(websocket: WebSocket) -> None:
             try:
                 data = json.loads(raw_data)
             except json.JSONDecodeError:
-                await websocket.send_json(
-                    ErrorMessage(message="Invalid JSON", code="PARSE_ERROR").model_dump()
+                await send_frame(
+                    websocket,
+                    ErrorMessage(message="Invalid JSON", code="PARSE_ERROR").model_dump(),
+                    stream_options,
                 )
                 continue
 
             msg = parse_client_message(data)
 
             if msg is None:
-                await websocket.send_json(
+                await send_frame(
+                    websocket,
                     ErrorMessage(
                         message=f"Unknown message type: {data.get('type', 'missing')}",
                         code="UNKNOWN_TYPE",
-                    ).model_dump()
+                    ).model_dump(),
+                    stream_options,
+                )
+                continue
+
+            if isinstance(msg, AuthMessage):
+                # Already authenticated (or auth disabled): only renegotiate the stream format.
+                stream_options = StreamOptions.negotiate(msg.stream_mode, msg.encoding)
+                await send_frame(
+                    websocket,
+                    AuthOkMessage(
+                        stream_mode=stream_options.stream_mode,
+                        encoding=stream_options.encoding,
+                        warning=stream_options.warning,
+                    ).model_dump(),
+                    stream_options,
                 )
                 continue
 
             if isinstance(msg, PingMessage):
-                await websocket.send_json(PongMessage().model_dump())
+                await send_frame(websocket, PongMessage().model_dump(), stream_options)
                 continue
 
             if isinstance(msg, ApproveMessage):
@@ -365,32 +409,37 @@ async def ws_conversation(websocket: WebSocket) -> None:
                     )
                     loop._approved_tool_names.add(tool_name)
                     pending_container[0] = None
-                    conversation = get_message_store(user_id, workspace_id)
-                    retry_msgs = _messages_from_conversation(
-                        conversation.get_messages_with_summary(50, workspace_id=workspace_id)
+                    conversation = await get_async_message_store(user_id, workspace_id)
+                    retry_msgs = await conversation.get_history(
+                        50, workspace_id, _messages_from_conversation
                     )
                     retry_msgs.append(Message.user(f"approve: please proceed with {tool_name}"))
                     await _run_agent_stream(
                         websocket, user_id, retry_msgs, conversation, session_id,
                         pending_ref=pending_container, workspace_id=workspace_id,
                         model=current_model, provider_keys=current_provider_keys,
+                        stream_options=stream_options,
                     )
                 continue
 
             if isinstance(msg, RejectMessage):
                 if pending_container[0]:
-                    await websocket.send_json(
+                    await send_frame(
+                        websocket,
                         DoneMessage(
                             response=f"Rejected: {pending_container[0].get('tool', 'unknown')}"
-                        ).model_dump()
+                        ).model_dump(),
+                        stream_options,
                     )
                     pending_container[0] = None
                 else:
-                    await websocket.send_json(
+                    await send_frame(
+                        websocket,
                         ErrorMessage(
                             message="No pending tool call to reject",
                             code="NO_PENDING_INTERRUPT",
-                        ).model_dump()
+                        ).model_dump(),
+                        stream_options,
                     )
                 continue
 
@@ -405,27 +454,30 @@ async def ws_conversation(websocket: WebSocket) -> None:
                     )
                     loop._approved_tool_names.add(tool_name)
                     pending_container[0] = None
-                    conversation = get_message_store(user_id, workspace_id)
-                    retry_msgs = _messages_from_conversation(
-                        conversation.get_messages_with_summary(50, workspace_id=workspace_id)
+                    conversation = await get_async_message_store(user_id, workspace_id)
+                    retry_msgs = await conversation.get_history(
+                        50, workspace_id, _messages_from_conversation
                     )
                     retry_msgs.append(Message.user(f"approved: proceed with {tool_name} with edited args: {msg.edited_args}"))
                     await _run_agent_stream(
                         websocket, user_id, retry_msgs, conversation, session_id,
                         pending_ref=pending_container, workspace_id=workspace_id,
                         model=current_model, provider_keys=current_provider_keys,
+                        stream_options=stream_options,
                     )
                 else:
-                    await websocket.send_json(
+                    await send_frame(
+                        websocket,
                         ErrorMessage(
                             message="No pending tool call to edit",
                             code="NO_PENDING_INTERRUPT",
-                        ).model_dump()
+                        ).model_dump(),
+                        stream_options,
                     )
                 continue
 
             if isinstance(msg, CancelMessage):
-                await websocket.send_json(DoneMessage(response="Cancelled").model_dump())
+                await send_frame(websocket, DoneMessage(response="Cancelled").model_dump(), stream_options)
                 break
 
             user_id = getattr(msg, "user_id", user_id) or user_id
@@ -440,7 +492,6 @@ async def ws_conversation(websocket: WebSocket) -> None:
                 continue
 
             content = msg.content
-            conversation = get_message_store(user_id, workspace_id)
 
             # If user types "approve" while a tool is pending, trigger retry
             if pending_container[0] and content.strip().lower() in ("approve", "yes", "accept"):
@@ -452,26 +503,24 @@ async def ws_conversation(websocket: WebSocket) -> None:
 
             import time
             t0 = time.monotonic()
-
+            conversation = await get_async_message_store(user_id, workspace_id)
             t1 = time.monotonic()
 
-            conversation.add_message("user", content, metadata={"workspace_id": workspace_id})
+            await conversation.add_message("user", content, metadata={"workspace_id": workspace_id})
             t2 = time.monotonic()
 
-            recent_messages = conversation.get_messages_with_summary(50, workspace_id=workspace_id)
+            sdk_messages = await conversation.get_history(
+                50, workspace_id, _messages_from_conversation
+            )
             t3 = time.monotonic()
 
-            sdk_messages = _messages_from_conversation(recent_messages)
-
-            t4 = time.monotonic()
             logger.info(
                 "ws.pre_loop_timing",
                 {
                     "get_store": f"{t1 - t0:.3f}s",
                     "add_msg": f"{t2 - t1:.3f}s",
-                    "get_msgs": f"{t3 - t2:.3f}s",
-                    "convert": f"{t4 - t3:.3f}s",
-                    "total": f"{t4 - t0:.3f}s",
+                    "get_history": f"{t3 - t2:.3f}s",
+                    "total": f"{t3 - t0:.3f}s",
                     "user_id": user_id,
                 },
                 user_id=user_id,
@@ -482,6 +531,7 @@ async def ws_conversation(websocket: WebSocket) -> None:
                 websocket, user_id, sdk_messages, conversation, session_id,
                 pending_ref=pending_container, workspace_id=workspace_id,
                 model=msg_model, provider_keys=msg_provider_keys,
+                stream_options=stream_options,
             )
             # After stream finishes: if a tool was interrupted, wait for approval
             while pending_container[0] is not None:
@@ -510,14 +560,15 @@ async def ws_conversation(websocket: WebSocket) -> None:
                     loop._approved_tool_names.add(tool_name)
                     pending_container[0] = None
                     # Retry with approval context
-                    retry_msgs = _messages_from_conversation(
-                        conversation.get_messages_with_summary(50, workspace_id=workspace_id)
+                    retry_msgs = await conversation.get_history(
+                        50, workspace_id, _messages_from_conversation
                     )
                     retry_msgs.append(Message.user(f"approve: please proceed with {tool_name}"))
                     await _run_agent_stream(
                         websocket, user_id, retry_msgs, conversation, session_id,
                         pending_ref=pending_container, workspace_id=workspace_id,
                         model=msg_model, provider_keys=msg_provider_keys,
+                        stream_options=stream_options,
                     )
                 elif is_reject:
                     pending_container[0] = None
@@ -535,8 +586,10 @@ async def ws_conversation(websocket: WebSocket) -> None:
             "ws.error", {"error": str(e), "session_id": session_id}, user_id=user_id, channel="ws"
         )
         try:
-            await websocket.send_json(
-                ErrorMessage(message=str(e), code="WEBSOCKET_ERROR").model_dump()
+            await send_frame(
+                websocket,
+                ErrorMessage(message=str(e), code="WEBSOCKET_ERROR").model_dump(),
+                stream_options,
             )
         except Exception:
             pass
@@ -15,6 +15,13 @@ Phase 5 adds block-structured streaming messages:
 - ReasoningStartMessage, ReasoningDeltaMessage, ReasoningEndMessage
 - ToolResultMessage (replaces ToolEndMessage for actual results)
 - ToolCallMessage (complete tool call with parsed args)
+- ToolProgressMessage (heartbeat for long-running parallel tools)
+
+Opt-in coalesced streaming, negotiated via AuthMessage.stream_mode:
+- StreamStartMessage carries session_id/workspace_id once per stream
+- DeltaBatchMessage carries the text/reasoning/tool-input deltas buffered
+  over a few milliseconds, in order, without per-delta envelopes
+- encoding="msgpack" sends every server message as a binary frame
 
 Backward-compatible messages are preserved:
 - AiTokenMessage, ToolStartMessage, ToolEndMessage, ReasoningMessage
@@ -40,10 +47,16 @@ class UserMessage(BaseModel):
 
 
 class AuthMessage(BaseModel):
-    """Client sends API key for authentication (first message after WS connect)."""
+    """Client sends API key for authentication (first message after WS connect).
+
+    Also negotiates the stream format. Clients that do not need auth may still
+    send it (with any api_key) to opt into coalesced streaming.
+    """
 
     type: Literal["auth"] = "auth"
     api_key: str
+    stream_mode: Literal["default", "coalesced"] = "default"
+    encoding: Literal["json", "msgpack"] = "json"
 
 
 class ApproveMessage(BaseModel):
@@ -149,6 +162,15 @@ class ToolResultMessage(BaseModel):
     result_preview: str = ""
 
 
+class ToolProgressMessage(BaseModel):
+    """Tool is still running (emitted periodically for long-running parallel tools)."""
+
+    type: str = "tool_progress"
+    tool: str
+    call_id: str
+    elapsed_ms: int = 0
+
+
 class ReasoningStartMessage(BaseModel):
     """Reasoning/thinking block begins."""
 
@@ -171,6 +193,26 @@ class ReasoningEndMessage(BaseModel):
     session_id: str = ""
 
 
+class StreamStartMessage(BaseModel):
+    """Coalesced mode: static fields sent once at the start of each stream."""
+
+    type: str = "stream_start"
+    session_id: str = ""
+    workspace_id: str = "personal"
+
+
+class DeltaBatchMessage(BaseModel):
+    """Coalesced mode: consecutive deltas flushed together.
+
+    Each item is {"type": "text_delta" | "reasoning_delta" | "tool_input_delta",
+    "content": str} plus "call_id" for tool input. Adjacent deltas of the same
+    block are already concatenated.
+    """
+
+    type: str = "delta_batch"
+    items: list[dict[str, str]] = Field(default_factory=list)
+
+
 # ─── Server → Client Messages (Backward-Compatible) ───
 
 
@@ -243,6 +285,9 @@ class AuthOkMessage(BaseModel):
     """API key accepted, client may now send messages."""
 
     type: Literal["auth_ok"] = "auth_ok"
+    stream_mode: str = "default"
+    encoding: str = "json"
+    warning: str | None = None
 
 
 class ErrorMessage(BaseModel):
@@ -284,6 +329,7 @@ CLIENT_MESSAGE_TYPES = {
     "edit_and_approve": EditAndApproveMessage,
     "cancel": CancelMessage,
     "ping": PingMessage,
+    "auth": AuthMessage,
 }
 
 SERVER_MESSAGE_TYPES = {
@@ -296,9 +342,13 @@ SERVER_MESSAGE_TYPES = {
     "tool_input_end": ToolInputEndMessage,
     "tool_call": ToolCallMessage,
     "tool_result": ToolResultMessage,
+    "tool_progress": ToolProgressMessage,
     "reasoning_start": ReasoningStartMessage,
     "reasoning_delta": ReasoningDeltaMessage,
     "reasoning_end": ReasoningEndMessage,
+    # Coalesced streaming
+    "stream_start": StreamStartMessage,
+    "delta_batch": DeltaBatchMessage,
     # Backward-compatible
     "ai_token": AiTokenMessage,
     "tool_start": ToolStartMessage,
@@ -325,6 +375,7 @@ def parse_client_message(
     | EditAndApproveMessage
     | CancelMessage
     | PingMessage
+    | AuthMessage
     | None
 ):
     """Parse a client message from raw dict. Returns None for unknown types."""
@@ -340,6 +391,7 @@ def parse_client_message(
             | EditAndApproveMessage
             | CancelMessage
             | PingMessage
+            | AuthMessage
             | None,
             msg_cls(**data),
         )
@@ -356,9 +408,12 @@ _ServerMessage = (
     | ToolInputEndMessage
     | ToolCallMessage
     | ToolResultMessage
+    | ToolProgressMessage
     | ReasoningStartMessage
     | ReasoningDeltaMessage
     | ReasoningEndMessage
+    | StreamStartMessage
+    | DeltaBatchMessage
     | AiTokenMessage
     | ToolStartMessage
     | ToolEndMessage
@@ -0,0 +1,192 @@
+"""Outgoing message framing for /ws/conversation.
+
+The default stream sends one JSON text frame per provider delta, each with
+its own workspace_id. At 100+ tokens/sec across many sockets the per-frame
+cost (pydantic dump, dict copy, json.dumps, socket write) dominates, so
+clients can opt into a coalesced stream via AuthMessage:
+
+    {"type": "auth", "api_key": "...", "stream_mode": "coalesced", "encoding": "msgpack"}
+
+In coalesced mode text/reasoning/tool-input deltas are buffered and flushed
+as one DeltaBatchMessage when the buffer reaches max_buffer_chars, when
+flush_interval has passed since the first buffered delta, or before any
+other message (so ordering is preserved). workspace_id/session_id are sent
+once in a StreamStartMessage and omitted from later frames.
+
+The encoding applies to every server frame of the connection, in either
+stream mode: JSON text frames (via orjson when it is installed), or binary
+MessagePack frames when encoding="msgpack" and msgpack is installed (both
+come with the "ws" extra). Without msgpack the connection falls back to
+JSON, and auth_ok says so in its encoding and warning fields. All sends go
+through send_frame. Client messages are always JSON text.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Any
+
+from src.app_logging import get_logger
+
+logger = get_logger()
+
+DEFAULT_FLUSH_INTERVAL = 0.03
+DEFAULT_MAX_BUFFER_CHARS = 2048
+
+DELTA_TYPES = frozenset({"text_delta", "reasoning_delta", "tool_input_delta"})
+
+try:
+    import orjson as _orjson
+except ImportError:  # pragma: no cover - optional speedup
+    _orjson = None  # type: ignore[assignment]
+
+try:
+    import msgpack as _msgpack
+except ImportError:
+    _msgpack = None
+
+
+def msgpack_available() -> bool:
+    return _msgpack is not None
+
+
+def dumps(payload: dict[str, Any]) -> str:
+    """Compact JSON, via orjson when installed."""
+    if _orjson is not None:
+        return _orjson.dumps(payload).decode()
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+
+@dataclass
+class StreamOptions:
+    """Stream format negotiated for one WebSocket connection."""
+
+    stream_mode: str = "default"
+    encoding: str = "json"
+    flush_interval: float = DEFAULT_FLUSH_INTERVAL
+    max_buffer_chars: int = DEFAULT_MAX_BUFFER_CHARS
+    warning: str | None = None  # why the client didn't get what it asked for
+
+    @classmethod
+    def negotiate(cls, stream_mode: str, encoding: str) -> StreamOptions:
+        """Accept the client's request, falling back to JSON without msgpack."""
+        warning = None
+        if encoding == "msgpack" and not msgpack_available():
+            logger.warning("ws.msgpack_unavailable", {"fallback": "json"})
+            encoding = "json"
+            warning = "msgpack is not installed on the server; frames are JSON"
+        return cls(stream_mode=stream_mode, encoding=encoding, warning=warning)
+
+    @property
+    def coalesced(self) -> bool:
+        return self.stream_mode == "coalesced"
+
+
+async def send_frame(
+    websocket: Any, payload: dict[str, Any], options: StreamOptions | None = None
+) -> None:
+    """Send one server message in the connection's negotiated encoding."""
+    if options is not None and options.encoding == "msgpack":
+        await websocket.send_bytes(_msgpack.packb(payload, use_bin_type=True))
+    else:
+        await websocket.send_text(dumps(payload))
+
+
+class WsStreamWriter:
+    """Sends one agent stream's messages to a WebSocket."""
+
+    def __init__(
+        self,
+        websocket: Any,
+        workspace_id: str,
+        session_id: str = "",
+        options: StreamOptions | None = None,
+    ):
+        self.websocket = websocket
+        self.workspace_id = workspace_id
+        self.session_id = session_id
+        self.options = options or StreamOptions()
+        self._items: list[dict[str, str]] = []
+        self._buffered_chars = 0
+        self._flush_task: asyncio.Task[None] | None = None
+        self._lock = asyncio.Lock()
+        self._started = False
+        self.frames = 0
+
+    async def _write(self, payload: dict[str, Any]) -> None:
+        self.frames += 1
+        await send_frame(self.websocket, payload, self.options)
+
+    async def start(self) -> None:
+        """Coalesced mode: send the per-stream static fields once."""
+        if self.options.coalesced and not self._started:
+            self._started = True
+            await self._write(
+                {
+                    "type": "stream_start",
+                    "session_id": self.session_id,
+                    "workspace_id": self.workspace_id,
+                }
+            )
+
+    async def send(self, payload: dict[str, Any]) -> None:
+        """Send a non-delta message, after any buffered deltas."""
+        if not self.options.coalesced:
+            payload = {**payload, "workspace_id": self.workspace_id}
+        async with self._lock:
+            await self._flush_locked()
+            await self._write(payload)
+
+    async def send_delta(self, chunk: Any) -> None:
+        """Send (or buffer) a StreamChunk whose canonical type is a delta."""
+        if not self.options.coalesced:
+            await self._write({**chunk.to_ws_message(), "workspace_id": self.workspace_id})
+            return
+
+        kind = chunk.canonical_type
+        content = chunk.content or ""
+        call_id = (chunk.call_id or "") if kind == "tool_input_delta" else None
+        async with self._lock:
+            last = self._items[-1] if self._items else None
+            if last is not None and last["type"] == kind and last.get("call_id") == call_id:
+                last["content"] += content
+            else:
+                item = {"type": kind, "content": content}
+                if call_id is not None:
+                    item["call_id"] = call_id
+                self._items.append(item)
+            self._buffered_chars += len(content)
+            if self._buffered_chars >= self.options.max_buffer_chars:
+                await self._flush_locked()
+            elif self._flush_task is None:
+                self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.options.flush_interval)
+        async with self._lock:
+            self._flush_task = None
+            try:
+                await self._flush_locked()
+            except Exception:
+                # Socket went away mid-stream; the caller sees the error on its next send.
+                self._items = []
+
+    async def _flush_locked(self) -> None:
+        task, self._flush_task = self._flush_task, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        if not self._items:
+            return
+        items, self._items = self._items, []
+        self._buffered_chars = 0
+        await self._write({"type": "delta_batch", "items": items})
+
+    async def flush(self) -> None:
+        async with self._lock:
+            await self._flush_locked()
+
+    async def aclose(self) -> None:
+        """Flush buffered deltas; safe to call more than once."""
+        await self.flush()
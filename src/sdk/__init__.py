@@ -3,6 +3,7 @@
 Public API:
     Message, ToolCall, StreamChunk - message types
     tool, ToolRegistry, ToolDefinition, ToolAnnotations, ToolResult - tool system
+    ToolExecutor, ToolExecutorConfig, ToolTimeoutError, get_tool_executor - off-loop tool execution
     AgentState - agent loop state
     LLMProvider, ModelInfo, ModelCost - provider base types
     create_provider, create_model_from_config - factory functions
@@ -55,6 +56,12 @@ from src.sdk.subagent_models import (
     TaskCancelledError,
     TaskStatus,
 )
+from src.sdk.tool_executor import (
+    ToolExecutor,
+    ToolExecutorConfig,
+    ToolTimeoutError,
+    get_tool_executor,
+)
 from src.sdk.tools import ToolAnnotations, ToolDefinition, ToolRegistry, ToolResult, tool
 from src.sdk.tracing import (
     ConsoleTraceProcessor,
@@ -76,6 +83,10 @@ __all__ = [
     "ToolDefinition",
     "ToolAnnotations",
     "ToolResult",
+    "ToolExecutor",
+    "ToolExecutorConfig",
+    "ToolTimeoutError",
+    "get_tool_executor",
     "Usage",
     "AgentState",
     "LLMProvider",
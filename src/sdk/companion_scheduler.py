@@ -153,7 +153,11 @@ class CompanionScheduler:
         now = datetime.now()
         hour = now.hour
         tod = _time_of_day(hour)
-        urgent = _count_urgent_emails(self.user_id)
+        emails = _email_counts(self.user_id)
+        email_text = (
+            f"{emails.get('unread', 0)} ({emails.get('flagged', 0)} flagged, "
+            f"{emails.get('recent_unread', 0)} from the last 24h)"
+        )
 
         workspaces = list_workspaces()
         ws_lines: list[str] = []
@@ -169,7 +173,7 @@ class CompanionScheduler:
         return f"""## Check-in context
 
 TIME: {now.strftime('%I:%M %p %A %B %d')} ({tod})
-URGENT UNREAD EMAILS: {urgent}
+URGENT UNREAD EMAILS: {email_text}
 WORKSPACES ({len(workspaces)} total):
 {ws_text}
 
@@ -221,39 +225,19 @@ Decide: nudge the user or skip?"""
         return DEFAULT_INTERVAL_MINUTES
 
 
-def _count_urgent_emails(user_id: str) -> int:
-    """Count unread emails across all connected email accounts."""
+def _email_counts(user_id: str) -> dict[str, int]:
+    """Unread/flagged/last-24h totals across all connected email accounts."""
     try:
-        from src.sdk.tools_core.email_db import get_engine, load_accounts
-
-        accounts = load_accounts(user_id)
-        if not accounts:
-            return 0
-
-        engine = get_engine(user_id)
-        unread_count = 0
-        with engine.connect() as conn:
-            for acc_id in accounts:
-                from sqlalchemy import text
-
-                result = conn.execute(
-                    text(
-                        "SELECT COUNT(*) as cnt FROM emails "
-                        "WHERE account_id = :acc_id AND read = 0"
-                    ),
-                    {"acc_id": acc_id},
-                )
-                row = result.fetchone()
-                if row:
-                    unread_count += row[0]
-        return unread_count
+        from src.sdk.tools_core.email_db import email_counter_totals, get_engine
+
+        return email_counter_totals(get_engine(user_id))
     except Exception as e:
         logger.warning(
             "companion.email_count_failed",
             {"error": str(e)},
             user_id=user_id,
         )
-        return 0
+        return {}
 
 
 def _summarize_workspace_activity(workspace_id: str) -> str | None:
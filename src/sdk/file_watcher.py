@@ -0,0 +1,352 @@
+"""Process-wide filesystem watcher shared by SSE clients and caches.
+
+The /sync/stream endpoint used to run its own loop per connected client,
+walking the whole workspace (plus skills and subagents) with rglob and stat
+every three seconds. FileWatcher keeps one watch per (user, workspace) and
+fans its debounced change events out to any number of subscribers.
+
+Each watch runs watchfiles (inotify / FSEvents / ReadDirectoryChangesW) on a
+daemon thread. If the native watcher cannot start, for example because the
+inotify watch limit is exhausted or the filesystem is a network mount, it
+falls back to watchfiles' polling mode.
+
+A watch starts with its first subscriber, or when a cache of the
+(user, workspace) is first used (watch_workspace). It stops once it has
+no subscribers and no cache has used it for idle_timeout seconds, and on
+shutdown. A watch only ever used by SSE clients stops when the last one leaves.
+
+Besides SSE subscribers, every batch goes to the process-wide listeners,
+which keep derived state in step with the disk: the workspace search index,
+cached skill registries and the tool index hashes.
+
+Usage:
+    async with get_file_watcher().subscribe(user_id, workspace_id) as queue:
+        event = await queue.get()
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import AsyncIterator, Callable, Iterable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEBOUNCE_MS = 500
+DEFAULT_POLL_DELAY_MS = 3000
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_IDLE_TIMEOUT = 1800.0
+# How often a watch thread wakes without changes to check whether it is idle.
+_IDLE_CHECK_MS = 60_000
+
+WatchKey = tuple[str, str]
+Listener = Callable[[Any, list["FileEvent"]], None]
+
+# Which file marks an entry in the per-name categories ("<name>/SKILL.md").
+_MARKER_FILES = {"skills": "SKILL.md", "subagents": "config.yaml", "tools": "TOOL.md"}
+_ACTIONS = {1: "created", 2: "modified", 3: "deleted"}
+
+
+@dataclass(frozen=True)
+class FileEvent:
+    """One change: a workspace file path, or a skill / subagent / tool name."""
+
+    category: str
+    path: str
+    action: str
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "type": f"{self.category}_changed",
+            "category": self.category,
+            "path": self.path,
+            "action": self.action,
+            "timestamp": datetime.now(UTC).isoformat(),
+        }
+
+
+@dataclass
+class _Subscriber:
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue[FileEvent]
+
+
+@dataclass
+class _Watch:
+    key: WatchKey
+    paths: Any
+    roots: list[tuple[str, Path]]
+    stop: threading.Event = field(default_factory=threading.Event)
+    subscribers: list[_Subscriber] = field(default_factory=list)
+    thread: threading.Thread | None = None
+    last_used: float | None = None  # monotonic time a cache last asked for the watch
+
+
+def _watch_roots(paths: Any) -> list[tuple[str, Path]]:
+    # Resolved, since watchers report real paths (e.g. /private/var on macOS).
+    return [
+        ("workspace", paths.workspace_files_dir().resolve()),
+        ("skills", paths.user_skills_dir().resolve()),
+        ("skills", paths.workspace_skills_dir().resolve()),
+        ("subagents", paths.user_subagents_dir().resolve()),
+        ("tools", paths.user_tools_dir().resolve()),
+        ("tools", paths.workspace_tools_dir().resolve()),
+    ]
+
+
+def classify(roots: list[tuple[str, Path]], changes: Iterable[tuple[Any, str]]) -> list[FileEvent]:
+    """Turn raw (Change, path) pairs into FileEvents, one per item.
+
+    Workspace events carry the path relative to the Files directory; skill,
+    subagent and tool events carry the entry's name and only fire for its
+    marker file. Several changes to one item in a batch collapse into one:
+    "created" survives later modifications, anything else takes the latest.
+    """
+    merged: dict[tuple[str, str], str] = {}
+    for change, raw in changes:
+        path = Path(raw)
+        for category, root in roots:
+            try:
+                rel = path.relative_to(root)
+            except ValueError:
+                continue
+            marker = _MARKER_FILES.get(category)
+            if marker is not None:
+                if len(rel.parts) != 2 or rel.name != marker:
+                    break
+                item = rel.parts[0]
+            elif not rel.parts:
+                break
+            else:
+                item = rel.as_posix()
+            action = _ACTIONS.get(int(change), "modified")
+            key = (category, item)
+            if not (merged.get(key) == "created" and action == "modified"):
+                merged[key] = action
+            break
+    return [FileEvent(category, item, action) for (category, item), action in merged.items()]
+
+
+class FileWatcher:
+    """One filesystem watch per (user, workspace), shared by its subscribers."""
+
+    def __init__(
+        self,
+        get_paths: Callable[..., Any] | None = None,
+        debounce_ms: int = DEFAULT_DEBOUNCE_MS,
+        poll_delay_ms: int = DEFAULT_POLL_DELAY_MS,
+        force_polling: bool | None = None,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    ):
+        if get_paths is None:
+            from src.storage.paths import get_paths as default_get_paths
+
+            get_paths = default_get_paths
+        self._get_paths = get_paths
+        self.debounce_ms = debounce_ms
+        self.poll_delay_ms = poll_delay_ms
+        self.force_polling = force_polling
+        self.idle_timeout = idle_timeout
+        self._watches: dict[WatchKey, _Watch] = {}
+        self._listeners: list[Listener] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Listener) -> None:
+        """Call listener(paths, events) on the watcher thread for every batch."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    @asynccontextmanager
+    async def subscribe(
+        self, user_id: str, workspace_id: str, max_queue: int = DEFAULT_QUEUE_SIZE
+    ) -> AsyncIterator[asyncio.Queue[FileEvent]]:
+        """Receive the (user, workspace) watch's events on a queue for the block.
+
+        When a slow consumer lets the queue fill, the oldest events are dropped.
+        """
+        sub = _Subscriber(asyncio.get_running_loop(), asyncio.Queue(maxsize=max_queue))
+        with self._lock:
+            watch = self._acquire(user_id, workspace_id)
+            watch.subscribers.append(sub)
+        try:
+            yield sub.queue
+        finally:
+            with self._lock:
+                watch.subscribers.remove(sub)
+                self._stop_if_idle(watch)
+
+    def ensure_watching(self, user_id: str, workspace_id: str) -> None:
+        """Keep the (user, workspace) watch running for its caches, with or
+        without subscribers, until idle_timeout passes without another call."""
+        with self._lock:
+            watch = self._acquire(user_id, workspace_id)
+            watch.last_used = time.monotonic()
+
+    def _acquire(self, user_id: str, workspace_id: str) -> _Watch:
+        """The running watch for the key, started if needed; call with the lock held."""
+        key = (user_id or "default_user", workspace_id or "personal")
+        watch = self._watches.get(key)
+        if watch is None:
+            paths = self._get_paths(user_id=key[0], workspace_id=key[1])
+            watch = _Watch(key, paths, _watch_roots(paths))
+            self._watches[key] = watch
+            self._start(watch)
+        return watch
+
+    def _stop_if_idle(self, watch: _Watch) -> None:
+        """Stop a watch nobody is using; call with the lock held."""
+        if watch.subscribers:
+            return
+        if watch.last_used is not None and time.monotonic() - watch.last_used < self.idle_timeout:
+            return
+        watch.stop.set()
+        if self._watches.get(watch.key) is watch:
+            del self._watches[watch.key]
+
+    def watching(self) -> list[WatchKey]:
+        with self._lock:
+            return list(self._watches)
+
+    def close(self, timeout: float = 2.0) -> None:
+        with self._lock:
+            watches = list(self._watches.values())
+            self._watches.clear()
+        for watch in watches:
+            watch.stop.set()
+        for watch in watches:
+            if watch.thread is not None:
+                watch.thread.join(timeout)
+
+    def _start(self, watch: _Watch) -> None:
+        watch.thread = threading.Thread(
+            target=self._run, args=(watch,), name=f"file-watcher-{watch.key[0]}", daemon=True
+        )
+        watch.thread.start()
+
+    def _run(self, watch: _Watch) -> None:
+        try:
+            self._watch(watch, self.force_polling)
+        except Exception as e:
+            if self.force_polling or watch.stop.is_set():
+                logger.warning("file_watcher.failed key=%s error=%s", watch.key, e)
+                return
+            logger.warning("file_watcher.native_failed key=%s error=%s; polling", watch.key, e)
+            try:
+                self._watch(watch, True)
+            except Exception as e:
+                logger.warning("file_watcher.failed key=%s error=%s", watch.key, e)
+
+    def _watch(self, watch: _Watch, force_polling: bool | None) -> None:
+        from watchfiles import watch as watch_changes
+
+        dirs = sorted({str(root) for _, root in watch.roots})
+        for changes in watch_changes(
+            *dirs,
+            debounce=self.debounce_ms,
+            stop_event=watch.stop,
+            force_polling=force_polling,
+            poll_delay_ms=self.poll_delay_ms,
+            rust_timeout=_IDLE_CHECK_MS,
+            yield_on_timeout=True,
+            raise_interrupt=False,
+            ignore_permission_denied=True,
+        ):
+            events = classify(watch.roots, changes)
+            if events:
+                self._publish(watch, events)
+            with self._lock:
+                self._stop_if_idle(watch)
+
+    def _publish(self, watch: _Watch, events: list[FileEvent]) -> None:
+        with self._lock:
+            subscribers = list(watch.subscribers)
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(watch.paths, events)
+            except Exception:
+                logger.warning("file_watcher.listener_failed key=%s", watch.key, exc_info=True)
+        for sub in subscribers:
+            for event in events:
+                try:
+                    sub.loop.call_soon_threadsafe(_offer, sub.queue, event)
+                except RuntimeError:
+                    break  # the subscriber's event loop is closed
+
+
+def _offer(queue: asyncio.Queue[FileEvent], event: FileEvent) -> None:
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+
+def refresh_search_index(paths: Any, events: list[FileEvent]) -> None:
+    """Re-index changed workspace files (if the workspace has a search index)."""
+    from src.sdk.tools_core.file_index import refresh_index
+
+    root = paths.workspace_files_dir().resolve()
+    targets = [root / e.path for e in events if e.category == "workspace"]
+    if targets:
+        refresh_index(paths, targets)
+
+
+def reload_skills(paths: Any, events: list[FileEvent]) -> None:
+    """Reload the user's cached skill registries when a SKILL.md changed."""
+    from src.skills.registry import reload_skill_registries
+
+    if any(e.category == "skills" for e in events):
+        reload_skill_registries(paths.user_id)
+
+
+def invalidate_tool_index(paths: Any, events: list[FileEvent]) -> None:
+    """Mark the user's tool index stale when a TOOL.md changed."""
+    from src.sdk.tool_index import invalidate_index
+
+    if any(e.category == "tools" for e in events):
+        invalidate_index(paths.user_tools_dir() / ".index")
+
+
+_watcher: FileWatcher | None = None
+_watcher_lock = threading.Lock()
+
+
+def get_file_watcher() -> FileWatcher:
+    """Return the process-wide FileWatcher, with the cache listeners attached."""
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = FileWatcher()
+            for listener in (refresh_search_index, reload_skills, invalidate_tool_index):
+                _watcher.add_listener(listener)
+        return _watcher
+
+
+def watch_workspace(user_id: str, workspace_id: str) -> None:
+    """Keep a (user, workspace) watch running while its caches are in use.
+
+    A no-op until the process watcher exists (the FastAPI lifespan starts
+    it), so scripts and tests that touch the caches start no threads.
+    """
+    watcher = _watcher
+    if watcher is None:
+        return
+    try:
+        watcher.ensure_watching(user_id, workspace_id)
+    except Exception:
+        logger.warning("file_watcher.start_failed user=%s", user_id, exc_info=True)
+
+
+def shutdown_file_watcher() -> None:
+    """Stop all watches (FastAPI lifespan exit)."""
+    global _watcher
+    with _watcher_lock:
+        watcher, _watcher = _watcher, None
+    if watcher is not None:
+        watcher.close()
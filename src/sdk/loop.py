@@ -16,6 +16,7 @@ Features:
     - Structured tracing (spans for LLM calls, tool exec, guardrails, handoffs)
     - Auto-approval via ToolAnnotations (replaces interrupt_on)
     - Cost tracking via RunConfig
+    - Sync tools run off the event loop via ToolExecutor (thread/process pools)
     - Backward-compatible: also emits ai_token, tool_start, tool_end, reasoning
 """
 
@@ -39,10 +40,12 @@ from src.sdk.guardrails import (
 from src.sdk.handoffs import Handoff
 from src.sdk.messages import Message, StreamChunk, ToolCall, Usage
 from src.sdk.middleware import Middleware
+from src.sdk.prompt_cache import mark_cache_breakpoints
 from src.sdk.providers.base import LLMProvider, ModelCost, ProviderContextOverflowError
 from src.sdk.state import AgentState
 from src.sdk.subagent_context import SubagentCancelledError, SubagentContext
 from src.sdk.subagent_models import TaskCancelledError
+from src.sdk.tool_executor import ToolExecutor, get_tool_executor
 from src.sdk.tools import ToolDefinition, ToolRegistry, ToolResult
 from src.sdk.tracing import SpanType, TraceProvider
 from src.sdk.validation import repair_tool_call
@@ -72,6 +75,7 @@ DEFAULT_MAX_ITERATIONS = 25
 DEFAULT_MAX_LLM_CALLS = 50
 DEFAULT_MAX_TOKENS_TOTAL = 1_000_000
 DEFAULT_COST_LIMIT_USD = 10.0
+DEFAULT_TOOL_PROGRESS_INTERVAL = 2.0
 
 
 @dataclass
@@ -92,6 +96,8 @@ class CostTracker:
         self.total_input_tokens: int = 0
         self.total_output_tokens: int = 0
         self.total_reasoning_tokens: int = 0
+        self.total_cache_read_tokens: int = 0
+        self.total_cache_creation_tokens: int = 0
         self.total_cost_usd: float = 0.0
         self.llm_calls: int = 0
 
@@ -101,10 +107,14 @@ class CostTracker:
         output_tokens: int = 0,
         reasoning_tokens: int = 0,
         cost: ModelCost | None = None,
+        cache_read_tokens: int = 0,
+        cache_creation_tokens: int = 0,
     ) -> None:
         self.total_input_tokens += input_tokens
         self.total_output_tokens += output_tokens
         self.total_reasoning_tokens += reasoning_tokens
+        self.total_cache_read_tokens += cache_read_tokens
+        self.total_cache_creation_tokens += cache_creation_tokens
         self.llm_calls += 1
         if cost:
             self.total_cost_usd += (input_tokens / 1_000_000) * cost.input + (
@@ -113,6 +123,33 @@ class CostTracker:
             if cost.reasoning and reasoning_tokens:
                 self.total_cost_usd += (reasoning_tokens / 1_000_000) * cost.reasoning
 
+    def add(self, usage: Usage | None, cost: ModelCost | None = None) -> None:
+        """Record one LLM call from its Usage (None counts the call only)."""
+        usage = usage or Usage()
+        self.add_usage(
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            reasoning_tokens=usage.reasoning_tokens,
+            cost=cost,
+            cache_read_tokens=usage.cache_read_tokens,
+            cache_creation_tokens=usage.cache_creation_tokens,
+        )
+
+    @property
+    def cache_hit_ratio(self) -> float:
+        """Share of input tokens served from the provider's prompt cache."""
+        if not self.total_input_tokens:
+            return 0.0
+        return self.total_cache_read_tokens / self.total_input_tokens
+
+    def log_summary(self) -> None:
+        logger.info(
+            f"run_usage llm_calls={self.llm_calls} input_tokens={self.total_input_tokens} "
+            f"cache_read_tokens={self.total_cache_read_tokens} "
+            f"cache_creation_tokens={self.total_cache_creation_tokens} "
+            f"cache_hit_ratio={self.cache_hit_ratio:.2f}"
+        )
+
     def exceeds_limits(self, config: RunConfig) -> str | None:
         if self.llm_calls >= config.max_llm_calls:
             return f"max_llm_calls ({config.max_llm_calls}) reached"
@@ -165,6 +202,8 @@ class AgentLoop:
         run_config: RunConfig | None = None,
         user_id: str | None = None,
         workspace_id: str | None = None,
+        tool_executor: ToolExecutor | None = None,
+        tool_progress_interval: float = DEFAULT_TOOL_PROGRESS_INTERVAL,
     ) -> None:
         self.provider = provider
         self.system_prompt = system_prompt
@@ -179,6 +218,10 @@ class AgentLoop:
         self.user_id = user_id
         self.workspace_id = workspace_id
         self.subagent_ctx: SubagentContext | None = None
+        self.tool_executor = tool_executor or get_tool_executor()
+        self.tool_progress_interval = tool_progress_interval
+        # Usage of the most recent run, including prompt-cache hit ratio
+        self.cost_tracker = CostTracker()
 
         self._registry = ToolRegistry()
         if tools:
@@ -270,10 +313,7 @@ class AgentLoop:
         tc = self._with_runtime_context(tc)
 
         try:
-            if tool_def._coroutine:
-                result = await tool_def.ainvoke(tc.arguments)
-            else:
-                result = tool_def.invoke(tc.arguments)
+            result = await self.tool_executor.run(tool_def, tc.arguments)
             logger.info(
                 f"sdk.tool_executed tool={tc.name} source={tool_def.function.__module__ if tool_def.function else 'unknown'}"
             )
@@ -332,10 +372,7 @@ class AgentLoop:
         tc = self._with_runtime_context(tc)
 
         try:
-            if td._coroutine:
-                result = await td.ainvoke(tc.arguments)
-            else:
-                result = td.invoke(tc.arguments)
+            result = await self.tool_executor.run(td, tc.arguments)
             return ToolResult.from_raw(result)
         except Exception as e:
             return ToolResult(content=str(e), is_error=True)
@@ -549,15 +586,19 @@ class AgentLoop:
     ) -> AsyncIterator[StreamChunk]:
         """Execute a batch of parallel-safe tool calls concurrently, yielding events.
 
-        Uses asyncio.gather for concurrent execution. Events are yielded
-        after all tools complete to maintain message ordering in state.
+        tool_result/tool_end events are yielded in completion order, so one slow
+        tool doesn't hide the results of fast ones. Tools still running after
+        tool_progress_interval seconds emit periodic tool_progress events.
+        tool_result messages are added to state in the original call order once
+        the whole batch finishes, since providers require results to follow the
+        assistant's tool_calls order.
         """
 
-        async def _run_one(tc: ToolCall) -> tuple[ToolCall, str]:
+        async def _run_one(tc: ToolCall) -> str:
             try:
                 await self._check_tool_guardrails(tc, "input", tc.arguments)
             except GuardrailTripwire as e:
-                return tc, json.dumps({"error": f"Tool input blocked: {e.result.message}"})
+                return json.dumps({"error": f"Tool input blocked: {e.result.message}"})
 
             tc_args = dict(tc.arguments)
             for mw in self.middlewares:
@@ -589,18 +630,54 @@ class AgentLoop:
             except GuardrailTripwire as e:
                 result_content = json.dumps({"error": f"Tool output blocked: {e.result.message}"})
 
-            return tc, result_content
+            return result_content
 
-        results = await asyncio.gather(*[_run_one(tc) for tc in tool_calls], return_exceptions=True)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        tasks = {asyncio.ensure_future(_run_one(tc)): i for i, tc in enumerate(tool_calls)}
+        results: list[str] = [""] * len(tool_calls)
+        pending = set(tasks)
+        interval = self.tool_progress_interval
+        next_progress = started + interval if interval > 0 else None
 
-        for i, result in enumerate(results):
-            tc = tool_calls[i]
-            if isinstance(result, Exception):
-                logger.error(f"parallel_tool_error tool={tc.name}: {result}")
-                result_content = json.dumps({"error": f"Tool execution failed: {result}"})
-            else:
-                tc_r, result_content = result  # type: ignore[misc]
+        try:
+            while pending:
+                timeout = None if next_progress is None else max(0.0, next_progress - loop.time())
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
 
+                for task in sorted(done, key=lambda t: tasks[t]):
+                    i = tasks[task]
+                    tc = tool_calls[i]
+                    exc = task.exception()
+                    if exc is not None:
+                        logger.error(f"parallel_tool_error tool={tc.name}: {exc}")
+                        result_content = json.dumps({"error": f"Tool execution failed: {exc}"})
+                    else:
+                        result_content = task.result()
+                    results[i] = result_content
+
+                    preview = result_content[:500] if result_content else ""
+                    yield StreamChunk.tool_result_event(
+                        tool=tc.name, call_id=tc.id, result_preview=preview
+                    )
+                    yield StreamChunk.tool_end(tool=tc.name, call_id=tc.id, result_preview=preview)
+
+                if next_progress is not None and pending and loop.time() >= next_progress:
+                    elapsed_ms = int((loop.time() - started) * 1000)
+                    for task in sorted(pending, key=lambda t: tasks[t]):
+                        tc = tool_calls[tasks[task]]
+                        yield StreamChunk.tool_progress(
+                            tool=tc.name, call_id=tc.id, elapsed_ms=elapsed_ms
+                        )
+                    next_progress = loop.time() + interval
+        finally:
+            # Consumer stopped early (cancel/disconnect) — don't leak tool tasks.
+            for task in pending:
+                task.cancel()
+
+        for tc, result_content in zip(tool_calls, results, strict=True):
             state.add_message(
                 Message.tool_result(
                     tool_call_id=tc.id,
@@ -608,9 +685,6 @@ class AgentLoop:
                     name=tc.name,
                 )
             )
-            preview = result_content[:500] if result_content else ""
-            yield StreamChunk.tool_result_event(tool=tc.name, call_id=tc.id, result_preview=preview)
-            yield StreamChunk.tool_end(tool=tc.name, call_id=tc.id, result_preview=preview)
 
     async def _run_hooks(self, hook_name: str, state: AgentState) -> None:
         for mw in self.middlewares:
@@ -626,16 +700,20 @@ class AgentLoop:
                 logger.warning(f"{hook_name} error in {mw.name}", exc_info=True)
 
     def _prepare_messages(self, state: AgentState) -> list[Message]:
+        """Lay out messages for the provider with a cache-stable prefix.
+
+        The system prompt stays a message of its own ahead of any summary, so
+        it is byte-identical across calls; see src.sdk.prompt_cache.
+        """
         messages = list(state.messages)
-        if self.system_prompt:
-            if not messages or messages[0].role != "system":
-                messages.insert(0, Message.system(self.system_prompt))
-            elif (
-                isinstance(messages[0].content, str)
-                and self.system_prompt not in messages[0].content
-            ):
-                messages[0] = Message.system(f"{self.system_prompt}\n\n{messages[0].content}")
-        return messages
+        if self.system_prompt and not (
+            messages
+            and messages[0].role == "system"
+            and isinstance(messages[0].content, str)
+            and self.system_prompt in messages[0].content
+        ):
+            messages.insert(0, Message.system(self.system_prompt))
+        return mark_cache_breakpoints(messages)
 
     async def _check_input_guardrails(self, state: AgentState) -> GuardrailResult | None:
         user_msgs = state.user_messages()
@@ -737,7 +815,7 @@ class AgentLoop:
         """Internal run implementation (wrapped by run() for ContextVar lifecycle)."""
         state = AgentState(messages=list(messages))
         self.state = state
-        cost_tracker = CostTracker()
+        cost_tracker = self.cost_tracker = CostTracker()
 
         await self._run_hooks("abefore_agent", state)
 
@@ -779,13 +857,7 @@ class AgentLoop:
                                 if response.usage:
                                     span.set_meta("input_tokens", response.usage.input_tokens)
                                     span.set_meta("output_tokens", response.usage.output_tokens)
-                                cost_tracker.add_usage(
-                                    input_tokens=response.usage.input_tokens if response.usage else 0,
-                                    output_tokens=response.usage.output_tokens if response.usage else 0,
-                                    reasoning_tokens=response.usage.reasoning_tokens
-                                    if response.usage
-                                    else 0,
-                                )
+                                cost_tracker.add(response.usage)
                         else:
                             response = await self.provider.chat(
                                 prepared,
@@ -793,11 +865,7 @@ class AgentLoop:
                                 model=None,
                                 provider_options=self.run_config.provider_options,
                             )
-                            cost_tracker.add_usage(
-                                input_tokens=response.usage.input_tokens if response.usage else 0,
-                                output_tokens=response.usage.output_tokens if response.usage else 0,
-                                reasoning_tokens=response.usage.reasoning_tokens if response.usage else 0,
-                            )
+                            cost_tracker.add(response.usage)
                         llm_success = True
                     except ProviderContextOverflowError:
                         overflow_retries += 1
@@ -874,6 +942,7 @@ class AgentLoop:
             raise
 
         await self._run_hooks("aafter_agent", state)
+        cost_tracker.log_summary()
         return state.messages
 
     async def run_stream(self, messages: list[Message]) -> AsyncIterator[StreamChunk]:
@@ -883,7 +952,8 @@ class AgentLoop:
             text_start / text_delta / text_end
             tool_input_start / tool_input_delta / tool_input_end
             reasoning_start / reasoning_delta / reasoning_end
-            tool_result (after tool execution)
+            tool_result (after each tool completes, in completion order)
+            tool_progress (periodically while a parallel tool is still running)
             interrupt / done / error
 
         Also emits backward-compatible aliases:
@@ -894,7 +964,7 @@ class AgentLoop:
         """
         state = AgentState(messages=list(messages))
         self.state = state
-        cost_tracker = CostTracker()
+        cost_tracker = self.cost_tracker = CostTracker()
         all_tool_calls: list[dict[str, Any]] = []
 
         token = _current_agent_loop.set(self)
@@ -994,11 +1064,7 @@ class AgentLoop:
                                     elif event.type == "reasoning_end":
                                         in_reasoning_block = False
 
-                            cost_tracker.add_usage(
-                                input_tokens=stream_usage.input_tokens,
-                                output_tokens=stream_usage.output_tokens,
-                                reasoning_tokens=stream_usage.reasoning_tokens,
-                            )
+                            cost_tracker.add(stream_usage)
                             llm_span.set_meta("tool_calls_count", len(stream_tool_calls_map))
                             llm_span.set_meta("input_tokens", stream_usage.input_tokens)
                             llm_span.set_meta("output_tokens", stream_usage.output_tokens)
@@ -1034,11 +1100,7 @@ class AgentLoop:
                                 elif event.type == "reasoning_end":
                                     in_reasoning_block = False
 
-                        cost_tracker.add_usage(
-                            input_tokens=stream_usage.input_tokens,
-                            output_tokens=stream_usage.output_tokens,
-                            reasoning_tokens=stream_usage.reasoning_tokens,
-                        )
+                        cost_tracker.add(stream_usage)
 
                 except ProviderContextOverflowError:
                     overflow_retries += 1
@@ -1162,7 +1224,7 @@ class AgentLoop:
                         tool=tc.name, call_id=tc.id, result_preview=interrupt_result[:2000]
                     )
 
-                # Execute parallel-safe tools concurrently, emit events as they complete
+                # Execute parallel-safe tools concurrently, emit events as each completes
                 if parallel_safe:
                     async for event in self._execute_tool_batch_streaming(parallel_safe, state):
                         yield event
@@ -1177,6 +1239,7 @@ class AgentLoop:
             raise
 
         await self._run_hooks("aafter_agent", state)
+        cost_tracker.log_summary()
 
         final_content = ""
         if state.messages:
@@ -62,7 +62,11 @@ Role = Literal["system", "user", "assistant", "tool"]
 
 
 class Usage(BaseModel):
-    """Token usage from a single LLM call."""
+    """Token usage from a single LLM call.
+
+    input_tokens counts the whole prompt, including cache_read_tokens and
+    cache_creation_tokens.
+    """
 
     input_tokens: int = 0
     output_tokens: int = 0
@@ -82,6 +86,9 @@ class Message(BaseModel):
     reasoning: str | None = None
     provider_metadata: dict[str, dict[str, Any]] = Field(default_factory=dict)
     usage: Usage | None = None
+    # Last message of a stable prompt prefix; set per request by
+    # prompt_cache.mark_cache_breakpoints and never serialized.
+    cache_breakpoint: bool = Field(default=False, exclude=True)
 
     model_config = {"extra": "allow"}
 
@@ -211,6 +218,7 @@ StreamEventType = Literal[
     "tool_end",
     "reasoning",
     "tool_result",
+    "tool_progress",
     "usage",
 ]
 
@@ -222,6 +230,31 @@ _COMPAT_ALIAS_MAP: dict[str, str] = {
 }
 
 
+SUMMARY_HEADER = "## Conversation Summary"
+FORCED_SUMMARY_HEADER = "## Summary of previous conversation"
+# Summaries reloaded from the message store (see runner._messages_from_conversation)
+STORED_SUMMARY_PREFIX = "[SUMMARY OF PREVIOUS CONVERSATION]"
+
+
+def summary_text(msg: Message) -> str | None:
+    """Return the summary body if msg is a conversation summary."""
+    if not isinstance(msg.content, str):
+        return None
+    content = msg.content
+    if msg.role == "system":
+        for header in (SUMMARY_HEADER, FORCED_SUMMARY_HEADER):
+            if content.startswith(header):
+                return content[len(header) :].strip()
+    elif msg.role == "user" and content.startswith(STORED_SUMMARY_PREFIX):
+        return content[len(STORED_SUMMARY_PREFIX) :].strip()
+    return None
+
+
+def is_summary_message(msg: Message) -> bool:
+    """True for summaries written by SummarizationMiddleware or reloaded from the store."""
+    return summary_text(msg) is not None
+
+
 class StreamChunk(BaseModel):
     """A single streaming event from the agent loop.
 
@@ -229,7 +262,7 @@ class StreamChunk(BaseModel):
         text_start / text_delta / text_end
         tool_input_start / tool_input_delta / tool_input_end
         reasoning_start / reasoning_delta / reasoning_end
-        interrupt / done / error / tool_result
+        interrupt / done / error / tool_result / tool_progress
 
     Backward-compatible aliases (also emitted alongside primary):
         ai_token → text_delta
@@ -246,6 +279,7 @@ class StreamChunk(BaseModel):
     result_preview: str | None = None
     tool_calls: list[dict[str, Any]] | None = None
     usage: Usage | None = None
+    elapsed_ms: int | None = None
 
     @classmethod
     def text_start(cls) -> StreamChunk:
@@ -287,6 +321,10 @@ class StreamChunk(BaseModel):
     def tool_result_event(cls, tool: str, call_id: str, result_preview: str = "") -> StreamChunk:
         return cls(type="tool_result", tool=tool, call_id=call_id, result_preview=result_preview)
 
+    @classmethod
+    def tool_progress(cls, tool: str, call_id: str, elapsed_ms: int = 0) -> StreamChunk:
+        return cls(type="tool_progress", tool=tool, call_id=call_id, elapsed_ms=elapsed_ms)
+
     @classmethod
     def ai_token(cls, content: str) -> StreamChunk:
         return cls(type="ai_token", content=content)
@@ -339,6 +377,7 @@ class StreamChunk(BaseModel):
             ToolInputDeltaMessage,
             ToolInputEndMessage,
             ToolInputStartMessage,
+            ToolProgressMessage,
             ToolResultMessage,
             ToolStartMessage,
         )
@@ -395,6 +434,12 @@ class StreamChunk(BaseModel):
                 call_id=self.call_id or "",
                 result_preview=self.result_preview or "",
             ).model_dump()
+        if self.type == "tool_progress":
+            return ToolProgressMessage(
+                tool=self.tool or "",
+                call_id=self.call_id or "",
+                elapsed_ms=self.elapsed_ms or 0,
+            ).model_dump()
         if self.type == "done":
             return DoneMessage(response=self.content, tool_calls=self.tool_calls or []).model_dump()
         if self.type == "error":
@@ -9,20 +9,39 @@ Reimplements LangChain's SummarizationMiddleware from scratch:
 - Duplicate prevention guard
 - Tool output pruning before summarization
 - Force summarization for overflow recovery and manual /summarize
+- Per-message token cache + prefix sums on AgentState, so the trigger check
+  only tokenizes new messages and split points come from a binary search
+- Rolling summaries: an existing summary in the old segment is merged with
+  the new messages instead of being kept alongside a second summary
+- Optional background mode: summarization starts once history crosses a soft
+  watermark and the finished summary is swapped in on a later model call
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
-from collections.abc import Awaitable, Callable
-from typing import Any
+from bisect import bisect_left
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, TypeGuard
 
 import tiktoken
 
 from src.app_logging import get_logger
-from src.sdk.messages import Message
+from src.sdk.messages import (
+    FORCED_SUMMARY_HEADER,
+    SUMMARY_HEADER,
+    Message,
+    is_summary_message,
+    summary_text,
+)
 from src.sdk.middleware import Middleware
-from src.sdk.state import AgentState
+from src.sdk.state import AgentState, TokenLedger
+
+if TYPE_CHECKING:
+    from src.sdk.loop import AgentLoop
 
 logger = get_logger()
 
@@ -63,8 +82,97 @@ SUMMARY_USER_TEMPLATE = (
     "Summarize the following conversation segment in 200-500 words:\n\n{conversation}"
 )
 
+ROLLING_SUMMARY_TEMPLATE = """<previous_summary>
+{summary}
+</previous_summary>
+
+Merge the previous summary above with the new messages below into one updated summary. Keep earlier details that still matter; do not just append.
+
+<new_messages>
+{conversation}
+</new_messages>"""
+
+DEFAULT_SOFT_TRIGGER_RATIO = 0.8
+
 _APPROX_TOKENS_PER_CHAR = 0.25
 _FALLBACK_TOKEN_RATIO = 4
+_TOKEN_CACHE_SIZE = 10000
+
+
+class TokenCountCache:
+    """LRU cache of per-message token counts keyed by a content hash.
+
+    The key covers everything _count_message_tokens looks at (role, content,
+    tool name, reasoning, tool call names/arguments), so equal messages share
+    an entry even when they are different objects, e.g. after a session is
+    reloaded from the message store.
+    """
+
+    def __init__(self, maxsize: int = _TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._counts: OrderedDict[int, int] = OrderedDict()
+
+    @staticmethod
+    def key(msg: Message) -> int:
+        content = msg.content if isinstance(msg.content, str) else json.dumps(msg.content)
+        tool_calls = tuple(
+            (tc.name, json.dumps(tc.arguments, sort_keys=True)) for tc in msg.tool_calls or ()
+        )
+        return hash((msg.role, content, msg.name, msg.reasoning, tool_calls))
+
+    def get_or_count(self, msg: Message, count: Callable[[Message], int]) -> int:
+        key = self.key(msg)
+        cached = self._counts.get(key)
+        if cached is not None:
+            self.hits += 1
+            self._counts.move_to_end(key)
+            return cached
+        self.misses += 1
+        tokens = count(msg)
+        self._counts[key] = tokens
+        if len(self._counts) > self.maxsize:
+            self._counts.popitem(last=False)
+        return tokens
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._counts),
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        self._counts.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+@dataclass
+class _SummaryJob:
+    """One summarization of the oldest split_idx messages.
+
+    covered holds cache keys of the messages the summary replaces, so a
+    summary produced in the background can be checked against the history
+    it is swapped into.
+    """
+
+    conversation_text: str
+    old_messages: list[Message]
+    kept_system: list[Message]
+    recent_messages: list[Message]
+    split_idx: int
+    covered: list[int]
+    merged_previous: bool
+
+
+@dataclass
+class _BackgroundSummary:
+    job: _SummaryJob
+    task: asyncio.Task[str | None]
 
 
 class SummarizationMiddleware(Middleware):
@@ -75,11 +183,19 @@ class SummarizationMiddleware(Middleware):
     summarized and replaced with a single system message containing the summary.
     The most recent keep_tokens worth of messages are always preserved.
 
+    With background=True, crossing soft_trigger_tokens starts summarizing the
+    old segment in a background task. The result is swapped in on a later
+    model call (or awaited once trigger_tokens is reached), so the user does
+    not wait for a full summary round-trip before their answer streams.
+
     Args:
         trigger_tokens: Start summarization when total tokens exceed this.
         keep_tokens: Always keep at least this many tokens of recent messages.
         model: LLM model identifier for summary generation.
         on_summarize: Optional callback invoked with summary content on success.
+        background: Summarize speculatively in the background.
+        soft_trigger_tokens: Watermark that starts background summarization
+            (default: 80% of trigger_tokens).
     """
 
     def __init__(
@@ -88,20 +204,33 @@ class SummarizationMiddleware(Middleware):
         keep_tokens: int = 1000,
         model: str = "ollama:minimax-m2.5",
         on_summarize: SummaryCallback | None = None,
+        background: bool = False,
+        soft_trigger_tokens: int | None = None,
     ):
         self.trigger_tokens = trigger_tokens
         self.keep_tokens = keep_tokens
         self.model = model
         self._on_summarize = on_summarize
+        self.background = background
+        self.soft_trigger_tokens = (
+            soft_trigger_tokens
+            if soft_trigger_tokens is not None
+            else int(trigger_tokens * DEFAULT_SOFT_TRIGGER_RATIO)
+        )
+        self._pending: _BackgroundSummary | None = None
+        self._summary_loop: AgentLoop | None = None
         self._last_summary_msg_count: int = 0
         self._encoding: Any = None
+        self._encoding_failed = False
+        self.token_cache = TokenCountCache()
 
     def _get_encoding(self) -> Any:
-        if self._encoding is None:
+        # A failed load is not retried; count_tokens falls back to the char heuristic.
+        if self._encoding is None and not self._encoding_failed:
             try:
                 self._encoding = tiktoken.get_encoding("cl100k_base")
             except Exception:
-                self._encoding = None
+                self._encoding_failed = True
         return self._encoding
 
     def count_tokens(self, text: str) -> int:
@@ -114,6 +243,9 @@ class SummarizationMiddleware(Middleware):
         return max(1, int(len(text) * _APPROX_TOKENS_PER_CHAR))
 
     def _count_message_tokens(self, msg: Message) -> int:
+        return self.token_cache.get_or_count(msg, self._count_message_tokens_uncached)
+
+    def _count_message_tokens_uncached(self, msg: Message) -> int:
         content = msg.content if isinstance(msg.content, str) else json.dumps(msg.content)
         total = self.count_tokens(content)
         total += 4
@@ -130,6 +262,127 @@ class SummarizationMiddleware(Middleware):
     def _total_tokens(self, messages: list[Message]) -> int:
         return sum(self._count_message_tokens(m) for m in messages)
 
+    def token_cache_stats(self) -> dict[str, Any]:
+        """Hit/miss counters of the per-message token cache."""
+        return self.token_cache.stats()
+
+    def _pruned_message(self, msg: Message, original_tokens: int) -> Message:
+        """Return the form msg takes once it falls outside the keep window."""
+        if msg.role == "tool":
+            return Message(
+                role="tool",
+                content=f"[pruned: {original_tokens} tokens of tool output]",
+                name=msg.name,
+                tool_call_id=msg.tool_call_id,
+            )
+        if msg.role == "assistant" and msg.tool_calls:
+            return Message(role="assistant", content=msg.content, tool_calls=msg.tool_calls)
+        return msg
+
+    def _ledger_counts(self, msg: Message) -> tuple[int, int]:
+        raw = self._count_message_tokens(msg)
+        pruned = self._pruned_message(msg, raw)
+        return raw, raw if pruned is msg else self._count_message_tokens(pruned)
+
+    def _sync_ledger(self, state: AgentState) -> TokenLedger:
+        """Update state.tokens for messages appended since the last call."""
+        state.tokens.sync(state.messages, self._ledger_counts)
+        return state.tokens
+
+    def _prefix_sums(self, messages: list[Message]) -> list[int]:
+        prefix = [0]
+        for msg in messages:
+            prefix.append(prefix[-1] + self._count_message_tokens(msg))
+        return prefix
+
+    @staticmethod
+    def _keep_boundary(prefix: Sequence[int], keep_tokens: int) -> int | None:
+        """Index where the kept tail of the history starts, or None.
+
+        Binary search for the largest i whose suffix (prefix[n] - prefix[i])
+        exceeds keep_tokens. The newest message is always kept even when it
+        alone exceeds the budget. None means everything fits.
+        """
+        n = len(prefix) - 1
+        if n < 2:
+            return None
+        last_over = bisect_left(prefix, prefix[n] - keep_tokens, 0, n) - 1
+        if last_over < 0:
+            return None
+        return min(last_over + 1, n - 1)
+
+    def _apply_pruning(self, messages: list[Message], boundary: int) -> list[Message]:
+        pruned = list(messages)
+        for i in range(boundary):
+            pruned[i] = self._pruned_message(pruned[i], self._count_message_tokens(pruned[i]))
+        return pruned
+
+    def _split_at(
+        self, messages: list[Message], split_idx: int
+    ) -> tuple[list[Message], list[Message]]:
+        old_messages = messages[:split_idx]
+        system_messages = [m for m in old_messages if m.role == "system"]
+        non_system_old = [m for m in old_messages if m.role != "system"]
+        return non_system_old, list(system_messages) + list(messages[split_idx:])
+
+    def _plan(self, state: AgentState) -> tuple[int, int | None]:
+        """Return (pruned_total_tokens, keep_boundary) for state.messages.
+
+        Uses the ledger on state, so only new messages are tokenized.
+        """
+        ledger = self._sync_ledger(state)
+        n = len(state.messages)
+        boundary = self._keep_boundary(ledger.prefix, self.keep_tokens)
+        prune_end = n if boundary is None else boundary
+        total = ledger.pruned_prefix[prune_end] + ledger.prefix[n] - ledger.prefix[prune_end]
+        return total, boundary
+
+    def _prepare_job(self, state: AgentState, boundary: int | None) -> _SummaryJob:
+        """Prune old tool outputs, split the pruned history and build the prompt.
+
+        Earlier summaries in the old segment are merged into the new one
+        rather than kept next to it.
+        """
+        ledger = state.tokens
+        messages = state.messages
+        n = len(messages)
+        prune_end = n if boundary is None else boundary
+        pruned = self._apply_pruning(messages, prune_end)
+        # Prefix sums of the pruned list: pruned counts up to the boundary,
+        # raw counts after it.
+        offset = ledger.pruned_prefix[prune_end] - ledger.prefix[prune_end]
+        pruned_prefix = ledger.pruned_prefix[: prune_end + 1] + [
+            p + offset for p in ledger.prefix[prune_end + 1 : n + 1]
+        ]
+        split_idx = self._keep_boundary(pruned_prefix, self.keep_tokens) or 1
+
+        previous: list[str] = []
+        old_messages: list[Message] = []
+        kept_system: list[Message] = []
+        for msg in pruned[:split_idx]:
+            summary = summary_text(msg)
+            if summary is not None:
+                previous.append(summary)
+            elif msg.role == "system":
+                kept_system.append(msg)
+            else:
+                old_messages.append(msg)
+
+        conversation_text = self._messages_to_conversation_text(old_messages)
+        if previous:
+            conversation_text = ROLLING_SUMMARY_TEMPLATE.format(
+                summary="\n\n".join(previous), conversation=conversation_text
+            )
+        return _SummaryJob(
+            conversation_text=conversation_text,
+            old_messages=old_messages,
+            kept_system=kept_system,
+            recent_messages=pruned[split_idx:],
+            split_idx=split_idx,
+            covered=[self.token_cache.key(m) for m in messages[:split_idx]],
+            merged_previous=bool(previous),
+        )
+
     def _messages_to_conversation_text(self, messages: list[Message]) -> str:
         lines = []
         for msg in messages:
@@ -145,32 +398,8 @@ class SummarizationMiddleware(Middleware):
         Older messages with role=='tool' get their content replaced with
         a short placeholder to save tokens during summarization.
         """
-        recent_tokens = 0
-        boundary = len(messages)
-        for i in range(len(messages) - 1, -1, -1):
-            t = self._count_message_tokens(messages[i])
-            if recent_tokens + t > keep_tokens and i < len(messages) - 1:
-                boundary = i + 1
-                break
-            recent_tokens += t
-
-        pruned = list(messages)
-        for i in range(boundary):
-            if pruned[i].role == "tool":
-                original_tokens = self._count_message_tokens(pruned[i])
-                pruned[i] = Message(
-                    role="tool",
-                    content=f"[pruned: {original_tokens} tokens of tool output]",
-                    name=pruned[i].name,
-                    tool_call_id=pruned[i].tool_call_id,
-                )
-            elif pruned[i].role == "assistant" and pruned[i].tool_calls:
-                pruned[i] = Message(
-                    role="assistant",
-                    content=pruned[i].content,
-                    tool_calls=pruned[i].tool_calls,
-                )
-        return pruned
+        boundary = self._keep_boundary(self._prefix_sums(messages), keep_tokens)
+        return self._apply_pruning(messages, len(messages) if boundary is None else boundary)
 
     def _split_messages(
         self, messages: list[Message], keep_tokens: int | None = None
@@ -181,30 +410,25 @@ class SummarizationMiddleware(Middleware):
         System messages are excluded from the 'old' list.
         """
         tokens_to_keep = keep_tokens if keep_tokens is not None else self.keep_tokens
-        recent_tokens = 0
-        split_idx = len(messages)
-
-        for i in range(len(messages) - 1, -1, -1):
-            msg_tokens = self._count_message_tokens(messages[i])
-            if recent_tokens + msg_tokens > tokens_to_keep and i < len(messages) - 1:
-                split_idx = i + 1
-                break
-            recent_tokens += msg_tokens
-        else:
-            split_idx = 1
+        split_idx = self._keep_boundary(self._prefix_sums(messages), tokens_to_keep) or 1
+        return self._split_at(messages, split_idx)
 
-        old_messages = messages[:split_idx]
-        system_messages = [m for m in old_messages if m.role == "system"]
-        non_system_old = [m for m in old_messages if m.role != "system"]
-        return non_system_old, list(system_messages) + list(messages[split_idx:])
+    def _get_summary_loop(self) -> AgentLoop:
+        """Return the AgentLoop used for summaries, created once and reused.
 
-    async def _generate_summary(self, conversation_text: str) -> str | None:
-        try:
+        Reusing it keeps the provider (and its HTTP client) alive across
+        summaries instead of reconnecting for every call.
+        """
+        if self._summary_loop is None:
             from src.sdk.loop import AgentLoop
             from src.sdk.providers.factory import create_provider
 
-            provider = create_provider(self.model)
-            loop = AgentLoop(provider=provider)
+            self._summary_loop = AgentLoop(provider=create_provider(self.model))
+        return self._summary_loop
+
+    async def _generate_summary(self, conversation_text: str) -> str | None:
+        try:
+            loop = self._get_summary_loop()
 
             summary_messages = [
                 Message.system(SUMMARY_SYSTEM_PROMPT),
@@ -233,15 +457,15 @@ class SummarizationMiddleware(Middleware):
         If instructions are provided, they are prepended to the summary
         prompt to focus the summary on specific areas.
         """
-        messages = state.messages
-        pruned = self._prune_tool_outputs(messages, self.keep_tokens)
-        total_tokens = self._total_tokens(pruned)
+        total_tokens, boundary = self._plan(state)
 
         if total_tokens < 1000:
             return False
 
-        old_messages, recent_messages = self._split_messages(pruned)
-        conversation_text = self._messages_to_conversation_text(old_messages)
+        # A summary being built in the background covers stale state now.
+        self._cancel_background()
+        job = self._prepare_job(state, boundary)
+        conversation_text = job.conversation_text
 
         if instructions:
             conversation_text = f"[Focus: {instructions}]\n\n{conversation_text}"
@@ -251,8 +475,9 @@ class SummarizationMiddleware(Middleware):
             return False
 
         new_messages = [
-            Message.system(f"## Summary of previous conversation\n\n{summary}"),
-            *recent_messages,
+            Message.system(f"{FORCED_SUMMARY_HEADER}\n\n{summary}"),
+            *job.kept_system,
+            *job.recent_messages,
         ]
         state.messages = new_messages
         self._last_summary_msg_count = len(new_messages)
@@ -279,11 +504,21 @@ class SummarizationMiddleware(Middleware):
             )
             return None
 
-        # Prune old tool outputs before counting tokens
-        pruned = self._prune_tool_outputs(messages, self.keep_tokens)
-        total_tokens = self._total_tokens(pruned)
+        # Token count after pruning old tool outputs, from the prefix sums
+        total_tokens, boundary = self._plan(state)
+
+        if self._pending is not None:
+            # Past the hard trigger we have to summarize now anyway, so wait
+            # for the background summary rather than starting over inline.
+            swapped = await self._take_background_summary(
+                state, wait=total_tokens > self.trigger_tokens
+            )
+            if swapped is not None:
+                return swapped
 
         if total_tokens <= self.trigger_tokens:
+            if self.background and total_tokens > self.soft_trigger_tokens:
+                self._start_background_summary(state, boundary)
             return None
 
         logger.info(
@@ -292,24 +527,12 @@ class SummarizationMiddleware(Middleware):
                 "total_tokens": total_tokens,
                 "trigger_tokens": self.trigger_tokens,
                 "msg_count": current_msg_count,
+                "token_cache": self.token_cache.stats(),
             },
             user_id="system",
         )
 
-        tokens_to_keep = self.keep_tokens
-        recent_tokens = 0
-        split_idx = len(messages)
-
-        for i in range(len(messages) - 1, -1, -1):
-            msg_tokens = self._count_message_tokens(messages[i])
-            if recent_tokens + msg_tokens > tokens_to_keep and i < len(messages) - 1:
-                split_idx = i + 1
-                break
-            recent_tokens += msg_tokens
-        else:
-            split_idx = 1
-
-        if split_idx <= 1:
+        if boundary is None or boundary <= 1:
             logger.warning(
                 "summarization.cannot_split",
                 {"msg_count": current_msg_count},
@@ -317,21 +540,30 @@ class SummarizationMiddleware(Middleware):
             )
             return None
 
-        old_messages, recent_messages = self._split_messages(pruned)
+        job = self._prepare_job(state, boundary)
 
-        if not old_messages:
+        if not job.old_messages:
             return None
 
-        conversation_text = self._messages_to_conversation_text(old_messages)
-        summary_content = await self._generate_summary(conversation_text)
+        summary_content = await self._generate_summary(job.conversation_text)
+        if not self._summary_usable(summary_content, job):
+            return None
+
+        new_messages = [
+            Message.system(f"{SUMMARY_HEADER}\n\n{summary_content}"),
+            *job.kept_system,
+            *job.recent_messages,
+        ]
+        return await self._complete(new_messages, summary_content, current_msg_count, total_tokens)
 
+    def _summary_usable(self, summary_content: str | None, job: _SummaryJob) -> TypeGuard[str]:
         if summary_content is None:
             logger.warning(
                 "summarization.failed_no_summary",
-                {"old_msg_count": len(old_messages)},
+                {"old_msg_count": len(job.old_messages)},
                 user_id="system",
             )
-            return None
+            return False
 
         content_lower = summary_content.lower()
         failure_reasons = []
@@ -353,21 +585,25 @@ class SummarizationMiddleware(Middleware):
                 },
                 user_id="system",
             )
-            return None
-
-        summary_msg = Message.system(f"## Conversation Summary\n\n{summary_content}")
-
-        new_messages = [summary_msg] + list(recent_messages)
+            return False
+        return True
 
+    async def _complete(
+        self,
+        new_messages: list[Message],
+        summary_content: str,
+        old_msg_count: int,
+        tokens_before: int,
+    ) -> dict[str, Any]:
         self._last_summary_msg_count = len(new_messages)
 
         logger.info(
             "summarization.completed",
             {
-                "old_msg_count": current_msg_count,
+                "old_msg_count": old_msg_count,
                 "new_msg_count": len(new_messages),
                 "summary_length": len(summary_content),
-                "tokens_before": total_tokens,
+                "tokens_before": tokens_before,
             },
             user_id="system",
         )
@@ -386,8 +622,68 @@ class SummarizationMiddleware(Middleware):
 
         return {"messages": new_messages}
 
+    # -- background summarization --
+
+    def _start_background_summary(self, state: AgentState, boundary: int | None) -> None:
+        if self._pending is not None or boundary is None or boundary <= 1:
+            return
+        job = self._prepare_job(state, boundary)
+        if not job.old_messages:
+            return
+        task = asyncio.create_task(self._generate_summary(job.conversation_text))
+        self._pending = _BackgroundSummary(job=job, task=task)
+        logger.info(
+            "summarization.background_started",
+            {
+                "old_msg_count": len(job.old_messages),
+                "soft_trigger_tokens": self.soft_trigger_tokens,
+                "rolling": job.merged_previous,
+            },
+            user_id="system",
+        )
+
+    async def _take_background_summary(
+        self, state: AgentState, wait: bool
+    ) -> dict[str, Any] | None:
+        """Swap a finished background summary into state, if it still applies."""
+        pending = self._pending
+        if pending is None or (not wait and not pending.task.done()):
+            return None
+        self._pending = None
+
+        try:
+            summary_content = await pending.task
+        except asyncio.CancelledError:
+            return None
+
+        job = pending.job
+        messages = state.messages
+        covered = [self.token_cache.key(m) for m in messages[: job.split_idx]]
+        if covered != job.covered:
+            logger.info(
+                "summarization.background_stale",
+                {"split_idx": job.split_idx, "msg_count": len(messages)},
+                user_id="system",
+            )
+            return None
+        if not self._summary_usable(summary_content, job):
+            return None
+
+        tokens_before = state.tokens.prefix[-1]
+        new_messages = [
+            Message.system(f"{SUMMARY_HEADER}\n\n{summary_content}"),
+            *job.kept_system,
+            *messages[job.split_idx :],
+        ]
+        return await self._complete(new_messages, summary_content, len(messages), tokens_before)
+
+    def _cancel_background(self) -> None:
+        if self._pending is not None:
+            self._pending.task.cancel()
+            self._pending = None
+
     def before_model(self, state: AgentState) -> dict[str, Any] | None:
-        total_tokens = self._total_tokens(state.messages)
+        total_tokens = self._sync_ledger(state).prefix[-1]
         if total_tokens <= self.trigger_tokens:
             return None
 
@@ -399,4 +695,4 @@ class SummarizationMiddleware(Middleware):
         return None
 
 
-__all__ = ["SummarizationMiddleware"]
+__all__ = ["SummarizationMiddleware", "TokenCountCache", "is_summary_message"]
@@ -65,6 +65,7 @@ from src.sdk.tools_core.filesystem import (
     files_mkdir,
     files_read,
     files_rename,
+    files_tail,
     files_write,
 )
 from src.sdk.tools_core.mcp import (
@@ -125,6 +126,7 @@ def _register_all() -> None:
 
     registry.register(files_list)
     registry.register(files_read)
+    registry.register(files_tail)
     registry.register(files_write)
     registry.register(files_edit)
     registry.register(files_delete)
@@ -0,0 +1,56 @@
+"""Prompt-cache layout helpers.
+
+Providers cache the longest prompt prefix they have seen before: Anthropic
+at explicit cache_control breakpoints, OpenAI-compatible APIs automatically
+on the exact leading tokens. Both only pay off if the stable part of the
+prompt (system prompt, tool schemas, the latest conversation summary) comes
+first and is byte-identical across LLM calls.
+
+AgentLoop._prepare_messages lays messages out as
+
+    [system prompt] [leading system messages, e.g. summary] [history...]
+
+and marks the end of each stable segment with Message.cache_breakpoint.
+Providers with explicit caching turn the marks into cache_control blocks;
+the others merge the leading system messages back into one.
+"""
+
+from __future__ import annotations
+
+from src.sdk.messages import Message, is_summary_message
+
+
+def mark_cache_breakpoints(messages: list[Message]) -> list[Message]:
+    """Mark the system prompt and the latest summary as cache breakpoints.
+
+    Returns a new list; marked messages are copies, so AgentState is left
+    untouched.
+    """
+    marks: list[int] = []
+    if messages and messages[0].role == "system":
+        marks.append(0)
+    for i in range(len(messages) - 1, 0, -1):
+        if is_summary_message(messages[i]):
+            marks.append(i)
+            break
+
+    result = list(messages)
+    for i in marks:
+        result[i] = result[i].model_copy(update={"cache_breakpoint": True})
+    return result
+
+
+def merge_leading_system(messages: list[Message]) -> list[Message]:
+    """Join the leading run of system messages into one.
+
+    For providers without explicit cache markers; the joined text still
+    starts with the unchanged system prompt, so automatic prefix caching
+    keeps working.
+    """
+    n = 0
+    while n < len(messages) and messages[n].role == "system":
+        n += 1
+    if n < 2 or not all(isinstance(m.content, str) for m in messages[:n]):
+        return messages
+    merged = Message.system("\n\n".join(str(m.content) for m in messages[:n]))
+    return [merged, *messages[n:]]
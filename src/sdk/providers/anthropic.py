@@ -5,6 +5,8 @@ Handles:
 - Tool use blocks (different from OpenAI's tool_calls)
 - x-api-key auth, anthropic-version header
 - Extended thinking support (for Claude's reasoning mode)
+- Prompt caching: cache_control on the tool block and on messages marked
+  Message.cache_breakpoint (system prompt, latest summary)
 """
 
 from __future__ import annotations
@@ -18,10 +20,12 @@ import httpx
 
 from src.sdk.messages import Message, StreamChunk, ToolCall, Usage
 from src.sdk.providers.base import LLMProvider, ModelInfo, raise_if_context_overflow
+from src.sdk.providers.client_pool import get_client_pool
 from src.sdk.tools import ToolDefinition
 
 ANTHROPIC_BASE_URL = "https://api.anthropic.com"
 ANTHROPIC_API_VERSION = "2023-06-01"
+CACHE_CONTROL = {"type": "ephemeral"}
 
 
 class AnthropicProvider(LLMProvider):
@@ -34,30 +38,28 @@ class AnthropicProvider(LLMProvider):
         base_url: str = ANTHROPIC_BASE_URL,
         timeout: float = 120.0,
         max_tokens: int = 4096,
+        prompt_caching: bool = True,
     ) -> None:
         self.api_key = api_key
+        self.prompt_caching = prompt_caching
         self.model = model
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
         self.max_tokens = max_tokens
-        self._http_client: httpx.AsyncClient | None = None
 
     @property
     def provider_id(self) -> str:
         return "anthropic"
 
     def _get_client(self) -> httpx.AsyncClient:
-        if self._http_client is None or self._http_client.is_closed:
-            headers = {
-                "x-api-key": self.api_key or "",
-                "anthropic-version": ANTHROPIC_API_VERSION,
-                "content-type": "application/json",
-            }
-            self._http_client = httpx.AsyncClient(
-                timeout=httpx.Timeout(self.timeout),
-                headers=headers,
-            )
-        return self._http_client
+        headers = {
+            "x-api-key": self.api_key or "",
+            "anthropic-version": ANTHROPIC_API_VERSION,
+            "content-type": "application/json",
+        }
+        return get_client_pool().get_client(
+            "anthropic", self.base_url, self.api_key, self.timeout, headers=headers
+        )
 
     def _build_payload(
         self,
@@ -69,11 +71,14 @@ class AnthropicProvider(LLMProvider):
         provider_options: dict[str, dict[str, Any]] | None = None,
         **kwargs: Any,
     ) -> dict[str, Any]:
-        system_content = None
+        system_blocks: list[dict[str, Any]] = []
         anthropic_msgs = []
         for m in messages:
             if m.role == "system":
-                system_content = str(m.content)
+                block: dict[str, Any] = {"type": "text", "text": str(m.content)}
+                if self.prompt_caching and m.cache_breakpoint:
+                    block["cache_control"] = CACHE_CONTROL
+                system_blocks.append(block)
                 continue
             am = m.to_anthropic()
             if m.role == "tool":
@@ -87,6 +92,8 @@ class AnthropicProvider(LLMProvider):
                         }
                     ],
                 }
+            if self.prompt_caching and m.cache_breakpoint:
+                am = self._with_cache_control(am)
             anthropic_msgs.append(am)
 
         payload: dict[str, Any] = {
@@ -94,17 +101,38 @@ class AnthropicProvider(LLMProvider):
             "messages": anthropic_msgs,
             "max_tokens": max_tokens or self.max_tokens,
         }
-        if system_content:
-            payload["system"] = system_content
+        if system_blocks:
+            if any("cache_control" in b for b in system_blocks):
+                payload["system"] = system_blocks
+            else:
+                payload["system"] = "\n\n".join(b["text"] for b in system_blocks)
         if stream:
             payload["stream"] = True
         if tools:
-            payload["tools"] = [t.to_anthropic_format() for t in tools]
+            tool_schemas = [t.to_anthropic_format() for t in tools]
+            if self.prompt_caching:
+                # Tools render first, so this breakpoint caches the tool block alone.
+                tool_schemas[-1] = {**tool_schemas[-1], "cache_control": CACHE_CONTROL}
+            payload["tools"] = tool_schemas
         provider_opts = self._extract_provider_options(provider_options)
         payload.update(kwargs)
         payload.update(provider_opts)
         return payload
 
+    @staticmethod
+    def _with_cache_control(am: dict[str, Any]) -> dict[str, Any]:
+        """Put a cache breakpoint on the last content block of a message."""
+        content = am.get("content")
+        blocks: list[dict[str, Any]]
+        if isinstance(content, str):
+            blocks = [{"type": "text", "text": content}]
+        elif isinstance(content, list) and content:
+            blocks = [dict(b) for b in content]
+        else:
+            return am
+        blocks[-1]["cache_control"] = CACHE_CONTROL
+        return {**am, "content": blocks}
+
     @staticmethod
     def _to_anthropic_tool(td: ToolDefinition) -> dict[str, Any]:
         return {
@@ -115,6 +143,18 @@ class AnthropicProvider(LLMProvider):
             else {"type": "object", "properties": {}},
         }
 
+    @staticmethod
+    def _parse_usage(raw_usage: dict[str, Any]) -> Usage:
+        # Anthropic's input_tokens excludes cached tokens; Usage counts the whole prompt.
+        cache_read = raw_usage.get("cache_read_input_tokens", 0) or 0
+        cache_creation = raw_usage.get("cache_creation_input_tokens", 0) or 0
+        return Usage(
+            input_tokens=(raw_usage.get("input_tokens", 0) or 0) + cache_read + cache_creation,
+            output_tokens=raw_usage.get("output_tokens", 0) or 0,
+            cache_read_tokens=cache_read,
+            cache_creation_tokens=cache_creation,
+        )
+
     async def chat(
         self,
         messages: list[Message],
@@ -163,12 +203,7 @@ class AnthropicProvider(LLMProvider):
         usage = None
         raw_usage = data.get("usage")
         if raw_usage:
-            usage = Usage(
-                input_tokens=raw_usage.get("input_tokens", 0),
-                output_tokens=raw_usage.get("output_tokens", 0),
-                cache_read_tokens=raw_usage.get("cache_read_input_tokens", 0),
-                cache_creation_tokens=raw_usage.get("cache_creation_input_tokens", 0),
-            )
+            usage = self._parse_usage(raw_usage)
 
         result = Message.assistant(content=content, tool_calls=tool_calls, usage=usage)
         if reasoning:
@@ -284,16 +319,7 @@ class AnthropicProvider(LLMProvider):
             msg_data = data.get("message", {})
             raw_usage = msg_data.get("usage")
             if raw_usage:
-                events.append(
-                    StreamChunk.usage_event(
-                        Usage(
-                            input_tokens=raw_usage.get("input_tokens", 0),
-                            output_tokens=raw_usage.get("output_tokens", 0),
-                            cache_read_tokens=raw_usage.get("cache_read_input_tokens", 0),
-                            cache_creation_tokens=raw_usage.get("cache_creation_input_tokens", 0),
-                        )
-                    )
-                )
+                events.append(StreamChunk.usage_event(self._parse_usage(raw_usage)))
 
         elif event_type == "message_delta":
             delta_usage = data.get("usage", {})
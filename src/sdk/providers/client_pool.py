@@ -0,0 +1,179 @@
+"""Process-wide pool of HTTP clients shared by LLM providers.
+
+Every AgentLoop used to build its own httpx.AsyncClient / AsyncOpenAI, so
+subagents, summaries and companion cycles each paid a fresh TCP+TLS
+handshake. ProviderClientPool hands out one keep-alive client per
+(provider type, base_url, api key hash, timeout) instead, with HTTP/2 when
+the optional ``h2`` package is installed and bounded connections per host.
+
+httpx connections belong to the event loop that opened them, and some code
+paths (subagents, sync tools) run their own loop via asyncio.run, so clients
+are pooled per running loop. Clients of a loop that has been garbage
+collected disappear with it.
+
+Usage:
+    client = get_client_pool().get_client("anthropic", base_url, api_key, headers=...)
+    response = await client.post(...)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import importlib.util
+import logging
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE = 10
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+
+ClientKey = tuple[str, str, str, float]
+
+
+@dataclass
+class ClientPoolConfig:
+    """Connection limits applied to every pooled client (one client per host)."""
+
+    max_connections: int = DEFAULT_MAX_CONNECTIONS
+    max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE
+    keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY
+    http2: bool = True
+
+
+def _key_hash(api_key: str | None) -> str:
+    if not api_key:
+        return ""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class ProviderClientPool:
+    """Shares httpx.AsyncClient instances across providers on the same loop."""
+
+    def __init__(self, config: ClientPoolConfig | None = None):
+        self.config = config or ClientPoolConfig()
+        self.http2 = self.config.http2 and _http2_available()
+        self._clients: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[ClientKey, httpx.AsyncClient]
+        ] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def get_client(
+        self,
+        provider_type: str,
+        base_url: str,
+        api_key: str | None = None,
+        timeout: float = 120.0,
+        headers: dict[str, str] | None = None,
+    ) -> httpx.AsyncClient:
+        """Return the shared client for this provider/endpoint/key.
+
+        headers are only applied when the client is first created; they must
+        be derived from the key fields (e.g. the auth header for api_key).
+        Outside a running event loop a fresh, unpooled client is returned.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return self._new_client(timeout, headers)
+
+        key: ClientKey = (provider_type, base_url.rstrip("/"), _key_hash(api_key), timeout)
+        with self._lock:
+            clients = self._clients.setdefault(loop, {})
+            client = clients.get(key)
+            if client is not None and not client.is_closed:
+                self.reused += 1
+                return client
+            client = self._new_client(timeout, headers)
+            clients[key] = client
+            self.created += 1
+        logger.debug(f"client_pool.created provider={provider_type} base_url={key[1]}")
+        return client
+
+    def _new_client(self, timeout: float, headers: dict[str, str] | None) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout),
+            headers=headers,
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=self.config.max_connections,
+                max_keepalive_connections=self.config.max_keepalive_connections,
+                keepalive_expiry=self.config.keepalive_expiry,
+            ),
+        )
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            open_clients = sum(
+                1
+                for clients in self._clients.values()
+                for client in clients.values()
+                if not client.is_closed
+            )
+        requests = self.created + self.reused
+        return {
+            "clients": open_clients,
+            "created": self.created,
+            "reused": self.reused,
+            "reuse_ratio": self.reused / requests if requests else 0.0,
+            "http2": self.http2,
+        }
+
+    async def aclose(self) -> None:
+        """Close every client owned by the running loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._clients.pop(loop, {})
+        for client in clients.values():
+            try:
+                await client.aclose()
+            except Exception:
+                logger.debug("client_pool.close_failed", exc_info=True)
+
+
+_pool: ProviderClientPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_client_pool() -> ProviderClientPool:
+    """Return the process-wide ProviderClientPool, sized from ProvidersConfig."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            config = ClientPoolConfig()
+            try:
+                from src.config import get_settings
+
+                providers_cfg = get_settings().providers
+                config = ClientPoolConfig(
+                    max_connections=providers_cfg.max_connections_per_host,
+                    max_keepalive_connections=providers_cfg.max_keepalive_connections,
+                    keepalive_expiry=providers_cfg.keepalive_expiry_seconds,
+                    http2=providers_cfg.http2,
+                )
+            except Exception:
+                logger.debug("client_pool.settings_unavailable", exc_info=True)
+            _pool = ProviderClientPool(config)
+        return _pool
+
+
+async def shutdown_client_pool() -> None:
+    """Close pooled clients on the running loop (FastAPI lifespan exit)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        await pool.aclose()
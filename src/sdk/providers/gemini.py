@@ -19,7 +19,9 @@ from uuid import uuid4
 import httpx
 
 from src.sdk.messages import Message, StreamChunk, ToolCall, Usage
+from src.sdk.prompt_cache import merge_leading_system
 from src.sdk.providers.base import LLMProvider, ModelInfo, raise_if_context_overflow
+from src.sdk.providers.client_pool import get_client_pool
 from src.sdk.tools import ToolDefinition
 
 GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
@@ -39,18 +41,14 @@ class GeminiProvider(LLMProvider):
         self.model = model
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
-        self._http_client: httpx.AsyncClient | None = None
 
     @property
     def provider_id(self) -> str:
         return "gemini"
 
     def _get_client(self) -> httpx.AsyncClient:
-        if self._http_client is None or self._http_client.is_closed:
-            self._http_client = httpx.AsyncClient(
-                timeout=httpx.Timeout(self.timeout),
-            )
-        return self._http_client
+        # The API key travels in the query string, so one client serves all keys.
+        return get_client_pool().get_client("gemini", self.base_url, timeout=self.timeout)
 
     def _messages_to_contents(self, messages: list[Message]) -> list[dict[str, Any]]:
         contents = []
@@ -138,7 +136,7 @@ class GeminiProvider(LLMProvider):
         **kwargs: Any,
     ) -> dict[str, Any]:
         payload: dict[str, Any] = {
-            "contents": self._messages_to_contents(messages),
+            "contents": self._messages_to_contents(merge_leading_system(messages)),
         }
         if tools:
             payload["tools"] = self._tools_to_gemini(tools)
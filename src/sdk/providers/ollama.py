@@ -17,7 +17,9 @@ from uuid import uuid4
 import httpx
 
 from src.sdk.messages import Message, StreamChunk, ToolCall, Usage
+from src.sdk.prompt_cache import merge_leading_system
 from src.sdk.providers.base import LLMProvider, ModelInfo, raise_if_context_overflow
+from src.sdk.providers.client_pool import get_client_pool
 from src.sdk.tools import ToolDefinition
 
 
@@ -43,22 +45,18 @@ class OllamaCloud(LLMProvider):
         self.model = model
         self.api_key = api_key
         self.timeout = timeout
-        self._http_client: httpx.AsyncClient | None = None
 
     @property
     def provider_id(self) -> str:
         return "ollama-cloud"
 
     def _get_client(self) -> httpx.AsyncClient:
-        if self._http_client is None or self._http_client.is_closed:
-            headers: dict[str, str] = {"Content-Type": "application/json"}
-            if self.api_key:
-                headers["Authorization"] = f"Bearer {self.api_key}"
-            self._http_client = httpx.AsyncClient(
-                timeout=httpx.Timeout(self.timeout),
-                headers=headers,
-            )
-        return self._http_client
+        headers: dict[str, str] = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return get_client_pool().get_client(
+            "ollama-cloud", self.base_url, self.api_key, self.timeout, headers=headers
+        )
 
     def _build_payload(
         self,
@@ -71,7 +69,7 @@ class OllamaCloud(LLMProvider):
     ) -> dict[str, Any]:
         payload: dict[str, Any] = {
             "model": model,
-            "messages": [m.to_ollama() for m in messages],
+            "messages": [m.to_ollama() for m in merge_leading_system(messages)],
             "stream": stream,
         }
         if tools:
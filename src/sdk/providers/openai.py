@@ -9,14 +9,18 @@ error handling). We wrap it with our SDK Message types.
 
 from __future__ import annotations
 
+import asyncio
 from collections.abc import AsyncIterator
-from typing import Any
+from typing import Any, cast
 from uuid import uuid4
 
+import httpx
 from openai import AsyncOpenAI
 
 from src.sdk.messages import Message, StreamChunk, ToolCall, Usage
+from src.sdk.prompt_cache import merge_leading_system
 from src.sdk.providers.base import LLMProvider, ModelInfo, raise_if_context_overflow
+from src.sdk.providers.client_pool import get_client_pool
 from src.sdk.tools import ToolDefinition
 
 OPENAI_DEFAULT_BASE_URL = "https://api.openai.com/v1"
@@ -37,12 +41,47 @@ class OpenAIProvider(LLMProvider):
         timeout: float = 120.0,
     ) -> None:
         self.model = model
-        self._client = AsyncOpenAI(
-            api_key=api_key or "unused",
-            base_url=base_url,
-            organization=organization,
-            timeout=timeout,
+        self._api_key = api_key
+        self.base_url = base_url
+        self.organization = organization
+        self.timeout = timeout
+        self._openai: AsyncOpenAI | None = None
+        self._http_client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def _client(self) -> AsyncOpenAI:
+        """AsyncOpenAI over the pooled HTTP client, resolved once per event loop.
+
+        Pooled clients belong to the loop that opened them, so the client is
+        looked up again only when the provider is used from another loop or
+        the pooled client was closed.
+        """
+        try:
+            loop: asyncio.AbstractEventLoop | None = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if (
+            self._openai is not None
+            and self._loop is loop
+            and self._http_client is not None
+            and not self._http_client.is_closed
+        ):
+            return self._openai
+        http_client = get_client_pool().get_client(
+            "openai", self.base_url, self._api_key, self.timeout
+        )
+        self._openai = AsyncOpenAI(
+            api_key=self._api_key or "unused",
+            base_url=self.base_url,
+            organization=self.organization,
+            timeout=self.timeout,
+            # The SDK accepts httpx clients at runtime; its stubs only name httpx2.
+            http_client=cast(Any, http_client),
         )
+        self._http_client = http_client
+        self._loop = loop
+        return self._openai
 
     @property
     def provider_id(self) -> str:
@@ -57,7 +96,7 @@ class OpenAIProvider(LLMProvider):
         **kwargs: Any,
     ) -> Message:
         model = model or self.model
-        openai_msgs = [m.to_openai() for m in messages]
+        openai_msgs = [m.to_openai() for m in merge_leading_system(messages)]
         tool_schemas = [t.to_openai_format() for t in tools] if tools else None
 
         params: dict[str, Any] = {
@@ -86,7 +125,7 @@ class OpenAIProvider(LLMProvider):
         **kwargs: Any,
     ) -> AsyncIterator[StreamChunk]:
         model = model or self.model
-        openai_msgs = [m.to_openai() for m in messages]
+        openai_msgs = [m.to_openai() for m in merge_leading_system(messages)]
         tool_schemas = [t.to_openai_format() for t in tools] if tools else None
 
         params: dict[str, Any] = {
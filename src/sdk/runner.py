@@ -268,6 +268,48 @@ def _get_connector_context(user_id: str) -> str:
         return ""
 
 
+def _get_email_context(user_id: str) -> str:
+    """Summarize mailbox counters (never the emails table) for the current turn."""
+    try:
+        from src.sdk.tools_core.email_db import email_counter_totals, get_read_engine
+
+        engine = get_read_engine(user_id)
+        if engine is None:
+            return ""
+        totals = email_counter_totals(engine)
+        if not totals["accounts"]:
+            return ""
+        return (
+            "<email_status>\n"
+            f"{totals['unread']} unread across {totals['accounts']} account(s), "
+            f"{totals['flagged']} flagged; {totals['recent']} received in the last 24h "
+            f"({totals['recent_unread']} unread). Use the email_* tools for details.\n"
+            "</email_status>"
+        )
+    except Exception:
+        return ""
+
+
+async def _with_turn_context(user_id: str, messages: list[Message]) -> list[Message]:
+    """Prefix the newest user message with context that changes every turn.
+
+    Mailbox counts go stale within minutes, so they stay out of the system
+    prompt, which must be byte-identical across turns to be cached. Only
+    the copy sent to the model carries them; callers never persist it.
+    The counters are read in a worker thread, off the event loop.
+    """
+    context = await asyncio.to_thread(_get_email_context, user_id)
+    if not context:
+        return messages
+    for i in range(len(messages) - 1, -1, -1):
+        message = messages[i]
+        if message.role == "user" and isinstance(message.content, str):
+            result = list(messages)
+            result[i] = message.model_copy(update={"content": f"{context}\n\n{message.content}"})
+            return result
+    return messages
+
+
 async def create_sdk_loop(user_id: str, workspace_id: str = "personal", model: str | None = None, provider_keys: dict[str, str] | None = None) -> AgentLoop:
     """Create an AgentLoop for a user with all wiring."""
     import time
@@ -370,10 +412,13 @@ async def create_sdk_loop(user_id: str, workspace_id: str = "personal", model: s
     )
 
     if idx.count() == 0:
+        # Collect every tool's row, then index them in one batch
+        rows: list[dict[str, Any]] = []
+
         # Index native tools
         for td in tools:
             if not is_core_tool(td.name):
-                idx.index_tool(td, tool_type="native", namespace="native")
+                rows.append(idx.tool_row(td, tool_type="native", namespace="native"))
 
         # Index custom (TOOL.md) tools
         from src.sdk.tools_custom import find_tool_file, get_custom_tools, load_tool_meta
@@ -389,8 +434,8 @@ async def create_sdk_loop(user_id: str, workspace_id: str = "personal", model: s
                             "install": meta.get("install", []),
                             "tool_dir": str(tool_file.parent),
                         }
-                idx.index_tool(td, tool_type="custom", namespace="custom",
-                               reconstruct=reconstruct_data)
+                rows.append(idx.tool_row(td, tool_type="custom", namespace="custom",
+                                         reconstruct=reconstruct_data))
 
         # Index MCP tools
         for td in mcp_tools:
@@ -398,16 +443,18 @@ async def create_sdk_loop(user_id: str, workspace_id: str = "personal", model: s
                 parts = td.name.split("__", 2)
                 server_name = parts[1] if len(parts) == 3 else ""
                 reconstruct = {"server_name": server_name, "mcp_tool_name": td.name}
-                idx.index_tool(td, tool_type="mcp", namespace=f"mcp__{server_name}",
-                               reconstruct=reconstruct)
+                rows.append(idx.tool_row(td, tool_type="mcp", namespace=f"mcp__{server_name}",
+                                         reconstruct=reconstruct))
 
         # Index connector tools
         for td in connectkit_tool_defs:
             if not is_core_tool(td.name):
                 namespace = td.name.split("__")[0] if "__" in td.name else "connector"
                 reconstruct = {"namespace": namespace, "tool_name": td.name}
-                idx.index_tool(td, tool_type="connector", namespace=namespace,
-                               reconstruct=reconstruct)
+                rows.append(idx.tool_row(td, tool_type="connector", namespace=namespace,
+                                         reconstruct=reconstruct))
+
+        idx.index_rows(rows)
 
     summary_config = settings.memory.summarization
 
@@ -438,6 +485,8 @@ async def create_sdk_loop(user_id: str, workspace_id: str = "personal", model: s
                 keep_tokens=summary_config.keep_tokens,
                 model=model_str,
                 on_summarize=_persist_summary,
+                background=summary_config.background,
+                soft_trigger_tokens=summary_config.soft_trigger_tokens,
             )
         )
 
@@ -580,7 +629,7 @@ async def run_sdk_agent(
     loop = await get_sdk_loop(user_id, workspace_id, model=model, provider_keys=provider_keys)
     register_user_loop(user_id, loop)
     try:
-        result = await loop.run(messages)
+        result = await loop.run(await _with_turn_context(user_id, messages))
         return result
     finally:
         unregister_user_loop(user_id)
@@ -597,7 +646,7 @@ async def run_sdk_agent_stream(
     register_user_loop(user_id, loop)
 
     try:
-        async for chunk in loop.run_stream(messages):
+        async for chunk in loop.run_stream(await _with_turn_context(user_id, messages)):
             yield chunk
     except Exception as e:
         logger.error("sdk_runner.stream_error", {"error": str(e)}, user_id=user_id)
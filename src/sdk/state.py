@@ -6,12 +6,58 @@ Uses a simple dataclass with an extra dict for extensibility.
 
 from __future__ import annotations
 
+from collections.abc import Callable
 from dataclasses import dataclass, field
 from typing import Any
 
 from src.sdk.messages import Message
 
 
+@dataclass
+class TokenLedger:
+    """Running token prefix sums over a message list.
+
+    prefix[i] is the token count of messages[:i]; pruned_prefix[i] is the same
+    count with old tool outputs replaced by placeholders (see
+    SummarizationMiddleware). Entries are tied to message identity, so an
+    append-only history is synced in O(new messages) and any rewrite of the
+    history only recounts from the first message that changed.
+    """
+
+    messages: list[Message] = field(default_factory=list)
+    prefix: list[int] = field(default_factory=lambda: [0])
+    pruned_prefix: list[int] = field(default_factory=lambda: [0])
+
+    def _common_prefix(self, messages: list[Message]) -> int:
+        tracked = self.messages
+        n = min(len(tracked), len(messages))
+        if n == 0:
+            return 0
+        # Fast path: the history was only appended to.
+        if tracked[0] is messages[0] and tracked[n - 1] is messages[n - 1]:
+            return n
+        for i in range(n):
+            if tracked[i] is not messages[i]:
+                return i
+        return n
+
+    def sync(self, messages: list[Message], count: Callable[[Message], tuple[int, int]]) -> None:
+        """Bring the ledger in line with messages.
+
+        count(msg) returns (raw_tokens, pruned_tokens) for a single message.
+        """
+        keep = self._common_prefix(messages)
+        if keep < len(self.messages):
+            del self.messages[keep:]
+            del self.prefix[keep + 1 :]
+            del self.pruned_prefix[keep + 1 :]
+        for msg in messages[keep:]:
+            raw, pruned = count(msg)
+            self.messages.append(msg)
+            self.prefix.append(self.prefix[-1] + raw)
+            self.pruned_prefix.append(self.pruned_prefix[-1] + pruned)
+
+
 @dataclass
 class AgentState:
     """State container for the agent loop.
@@ -20,10 +66,13 @@ class AgentState:
         messages: Conversation message history.
         extra: Arbitrary key-value state used by middleware
                (e.g., memory_context, skills_loaded, turn_count).
+        tokens: Token prefix sums over messages, maintained by
+                SummarizationMiddleware. Not serialized.
     """
 
     messages: list[Message] = field(default_factory=list)
     extra: dict[str, Any] = field(default_factory=dict)
+    tokens: TokenLedger = field(default_factory=TokenLedger, repr=False, compare=False)
 
     def get(self, key: str, default: Any = None) -> Any:
         return self.extra.get(key, default)
@@ -0,0 +1,232 @@
+"""Off-loop tool execution for the agent loop.
+
+Synchronous tools (httpx.get, IMAP, rglob, subprocess) must never run on the
+event loop thread — one slow call would stall every other user's stream.
+ToolExecutor routes each call based on its ToolDefinition/ToolAnnotations:
+
+    - coroutine tools      → awaited directly on the event loop
+    - sync tools           → bounded thread pool (default)
+    - cpu_bound=True tools → process pool (falls back to threads when the
+                             function can't be imported by a child process)
+
+Per-tool limits come from annotations:
+    - max_concurrency: at most N in-flight calls of that tool
+    - timeout_seconds: per-call timeout (overrides the executor default)
+
+Usage:
+    executor = get_tool_executor()
+    result = await executor.run(tool_def, {"url": "https://example.com"})
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import importlib
+import logging
+import multiprocessing
+import threading
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+from src.sdk.tools import ToolDefinition
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_THREADS = 16
+DEFAULT_MAX_PROCESSES = 2
+
+
+class ToolTimeoutError(Exception):
+    """Raised when a tool call exceeds its timeout."""
+
+    def __init__(self, tool_name: str, timeout: float):
+        self.tool_name = tool_name
+        self.timeout = timeout
+        super().__init__(f"Tool '{tool_name}' timed out after {timeout:g}s")
+
+
+@dataclass
+class ToolExecutorConfig:
+    """Sizing and timeout defaults for ToolExecutor.
+
+    default_timeout_seconds of None (or <= 0) means no timeout unless the
+    tool sets ToolAnnotations.timeout_seconds.
+    """
+
+    max_threads: int = DEFAULT_MAX_THREADS
+    max_processes: int = DEFAULT_MAX_PROCESSES
+    default_timeout_seconds: float | None = None
+
+
+def _invoke_by_reference(module_name: str, qualname: str, args: dict[str, Any]) -> Any:
+    """Process-pool entry point: re-import the tool and call it.
+
+    @tool replaces the module attribute with a ToolDefinition, so the raw
+    function can't be pickled by reference. The child re-imports the module
+    and resolves the attribute instead.
+    """
+    target: Any = importlib.import_module(module_name)
+    for part in qualname.split("."):
+        target = getattr(target, part)
+    if isinstance(target, ToolDefinition):
+        return target.invoke(args)
+    return target(**args)
+
+
+def _process_reference(tool_def: ToolDefinition) -> tuple[str, str] | None:
+    """Return (module, qualname) if a child process can import the tool function."""
+    func = tool_def.function
+    if func is None:
+        return None
+    module_name = getattr(func, "__module__", None)
+    qualname = getattr(func, "__qualname__", None)
+    if not module_name or not qualname or module_name == "__main__" or "<locals>" in qualname:
+        return None
+    return module_name, qualname
+
+
+class ToolExecutor:
+    """Runs tool calls off the event loop with per-tool limits.
+
+    Thread and process pools are created lazily and shared by every
+    AgentLoop in the process. Per-tool semaphores are kept per event loop,
+    since asyncio primitives can't be shared across loops.
+    """
+
+    def __init__(self, config: ToolExecutorConfig | None = None) -> None:
+        self.config = config or ToolExecutorConfig()
+        self._threads: ThreadPoolExecutor | None = None
+        self._processes: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._semaphores: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]
+        ] = weakref.WeakKeyDictionary()
+
+    def _thread_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(
+                    max_workers=max(1, self.config.max_threads),
+                    thread_name_prefix="ea-tool",
+                )
+            return self._threads
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(
+                    max_workers=max(1, self.config.max_processes),
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._processes
+
+    def _semaphore(self, tool_def: ToolDefinition) -> asyncio.Semaphore | None:
+        limit = tool_def.annotations.max_concurrency
+        if not limit or limit <= 0:
+            return None
+        loop = asyncio.get_running_loop()
+        per_loop = self._semaphores.setdefault(loop, {})
+        sem = per_loop.get(tool_def.name)
+        if sem is None:
+            sem = asyncio.Semaphore(limit)
+            per_loop[tool_def.name] = sem
+        return sem
+
+    def _timeout(self, tool_def: ToolDefinition) -> float | None:
+        timeout = tool_def.annotations.timeout_seconds
+        if timeout is None:
+            timeout = self.config.default_timeout_seconds
+        if timeout is None or timeout <= 0:
+            return None
+        return timeout
+
+    async def run(self, tool_def: ToolDefinition, args: dict[str, Any]) -> Any:
+        """Execute a tool call, honoring its concurrency limit and timeout.
+
+        Raises:
+            ToolTimeoutError: if the call exceeds its timeout.
+        """
+        sem = self._semaphore(tool_def)
+        if sem is None:
+            return await self._run_with_timeout(tool_def, args)
+        async with sem:
+            return await self._run_with_timeout(tool_def, args)
+
+    async def _run_with_timeout(self, tool_def: ToolDefinition, args: dict[str, Any]) -> Any:
+        timeout = self._timeout(tool_def)
+        if timeout is None:
+            return await self._dispatch(tool_def, args)
+        try:
+            return await asyncio.wait_for(self._dispatch(tool_def, args), timeout=timeout)
+        except TimeoutError:
+            # The worker thread keeps running to completion in the background;
+            # only the caller stops waiting for it.
+            logger.warning(f"tool_timeout tool={tool_def.name} timeout={timeout}")
+            raise ToolTimeoutError(tool_def.name, timeout) from None
+
+    async def _dispatch(self, tool_def: ToolDefinition, args: dict[str, Any]) -> Any:
+        if tool_def._coroutine:
+            return await tool_def.ainvoke(args)
+
+        loop = asyncio.get_running_loop()
+        if tool_def.annotations.cpu_bound:
+            ref = _process_reference(tool_def)
+            if ref is not None:
+                return await loop.run_in_executor(
+                    self._process_pool(), _invoke_by_reference, ref[0], ref[1], dict(args)
+                )
+            logger.debug(f"tool_executor.process_fallback tool={tool_def.name}")
+
+        # Copy the context so ContextVars (e.g. the current AgentLoop) are
+        # visible to the tool inside the worker thread.
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self._thread_pool(), functools.partial(ctx.run, tool_def.invoke, args)
+        )
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down both pools. A later run() recreates them lazily."""
+        with self._lock:
+            pools: list[Executor] = [p for p in (self._threads, self._processes) if p is not None]
+            self._threads = None
+            self._processes = None
+        for pool in pools:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_executor: ToolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_tool_executor() -> ToolExecutor:
+    """Return the process-wide ToolExecutor, sized from ToolsConfig."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            config = ToolExecutorConfig()
+            try:
+                from src.config import get_settings
+
+                tools_cfg = get_settings().tools
+                config = ToolExecutorConfig(
+                    max_threads=tools_cfg.executor_max_threads,
+                    max_processes=tools_cfg.executor_max_processes,
+                    default_timeout_seconds=tools_cfg.executor_timeout_seconds or None,
+                )
+            except Exception:
+                logger.debug("tool_executor.settings_unavailable", exc_info=True)
+            _executor = ToolExecutor(config)
+        return _executor
+
+
+def shutdown_tool_executor(wait: bool = True) -> None:
+    """Shut down the process-wide ToolExecutor (FastAPI lifespan exit)."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
@@ -10,8 +10,10 @@ from typing import Any
 from hybriddb import HybridDB
 
 from src.sdk.tools import ToolDefinition
+from src.storage.hybrid_bulk import EMBEDDING_MODEL_NAME, BatchEmbedder, bulk_upsert
 
 _RECONSTRUCT_EMPTY = "{}"
+_EMBEDDED_COLUMNS = ("description", "search_text", "definition_json")
 
 
 def _rebuild_custom_function(td: ToolDefinition, reconstruct: dict[str, Any]) -> ToolDefinition:
@@ -66,7 +68,12 @@ class ToolIndex:
     def __init__(self, db_dir: Path):
         self.db_dir = db_dir
         self.db_dir.mkdir(parents=True, exist_ok=True)
-        self.db = HybridDB(str(self.db_dir))
+        self._embedder = BatchEmbedder()
+        self.db = HybridDB(
+            str(self.db_dir),
+            embedding_fn=self._embedder,
+            embedding_model_name=EMBEDDING_MODEL_NAME,
+        )
         self.db.create_table(
             "tools",
             {
@@ -80,15 +87,15 @@ class ToolIndex:
             },
         )
 
-    def index_tool(
-        self,
+    @staticmethod
+    def tool_row(
         td: ToolDefinition,
         tool_type: str,
         namespace: str = "",
         reconstruct: dict[str, Any] | None = None,
-    ) -> None:
-        existing = self.db.query("tools", where="name = ?", params=(td.name,))
-        row = {
+    ) -> dict[str, Any]:
+        """Build the index row for a tool, for batching through index_rows()."""
+        return {
             "name": td.name,
             "description": td.description,
             "search_text": f"{td.name} {td.description}",
@@ -97,10 +104,19 @@ class ToolIndex:
             "definition_json": td.model_dump_json(exclude={"function"}),
             "reconstruct": json.dumps(reconstruct or {}),
         }
-        if existing:
-            self.db.update("tools", existing[0]["id"], row)
-        else:
-            self.db.insert("tools", row)
+
+    def index_rows(self, rows: list[dict[str, Any]]) -> dict[str, int]:
+        """Insert or update tool rows by name in one batch; unchanged rows are skipped."""
+        return bulk_upsert(self.db, "tools", "name", rows, self._embedder, _EMBEDDED_COLUMNS)
+
+    def index_tool(
+        self,
+        td: ToolDefinition,
+        tool_type: str,
+        namespace: str = "",
+        reconstruct: dict[str, Any] | None = None,
+    ) -> None:
+        self.index_rows([self.tool_row(td, tool_type, namespace, reconstruct)])
 
     def index_tools(
         self,
@@ -109,8 +125,7 @@ class ToolIndex:
         namespace: str = "",
         reconstruct: dict[str, Any] | None = None,
     ) -> None:
-        for td in tools:
-            self.index_tool(td, tool_type, namespace, reconstruct)
+        self.index_rows([self.tool_row(td, tool_type, namespace, reconstruct) for td in tools])
 
     def remove_tool(self, name: str) -> None:
         existing = self.db.query("tools", where="name = ?", params=(name,))
@@ -219,6 +234,11 @@ def save_source_hashes(hashes_path: Path, hashes: dict[str, str]) -> None:
     hashes_path.write_text(json.dumps(hashes, sort_keys=True))
 
 
+def invalidate_index(index_dir: Path) -> None:
+    """Forget the stored source hashes so the next get_or_create_index rebuilds."""
+    (index_dir / ".index_hashes.json").unlink(missing_ok=True)
+
+
 def needs_rebuild(
     tools_dir: Path,
     workspace_tools_dir: Path | None,
@@ -244,8 +264,10 @@ def get_or_create_index(
     Tools to index must be passed separately via index_tool()/index_tools() calls
     by the caller after creation.
     """
+    from src.sdk.file_watcher import watch_workspace
     from src.storage.paths import get_paths
 
+    watch_workspace(user_id, workspace_id)
     paths = get_paths(user_id=user_id, workspace_id=workspace_id)
     index_dir = index_dir or (paths.user_tools_dir() / ".index")
     hashes_path = index_dir / ".index_hashes.json"
@@ -7,25 +7,44 @@ Key compatibility:
     - @tool produces objects with .name, .description, .args, .invoke, .ainvoke
     - .invoke() and .ainvoke() accept a dict, returning the function result
     - .to_openai_format() / .to_anthropic_format() for LLM tool definitions
+      (memoized per tool; treat the returned dicts as read-only)
 """
 
 from __future__ import annotations
 
 import inspect
-from collections.abc import Callable
-from typing import Any, get_type_hints
+from collections.abc import Callable, Mapping
+from typing import Any, Literal, Self, cast, get_type_hints
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 
 class ToolAnnotations(BaseModel):
-    """Metadata about a tool's behavior for auto-approval and UI display."""
+    """Metadata about a tool's behavior for auto-approval and UI display.
+
+    Execution hints (not sent to the LLM, see ToolExecutor):
+      - cpu_bound: run sync calls in the process pool instead of threads
+      - max_concurrency: max in-flight calls of this tool (None = unlimited)
+      - timeout_seconds: per-call timeout (None = executor default)
+    """
 
     title: str | None = None
     read_only: bool = False
     destructive: bool = False
     idempotent: bool = False
     open_world: bool = False
+    cpu_bound: bool = False
+    max_concurrency: int | None = None
+    timeout_seconds: float | None = None
+
+
+_EXECUTION_HINTS = {"cpu_bound", "max_concurrency", "timeout_seconds"}
+
+SchemaFormat = Literal["openai", "anthropic"]
+
+# Bumped whenever a field of any ToolDefinition is reassigned, so registry
+# schema lists built before the change are rebuilt (see ToolRegistry.schemas).
+_tool_mutations = 0
 
 
 class ToolResult(BaseModel):
@@ -68,6 +87,7 @@ class ToolDefinition(BaseModel):
     output_schema: dict[str, Any] | None = None
     function: Callable[..., Any] | None = Field(default=None, exclude=True)
     _coroutine: Any | None = None
+    _schemas: dict[str, dict[str, Any]] = PrivateAttr(default_factory=dict)
 
     model_config = {"arbitrary_types_allowed": True}
 
@@ -77,6 +97,19 @@ class ToolDefinition(BaseModel):
         if func and inspect.iscoroutinefunction(func):
             self._coroutine = func
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        global _tool_mutations
+        super().__setattr__(name, value)
+        if not name.startswith("_"):
+            # Reassigning a field (e.g. tool.annotations = ...) drops memoized schemas
+            self._schemas.clear()
+            _tool_mutations += 1
+
+    def model_copy(self, *, update: Mapping[str, Any] | None = None, deep: bool = False) -> Self:
+        copied = super().model_copy(update=update, deep=deep)
+        copied._schemas = {}
+        return copied
+
     @property
     def args(self) -> dict[str, Any]:
         return self.parameters
@@ -99,7 +132,28 @@ class ToolDefinition(BaseModel):
             return await self._coroutine(**merged)
         return self.function(**merged)
 
+    def _schema_memo(self) -> dict[str, dict[str, Any]]:
+        # self._schemas goes through BaseModel.__getattr__, which costs more
+        # than building a schema; read pydantic's private storage directly.
+        private = cast(dict[str, Any], self.__pydantic_private__)
+        memo: dict[str, dict[str, Any]] = private["_schemas"]
+        return memo
+
     def to_openai_format(self) -> dict[str, Any]:
+        memo = self._schema_memo()
+        cached = memo.get("openai")
+        if cached is None:
+            cached = memo["openai"] = self._build_openai_format()
+        return cached
+
+    def to_anthropic_format(self) -> dict[str, Any]:
+        memo = self._schema_memo()
+        cached = memo.get("anthropic")
+        if cached is None:
+            cached = memo["anthropic"] = self._build_anthropic_format()
+        return cached
+
+    def _build_openai_format(self) -> dict[str, Any]:
         result: dict[str, Any] = {
             "type": "function",
             "function": {
@@ -109,12 +163,14 @@ class ToolDefinition(BaseModel):
             },
         }
         if self.annotations.title or self.annotations.read_only or self.annotations.destructive:
-            result["function"]["annotations"] = self.annotations.model_dump(exclude_none=True)
+            result["function"]["annotations"] = self.annotations.model_dump(
+                exclude_none=True, exclude=_EXECUTION_HINTS
+            )
         if self.output_schema:
             result["function"]["output_schema"] = self.output_schema
         return result
 
-    def to_anthropic_format(self) -> dict[str, Any]:
+    def _build_anthropic_format(self) -> dict[str, Any]:
         result: dict[str, Any] = {
             "name": self.name,
             "description": self.description,
@@ -237,10 +293,20 @@ class ToolRegistry:
     """Registry for tools available to an agent.
 
     Provides deduplication, lookup, and format conversion.
+
+    Per-provider schema lists are computed once per version; register() and
+    remove() bump the version, and reassigning a field of any tool
+    invalidates them too.
     """
 
     def __init__(self) -> None:
         self._tools: dict[str, ToolDefinition] = {}
+        self._version = 0
+        self._schema_cache: dict[str, tuple[tuple[int, int], list[dict[str, Any]]]] = {}
+
+    @property
+    def version(self) -> int:
+        return self._version
 
     def register(
         self, func_or_tool: Callable[..., Any] | ToolDefinition, *, name: str | None = None
@@ -264,6 +330,7 @@ class ToolRegistry:
         if td.name in self._tools:
             raise ValueError(f"Tool '{td.name}' already registered")
         self._tools[td.name] = td
+        self._version += 1
         return td
 
     def get(self, name: str) -> ToolDefinition | None:
@@ -281,14 +348,33 @@ class ToolRegistry:
     def remove(self, name: str) -> bool:
         if name in self._tools:
             del self._tools[name]
+            self._version += 1
             return True
         return False
 
+    def schemas(self, fmt: SchemaFormat) -> list[dict[str, Any]]:
+        """Tool schemas in a provider's format, cached until the tools change.
+
+        The returned list is shared; do not mutate it.
+        """
+        key = (self._version, _tool_mutations)
+        cached = self._schema_cache.get(fmt)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        if fmt == "openai":
+            result = [td.to_openai_format() for td in self._tools.values()]
+        elif fmt == "anthropic":
+            result = [td.to_anthropic_format() for td in self._tools.values()]
+        else:
+            raise ValueError(f"Unknown schema format: {fmt}")
+        self._schema_cache[fmt] = (key, result)
+        return result
+
     def to_openai_format(self) -> list[dict[str, Any]]:
-        return [td.to_openai_format() for td in self._tools.values()]
+        return list(self.schemas("openai"))
 
     def to_anthropic_format(self) -> list[dict[str, Any]]:
-        return [td.to_anthropic_format() for td in self._tools.values()]
+        return list(self.schemas("anthropic"))
 
     def __len__(self) -> int:
         return len(self._tools)
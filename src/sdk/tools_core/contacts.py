@@ -1,5 +1,7 @@
 """Contacts tools — SDK-native implementation."""
 
+from datetime import UTC, datetime
+
 from src.app_logging import get_logger
 from src.sdk.tools import ToolAnnotations, tool
 from src.sdk.tools_core.contacts_storage import add_contact as storage_add_contact
@@ -96,6 +98,16 @@ Email: {contact.get("email")}
     if contact.get("tags"):
         output += "Tags: " + ", ".join(contact["tags"]) + "\n"
 
+    if contact.get("email_count"):
+        output += (
+            f"Emails: {contact['email_count']} "
+            f"({contact.get('sent_count') or 0} sent to, "
+            f"{contact.get('received_count') or 0} received from)\n"
+        )
+        if contact.get("last_seen"):
+            last = datetime.fromtimestamp(contact["last_seen"], UTC).strftime("%Y-%m-%d")
+            output += f"Last Email: {last}\n"
+
     output += f"\nSource: {contact.get('source')}\n"
     output += f"ID: {contact.get('id')}\n"
 
@@ -214,10 +226,10 @@ contacts_delete.annotations = ToolAnnotations(title="Delete Contact", destructiv
 
 @tool
 def contacts_search(query: str, limit: int = 20, user_id: str = "") -> str:
-    """Search contacts by name, email, or company.
+    """Search contacts by name, email, or company, tolerating typos.
 
     Args:
-        query: Search query
+        query: Search query (names, parts of an address, or a company)
         limit: Max results (default: 20)
         user_id: User ID (REQUIRED)
 
@@ -244,6 +256,10 @@ def contacts_search(query: str, limit: int = 20, user_id: str = "") -> str:
         output += f"{i}. {name} - {email}"
         if company:
             output += f" ({company})"
+        if c.get("email_count"):
+            output += f" - {c['email_count']} emails"
+        if c.get("match") == "fuzzy":
+            output += " [approximate match]"
         output += "\n"
 
     return output.strip()
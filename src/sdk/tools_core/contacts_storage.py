@@ -1,10 +1,12 @@
 """Contacts storage and parsing from email."""
 
+import re
 import uuid
+from collections.abc import Iterable
 from datetime import UTC, datetime
 from typing import Any
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import bindparam, create_engine, text
 
 from src.app_logging import get_logger
 
@@ -12,6 +14,20 @@ logger = get_logger()
 
 _engines: dict[str, object] = {}
 
+# Interaction stats kept on email contacts, summed across sync batches.
+_STAT_COLUMNS = ("email_count", "sent_count", "received_count")
+_LOOKUP_CHUNK = 500
+
+# Columns indexed by contacts_fts, in FTS column order, and their BM25 weights.
+# The last FTS column, words, holds every name/company/email word padded as
+# ^word$ so typo candidates can be found by shared (edge) trigrams.
+SEARCH_COLUMNS = ("name", "first_name", "last_name", "company", "email")
+SEARCH_WEIGHTS = (10.0, 6.0, 6.0, 3.0, 4.0, 1.0)
+# An interaction boost of up to 2x: bm25 * (1 + n / (n + _FREQUENCY_HALF)).
+_FREQUENCY_HALF = 10.0
+_FUZZY_CANDIDATES = 200
+_WORD_SPLIT = re.compile(r"[\s@.,_+\-]+")
+
 
 def get_db_path(user_id: str) -> str:
     """Get SQLite database path for user."""
@@ -75,12 +91,171 @@ def _init_db(engine: Any) -> None:
         """)
         )
 
+        # Messages whose interaction stats are already in contacts (see save_contacts).
+        conn.execute(
+            text("""
+            CREATE TABLE IF NOT EXISTS contact_messages (
+                account_id TEXT NOT NULL,
+                message_key TEXT NOT NULL,
+                PRIMARY KEY (account_id, message_key)
+            )
+        """)
+        )
+
         conn.execute(text("CREATE INDEX IF NOT EXISTS idx_contacts_email ON contacts(email)"))
         conn.execute(text("CREATE INDEX IF NOT EXISTS idx_contacts_name ON contacts(name)"))
 
+        columns = {row[1] for row in conn.execute(text("PRAGMA table_info(contacts)"))}
+        for column, ddl in (
+            *((c, "INTEGER DEFAULT 0") for c in _STAT_COLUMNS),
+            ("first_seen", "INTEGER"),
+            ("last_seen", "INTEGER"),
+        ):
+            if column not in columns:
+                conn.execute(text(f"ALTER TABLE contacts ADD COLUMN {column} {ddl}"))
+
+        _init_unique_email_index(conn)
+        _init_search_index(conn)
+        conn.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS idx_contact_emails_contact "
+                "ON contact_emails(contact_id)"
+            )
+        )
+
         conn.commit()
 
 
+def _init_unique_email_index(conn: Any) -> None:
+    """Create the (email, source) unique index save_contacts upserts on.
+
+    Databases from before the index may hold duplicate rows (concurrent syncs
+    could both insert an address); keep the oldest of each, move the others'
+    tags and extra emails onto it and drop them.
+    """
+    exists = conn.execute(
+        text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' "
+            "AND name = 'idx_contacts_email_source'"
+        )
+    ).fetchone()
+    if exists:
+        return
+    # (dup, keep): each duplicate row's id and the id of the row that stays.
+    merges = (
+        "SELECT c.id AS dup, k.id AS keep FROM contacts c JOIN contacts k ON k.rowid = "
+        "(SELECT MIN(rowid) FROM contacts WHERE email = c.email AND source IS c.source) "
+        "WHERE c.rowid != k.rowid"
+    )
+    conn.execute(
+        text(f"""
+        INSERT INTO contact_tags (contact_id, tag)
+        SELECT DISTINCT m.keep, t.tag FROM contact_tags t JOIN ({merges}) m ON t.contact_id = m.dup
+        WHERE NOT EXISTS (SELECT 1 FROM contact_tags WHERE contact_id = m.keep AND tag = t.tag)
+    """)
+    )
+    conn.execute(
+        text(f"""
+        UPDATE contact_emails SET is_primary = 0,
+            contact_id = (SELECT keep FROM ({merges}) WHERE dup = contact_emails.contact_id)
+        WHERE contact_id IN (SELECT dup FROM ({merges}))
+          AND NOT EXISTS (
+            SELECT 1 FROM contact_emails e JOIN ({merges}) m ON e.contact_id = m.keep
+            WHERE m.dup = contact_emails.contact_id AND e.email = contact_emails.email
+          )
+    """)
+    )
+    duplicates = f"SELECT dup FROM ({merges})"
+    for table in ("contact_emails", "contact_tags"):
+        conn.execute(text(f"DELETE FROM {table} WHERE contact_id IN ({duplicates})"))
+    conn.execute(text(f"DELETE FROM contacts WHERE id IN ({duplicates})"))
+    conn.execute(text("CREATE UNIQUE INDEX idx_contacts_email_source ON contacts(email, source)"))
+
+
+def _words_sql(row: str) -> str:
+    """SQL for the words column of a contacts row (``new`` or ``old``)."""
+    expr = (
+        f"lower(coalesce({row}.name, '') || ' ' || coalesce({row}.company, '') "
+        f"|| ' ' || {row}.email)"
+    )
+    for separator in "@.,_+-":
+        expr = f"replace({expr}, '{separator}', ' ')"
+    return f"'^' || replace({expr}, ' ', '$ ^') || '$'"
+
+
+def _init_search_index(conn: Any) -> None:
+    """Create the contacts_fts trigram index and the triggers that keep it in sync.
+
+    contacts_fts is a contentless FTS5 table keyed by contacts' rowid: the
+    trigram tokenizer makes any 3+ character substring query an index lookup,
+    and being contentless keeps the extra words column out of contacts.
+    Contentless tables can only delete entries given the indexed values, so
+    every change must go through the triggers (plain INSERT/UPDATE/DELETE or
+    ON CONFLICT DO UPDATE; never INSERT OR REPLACE).
+    """
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'contacts_fts'")
+    ).fetchone()
+    columns = ", ".join((*SEARCH_COLUMNS, "words"))
+    new_values = ", ".join((*(f"new.{c}" for c in SEARCH_COLUMNS), _words_sql("new")))
+    old_values = ", ".join((*(f"old.{c}" for c in SEARCH_COLUMNS), _words_sql("old")))
+    changed = " OR ".join(f"old.{c} IS NOT new.{c}" for c in SEARCH_COLUMNS)
+
+    conn.execute(
+        text(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5(
+            {columns}, content='', tokenize='trigram'
+        )
+    """)
+    )
+    conn.execute(
+        text(f"""
+        CREATE TRIGGER IF NOT EXISTS contacts_fts_ai AFTER INSERT ON contacts BEGIN
+            INSERT INTO contacts_fts(rowid, {columns}) VALUES (new.rowid, {new_values});
+        END
+    """)
+    )
+    conn.execute(
+        text(f"""
+        CREATE TRIGGER IF NOT EXISTS contacts_fts_ad AFTER DELETE ON contacts BEGIN
+            INSERT INTO contacts_fts(contacts_fts, rowid, {columns})
+            VALUES ('delete', old.rowid, {old_values});
+        END
+    """)
+    )
+    # Sync upserts touch name on every batch; only reindex when text changed.
+    conn.execute(
+        text(f"""
+        CREATE TRIGGER IF NOT EXISTS contacts_fts_au
+        AFTER UPDATE OF {", ".join(SEARCH_COLUMNS)} ON contacts WHEN {changed} BEGIN
+            INSERT INTO contacts_fts(contacts_fts, rowid, {columns})
+            VALUES ('delete', old.rowid, {old_values});
+            INSERT INTO contacts_fts(rowid, {columns}) VALUES (new.rowid, {new_values});
+        END
+    """)
+    )
+    if not exists:
+        _populate_search_index(conn)
+
+
+def _populate_search_index(conn: Any) -> None:
+    columns = ", ".join((*SEARCH_COLUMNS, "words"))
+    values = ", ".join((*(f"c.{c}" for c in SEARCH_COLUMNS), _words_sql("c")))
+    conn.execute(
+        text(f"INSERT INTO contacts_fts(rowid, {columns}) SELECT c.rowid, {values} FROM contacts c")
+    )
+
+
+def rebuild_search_index(user_id: str) -> int:
+    """Rebuild contacts_fts from the contacts table; returns the number of contacts indexed."""
+    engine = get_engine(user_id)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO contacts_fts(contacts_fts) VALUES ('delete-all')"))
+        _populate_search_index(conn)
+        conn.execute(text("INSERT INTO contacts_fts(contacts_fts) VALUES ('optimize')"))
+        return int(conn.execute(text("SELECT COUNT(*) FROM contacts")).scalar() or 0)
+
+
 def parse_name_from_email(email: str) -> tuple[str | None, str | None]:
     """Parse first/last name from email address."""
     local = email.split("@")[0] if "@" in email else email
@@ -139,77 +314,137 @@ def parse_contacts_from_email(
     return contacts
 
 
+_COUNTED_MESSAGES = text(
+    "SELECT message_key FROM contact_messages "
+    "WHERE account_id = :account_id AND message_key IN :keys"
+).bindparams(bindparam("keys", expanding=True))
+
+_RECORD_MESSAGE = text(
+    "INSERT OR IGNORE INTO contact_messages (account_id, message_key) "
+    "VALUES (:account_id, :message_key)"
+)
+
+_EXISTING_EMAIL_CONTACTS = text(
+    "SELECT email FROM contacts WHERE source = 'email' AND email IN :emails"
+).bindparams(bindparam("emails", expanding=True))
+
+# Name is only filled in when missing; stats are added to what is stored.
+_UPSERT_EMAIL_CONTACT = text("""
+    INSERT INTO contacts
+    (id, email, name, first_name, last_name, source, email_account, created_at,
+     email_count, sent_count, received_count, first_seen, last_seen)
+    VALUES (:id, :email, :name, :first_name, :last_name, 'email', :email_account, :now,
+            :email_count, :sent_count, :received_count, :first_seen, :last_seen)
+    ON CONFLICT (email, source) DO UPDATE SET
+        name = COALESCE(contacts.name, excluded.name),
+        updated_at = CASE WHEN contacts.name IS NULL AND excluded.name IS NOT NULL
+                          THEN :now ELSE contacts.updated_at END,
+        email_count = COALESCE(contacts.email_count, 0) + excluded.email_count,
+        sent_count = COALESCE(contacts.sent_count, 0) + excluded.sent_count,
+        received_count = COALESCE(contacts.received_count, 0) + excluded.received_count,
+        first_seen = MIN(COALESCE(contacts.first_seen, excluded.first_seen),
+                         COALESCE(excluded.first_seen, contacts.first_seen)),
+        last_seen = MAX(COALESCE(contacts.last_seen, excluded.last_seen),
+                        COALESCE(excluded.last_seen, contacts.last_seen))
+""")
+
+_LINK_PRIMARY_EMAIL = text("""
+    INSERT INTO contact_emails (id, contact_id, email, is_primary)
+    SELECT :id, id, email, 1 FROM contacts WHERE email = :email AND source = 'email'
+""")
+
+
+def _merge_contacts(
+    account_id: str, contacts: Iterable[dict[str, Any]]
+) -> dict[str, dict[str, Any]]:
+    """Collapse a batch to one entry per address: first name seen wins, stats are summed."""
+    merged: dict[str, dict[str, Any]] = {}
+    for contact in contacts:
+        email = (contact.get("email") or "").strip().lower()
+        if not email:
+            continue
+        ts = contact.get("timestamp")
+        entry = merged.get(email)
+        if entry is None:
+            entry = merged[email] = {
+                "email": email,
+                "name": None,
+                "email_account": account_id,
+                "first_seen": ts,
+                "last_seen": ts,
+                **dict.fromkeys(_STAT_COLUMNS, 0),
+            }
+        if contact.get("name") and not entry["name"]:
+            entry["name"] = contact["name"]
+        for column in _STAT_COLUMNS:
+            entry[column] += contact.get(column, 0)
+        if ts is not None:
+            entry["first_seen"] = min(entry["first_seen"] or ts, ts)
+            entry["last_seen"] = max(entry["last_seen"] or ts, ts)
+    for entry in merged.values():
+        first_name, last_name = parse_name_from_email(entry["email"])
+        if entry["name"]:
+            parts = entry["name"].split()
+            first_name = parts[0]
+            last_name = " ".join(parts[1:]) if len(parts) > 1 else None
+        entry["first_name"], entry["last_name"] = first_name, last_name
+    return merged
+
+
 def save_contacts(user_id: str, account_id: str, contacts: list[dict[str, Any]]) -> int:
-    """Save contacts to database, returns count of new contacts."""
+    """Save contacts to database, returns count of new contacts.
+
+    The batch is deduplicated by address in memory, then written with one
+    existence lookup and one INSERT ... ON CONFLICT (email, source) for
+    all of it. Contacts may carry email_count, sent_count and
+    received_count increments and a message ``timestamp``, which update the
+    stored interaction stats.
+
+    Contacts may also carry the ``message_key`` they were taken from. Keys
+    are recorded in contact_messages in the same transaction, and contacts
+    from an already recorded message are skipped, so saving a message twice
+    (a retried sync batch) never counts it twice.
+    """
     if not contacts:
         return 0
-
     engine = get_engine(user_id)
-    new_count = 0
-
-    with engine.connect() as conn:
-        for contact in contacts:
-            email = contact.get("email", "").lower()
-            if not email:
-                continue
-
-            existing = conn.execute(
-                text("SELECT id, name FROM contacts WHERE email = :email AND source = 'email'"),
-                {"email": email},
-            ).fetchone()
-
-            if existing:
-                if contact.get("name") and not existing[1]:
-                    conn.execute(
-                        text("""
-                            UPDATE contacts SET name = :name, updated_at = :updated_at
-                            WHERE id = :id
-                        """),
-                        {
-                            "name": contact["name"],
-                            "updated_at": int(datetime.now(UTC).timestamp()),
-                            "id": existing[0],
-                        },
-                    )
-                continue
-
-            contact_id = str(uuid.uuid4())
-            conn.execute(
-                text("""
-                    INSERT INTO contacts
-                    (id, email, name, first_name, last_name, source, email_account, created_at)
-                    VALUES (:id, :email, :name, :first_name, :last_name, :source, :email_account, :created_at)
-                """),
-                {
-                    "id": contact_id,
-                    "email": email,
-                    "name": contact.get("name"),
-                    "first_name": contact.get("first_name"),
-                    "last_name": contact.get("last_name"),
-                    "source": "email",
-                    "email_account": account_id,
-                    "created_at": int(datetime.now(UTC).timestamp()),
-                },
-            )
-
+    now = int(datetime.now(UTC).timestamp())
+
+    with engine.begin() as conn:
+        keys = list(dict.fromkeys(c["message_key"] for c in contacts if c.get("message_key")))
+        if keys:
+            counted: set[str] = set()
+            for i in range(0, len(keys), _LOOKUP_CHUNK):
+                params = {"account_id": account_id, "keys": keys[i : i + _LOOKUP_CHUNK]}
+                counted.update(r[0] for r in conn.execute(_COUNTED_MESSAGES, params))
+            contacts = [c for c in contacts if c.get("message_key") not in counted]
+            new_keys = [k for k in keys if k not in counted]
+            if new_keys:
+                conn.execute(
+                    _RECORD_MESSAGE,
+                    [{"account_id": account_id, "message_key": k} for k in new_keys],
+                )
+
+        merged = _merge_contacts(account_id, contacts)
+        if not merged:
+            return 0
+        emails = list(merged)
+        existing: set[str] = set()
+        for i in range(0, len(emails), _LOOKUP_CHUNK):
+            chunk = emails[i : i + _LOOKUP_CHUNK]
+            existing.update(r[0] for r in conn.execute(_EXISTING_EMAIL_CONTACTS, {"emails": chunk}))
+        conn.execute(
+            _UPSERT_EMAIL_CONTACT,
+            [{**entry, "id": str(uuid.uuid4()), "now": now} for entry in merged.values()],
+        )
+        new = [email for email in emails if email not in existing]
+        if new:
             conn.execute(
-                text("""
-                    INSERT INTO contact_emails (id, contact_id, email, is_primary)
-                    VALUES (:id, :contact_id, :email, 1)
-                """),
-                {
-                    "id": str(uuid.uuid4()),
-                    "contact_id": contact_id,
-                    "email": email,
-                },
+                _LINK_PRIMARY_EMAIL, [{"id": str(uuid.uuid4()), "email": email} for email in new]
             )
 
-            new_count += 1
-
-        conn.commit()
-
-    logger.info("contacts_parsed", {"new": new_count}, user_id=user_id)
-    return new_count
+    logger.info("contacts_parsed", {"new": len(new), "seen": len(merged)}, user_id=user_id)
+    return len(new)
 
 
 def get_contacts(user_id: str, limit: int = 50, offset: int = 0) -> list[dict[str, Any]]:
@@ -405,22 +640,169 @@ def delete_contact(user_id: str, contact_id: str | None = None, email: str | Non
     return {"success": True}
 
 
+def _phrase(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _trigrams(word: str) -> set[str]:
+    return {word[i : i + 3] for i in range(len(word) - 2)}
+
+
+def _edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance counting an adjacent transposition as one edit."""
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if before and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+    return current[-1]
+
+
+def _max_typos(word: str) -> int:
+    return 0 if len(word) < 4 else 1 if len(word) < 8 else 2
+
+
+def _word_distance(word: str, contact_word: str) -> float:
+    # Matching only a prefix costs an extra half typo, so "jonh" prefers
+    # John over Jones.
+    prefix = _edit_distance(word, contact_word[: len(word)]) + 0.5
+    if abs(len(word) - len(contact_word)) >= prefix:
+        return prefix
+    return min(_edit_distance(word, contact_word), prefix)
+
+
+def _fuzzy_distance(
+    words: list[str], contact_words: set[str], cache: dict[tuple[str, str], float]
+) -> float | None:
+    """Total typos for every query word to match (a prefix of) some contact word."""
+    total = 0.0
+    for word in words:
+        best = None
+        for contact_word in contact_words:
+            key = (word, contact_word)
+            if key not in cache:
+                cache[key] = _word_distance(word, contact_word)
+            if best is None or cache[key] < best:
+                best = cache[key]
+        if best is None or int(best) > _max_typos(word):
+            return None
+        total += best
+    return total
+
+
+_SEARCH_SELECT = """
+    SELECT c.id, c.email, c.name, c.first_name, c.last_name, c.company, c.phone,
+           c.source, c.created_at, COALESCE(c.email_count, 0) AS email_count,
+           bm25(contacts_fts, {weights})
+               * (1.0 + COALESCE(c.email_count, 0) / (COALESCE(c.email_count, 0) + {half}))
+               AS score
+    FROM contacts_fts
+    JOIN contacts c ON c.rowid = contacts_fts.rowid
+    WHERE contacts_fts MATCH :match
+    ORDER BY score, c.name
+    LIMIT :limit
+"""
+
+
 def search_contacts(user_id: str, query: str, limit: int = 20) -> list[dict[str, Any]]:
-    """Search contacts by name, email, company. Case-insensitive."""
+    """Search contacts by name, email, company. Case-insensitive, typo-tolerant.
+
+    Every query word must appear in some field: words of 3+ characters as a
+    substring, shorter ones as a word prefix. Matches are ranked by BM25
+    (name above email above company) boosted by how often the contact is
+    emailed. When that finds fewer than ``limit`` contacts, contacts whose
+    words are within one or two typos of the query fill the rest, marked
+    ``match="fuzzy"`` (others are ``match="exact"``).
+    """
     engine = get_engine(user_id)
-    pattern = f"%{query}%"
+    words = [w for w in _WORD_SPLIT.split(query.lower()) if w]
+    terms = query.split()
+    if not words:
+        return []
+    if any(len(w) < 2 for w in words):
+        return _like_search(engine, query, limit)
+
+    fields = "{" + " ".join(SEARCH_COLUMNS) + "}"
+    match = " AND ".join(
+        f"{fields} : {_phrase(t)}" if len(t) >= 3 else f"words : {_phrase('^' + t.lower())}"
+        for t in terms
+        if len(t) >= 2
+    )
+    sql = text(
+        _SEARCH_SELECT.format(
+            weights=", ".join(str(w) for w in SEARCH_WEIGHTS), half=_FREQUENCY_HALF
+        )
+    )
+    with engine.connect() as conn:
+        results = [
+            {**dict(row._mapping), "match": "exact"}
+            for row in conn.execute(sql, {"match": match, "limit": limit})
+        ]
+        if len(results) >= limit or not any(_max_typos(w) for w in words):
+            return results
+
+        # Candidates share an edge or inner trigram with the query words or
+        # with any one-letter deletion of them (covers swaps and insertions).
+        grams: set[str] = set()
+        for word in words:
+            for variant in {word, *(word[:i] + word[i + 1 :] for i in range(len(word)))}:
+                grams |= _trigrams(f"^{variant}$")
+        # Rank candidates on the index alone; joining contacts for all of a
+        # broad OR match costs more than loading the few that are kept.
+        match = "words : (" + " OR ".join(sorted(map(_phrase, grams))) + ")"
+        rowids = list(
+            conn.execute(
+                text(
+                    "SELECT rowid FROM contacts_fts WHERE contacts_fts MATCH :match "
+                    "ORDER BY bm25(contacts_fts) LIMIT :limit"
+                ),
+                {"match": match, "limit": _FUZZY_CANDIDATES},
+            ).scalars()
+        )
+        if not rowids:
+            return results
+        candidates = conn.execute(
+            text(
+                "SELECT id, email, name, first_name, last_name, company, phone, source, "
+                "created_at, COALESCE(email_count, 0) AS email_count "
+                "FROM contacts WHERE rowid IN :rowids"
+            ).bindparams(bindparam("rowids", expanding=True)),
+            {"rowids": rowids},
+        ).fetchall()
 
+    seen = {r["id"] for r in results}
+    distances: dict[tuple[str, str], float] = {}
+    fuzzy = []
+    for row in candidates:
+        contact = dict(row._mapping)
+        if contact["id"] in seen:
+            continue
+        text_fields = " ".join(str(contact.get(c) or "") for c in SEARCH_COLUMNS).lower()
+        distance = _fuzzy_distance(words, set(_WORD_SPLIT.split(text_fields)) - {""}, distances)
+        if distance is not None:
+            fuzzy.append((distance, -contact["email_count"], {**contact, "match": "fuzzy"}))
+    fuzzy.sort(key=lambda item: item[:2])
+    return results + [contact for *_, contact in fuzzy[: limit - len(results)]]
+
+
+def _like_search(engine: Any, query: str, limit: int) -> list[dict[str, Any]]:
+    """Substring scan for queries with one-letter words, which trigrams can't index."""
+    pattern = f"%{query}%"
     with engine.connect() as conn:
         result = conn.execute(
             text("""
-                SELECT id, email, name, first_name, last_name, company, phone, source, created_at
+                SELECT id, email, name, first_name, last_name, company, phone, source, created_at,
+                       COALESCE(email_count, 0) AS email_count, 'exact' AS match
                 FROM contacts
                 WHERE name LIKE :pattern COLLATE NOCASE
                    OR email LIKE :pattern COLLATE NOCASE
                    OR company LIKE :pattern COLLATE NOCASE
                    OR first_name LIKE :pattern COLLATE NOCASE
                    OR last_name LIKE :pattern COLLATE NOCASE
-                ORDER BY name ASC
+                ORDER BY email_count DESC, name ASC
                 LIMIT :limit
             """),
             {"pattern": pattern, "limit": limit},
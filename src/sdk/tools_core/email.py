@@ -19,8 +19,11 @@ from src.sdk.tools_core.email_db import (
     get_engine,
     load_accounts,
     save_account,
+    search_emails,
 )
 from src.sdk.tools_core.email_sync import start_background_sync
+from src.sdk.tools_core.email_threads import find_thread_id, get_thread
+from src.sdk.tools_core.imap_sync import load_folder_states
 
 logger = get_logger()
 SETTINGS = get_settings()
@@ -165,10 +168,19 @@ def email_accounts(user_id: str = "") -> str:
     if not accounts:
         return "No email accounts connected. Use email_connect to add one."
 
+    engine = get_engine(user_id)
     output = "Connected email accounts:\n"
     for acc in accounts.values():
         output += f"- {acc['name']}: {acc['email']} ({acc['provider']})\n"
         output += f"  Status: {acc['status']}, Folders: {acc.get('folders', [])}\n"
+        backfill = [
+            f"{folder} {'complete' if state.backfill_uid == 0 else 'in progress'}"
+            f" ({state.backfill_fetched} fetched)"
+            for folder, state in load_folder_states(engine, acc["id"]).items()
+            if state.backfill_uid is not None
+        ]
+        if backfill:
+            output += f"  Backfill: {', '.join(backfill)}\n"
 
     return output
 
@@ -339,25 +351,37 @@ Subject: {row["subject"]}
 email_get.annotations = ToolAnnotations(title="Get Email", read_only=True, idempotent=True)
 
 
+def _parse_date(date_str: str) -> int | None:
+    """YYYY-MM-DD (UTC) to a Unix timestamp; None if empty."""
+    if not date_str:
+        return None
+    return int(datetime.strptime(date_str, "%Y-%m-%d").replace(tzinfo=UTC).timestamp())
+
+
 @tool
 def email_search(
     query: str = "",
     account_name: str = "",
     folder: str = "INBOX",
+    since: str = "",
+    until: str = "",
     limit: int = 20,
     user_id: str = "",
 ) -> str:
-    """Search emails by subject or sender.
+    """Search emails by subject, sender, recipients and body, best matches first.
 
     Args:
-        query: Search query (matches subject or sender)
-        account_name: Account name to search
-        folder: Folder to search (default: INBOX)
+        query: Search words (all must match). Use "quoted phrases", a trailing *
+            for prefixes (e.g. invoi*), and OR between alternatives.
+        account_name: Account name to search (empty: all accounts)
+        folder: Folder to search (default: INBOX, empty: all folders)
+        since: Only emails on or after this date (YYYY-MM-DD)
+        until: Only emails before this date (YYYY-MM-DD)
         limit: Max results (default: 20, max: 100)
         user_id: User ID (REQUIRED)
 
     Returns:
-        Matching emails
+        Matching emails with a snippet of the matched text
     """
     if not user_id:
         return "Error: user_id is required."
@@ -365,63 +389,146 @@ def email_search(
     if not query:
         return "Error: query is required."
 
-    account_id = get_account_id_by_name(account_name, user_id)
-    if not account_id:
-        return f"Error: Account '{account_name}' not found."
-
-    engine = get_engine(user_id)
-    limit = min(limit, 100)
-    search_pattern = f"%{query}%"
-
-    with engine.connect() as conn:
-        result = conn.execute(
-            text("""
-                SELECT message_id, from_addr, from_name, subject, timestamp,
-                       read, flagged, has_attachments
-                FROM emails
-                WHERE account_id = :account_id
-                  AND folder = :folder
-                  AND (subject LIKE :query OR from_addr LIKE :query OR from_name LIKE :query)
-                ORDER BY timestamp DESC
-                LIMIT :limit
-            """),
-            {
-                "account_id": account_id,
-                "folder": folder,
-                "query": search_pattern,
-                "limit": limit,
-            },
-        )
+    account_id = None
+    if account_name:
+        account_id = get_account_id_by_name(account_name, user_id)
+        if not account_id:
+            return f"Error: Account '{account_name}' not found."
 
-        rows = result.fetchall()
+    try:
+        since_ts = _parse_date(since)
+        until_ts = _parse_date(until)
+    except ValueError:
+        return "Error: since/until must be dates in YYYY-MM-DD format."
+
+    rows = search_emails(
+        get_engine(user_id),
+        query,
+        account_id=account_id,
+        folder=folder or None,
+        since=since_ts,
+        until=until_ts,
+        limit=min(limit, 100),
+    )
 
+    where = folder or "all folders"
     if not rows:
-        return f"No emails matching '{query}' in {folder}."
+        return f"No emails matching '{query}' in {where}."
 
-    output = f"Found {len(rows)} emails matching '{query}' in {folder}:\n\n"
+    output = f"Found {len(rows)} emails matching '{query}' in {where}:\n\n"
     for i, row in enumerate(rows, 1):
-        msg_id, from_addr, from_name, subject, ts, read, flagged, has_attach = row
-        read_str = "📭" if not read else "📬"
-        flag_str = "⭐" if flagged else ""
-        attach_str = "📎" if has_attach else ""
+        read_str = "📭" if not row["read"] else "📬"
+        flag_str = "⭐" if row["flagged"] else ""
+        attach_str = "📎" if row["has_attachments"] else ""
 
-        from_display = from_name or from_addr
+        from_display = row["from_name"] or row["from_addr"]
+        subject = row["subject"]
         subject_preview = (
             (subject[:50] + "...") if subject and len(subject) > 50 else subject or "(No subject)"
         )
 
+        ts = row["timestamp"]
         date_str = datetime.fromtimestamp(ts, UTC).strftime("%Y-%m-%d %H:%M") if ts else "Unknown"
+        if not folder:
+            date_str += f" ({row['folder']})"
 
         output += f"{i}. {read_str}{flag_str}{attach_str} {from_display}\n"
         output += f"   {subject_preview}\n"
         output += f"   {date_str}\n"
-        output += f"   ID: {msg_id}\n\n"
+        if row["snippet"]:
+            output += f"   {' '.join(row['snippet'].split())}\n"
+        output += f"   ID: {row['message_id']}\n\n"
 
     return output.strip()
 
 
 email_search.annotations = ToolAnnotations(title="Search Emails", read_only=True)
 
+# Per-message body budget in email_thread output, after quoted lines are dropped.
+THREAD_BODY_CHARS = 2000
+
+
+def _unquoted(body: str) -> str:
+    lines = [line for line in body.splitlines() if not line.lstrip().startswith(">")]
+    text_ = "\n".join(lines).strip()
+    if len(text_) > THREAD_BODY_CHARS:
+        text_ = text_[:THREAD_BODY_CHARS] + "..."
+    return text_
+
+
+@tool
+def email_thread(
+    account_name: str,
+    email_id: str = "",
+    thread_id: str = "",
+    folder: str = "INBOX",
+    limit: int = 20,
+    user_id: str = "",
+) -> str:
+    """Get a whole email conversation in one call, oldest message first.
+
+    Args:
+        account_name: Account name
+        email_id: ID of any email in the thread (from email_list or email_search)
+        thread_id: Thread ID, instead of email_id
+        folder: Folder of email_id (default: INBOX)
+        limit: Max messages, most recent kept (default: 20, max: 100)
+        user_id: User ID (REQUIRED)
+
+    Returns:
+        Thread summary and each message's sender, date and text (quoted lines removed)
+    """
+    if not user_id:
+        return "Error: user_id is required."
+
+    if not email_id and not thread_id:
+        return "Error: email_id or thread_id is required."
+
+    account_id = get_account_id_by_name(account_name, user_id)
+    if not account_id:
+        return f"Error: Account '{account_name}' not found."
+
+    engine = get_engine(user_id)
+    if not thread_id:
+        thread_id = find_thread_id(engine, account_id, folder, email_id) or ""
+        if not thread_id:
+            return f"Error: Email {email_id} not found or not threaded yet."
+
+    thread, messages = get_thread(engine, account_id, thread_id)
+    if thread is None or not messages:
+        return f"Error: Thread {thread_id} not found."
+
+    shown = messages[-min(limit, 100) :]
+    last = datetime.fromtimestamp(thread["last_activity"], UTC).strftime("%Y-%m-%d %H:%M")
+    participants = thread["participants"]
+    output = f"Thread: {thread['subject'] or '(No subject)'}\n"
+    output += f"ID: {thread_id}\n"
+    output += f"Messages: {thread['message_count']} ({thread['unread_count']} unread)"
+    if len(shown) < len(messages):
+        output += f", showing the last {len(shown)}"
+    output += f"\nLast activity: {last}\n"
+    output += f"Participants: {', '.join(participants) if participants else 'Unknown'}\n\n"
+
+    for i, msg in enumerate(shown, len(messages) - len(shown) + 1):
+        from_display = (
+            f"{msg['from_name']} <{msg['from_addr']}>" if msg["from_name"] else msg["from_addr"]
+        )
+        ts = msg["timestamp"]
+        date_str = datetime.fromtimestamp(ts, UTC).strftime("%Y-%m-%d %H:%M") if ts else "Unknown"
+        read_str = "📭" if not msg["read"] else "📬"
+        attach_str = "📎" if msg["has_attachments"] else ""
+
+        output += f"--- {i}. {read_str}{attach_str} {from_display}, {date_str}\n"
+        output += f"ID: {msg['message_id']} ({msg['folder']})\n"
+        output += f"{_unquoted(msg['body_text'] or '') or '(No body)'}\n\n"
+
+    return output.strip()
+
+
+email_thread.annotations = ToolAnnotations(
+    title="Get Email Thread", read_only=True, idempotent=True
+)
+
 
 def _get_email_by_id(email_id: str, account_id: str, user_id: str) -> dict[str, Any] | None:
     engine = get_engine(user_id)
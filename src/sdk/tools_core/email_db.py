@@ -1,7 +1,10 @@
 """Email database operations - single source of truth for all email/contacts DB operations."""
 
+import re
+import threading
 from datetime import UTC, datetime
 from email.utils import parsedate_to_datetime
+from pathlib import Path
 from typing import Any
 
 from sqlalchemy import create_engine, text
@@ -27,6 +30,27 @@ def get_engine(user_id: str) -> Any:
     return engine
 
 
+_read_engines: dict[str, Any] = {}
+_read_engines_lock = threading.Lock()
+
+
+def get_read_engine(user_id: str) -> Any | None:
+    """Cached engine for frequent reads of an existing email database.
+
+    Unlike get_engine it neither creates the file nor runs init_db, so it is
+    cheap enough for every agent turn. None if the user has no email
+    database yet.
+    """
+    db_path = get_db_path(user_id)
+    if not Path(db_path).exists():
+        return None
+    with _read_engines_lock:
+        engine = _read_engines.get(db_path)
+        if engine is None:
+            engine = _read_engines[db_path] = create_engine(f"sqlite:///{db_path}")
+    return engine
+
+
 def init_db(engine: Any) -> None:
     """Initialize database schema."""
     with engine.connect() as conn:
@@ -80,9 +104,452 @@ def init_db(engine: Any) -> None:
 
         conn.execute(text("CREATE INDEX IF NOT EXISTS idx_emails_timestamp ON emails(timestamp)"))
 
+        # body_fetched = 0 marks rows synced headers-first whose body is still pending
+        columns = {row[1] for row in conn.execute(text("PRAGMA table_info(emails)"))}
+        if "body_fetched" not in columns:
+            conn.execute(text("ALTER TABLE emails ADD COLUMN body_fetched INTEGER DEFAULT 1"))
+
+        _init_search_index(conn)
+        _init_thread_index(conn, columns)
+        _init_counters(conn)
+
+        # Per-folder IMAP cursor for incremental sync (see imap_sync.py)
+        conn.execute(
+            text("""
+            CREATE TABLE IF NOT EXISTS folder_sync_state (
+                account_id TEXT NOT NULL,
+                folder TEXT NOT NULL,
+                uidvalidity INTEGER,
+                uidnext INTEGER,
+                highest_modseq INTEGER,
+                last_uid INTEGER DEFAULT 0,
+                last_sync INTEGER,
+                last_change INTEGER,
+                activity REAL DEFAULT 0,
+                backfill_uid INTEGER,
+                backfill_fetched INTEGER DEFAULT 0,
+                PRIMARY KEY (account_id, folder)
+            )
+        """)
+        )
+        state_columns = {
+            row[1] for row in conn.execute(text("PRAGMA table_info(folder_sync_state)"))
+        }
+        for column, ddl in (
+            ("last_change", "INTEGER"),
+            ("activity", "REAL DEFAULT 0"),
+            ("backfill_uid", "INTEGER"),
+            ("backfill_fetched", "INTEGER DEFAULT 0"),
+        ):
+            if column not in state_columns:
+                conn.execute(text(f"ALTER TABLE folder_sync_state ADD COLUMN {column} {ddl}"))
+
         conn.commit()
 
 
+# Columns indexed by emails_fts, in FTS column order, and their BM25 weights.
+SEARCH_COLUMNS = ("subject", "from_addr", "from_name", "to_addrs", "body_text")
+SEARCH_WEIGHTS = (10.0, 5.0, 5.0, 2.0, 1.0)
+
+_FTS_TOKEN = re.compile(r'"[^"]*"|\S+')
+
+
+def _init_search_index(conn: Any) -> None:
+    """Create the emails_fts index and the triggers that keep it in sync.
+
+    emails_fts is an external-content FTS5 table over emails' rowid, so the
+    text is stored once. Writers must not use INSERT OR REPLACE on emails:
+    REPLACE does not fire the delete trigger, which would leave stale index
+    entries. Use INSERT ... ON CONFLICT DO UPDATE instead.
+    """
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'emails_fts'")
+    ).fetchone()
+    columns = ", ".join(SEARCH_COLUMNS)
+    new_values = ", ".join(f"new.{c}" for c in SEARCH_COLUMNS)
+    old_values = ", ".join(f"old.{c}" for c in SEARCH_COLUMNS)
+
+    conn.execute(
+        text(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS emails_fts USING fts5(
+            {columns},
+            content='emails', content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    """)
+    )
+    conn.execute(
+        text(f"""
+        CREATE TRIGGER IF NOT EXISTS emails_fts_ai AFTER INSERT ON emails BEGIN
+            INSERT INTO emails_fts(rowid, {columns}) VALUES (new.rowid, {new_values});
+        END
+    """)
+    )
+    conn.execute(
+        text(f"""
+        CREATE TRIGGER IF NOT EXISTS emails_fts_ad AFTER DELETE ON emails BEGIN
+            INSERT INTO emails_fts(emails_fts, rowid, {columns})
+            VALUES ('delete', old.rowid, {old_values});
+        END
+    """)
+    )
+    conn.execute(
+        text(f"""
+        CREATE TRIGGER IF NOT EXISTS emails_fts_au AFTER UPDATE OF {columns} ON emails BEGIN
+            INSERT INTO emails_fts(emails_fts, rowid, {columns})
+            VALUES ('delete', old.rowid, {old_values});
+            INSERT INTO emails_fts(rowid, {columns}) VALUES (new.rowid, {new_values});
+        END
+    """)
+    )
+    if not exists:
+        # Index mail synced before the search index existed.
+        conn.execute(text("INSERT INTO emails_fts(emails_fts) VALUES ('rebuild')"))
+
+
+def _init_thread_index(conn: Any, email_columns: set[str]) -> None:
+    """Create the conversation thread tables (maintained by email_threads.py).
+
+    emails.rfc_message_id holds the Message-ID header (message_id is the
+    IMAP UID) and emails.thread_id the thread it belongs to. thread_links
+    maps every Message-ID seen, including referenced ones not stored, to
+    its thread.
+    """
+    for column in ("rfc_message_id", "thread_id"):
+        if column not in email_columns:
+            conn.execute(text(f"ALTER TABLE emails ADD COLUMN {column} TEXT"))
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS idx_emails_thread "
+            "ON emails(account_id, thread_id, timestamp)"
+        )
+    )
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS idx_emails_rfc_message_id "
+            "ON emails(account_id, rfc_message_id)"
+        )
+    )
+    conn.execute(
+        text("""
+        CREATE TABLE IF NOT EXISTS threads (
+            account_id TEXT NOT NULL,
+            thread_id TEXT NOT NULL,
+            subject TEXT,
+            subject_key TEXT,
+            participants TEXT,
+            message_count INTEGER DEFAULT 0,
+            unread_count INTEGER DEFAULT 0,
+            first_activity INTEGER,
+            last_activity INTEGER,
+            PRIMARY KEY (account_id, thread_id)
+        )
+    """)
+    )
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS idx_threads_activity ON threads(account_id, last_activity)"
+        )
+    )
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS idx_threads_subject "
+            "ON threads(account_id, subject_key, last_activity)"
+        )
+    )
+    conn.execute(
+        text("""
+        CREATE TABLE IF NOT EXISTS thread_links (
+            account_id TEXT NOT NULL,
+            ref_id TEXT NOT NULL,
+            thread_id TEXT NOT NULL,
+            PRIMARY KEY (account_id, ref_id)
+        )
+    """)
+    )
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS idx_thread_links_thread "
+            "ON thread_links(account_id, thread_id)"
+        )
+    )
+
+
+# Hourly arrival buckets cover this window so "last 24h" stays exact while a
+# message ages out; older buckets are pruned as new mail arrives.
+_RECENT_WINDOW = 2 * 24 * 3600
+_COUNTER_COLUMNS = ("total", "unread", "flagged", "with_attachments")
+
+
+def _counter_values(row: str, sign: str) -> str:
+    return (
+        f"{sign}1, {sign}(COALESCE({row}.read, 0) = 0), {sign}(COALESCE({row}.flagged, 0) != 0), "
+        f"{sign}(COALESCE({row}.has_attachments, 0) != 0)"
+    )
+
+
+def _counter_sql(row: str, sign: str) -> str:
+    """Trigger statements adding (sign "") or removing (sign "-") one row's counts."""
+    columns = ", ".join(_COUNTER_COLUMNS)
+    added = ", ".join(f"{c} = {c} + excluded.{c}" for c in _COUNTER_COLUMNS)
+    recent = f"{row}.timestamp >= CAST(strftime('%s', 'now') AS INTEGER) - {_RECENT_WINDOW}"
+    return f"""
+        INSERT INTO email_counters (account_id, folder, {columns})
+        VALUES ({row}.account_id, {row}.folder, {_counter_values(row, sign)})
+        ON CONFLICT (account_id, folder) DO UPDATE SET {added};
+        INSERT INTO email_counter_hours (account_id, folder, hour, total, unread)
+        SELECT {row}.account_id, {row}.folder, {row}.timestamp / 3600,
+               {sign}1, {sign}(COALESCE({row}.read, 0) = 0)
+        WHERE {recent}
+        ON CONFLICT (account_id, folder, hour) DO UPDATE SET
+            total = total + excluded.total, unread = unread + excluded.unread;
+    """
+
+
+def _init_counters(conn: Any) -> None:
+    """Create the unread/flagged counter tables and the triggers that maintain them.
+
+    email_counters holds per-folder totals and email_counter_hours per-hour
+    arrivals for recent mail, so get_email_counters never reads emails.
+    Every write to emails (sync upserts, flag updates, email_get marking a
+    message read, deletes) adjusts them through the triggers.
+    """
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'email_counters'")
+    ).fetchone()
+    conn.execute(
+        text("""
+        CREATE TABLE IF NOT EXISTS email_counters (
+            account_id TEXT NOT NULL,
+            folder TEXT NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            unread INTEGER NOT NULL DEFAULT 0,
+            flagged INTEGER NOT NULL DEFAULT 0,
+            with_attachments INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (account_id, folder)
+        )
+    """)
+    )
+    conn.execute(
+        text("""
+        CREATE TABLE IF NOT EXISTS email_counter_hours (
+            account_id TEXT NOT NULL,
+            folder TEXT NOT NULL,
+            hour INTEGER NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            unread INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (account_id, folder, hour)
+        )
+    """)
+    )
+    conn.execute(
+        text(f"""
+        CREATE TRIGGER IF NOT EXISTS email_counters_ai AFTER INSERT ON emails BEGIN
+            {_counter_sql("new", "")}
+            DELETE FROM email_counter_hours
+            WHERE account_id = new.account_id AND folder = new.folder
+              AND hour < (CAST(strftime('%s', 'now') AS INTEGER) - {_RECENT_WINDOW}) / 3600;
+        END
+    """)
+    )
+    conn.execute(
+        text(f"""
+        CREATE TRIGGER IF NOT EXISTS email_counters_ad AFTER DELETE ON emails BEGIN
+            {_counter_sql("old", "-")}
+        END
+    """)
+    )
+    # Upserts rewrite every column; only recount when a counted value moved.
+    watched = ("account_id", "folder", "timestamp", "read", "flagged", "has_attachments")
+    changed = " OR ".join(f"old.{c} IS NOT new.{c}" for c in watched)
+    conn.execute(
+        text(f"""
+        CREATE TRIGGER IF NOT EXISTS email_counters_au
+        AFTER UPDATE OF {", ".join(watched)} ON emails WHEN {changed} BEGIN
+            {_counter_sql("old", "-")}
+            {_counter_sql("new", "")}
+        END
+    """)
+    )
+    if not exists:
+        _populate_counters(conn)
+
+
+def _populate_counters(conn: Any) -> None:
+    columns = ", ".join(_COUNTER_COLUMNS)
+    conn.execute(text("DELETE FROM email_counters"))
+    conn.execute(text("DELETE FROM email_counter_hours"))
+    conn.execute(
+        text(f"""
+        INSERT INTO email_counters (account_id, folder, {columns})
+        SELECT account_id, folder, COUNT(*), SUM(COALESCE(read, 0) = 0),
+               SUM(COALESCE(flagged, 0) != 0), SUM(COALESCE(has_attachments, 0) != 0)
+        FROM emails GROUP BY account_id, folder
+    """)
+    )
+    conn.execute(
+        text("""
+        INSERT INTO email_counter_hours (account_id, folder, hour, total, unread)
+        SELECT account_id, folder, timestamp / 3600, COUNT(*), SUM(COALESCE(read, 0) = 0)
+        FROM emails WHERE timestamp >= :since
+        GROUP BY account_id, folder, timestamp / 3600
+    """),
+        {"since": int(datetime.now(UTC).timestamp()) - _RECENT_WINDOW},
+    )
+
+
+def rebuild_email_counters(user_id: str) -> int:
+    """Recompute email_counters from the emails table; returns the number of folders."""
+    engine = get_engine(user_id)
+    with engine.begin() as conn:
+        _populate_counters(conn)
+        return int(conn.execute(text("SELECT COUNT(*) FROM email_counters")).scalar() or 0)
+
+
+def get_email_counters(engine: Any, account_id: str | None = None) -> list[dict[str, Any]]:
+    """Per-folder counts from the counter tables, without reading emails.
+
+    Each row has account_id, folder, total, unread, flagged, with_attachments,
+    and recent/recent_unread for mail dated within the last 24 hours (to the
+    hour). Folders of removed accounts are left out.
+    """
+    params: dict[str, Any] = {"since_hour": (int(datetime.now(UTC).timestamp()) - 86400) // 3600}
+    account_filter = ""
+    if account_id:
+        account_filter = "AND c.account_id = :account_id"
+        params["account_id"] = account_id
+    with engine.connect() as conn:
+        result = conn.execute(
+            text(f"""
+                SELECT c.account_id, c.folder, c.total, c.unread, c.flagged, c.with_attachments,
+                       COALESCE(SUM(h.total), 0) AS recent,
+                       COALESCE(SUM(h.unread), 0) AS recent_unread
+                FROM email_counters c
+                JOIN accounts a ON a.id = c.account_id
+                LEFT JOIN email_counter_hours h
+                    ON h.account_id = c.account_id AND h.folder = c.folder
+                   AND h.hour >= :since_hour
+                WHERE c.total > 0 {account_filter}
+                GROUP BY c.account_id, c.folder
+                ORDER BY c.account_id, c.folder
+            """),
+            params,
+        )
+        return [dict(row._mapping) for row in result]
+
+
+def email_counter_totals(engine: Any, account_id: str | None = None) -> dict[str, int]:
+    """get_email_counters summed over folders (and accounts unless one is given)."""
+    totals = dict.fromkeys((*_COUNTER_COLUMNS, "recent", "recent_unread", "accounts"), 0)
+    accounts = set()
+    for row in get_email_counters(engine, account_id):
+        accounts.add(row["account_id"])
+        for key in totals:
+            if key != "accounts":
+                totals[key] += row[key]
+    totals["accounts"] = len(accounts)
+    return totals
+
+
+def rebuild_search_index(user_id: str) -> int:
+    """Rebuild emails_fts from the emails table; returns the number of emails indexed."""
+    engine = get_engine(user_id)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO emails_fts(emails_fts) VALUES ('rebuild')"))
+        conn.execute(text("INSERT INTO emails_fts(emails_fts) VALUES ('optimize')"))
+        return int(conn.execute(text("SELECT COUNT(*) FROM emails")).scalar() or 0)
+
+
+def build_fts_query(query: str) -> str:
+    """Turn a user query into an FTS5 MATCH expression.
+
+    Words and "quoted phrases" are matched as literal tokens and AND-ed;
+    a trailing * makes a prefix query (``invoi*``) and a bare OR combines
+    its neighbours. FTS5 operators and column filters in the input are
+    treated as text, so any query is valid MATCH syntax.
+    """
+    parts: list[str] = []
+    for token in _FTS_TOKEN.findall(query):
+        if token == "OR":
+            if parts and parts[-1] != "OR":
+                parts.append("OR")
+            continue
+        prefix = token.endswith("*") and not token.startswith('"')
+        term = token.strip('"').rstrip("*") if not token.startswith('"') else token[1:-1]
+        if not term.strip():
+            continue
+        parts.append('"' + term.replace('"', '""') + '"' + ("*" if prefix else ""))
+    while parts and parts[-1] == "OR":
+        parts.pop()
+    if parts and parts[0] == "OR":
+        parts.pop(0)
+    return " ".join(parts)
+
+
+def search_emails(
+    engine: Any,
+    query: str,
+    *,
+    account_id: str | None = None,
+    folder: str | None = None,
+    since: int | None = None,
+    until: int | None = None,
+    limit: int = 20,
+) -> list[dict[str, Any]]:
+    """Full-text search over subject, sender, recipients and body, best match first.
+
+    Results are ranked by BM25 with subject and sender weighted above the
+    body, and carry a ``snippet`` with the matched terms in [brackets].
+    since/until are Unix timestamps (inclusive/exclusive).
+    """
+    match = build_fts_query(query)
+    if not match:
+        return []
+
+    filters = ["emails_fts MATCH :match"]
+    params: dict[str, Any] = {"match": match, "limit": limit}
+    if account_id:
+        filters.append("e.account_id = :account_id")
+        params["account_id"] = account_id
+    if folder:
+        filters.append("e.folder = :folder")
+        params["folder"] = folder
+    if since is not None:
+        filters.append("e.timestamp >= :since")
+        params["since"] = since
+    if until is not None:
+        filters.append("e.timestamp < :until")
+        params["until"] = until
+
+    weights = ", ".join(str(w) for w in SEARCH_WEIGHTS)
+    with engine.connect() as conn:
+        # Rank first and build snippets only for the rows that are returned;
+        # snippet() is far more expensive than bm25() on a broad match.
+        result = conn.execute(
+            text(f"""
+                WITH top AS (
+                    SELECT e.rowid AS id, e.timestamp AS ts, bm25(emails_fts, {weights}) AS rank
+                    FROM emails_fts
+                    JOIN emails e ON e.rowid = emails_fts.rowid
+                    WHERE {" AND ".join(filters)}
+                    ORDER BY rank, e.timestamp DESC
+                    LIMIT :limit
+                )
+                SELECT e.account_id, e.folder, e.message_id, e.from_addr, e.from_name,
+                       e.subject, e.timestamp, e.read, e.flagged, e.has_attachments,
+                       snippet(emails_fts, -1, '[', ']', '...', 16) AS snippet,
+                       top.rank AS rank
+                FROM top
+                JOIN emails_fts ON emails_fts.rowid = top.id
+                JOIN emails e ON e.rowid = top.id
+                WHERE emails_fts MATCH :match
+                ORDER BY top.rank, top.ts DESC
+            """),
+            params,
+        )
+        return [dict(row._mapping) for row in result]
+
+
 def load_accounts(user_id: str) -> dict[str, Any]:
     """Load all accounts for a user."""
     engine = get_engine(user_id)
@@ -149,7 +616,15 @@ def delete_account(user_id: str, account_id: str) -> None:
     engine = get_engine(user_id)
 
     with engine.connect() as conn:
-        conn.execute(text("DELETE FROM emails WHERE account_id = :id"), {"id": account_id})
+        for table in (
+            "emails",
+            "folder_sync_state",
+            "threads",
+            "thread_links",
+            "email_counters",
+            "email_counter_hours",
+        ):
+            conn.execute(text(f"DELETE FROM {table} WHERE account_id = :id"), {"id": account_id})
         conn.execute(text("DELETE FROM accounts WHERE id = :id"), {"id": account_id})
         conn.commit()
 
@@ -196,6 +671,12 @@ def parse_email_date(date_str: str) -> int:
         return int(datetime.now(UTC).timestamp())
 
 
+def header_value(msg: Any, name: str) -> str | None:
+    """First value of a message header, unfolded; imap_tools keys headers in lower case."""
+    values = msg.headers.get(name.lower()) if msg.headers else None
+    return " ".join(values[0].split()) if values else None
+
+
 def email_to_dict(msg: Any) -> dict[str, Any]:
     """Convert imap_tools message to dict."""
     attachments = []
@@ -220,15 +701,12 @@ def email_to_dict(msg: Any) -> dict[str, Any]:
         "subject": msg.subject or "",
         "body_text": msg.text or "",
         "timestamp": date_ts,
-        "in_reply_to": msg.headers.get("In-Reply-To", [None])[0] if msg.headers else None,
-        "thread_references": msg.headers.get("References", [None])[0] if msg.headers else None,
-        "is_forwarded": bool(
-            msg.headers.get("X-FWD", [None])[0] or msg.headers.get("Forwarded", [None])[0]
-        )
-        if msg.headers
-        else False,
-        "read": not msg.flags.Seen if hasattr(msg.flags, "Seen") else True,
-        "flagged": msg.flags.Flagged if hasattr(msg.flags, "Flagged") else False,
+        "rfc_message_id": header_value(msg, "Message-ID"),
+        "in_reply_to": header_value(msg, "In-Reply-To"),
+        "thread_references": header_value(msg, "References"),
+        "is_forwarded": bool(header_value(msg, "X-FWD") or header_value(msg, "Forwarded")),
+        "read": "\\Seen" in msg.flags,
+        "flagged": "\\Flagged" in msg.flags,
         "has_attachments": bool(attachments),
         "attachments": attachments,
     }
@@ -6,18 +6,36 @@ from datetime import UTC, datetime
 from email.utils import parsedate_to_datetime
 from typing import Any
 
-from sqlalchemy import text
+from sqlalchemy import bindparam, text
 
 from src.app_logging import get_logger
 from src.config import get_settings
 from src.sdk.tools import tool
+from src.sdk.tools_core.contacts_storage import save_contacts
 from src.sdk.tools_core.email_db import get_engine as _get_engine
+from src.sdk.tools_core.email_db import header_value
+from src.sdk.tools_core.email_threads import backfill_threads, message_key
+from src.sdk.tools_core.imap_pool import ImapIdleWatcher, get_imap_pool
+from src.sdk.tools_core.imap_sync import fetch_thread_headers, load_folder_states, sync_folder
 
 logger = get_logger()
 SETTINGS = get_settings()
 
 RATE_LIMIT_COOLDOWN: dict[str, float] = {}
 
+# Per-account scheduler bookkeeping, keyed like RATE_LIMIT_COOLDOWN ("user_id:account_id").
+SYNC_METRICS: dict[str, dict[str, Any]] = {}
+
+# Latest full-sync (backfill) pass per folder, keyed "user_id:account_id:folder".
+BACKFILL_PROGRESS: dict[str, dict[str, Any]] = {}
+
+# Folders whose activity score is below this are synced every
+# quiet_folder_multiplier intervals instead of every interval. INBOX is always synced.
+ACTIVE_FOLDER_THRESHOLD = 0.5
+
+# How often an IDLE task checks whether its watcher thread has ended.
+IDLE_CHECK_SECONDS = 60
+
 
 def _load_accounts(user_id: str) -> dict[str, Any]:
     """Load accounts from database."""
@@ -117,38 +135,96 @@ def _email_to_dict(msg: Any) -> dict[str, Any]:
         "subject": msg.subject or "",
         "body_text": msg.text or "",
         "timestamp": date_ts,
-        "in_reply_to": msg.headers.get("In-Reply-To", [None])[0] if msg.headers else None,
-        "thread_references": msg.headers.get("References", [None])[0] if msg.headers else None,
-        "is_forwarded": bool(
-            msg.headers.get("X-FWD", [None])[0] or msg.headers.get("Forwarded", [None])[0]
-        )
-        if msg.headers
-        else False,
-        "read": not msg.flags.Seen if hasattr(msg.flags, "Seen") else True,
-        "flagged": msg.flags.Flagged if hasattr(msg.flags, "Flagged") else False,
+        "rfc_message_id": header_value(msg, "Message-ID"),
+        "in_reply_to": header_value(msg, "In-Reply-To"),
+        "thread_references": header_value(msg, "References"),
+        "is_forwarded": bool(header_value(msg, "X-FWD") or header_value(msg, "Forwarded")),
+        "read": "\\Seen" in msg.flags,
+        "flagged": "\\Flagged" in msg.flags,
         "has_attachments": bool(attachments),
         "attachments": attachments,
     }
 
 
-def _get_imap_connection(account_id: str, user_id: str) -> Any:
-    """Get IMAP connection for account."""
-    accounts = _load_accounts(user_id)
-    account = accounts.get(account_id)
-    if not account:
-        raise ValueError(f"Account {account_id} not found")
+# Copies of a batch's messages stored before it: other folders or other UIDs.
+_STORED_MESSAGE_IDS = text("""
+    SELECT rfc_message_id FROM emails
+    WHERE account_id = :account_id AND rfc_message_id IN :ids
+      AND NOT (folder = :folder AND message_id IN :uids)
+""").bindparams(bindparam("ids", expanding=True), bindparam("uids", expanding=True))
 
-    email = account.get("email")
-    password = account.get("password")
-    imap_host = account.get("imap_host")
-    imap_port = account.get("imap_port", 993)
 
-    if not email or not password or not imap_host:
-        raise ValueError(f"Account {account_id} is missing credentials")
+def _extract_contacts(
+    conn: Any, user_id: str, account_id: str, own_address: str, rows: list[dict[str, Any]]
+) -> None:
+    """Sync pipeline stage: record a batch's correspondents and interaction stats.
 
-    from imap_tools import MailBox
+    Called with the batch's email connection (``conn``) after its rows are
+    inserted, but contacts live in their own database: they are written by
+    save_contacts in a separate transaction and are not atomic with the
+    batch. Each contact carries its message's key, so a batch that is
+    retried after contacts were saved is not counted twice.
 
-    return MailBox(imap_host, imap_port).login(email, password)
+    Messages already stored in another folder (same Message-ID) were counted
+    when that copy synced and are skipped. Mail from ``own_address`` counts as
+    sent to its recipients; anything else as received from its sender.
+    """
+    own = own_address.lower()
+    ids = [r["rfc_message_id"] for r in rows if r.get("rfc_message_id")]
+    seen: set[str] = set()
+    if ids:
+        params = {
+            "account_id": account_id,
+            "ids": ids,
+            "folder": rows[0]["folder"],
+            "uids": [r["message_id"] for r in rows],
+        }
+        seen.update(r[0] for r in conn.execute(_STORED_MESSAGE_IDS, params))
+
+    contacts: list[dict[str, Any]] = []
+    for row in rows:
+        message_id = row.get("rfc_message_id")
+        if message_id:
+            if message_id in seen:
+                continue
+            seen.add(message_id)
+        sender = (row.get("from_addr") or "").lower()
+        outgoing = bool(own) and sender == own
+        ts = row.get("timestamp")
+        key = message_key(row)
+        if sender and not outgoing:
+            contacts.append(
+                {
+                    "email": sender,
+                    "name": row.get("from_name"),
+                    "email_count": 1,
+                    "received_count": 1,
+                    "timestamp": ts,
+                    "message_key": key,
+                }
+            )
+        recipients = f"{row.get('to_addrs') or ''},{row.get('cc_addrs') or ''}".split(",")
+        for addr in dict.fromkeys(a.strip().lower() for a in recipients):
+            if addr and addr not in (own, sender):
+                contacts.append(
+                    {
+                        "email": addr,
+                        "email_count": 1,
+                        "sent_count": 1 if outgoing else 0,
+                        "timestamp": ts,
+                        "message_key": key,
+                    }
+                )
+    try:
+        save_contacts(user_id, account_id, contacts)
+    except Exception as e:
+        # Contacts are derived data; never fail a mail sync over them. The
+        # emails are still committed, and these messages won't be offered again.
+        logger.warning(
+            "email_sync.contacts_error",
+            {"account_id": account_id, "error": str(e)},
+            user_id=user_id,
+        )
 
 
 def _sync_folder(
@@ -161,8 +237,12 @@ def _sync_folder(
     """Sync emails from a folder.
 
     Modes:
-        - "new": Fetch emails newer than last_timestamp (quick sync)
-        - "full": Fetch all emails (backfill, newest -> earliest)
+        - "new": Fetch UIDs above the last synced UID (quick sync)
+        - "full": Backfill older mail newest -> earliest from the folder's saved
+          cursor, so an interrupted backfill resumes where it stopped
+
+    Only UIDs missing from the store are downloaded; flag changes on stored
+    emails are picked up too. See imap_sync.sync_folder.
 
     Args:
         account_id: Account ID
@@ -180,196 +260,39 @@ def _sync_folder(
     if not account:
         raise ValueError(f"Account {account_id} not found")
 
-    with _get_imap_connection(account_id, user_id) as mailbox:
-        mailbox.folder.set(folder)
-
-        if mode == "full":
-            # Full backfill - fetch all in batches (newest first), paginating
-            # by UID range so each batch fetches older emails than the last
-            from imap_tools import AND, UidRange
-
-            synced = 0
-
-            existing_ids = set()
-            with engine.connect() as conn:
-                result = conn.execute(
-                    text(
-                        "SELECT message_id FROM emails WHERE account_id = :account_id AND folder = :folder"
-                    ),
-                    {"account_id": account_id, "folder": folder},
-                )
-                for row in result:
-                    existing_ids.add(row[0])
-
-            batch_count = 0
-            max_batches = 50  # Safety limit
-            min_uid_seen = None  # Track lowest UID for pagination
-
-            while batch_count < max_batches:
-                # First batch: fetch newest emails (no UID filter)
-                # Subsequent batches: fetch emails older than min_uid_seen
-                if min_uid_seen is not None:
-                    criteria = AND(uid_range=UidRange("1", str(min_uid_seen - 1)))  # type: ignore[call-arg]
-                    messages = list(mailbox.fetch(criteria, limit=limit, reverse=True))
-                else:
-                    messages = list(mailbox.fetch(limit=limit, reverse=True))
-
-                if not messages:
-                    break
-
-                for msg in messages:
-                    msg_uid = str(msg.uid)
-                    if msg_uid in existing_ids:
-                        continue
-
-                    email_data = _email_to_dict(msg)
-                    email_data["account_id"] = account_id
-                    email_data["folder"] = folder
-                    email_data["created_at"] = int(datetime.now(UTC).timestamp())
-
-                    with engine.connect() as conn:
-                        conn.execute(
-                            text("""
-                                INSERT OR REPLACE INTO emails
-                                (account_id, folder, message_id, from_addr, from_name,
-                                 to_addrs, cc_addrs, subject, body_text, timestamp,
-                                 in_reply_to, thread_references, is_forwarded,
-                                 read, flagged, has_attachments, attachments, tags, created_at)
-                                VALUES
-                                (:account_id, :folder, :message_id, :from_addr, :from_name,
-                                 :to_addrs, :cc_addrs, :subject, :body_text, :timestamp,
-                                 :in_reply_to, :thread_references, :is_forwarded,
-                                 :read, :flagged, :has_attachments, :attachments, :tags, :created_at)
-                            """),
-                            {
-                                **email_data,
-                                "to_addrs": ",".join(email_data["to_addrs"]),
-                                "cc_addrs": ",".join(email_data["cc_addrs"]),
-                                "attachments": str(email_data["attachments"]),
-                                "read": 1 if email_data["read"] else 0,
-                                "flagged": 1 if email_data["flagged"] else 0,
-                                "has_attachments": 1 if email_data["has_attachments"] else 0,
-                                "is_forwarded": 1 if email_data.get("is_forwarded") else 0,
-                                "tags": "",
-                            },
-                        )
-                        conn.commit()
-
-                    existing_ids.add(msg_uid)
-                    synced += 1
-
-                # Track lowest UID for pagination
-                batch_uids = [msg.uid for msg in messages if msg.uid is not None]
-                if batch_uids:
-                    batch_min = min(batch_uids)
-                    if min_uid_seen is not None and batch_min >= min_uid_seen:
-                        # No progress — all returned UIDs are >= our threshold
-                        break
-                    min_uid_seen = batch_min
-
-                batch_count += 1
-
-                # If we got fewer than limit, we've reached the end
-                if len(messages) < limit:
-                    break
-
-            if synced > 0:
-                account["last_sync"] = int(datetime.now(UTC).timestamp())
-                # Use the oldest synced email's timestamp for incremental sync
-                # so future "new" syncs pick up from where we left off
-                with engine.connect() as conn:
-                    result = conn.execute(
-                        text(
-                            "SELECT MIN(timestamp) FROM emails "
-                            "WHERE account_id = :account_id AND folder = :folder"
-                        ),
-                        {"account_id": account_id, "folder": folder},
-                    )
-                    row = result.fetchone()
-                    if row and row[0]:
-                        account["last_timestamp"] = int(row[0])
-                    else:
-                        account["last_timestamp"] = int(datetime.now(UTC).timestamp())
-                _save_account(user_id, account_id, account)
-
-            logger.info(
-                "email.backfill_complete",
-                {"account_id": account_id, "folder": folder, "count": synced},
-            )
-            return synced
-
-        else:
-            # Quick sync - fetch recent emails
-            last_timestamp = account.get("last_timestamp", 0)
-            synced = 0
-
-            existing_ids = set()
-            with engine.connect() as conn:
-                result = conn.execute(
-                    text(
-                        "SELECT message_id FROM emails WHERE account_id = :account_id AND folder = :folder"
-                    ),
-                    {"account_id": account_id, "folder": folder},
-                )
-                for row in result:
-                    existing_ids.add(row[0])
-
-            messages = list(mailbox.fetch(limit=limit, reverse=True))
-
-            newest_timestamp = last_timestamp
-
-            for msg in messages:
-                msg_uid = str(msg.uid)
-                if msg_uid in existing_ids:
-                    continue
-
-                email_data = _email_to_dict(msg)
-                email_data["account_id"] = account_id
-                email_data["folder"] = folder
-                email_data["created_at"] = int(datetime.now(UTC).timestamp())
-
-                with engine.connect() as conn:
-                    conn.execute(
-                        text("""
-                            INSERT OR REPLACE INTO emails
-                            (account_id, folder, message_id, from_addr, from_name,
-                             to_addrs, cc_addrs, subject, body_text, timestamp,
-                             in_reply_to, thread_references, is_forwarded,
-                             read, flagged, has_attachments, attachments, tags, created_at)
-                            VALUES
-                            (:account_id, :folder, :message_id, :from_addr, :from_name,
-                             :to_addrs, :cc_addrs, :subject, :body_text, :timestamp,
-                             :in_reply_to, :thread_references, :is_forwarded,
-                             :read, :flagged, :has_attachments, :attachments, :tags, :created_at)
-                        """),
-                        {
-                            **email_data,
-                            "to_addrs": ",".join(email_data["to_addrs"]),
-                            "cc_addrs": ",".join(email_data["cc_addrs"]),
-                            "attachments": str(email_data["attachments"]),
-                            "read": 1 if email_data["read"] else 0,
-                            "flagged": 1 if email_data["flagged"] else 0,
-                            "has_attachments": 1 if email_data["has_attachments"] else 0,
-                            "is_forwarded": 1 if email_data.get("is_forwarded") else 0,
-                            "tags": "",
-                        },
-                    )
-                    conn.commit()
+    with get_imap_pool().session(user_id, account) as mailbox:
+        stats = sync_folder(
+            mailbox,
+            engine,
+            account_id,
+            folder,
+            to_dict=_email_to_dict,
+            mode=mode,
+            limit=limit,
+            batch_size=SETTINGS.email_sync.fetch_batch_size,
+            headers_first=SETTINGS.email_sync.headers_first,
+            on_rows=lambda conn, rows: _extract_contacts(
+                conn, user_id, account_id, account.get("email", ""), rows
+            ),
+        )
 
-                if email_data["timestamp"] > newest_timestamp:
-                    newest_timestamp = email_data["timestamp"]
-                synced += 1
+    if mode == "full":
+        BACKFILL_PROGRESS[f"{user_id}:{account_id}:{folder}"] = {
+            "done": stats.backfill_uid == 0,
+            "remaining": stats.backfill_remaining,
+            "updated_at": time.time(),
+        }
 
-            if synced > 0:
-                account["last_sync"] = int(datetime.now(UTC).timestamp())
-                account["last_timestamp"] = newest_timestamp
-                _save_account(user_id, account_id, account)
+    if stats.rows_written or stats.flags_updated:
+        account["last_sync"] = int(datetime.now(UTC).timestamp())
+        account["last_timestamp"] = max(account.get("last_timestamp") or 0, stats.newest_timestamp)
+        _save_account(user_id, account_id, account)
 
-            logger.info(
-                "email.quick_sync_complete",
-                {"account_id": account_id, "folder": folder, "count": synced},
-            )
-            return synced
+    logger.info(
+        "email.backfill_complete" if mode == "full" else "email.quick_sync_complete",
+        {**stats.to_dict(), "count": stats.rows_written},
+    )
+    return stats.rows_written
 
 
 async def _sync_emails(
@@ -435,11 +358,250 @@ def start_background_sync(user_id: str, account_id: str) -> None:
         )
 
 
+def backfill_thread_index(user_id: str, fetch_headers: bool = True) -> dict[str, dict[str, int]]:
+    """Thread every account's emails stored before the thread index existed.
+
+    Message-ID/References headers missing from older rows are fetched over
+    IMAP (headers only); with ``fetch_headers=False``, or when the server is
+    unreachable, rows are threaded from what is stored. Returns stats per
+    account name.
+    """
+    engine = _get_engine(user_id)
+    results: dict[str, dict[str, int]] = {}
+    for account_id, account in _load_accounts(user_id).items():
+        stats = None
+        if fetch_headers:
+            try:
+                with get_imap_pool().session(user_id, account) as mailbox:
+                    stats = backfill_threads(
+                        engine,
+                        account_id,
+                        fetch_headers=lambda folder, uids: fetch_thread_headers(
+                            mailbox, folder, uids
+                        ),
+                    )
+            except Exception as e:
+                logger.warning(
+                    "email.thread_backfill_fetch_failed",
+                    {"account": account["name"], "error": str(e)},
+                    user_id=user_id,
+                )
+        if stats is None:
+            stats = backfill_threads(engine, account_id)
+        logger.info(
+            "email.thread_backfill_complete", {"account": account["name"], **stats}, user_id=user_id
+        )
+        results[account["name"]] = stats
+    return results
+
+
+def _in_cooldown(cooldown_key: str) -> bool:
+    cooldown_until = RATE_LIMIT_COOLDOWN.get(cooldown_key)
+    return cooldown_until is not None and time.time() < cooldown_until
+
+
+def _record_sync(cooldown_key: str, ok: bool, synced: int, duration: float) -> dict[str, Any]:
+    now = time.time()
+    metrics = SYNC_METRICS.setdefault(
+        cooldown_key, {"first_seen": now, "last_success": None, "failures": 0, "synced": 0}
+    )
+    metrics["last_attempt"] = now
+    metrics["last_duration_seconds"] = round(duration, 3)
+    if ok:
+        metrics["last_success"] = now
+        metrics["failures"] = 0
+        metrics["synced"] += synced
+    else:
+        metrics["failures"] += 1
+    return metrics
+
+
+def account_sync_lag() -> dict[str, float]:
+    """Seconds since each account last synced successfully (or was first scheduled)."""
+    now = time.time()
+    return {key: now - (m["last_success"] or m["first_seen"]) for key, m in SYNC_METRICS.items()}
+
+
+def get_sync_metrics() -> dict[str, Any]:
+    """Aggregate sync lag and IMAP session stats (no account identifiers)."""
+    lags = list(account_sync_lag().values())
+    interval = SETTINGS.email_sync.interval_minutes * 60
+    return {
+        "accounts": len(lags),
+        "max_lag_seconds": round(max(lags), 1) if lags else 0.0,
+        "lagging": sum(1 for lag in lags if lag > 2 * interval),
+        "imap_sessions": get_imap_pool().stats(),
+        "backfill": {
+            "folders_in_progress": sum(1 for p in BACKFILL_PROGRESS.values() if not p["done"]),
+            "folders_complete": sum(1 for p in BACKFILL_PROGRESS.values() if p["done"]),
+            "remaining": sum(p["remaining"] for p in BACKFILL_PROGRESS.values()),
+        },
+    }
+
+
+def _pending_backfills(user_id: str, account_id: str) -> list[str]:
+    """Folders whose full-sync backfill started but has not finished."""
+    states = load_folder_states(_get_engine(user_id), account_id)
+    return [folder for folder, state in states.items() if state.backfill_uid]
+
+
+def _due_folders(user_id: str, account_id: str, account: dict[str, Any]) -> list[str]:
+    """Folders to sync this pass: INBOX first, then the rest by recent activity.
+
+    Folders that have been quiet are only synced every quiet_folder_multiplier
+    intervals.
+    """
+    interval = SETTINGS.email_sync.interval_minutes * 60
+    quiet_interval = interval * SETTINGS.email_sync.quiet_folder_multiplier
+    states = load_folder_states(_get_engine(user_id), account_id)
+    now = time.time()
+
+    due: list[tuple[float, str]] = []
+    for folder in dict.fromkeys(["INBOX", *account.get("folders", [])]):
+        if not folder:
+            continue
+        state = states.get(folder)
+        if folder != "INBOX" and state is not None and state.last_sync:
+            wait = interval if state.activity >= ACTIVE_FOLDER_THRESHOLD else quiet_interval
+            if now - state.last_sync < wait:
+                continue
+        activity = state.activity if state is not None else 0.0
+        due.append((float("inf") if folder == "INBOX" else activity, folder))
+    due.sort(key=lambda item: -item[0])
+    return [folder for _, folder in due]
+
+
+async def _sync_account(
+    user_id: str,
+    account_id: str,
+    account: dict[str, Any],
+    folders: list[str],
+    workers: asyncio.Semaphore,
+    host_slots: asyncio.Semaphore,
+) -> None:
+    """Sync an account's due folders, one at a time over a pooled session."""
+    cooldown_key = f"{user_id}:{account_id}"
+    batch_size = SETTINGS.email_sync.batch_size
+
+    # Host slot first, so a worker is never held while waiting on a busy host.
+    async with host_slots, workers:
+        started = time.monotonic()
+        synced = 0
+        ok = True
+        try:
+            for folder in folders:
+                if _in_cooldown(cooldown_key):
+                    ok = False
+                    break
+                synced += await _sync_emails(
+                    user_id=user_id,
+                    account_id=account_id,
+                    folder=folder,
+                    mode="new",
+                    limit=batch_size,
+                )
+            # Resume interrupted backfills (e.g. across restarts), one budget per pass.
+            for folder in await asyncio.to_thread(_pending_backfills, user_id, account_id):
+                if _in_cooldown(cooldown_key):
+                    break
+                synced += await _sync_emails(
+                    user_id=user_id,
+                    account_id=account_id,
+                    folder=folder,
+                    mode="full",
+                    limit=SETTINGS.email_sync.backfill_limit,
+                )
+            ok = ok and not _in_cooldown(cooldown_key)
+        except Exception as e:
+            ok = False
+            error_str = str(e).lower()
+            if "too many simultaneous connections" in error_str or "rate limit" in error_str:
+                cooldown_minutes = getattr(SETTINGS.email_sync, "cooldown_minutes", 15)
+                RATE_LIMIT_COOLDOWN[cooldown_key] = time.time() + (cooldown_minutes * 60)
+                logger.warning(
+                    "email_sync.rate_limited",
+                    {"account": account["name"], "cooldown_minutes": cooldown_minutes},
+                )
+            else:
+                logger.error(
+                    "email_sync.account_error",
+                    {"account": account["name"], "error": str(e)},
+                )
+
+    metrics = _record_sync(cooldown_key, ok, synced, time.monotonic() - started)
+    lag = time.time() - (metrics["last_success"] or metrics["first_seen"])
+    logger.info(
+        "email_sync.account_synced",
+        {
+            "account": account["name"],
+            "folders": folders,
+            "count": synced,
+            "ok": ok,
+            "duration_seconds": metrics["last_duration_seconds"],
+            "lag_seconds": round(lag, 1),
+        },
+        user_id=user_id,
+    )
+
+
+async def _watch_idle(user_id: str, account_id: str, account: dict[str, Any]) -> None:
+    """Sync INBOX as soon as IMAP IDLE reports a change, until sync stops.
+
+    IDLE runs on an ImapIdleWatcher (its own connection and thread, outside
+    the session pool); only the INBOX sync it triggers uses a pooled session.
+    """
+    cooldown_key = f"{user_id}:{account_id}"
+    loop = asyncio.get_running_loop()
+    changed = asyncio.Event()
+    watcher = ImapIdleWatcher(
+        account,
+        "INBOX",
+        lambda: loop.call_soon_threadsafe(changed.set),
+        paused=lambda: _in_cooldown(cooldown_key),
+        name=f"imap-idle-{account_id}",
+    )
+    watcher.start()
+    try:
+        while _running:
+            try:
+                await asyncio.wait_for(changed.wait(), IDLE_CHECK_SECONDS)
+            except TimeoutError:
+                if not watcher.is_alive():
+                    if watcher.supported is False:
+                        logger.info("email_sync.idle_unsupported", {"account": account["name"]})
+                    return
+                continue
+            changed.clear()
+            if not _running:
+                break
+            started = time.monotonic()
+            try:
+                count = await _sync_emails(
+                    user_id, account_id, "INBOX", "new", SETTINGS.email_sync.batch_size
+                )
+                _record_sync(
+                    cooldown_key, not _in_cooldown(cooldown_key), count, time.monotonic() - started
+                )
+            except Exception as e:
+                _record_sync(cooldown_key, False, 0, time.monotonic() - started)
+                logger.error(
+                    "email_sync.account_error", {"account": account["name"], "error": str(e)}
+                )
+    finally:
+        watcher.stop()
+
+
 # Interval sync scheduler
 _scheduler_task: asyncio.Task[None] | None = None
+_idle_tasks: dict[str, asyncio.Task[None]] = {}
 _running = False
 
 
+def _idle_watches() -> int:
+    """Accounts currently held in IDLE (ended watches, e.g. unsupported, don't count)."""
+    return sum(not task.done() for task in _idle_tasks.values())
+
+
 async def start_interval_sync() -> None:
     """Start background interval sync for all accounts."""
     global _scheduler_task, _running
@@ -465,13 +627,18 @@ async def stop_interval_sync() -> None:
     global _scheduler_task, _running
     _running = False
 
+    tasks = list(_idle_tasks.values())
+    _idle_tasks.clear()
     if _scheduler_task:
-        _scheduler_task.cancel()
+        tasks.append(_scheduler_task)
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
         try:
-            await _scheduler_task
+            await task
         except asyncio.CancelledError:
             pass
-        _scheduler_task = None
+    _scheduler_task = None
 
     logger.info("email_sync.stopped", {}, user_id="system")
 
@@ -493,53 +660,70 @@ async def _run_interval_sync() -> None:
 
 
 async def _sync_all_accounts() -> None:
-    """Sync all connected accounts."""
+    """Sync all connected accounts concurrently.
+
+    At most max_workers accounts sync at once and at most
+    max_connections_per_host of them against the same IMAP host. The most
+    lagging accounts start first; accounts in RATE_LIMIT_COOLDOWN are skipped.
+    """
     from src.storage.user import get_all_user_ids
 
     user_ids = get_all_user_ids()
     # Filter out "default_user" user - it's not valid for email operations
     user_ids = [uid for uid in user_ids if uid and uid != "default_user"]
-    batch_size = SETTINGS.email_sync.batch_size
+    config = SETTINGS.email_sync
 
+    lags = account_sync_lag()
+    jobs: list[tuple[float, str, str, dict[str, Any], list[str]]] = []
     for user_id in user_ids:
         accounts = _load_accounts(user_id)
         for account_id, account in accounts.items():
             cooldown_key = f"{user_id}:{account_id}"
 
-            if cooldown_key in RATE_LIMIT_COOLDOWN:
-                cooldown_until = RATE_LIMIT_COOLDOWN[cooldown_key]
-                if time.time() < cooldown_until:
-                    logger.info(
-                        "email_sync.skipping_rate_limited",
-                        {
-                            "account": account["name"],
-                            "cooldown_remaining": int(cooldown_until - time.time()),
-                        },
-                    )
-                    continue
+            if _in_cooldown(cooldown_key):
+                logger.info(
+                    "email_sync.skipping_rate_limited",
+                    {
+                        "account": account["name"],
+                        "cooldown_remaining": int(RATE_LIMIT_COOLDOWN[cooldown_key] - time.time()),
+                    },
+                )
+                continue
+
+            if (
+                config.idle_push
+                and _running
+                and cooldown_key not in _idle_tasks
+                and _idle_watches() < config.idle_max_accounts
+            ):
+                _idle_tasks[cooldown_key] = asyncio.create_task(
+                    _watch_idle(user_id, account_id, account)
+                )
 
             try:
-                await _sync_emails(
-                    user_id=user_id,
-                    account_id=account_id,
-                    folder="INBOX",
-                    mode="new",
-                    limit=batch_size,
-                )
+                folders = _due_folders(user_id, account_id, account)
             except Exception as e:
-                error_str = str(e).lower()
-                if "too many simultaneous connections" in error_str or "rate limit" in error_str:
-                    cooldown_minutes = getattr(SETTINGS.email_sync, "cooldown_minutes", 15)
-                    RATE_LIMIT_COOLDOWN[cooldown_key] = time.time() + (cooldown_minutes * 60)
-                    logger.warning(
-                        "email_sync.rate_limited",
-                        {"account": account["name"], "cooldown_minutes": cooldown_minutes},
-                    )
-                else:
-                    logger.error(
-                        "email_sync.account_error",
-                        {"account": account["name"], "error": str(e)},
-                    )
+                logger.error(
+                    "email_sync.account_error", {"account": account["name"], "error": str(e)}
+                )
+                continue
+            jobs.append(
+                (lags.get(cooldown_key, float("inf")), user_id, account_id, account, folders)
+            )
+
+    # Most-lagging (and never synced) accounts first; semaphore waiters wake in FIFO order.
+    jobs.sort(key=lambda job: -job[0])
+    workers = asyncio.Semaphore(max(1, config.max_workers))
+    host_slots: dict[str, asyncio.Semaphore] = {}
+    tasks = []
+    for _, user_id, account_id, account, folders in jobs:
+        host = account.get("imap_host") or ""
+        slots = host_slots.setdefault(
+            host, asyncio.Semaphore(max(1, config.max_connections_per_host))
+        )
+        tasks.append(_sync_account(user_id, account_id, account, folders, workers, slots))
+    await asyncio.gather(*tasks)
+    get_imap_pool().prune()
 
 
 @tool
@@ -0,0 +1,414 @@
+"""Conversation threading for stored emails.
+
+A JWZ-style pass over Message-ID, In-Reply-To and References that runs
+incrementally as each sync batch is written:
+
+1. Every message contributes its own Message-ID plus every ID it references.
+   ``thread_links`` maps each ID seen so far to a thread, so a reply joins
+   its parent's thread even when the parent is stored later (backfill runs
+   newest first) or never: two replies citing the same missing parent still
+   meet at its ID.
+2. When a message's IDs resolve to several threads, they are merged into the
+   oldest one.
+3. A message with no references whose subject carries a reply prefix
+   ("Re:", "Fwd:", ...) joins the most recent thread with the same base
+   subject within SUBJECT_WINDOW_SECONDS, for clients that drop References.
+4. ``threads`` keeps one summary row per thread (subject, participants,
+   message/unread counts, first/last activity), recomputed for the threads a
+   batch touched.
+
+The same message stored in several folders shares its Message-ID, so it
+lands in one thread and is counted once.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from collections.abc import Callable, Iterable
+from email.utils import getaddresses
+from typing import Any
+
+from sqlalchemy import bindparam, text
+
+SUBJECT_WINDOW_SECONDS = 30 * 24 * 3600
+DEFAULT_BACKFILL_BATCH = 500
+MAX_PARTICIPANTS = 50
+
+_MESSAGE_ID = re.compile(r"<([^<>\s]+)>")
+_REPLY_PREFIX = re.compile(r"^(?:\s*(?:re|fwd?|aw|sv|wg|tr)(?:\[\d+\])?\s*:)+\s*", re.IGNORECASE)
+
+_LINKED_THREADS = text("""
+    SELECT DISTINCT l.thread_id, t.first_activity
+    FROM thread_links l
+    LEFT JOIN threads t ON t.account_id = l.account_id AND t.thread_id = l.thread_id
+    WHERE l.account_id = :account_id AND l.ref_id IN :keys
+""").bindparams(bindparam("keys", expanding=True))
+
+_SUBJECT_THREAD = text("""
+    SELECT thread_id FROM threads
+    WHERE account_id = :account_id AND subject_key = :subject_key
+      AND last_activity >= :since AND first_activity <= :until
+    ORDER BY last_activity DESC
+    LIMIT 1
+""")
+
+_LINK = text("""
+    INSERT INTO thread_links (account_id, ref_id, thread_id)
+    VALUES (:account_id, :ref_id, :thread_id)
+    ON CONFLICT (account_id, ref_id) DO UPDATE SET thread_id = excluded.thread_id
+""")
+
+_SET_THREAD = text("""
+    UPDATE emails SET thread_id = :thread_id
+    WHERE account_id = :account_id AND folder = :folder AND message_id = :message_id
+""")
+
+# Activity is kept current per message so merges and subject lookups later in
+# the same batch see it; the rest of the row is filled in by refresh_threads.
+_TOUCH_THREAD = text("""
+    INSERT INTO threads (account_id, thread_id, subject, subject_key, participants,
+                         message_count, unread_count, first_activity, last_activity)
+    VALUES (:account_id, :thread_id, :subject, :subject_key, '[]', 0, 0, :ts, :ts)
+    ON CONFLICT (account_id, thread_id) DO UPDATE SET
+        first_activity = MIN(first_activity, excluded.first_activity),
+        last_activity = MAX(last_activity, excluded.last_activity)
+""")
+
+_SAVE_THREAD = text("""
+    INSERT OR REPLACE INTO threads
+    (account_id, thread_id, subject, subject_key, participants,
+     message_count, unread_count, first_activity, last_activity)
+    VALUES (:account_id, :thread_id, :subject, :subject_key, :participants,
+            :message_count, :unread_count, :first_activity, :last_activity)
+""")
+
+_THREAD_ROWS = text("""
+    SELECT thread_id, folder, message_id, rfc_message_id, subject,
+           from_addr, to_addrs, cc_addrs, timestamp, read
+    FROM emails
+    WHERE account_id = :account_id AND thread_id IN :thread_ids
+    ORDER BY timestamp
+""").bindparams(bindparam("thread_ids", expanding=True))
+
+
+def message_ids(header: str | None) -> list[str]:
+    """Message-IDs in a header value, in order and without angle brackets."""
+    if not header:
+        return []
+    found = _MESSAGE_ID.findall(header)
+    if not found and header.strip() and " " not in header.strip():
+        found = [header.strip()]
+    return list(dict.fromkeys(found))
+
+
+def strip_reply_prefix(subject: str | None) -> str:
+    """Subject without leading "Re:"/"Fwd:"-style prefixes."""
+    return _REPLY_PREFIX.sub("", subject or "").strip()
+
+
+def subject_key(subject: str | None) -> str:
+    """Base subject normalised for matching."""
+    return " ".join(strip_reply_prefix(subject).split()).casefold()
+
+
+def message_key(row: dict[str, Any]) -> str:
+    """The ID a stored message is threaded under: its Message-ID, else folder/UID."""
+    ids = message_ids(row.get("rfc_message_id"))
+    return ids[0] if ids else f"{row['folder']}/{row['message_id']}"
+
+
+def _new_thread_id(key: str) -> str:
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def _participants(rows: list[Any]) -> list[str]:
+    fields: list[str] = []
+    for row in rows:
+        fields.extend(v for v in (row.from_addr, row.to_addrs, row.cc_addrs) if v)
+    addresses = {addr.lower() for _, addr in getaddresses(fields) if "@" in addr}
+    return sorted(addresses)[:MAX_PARTICIPANTS]
+
+
+def _merge(conn: Any, account_id: str, found: list[Any]) -> str:
+    """Fold every thread in ``found`` into the oldest; returns the survivor."""
+    found = sorted(found, key=lambda r: (r[1] is None, r[1] or 0, r[0]))
+    survivor = str(found[0][0])
+    others = [r[0] for r in found[1:]]
+    if not others:
+        return survivor
+    params = {"account_id": account_id, "survivor": survivor, "others": others}
+    for statement in (
+        "UPDATE thread_links SET thread_id = :survivor "
+        "WHERE account_id = :account_id AND thread_id IN :others",
+        "UPDATE emails SET thread_id = :survivor "
+        "WHERE account_id = :account_id AND thread_id IN :others",
+        "UPDATE threads SET "
+        "first_activity = MIN(first_activity, (SELECT MIN(first_activity) FROM threads "
+        "  WHERE account_id = :account_id AND thread_id IN :others)), "
+        "last_activity = MAX(last_activity, (SELECT MAX(last_activity) FROM threads "
+        "  WHERE account_id = :account_id AND thread_id IN :others)) "
+        "WHERE account_id = :account_id AND thread_id = :survivor",
+        "DELETE FROM threads WHERE account_id = :account_id AND thread_id IN :others",
+    ):
+        conn.execute(text(statement).bindparams(bindparam("others", expanding=True)), params)
+    return survivor
+
+
+def _subject_thread(conn: Any, account_id: str, row: dict[str, Any]) -> str | None:
+    subject = row.get("subject") or ""
+    key = subject_key(subject)
+    if not key or strip_reply_prefix(subject) == subject.strip():
+        return None
+    ts = row.get("timestamp") or 0
+    match = conn.execute(
+        _SUBJECT_THREAD,
+        {
+            "account_id": account_id,
+            "subject_key": key,
+            "since": ts - SUBJECT_WINDOW_SECONDS,
+            "until": ts + SUBJECT_WINDOW_SECONDS,
+        },
+    ).fetchone()
+    return match[0] if match else None
+
+
+def thread_messages(conn: Any, account_id: str, rows: Iterable[dict[str, Any]]) -> set[str]:
+    """Assign thread_id to stored emails rows and refresh the threads they touch.
+
+    Each row needs folder, message_id, subject and timestamp, plus
+    rfc_message_id, in_reply_to and thread_references when known. Runs on
+    the caller's connection so a batch is threaded in the transaction that
+    stored it. Returns the IDs of the threads touched.
+    """
+    touched: set[str] = set()
+    for row in sorted(rows, key=lambda r: r.get("timestamp") or 0):
+        own = message_key(row)
+        refs = message_ids(row.get("thread_references")) + message_ids(row.get("in_reply_to"))
+        keys = list(dict.fromkeys([own, *refs]))
+
+        found = conn.execute(_LINKED_THREADS, {"account_id": account_id, "keys": keys}).fetchall()
+        if found:
+            thread_id = _merge(conn, account_id, found)
+        else:
+            by_subject = _subject_thread(conn, account_id, row) if not refs else None
+            thread_id = by_subject or _new_thread_id(own)
+
+        conn.execute(
+            _LINK, [{"account_id": account_id, "ref_id": k, "thread_id": thread_id} for k in keys]
+        )
+        conn.execute(
+            _SET_THREAD,
+            {
+                "account_id": account_id,
+                "folder": row["folder"],
+                "message_id": row["message_id"],
+                "thread_id": thread_id,
+            },
+        )
+        conn.execute(
+            _TOUCH_THREAD,
+            {
+                "account_id": account_id,
+                "thread_id": thread_id,
+                "subject": strip_reply_prefix(row.get("subject")),
+                "subject_key": subject_key(row.get("subject")),
+                "ts": row.get("timestamp") or 0,
+            },
+        )
+        touched.add(thread_id)
+
+    refresh_threads(conn, account_id, touched)
+    return touched
+
+
+def refresh_threads(conn: Any, account_id: str, thread_ids: Iterable[str]) -> None:
+    """Recompute the threads rows for ``thread_ids``; drops threads left empty."""
+    thread_ids = [t for t in set(thread_ids) if t]
+    if not thread_ids:
+        return
+    grouped: dict[str, list[Any]] = {t: [] for t in thread_ids}
+    for row in conn.execute(_THREAD_ROWS, {"account_id": account_id, "thread_ids": thread_ids}):
+        grouped[row.thread_id].append(row)
+
+    saved = []
+    for thread_id, rows in grouped.items():
+        if not rows:
+            continue
+        # One entry per message, however many folders hold a copy.
+        messages: dict[str, bool] = {}
+        for row in rows:
+            key = message_key(row._mapping)
+            messages[key] = messages.get(key, False) or bool(row.read)
+        root = rows[0]
+        saved.append(
+            {
+                "account_id": account_id,
+                "thread_id": thread_id,
+                "subject": strip_reply_prefix(root.subject),
+                "subject_key": subject_key(root.subject),
+                "participants": json.dumps(_participants(rows)),
+                "message_count": len(messages),
+                "unread_count": sum(1 for read in messages.values() if not read),
+                "first_activity": rows[0].timestamp,
+                "last_activity": rows[-1].timestamp,
+            }
+        )
+    if saved:
+        conn.execute(_SAVE_THREAD, saved)
+    empty = [t for t, rows in grouped.items() if not rows]
+    if empty:
+        conn.execute(
+            text(
+                "DELETE FROM threads WHERE account_id = :account_id AND thread_id IN :empty"
+            ).bindparams(bindparam("empty", expanding=True)),
+            {"account_id": account_id, "empty": empty},
+        )
+
+
+def folder_thread_ids(conn: Any, account_id: str, folder: str) -> list[str]:
+    """Threads with at least one message in ``folder``."""
+    result = conn.execute(
+        text(
+            "SELECT DISTINCT thread_id FROM emails WHERE account_id = :account_id "
+            "AND folder = :folder AND thread_id IS NOT NULL"
+        ),
+        {"account_id": account_id, "folder": folder},
+    )
+    return [row[0] for row in result]
+
+
+def get_thread(
+    engine: Any, account_id: str, thread_id: str
+) -> tuple[dict[str, Any] | None, list[dict[str, Any]]]:
+    """A thread's summary row and its messages oldest first, one copy per message."""
+    with engine.connect() as conn:
+        summary = conn.execute(
+            text("SELECT * FROM threads WHERE account_id = :account_id AND thread_id = :thread_id"),
+            {"account_id": account_id, "thread_id": thread_id},
+        ).fetchone()
+        rows = conn.execute(
+            text("""
+                SELECT folder, message_id, rfc_message_id, from_addr, from_name, to_addrs,
+                       cc_addrs, subject, body_text, timestamp, read, flagged, has_attachments
+                FROM emails
+                WHERE account_id = :account_id AND thread_id = :thread_id
+                ORDER BY timestamp, folder = 'INBOX' DESC
+            """),
+            {"account_id": account_id, "thread_id": thread_id},
+        )
+        messages: dict[str, dict[str, Any]] = {}
+        for row in rows:
+            messages.setdefault(message_key(row._mapping), dict(row._mapping))
+    if summary is None:
+        return None, []
+    thread = dict(summary._mapping)
+    thread["participants"] = json.loads(thread["participants"] or "[]")
+    return thread, list(messages.values())
+
+
+def find_thread_id(engine: Any, account_id: str, folder: str, message_id: str) -> str | None:
+    """thread_id of a stored email, by folder and UID."""
+    with engine.connect() as conn:
+        row = conn.execute(
+            text(
+                "SELECT thread_id FROM emails WHERE account_id = :account_id "
+                "AND folder = :folder AND message_id = :message_id"
+            ),
+            {"account_id": account_id, "folder": folder, "message_id": message_id},
+        ).fetchone()
+    return row[0] if row else None
+
+
+HeaderFetcher = Callable[[str, list[str]], dict[str, dict[str, str | None]]]
+
+
+def backfill_threads(
+    engine: Any,
+    account_id: str,
+    *,
+    fetch_headers: HeaderFetcher | None = None,
+    batch_size: int = DEFAULT_BACKFILL_BATCH,
+) -> dict[str, int]:
+    """Thread an account's stored emails that have no thread_id yet, oldest first.
+
+    Rows stored before threading headers were captured have no Message-ID
+    or references. ``fetch_headers(folder, uids)`` returns them by UID
+    (keys rfc_message_id, in_reply_to, thread_references) so they are
+    filled in first; without it such rows are threaded on their own or by
+    subject. Each batch is committed separately, so an interrupted backfill
+    resumes where it stopped.
+    """
+    stats = {"headers_fetched": 0, "threaded": 0}
+    params = {"account_id": account_id}
+
+    if fetch_headers is not None:
+        with engine.connect() as conn:
+            pending: dict[str, list[str]] = {}
+            for folder, uid in conn.execute(
+                text(
+                    "SELECT folder, message_id FROM emails WHERE account_id = :account_id "
+                    "AND thread_id IS NULL AND rfc_message_id IS NULL"
+                ),
+                params,
+            ):
+                pending.setdefault(folder, []).append(uid)
+        for folder, uids in pending.items():
+            for i in range(0, len(uids), batch_size):
+                headers = fetch_headers(folder, uids[i : i + batch_size])
+                updates = [
+                    {
+                        "account_id": account_id,
+                        "folder": folder,
+                        "message_id": uid,
+                        "rfc_message_id": values.get("rfc_message_id") or "",
+                        "in_reply_to": values.get("in_reply_to"),
+                        "thread_references": values.get("thread_references"),
+                    }
+                    for uid, values in headers.items()
+                ]
+                if not updates:
+                    continue
+                with engine.begin() as conn:
+                    conn.execute(
+                        text("""
+                            UPDATE emails SET rfc_message_id = :rfc_message_id,
+                                in_reply_to = :in_reply_to,
+                                thread_references = :thread_references
+                            WHERE account_id = :account_id AND folder = :folder
+                              AND message_id = :message_id
+                        """),
+                        updates,
+                    )
+                stats["headers_fetched"] += len(updates)
+
+    while True:
+        with engine.begin() as conn:
+            rows = [
+                dict(row._mapping)
+                for row in conn.execute(
+                    text("""
+                        SELECT folder, message_id, rfc_message_id, in_reply_to,
+                               thread_references, subject, timestamp
+                        FROM emails
+                        WHERE account_id = :account_id AND thread_id IS NULL
+                        ORDER BY timestamp
+                        LIMIT :limit
+                    """),
+                    {**params, "limit": batch_size},
+                )
+            ]
+            if not rows:
+                break
+            thread_messages(conn, account_id, rows)
+        stats["threaded"] += len(rows)
+
+    with engine.connect() as conn:
+        stats["threads"] = int(
+            conn.execute(
+                text("SELECT COUNT(*) FROM threads WHERE account_id = :account_id"), params
+            ).scalar()
+            or 0
+        )
+    return stats
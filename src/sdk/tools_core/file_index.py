@@ -0,0 +1,635 @@
+"""Persistent trigram index over a workspace's text files, for files_grep_search.
+
+Each workspace keeps a SQLite index next to its Files directory: one row
+per file (size, mtime) and one (trigram, file) posting per distinct
+lower-cased trigram of the file's text. A regex query is reduced to the
+literal substrings any match must contain (an AND/OR tree, as in Google
+Code Search); only files holding all of their trigrams are opened and
+verified line by line with the real regex, and results are yielded as
+they are found so callers can stop early.
+
+The index is kept current three ways: the files_* tools refresh the
+paths they touch (refresh_index), a search first reconciles the subtree
+it covers against a stat-only walk (catching external edits without
+reading unchanged files; skipped if that subtree was walked within
+RECONCILE_TTL seconds), and a missing index is built on first search.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from typing import Any
+
+from src.app_logging import get_logger
+
+logger = get_logger()
+
+MAX_FILE_SIZE = 10 * 1024 * 1024
+# Seconds a reconciled subtree is trusted before a search walks it again.
+RECONCILE_TTL = 5.0
+_BINARY_SNIFF = 8192
+_ALWAYS_SKIP = {".git"}
+
+# A query plan node: ("lit", text) | ("and", [nodes]) | ("or", [nodes]).
+# ("and", []) matches every file.
+Plan = tuple[str, Any]
+_ALL: Plan = ("and", [])
+
+
+@dataclass
+class FileMatch:
+    """One matching line."""
+
+    path: str
+    line: int
+    text: str
+
+
+class IgnoreRules:
+    """.gitignore-style path patterns.
+
+    Supports comments, ``!`` negation, ``*``/``?``/``[...]``, ``**``,
+    trailing ``/`` for directories and leading or inner ``/`` to anchor a
+    pattern at the root; the last matching pattern wins and anything
+    inside an ignored directory is ignored.
+    """
+
+    def __init__(self, patterns: Iterable[str] = ()) -> None:
+        self._rules: list[tuple[re.Pattern[str], bool, bool]] = []
+        for line in patterns:
+            line = line.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            line = line[1:] if negate else line
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if line:
+                self._rules.append((self._compile(line), negate, dir_only))
+
+    def __bool__(self) -> bool:
+        return bool(self._rules)
+
+    @classmethod
+    def from_file(cls, path: Path, extra: Iterable[str] = ()) -> IgnoreRules:
+        try:
+            lines = path.read_text(encoding="utf-8", errors="ignore").splitlines()
+        except OSError:
+            lines = []
+        return cls([*lines, *extra])
+
+    @staticmethod
+    def _compile(pattern: str) -> re.Pattern[str]:
+        anchored = "/" in pattern
+        pattern = pattern.lstrip("/")
+        out, i = [], 0
+        while i < len(pattern):
+            if pattern.startswith("**/", i):
+                out.append("(?:.*/)?")
+                i += 3
+            elif pattern.startswith("**", i):
+                out.append(".*")
+                i += 2
+            elif pattern[i] == "*":
+                out.append("[^/]*")
+                i += 1
+            elif pattern[i] == "?":
+                out.append("[^/]")
+                i += 1
+            elif pattern[i] == "[" and (end := pattern.find("]", i + 2)) != -1:
+                body = pattern[i + 1 : end]
+                out.append("[" + ("^" + body[1:] if body.startswith("!") else body) + "]")
+                i = end + 1
+            else:
+                out.append(re.escape(pattern[i]))
+                i += 1
+        return re.compile(("" if anchored else "(?:.*/)?") + "".join(out))
+
+    def _match(self, path: str, is_dir: bool) -> bool:
+        ignored = False
+        for regex, negate, dir_only in self._rules:
+            if (is_dir or not dir_only) and regex.fullmatch(path):
+                ignored = not negate
+        return ignored
+
+    def ignored(self, path: str, is_dir: bool = False) -> bool:
+        """Whether a root-relative POSIX path (or any directory above it) is ignored."""
+        parts = path.split("/")
+        for i in range(1, len(parts)):
+            if self._match("/".join(parts[:i]), True):
+                return True
+        return self._match(path, is_dir)
+
+
+# ── Query planning ───────────────────────────────────────────────
+
+
+_SIMPLE_ESCAPES = {"a": "\a", "f": "\f", "n": "\n", "r": "\r", "t": "\t", "v": "\v"}
+_HEX_ESCAPES = {"x": 2, "u": 4, "U": 8}
+_REPEAT = re.compile(r"\{(\d*)(?:,(\d*))?\}")
+_INLINE_FLAGS = re.compile(r"\?([aiLmsux]*)(?:-([imsx]+))?([:)])")
+
+# What a regex atom contributes: ("char", c) a literal character, ("part",
+# plan) a group, ("any", None) unknown text, ("zero", None) nothing at all.
+_Atom = tuple[str, Any]
+
+
+class _UnplannableError(Exception):
+    """The pattern uses syntax whose literals can't be read off its text."""
+
+
+class _Walker:
+    """Reads the literals a regex needs straight off its source text.
+
+    Only the syntax that decides which literals are required is modelled
+    (escapes, classes, groups, alternation, repeats); anything else counts
+    as unknown text, which makes a plan less selective but never wrong.
+    The pattern must already compile.
+    """
+
+    def __init__(self, pattern: str, fold: bool) -> None:
+        self.pattern = pattern
+        self.pos = 0
+        self.fold = fold
+
+    def _peek(self, text: str) -> bool:
+        return self.pattern.startswith(text, self.pos)
+
+    def alternation(self) -> Plan:
+        branches = [self.sequence()]
+        while self._peek("|"):
+            self.pos += 1
+            branches.append(self.sequence())
+        return branches[0] if len(branches) == 1 else _simplify(("or", branches))
+
+    def sequence(self) -> Plan:
+        parts: list[Plan] = []
+        run: list[str] = []
+        last = ""  # kind of the atom a following repeat applies to
+
+        def flush() -> None:
+            literal = "".join(run)
+            # Case-insensitive non-ASCII can match other code points than lower() gives.
+            if len(literal) >= 3 and not (self.fold and not literal.isascii()):
+                parts.append(("lit", literal))
+            run.clear()
+
+        while self.pos < len(self.pattern) and not self._peek("|") and not self._peek(")"):
+            least = self._repeat()
+            if least is not None:
+                if last == "char":
+                    char = run.pop()
+                    if least:
+                        # The first copy ends the run and the last one starts the next.
+                        run.append(char)
+                        flush()
+                        run.append(char)
+                    else:
+                        flush()
+                elif last == "part" and not least:
+                    parts[-1] = _ALL
+                last = ""
+                continue
+            kind, value = self._atom()
+            if kind == "char":
+                run.append(value)
+            elif kind == "part":
+                flush()
+                parts.append(value)
+            elif kind == "any":
+                flush()
+            elif kind == "zero":
+                continue  # the literals either side stay adjacent
+            last = kind
+        flush()
+        return _simplify(("and", parts))
+
+    def _repeat(self) -> int | None:
+        """Consume a repeat operator, returning its minimum count."""
+        char = self.pattern[self.pos]
+        if char in "*?":
+            least, self.pos = 0, self.pos + 1
+        elif char == "+":
+            least, self.pos = 1, self.pos + 1
+        elif char == "{" and (m := _REPEAT.match(self.pattern, self.pos)):
+            least, self.pos = int(m.group(1) or 0), m.end()
+        else:
+            return None
+        if self._peek("?") or self._peek("+"):
+            self.pos += 1  # lazy or possessive
+        return least
+
+    def _atom(self) -> _Atom:
+        char = self.pattern[self.pos]
+        self.pos += 1
+        if char == "\\":
+            return self._escape()
+        if char == "[":
+            self._skip_class()
+            return ("any", None)
+        if char == "(":
+            return self._group()
+        if char == ".":
+            return ("any", None)
+        if char in "^$":
+            return ("zero", None)
+        return ("char", char)
+
+    def _escape(self) -> _Atom:
+        char = self.pattern[self.pos]
+        self.pos += 1
+        if char in "bBAZ":
+            return ("zero", None)
+        if char in "dDsSwW":
+            return ("any", None)
+        if char in _SIMPLE_ESCAPES:
+            return ("char", _SIMPLE_ESCAPES[char])
+        if char.isdigit():  # backreference or octal escape
+            while self.pos < len(self.pattern) and self.pattern[self.pos].isdigit():
+                self.pos += 1
+            return ("any", None)
+        if char in _HEX_ESCAPES:
+            end = self.pos + _HEX_ESCAPES[char]
+            code, self.pos = int(self.pattern[self.pos : end], 16), end
+            return ("char", chr(code))
+        if char == "N":  # \N{NAME}
+            self.pos = self.pattern.index("}", self.pos) + 1
+            return ("any", None)
+        return ("char", char)
+
+    def _skip_class(self) -> None:
+        if self._peek("^"):
+            self.pos += 1
+        if self._peek("]"):
+            self.pos += 1
+        while self.pattern[self.pos] != "]":
+            self.pos += 2 if self.pattern[self.pos] == "\\" else 1
+        self.pos += 1
+
+    def _body(self) -> Plan:
+        plan = self.alternation()
+        self.pos += 1  # the closing ")"
+        return plan
+
+    def _group(self) -> _Atom:
+        if not self._peek("?"):
+            return ("part", self._body())
+        if self._peek("?:") or self._peek("?>"):
+            self.pos += 2
+            return ("part", self._body())
+        if self._peek("?P<"):
+            self.pos = self.pattern.index(">", self.pos) + 1
+            return ("part", self._body())
+        if self._peek("?#"):
+            self.pos = self.pattern.index(")", self.pos) + 1
+            return ("zero", None)
+        if self._peek("?P="):
+            self.pos = self.pattern.index(")", self.pos) + 1
+            return ("any", None)
+        for prefix in ("?=", "?!", "?<=", "?<!"):
+            if self._peek(prefix):
+                self.pos += len(prefix)
+                self._body()
+                return ("any", None)
+        if self._peek("?("):  # conditional: (?(group)yes|no)
+            self.pos = self.pattern.index(")", self.pos) + 1
+            self._body()
+            return ("any", None)
+        m = _INLINE_FLAGS.match(self.pattern, self.pos)
+        if m is None:
+            raise _UnplannableError(self.pattern)
+        on, end = m.group(1), m.group(3)
+        if "x" in on:
+            raise _UnplannableError(self.pattern)  # verbose: whitespace and comments
+        self.pos = m.end()
+        if end == ")":
+            self.fold = self.fold or "i" in on
+            return ("zero", None)
+        fold = self.fold
+        self.fold = fold or "i" in on
+        plan = self._body()
+        self.fold = fold
+        return ("part", plan)
+
+
+def _simplify(plan: Plan) -> Plan:
+    kind, children = plan
+    if kind == "and":
+        children = [c for c in children if c != _ALL]
+        return children[0] if len(children) == 1 else ("and", children)
+    if kind == "or":
+        return _ALL if any(c == _ALL for c in children) else plan
+    return plan
+
+
+def query_plan(pattern: str, flags: int = 0) -> Plan:
+    """Reduce a regex to the literal substrings every match must contain."""
+    try:
+        re.compile(pattern, flags)
+    except re.error:
+        return _ALL
+    if flags & re.VERBOSE:
+        return _ALL
+    walker = _Walker(pattern, bool(flags & re.IGNORECASE))
+    try:
+        return walker.alternation()
+    except (_UnplannableError, IndexError, ValueError):
+        return _ALL
+
+
+def trigrams(text: str) -> set[str]:
+    """Distinct lower-cased trigrams of text that don't span a line break."""
+    text = text.lower()
+    return {g for g in (text[i : i + 3] for i in range(len(text) - 2)) if "\n" not in g}
+
+
+# ── Index ────────────────────────────────────────────────────────
+
+
+class FileIndex:
+    """Trigram index of one directory tree, stored in a SQLite file.
+
+    Methods are thread-safe; writers are serialized by a per-index lock.
+    """
+
+    def __init__(self, root: Path, db_path: Path) -> None:
+        self.root = root.resolve()
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._reconciled: dict[str, float] = {}  # subtree -> monotonic time of last walk
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS files (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT NOT NULL UNIQUE,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    indexed INTEGER NOT NULL DEFAULT 1
+                );
+                CREATE TABLE IF NOT EXISTS grams (
+                    gram TEXT NOT NULL,
+                    file_id INTEGER NOT NULL,
+                    PRIMARY KEY (gram, file_id)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_grams_file ON grams(file_id);
+            """)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """A connection that commits on success and is always closed."""
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _ignore_rules(self) -> IgnoreRules:
+        return IgnoreRules.from_file(self.root / ".gitignore")
+
+    def _rel(self, path: Path) -> str | None:
+        try:
+            rel = path.resolve().relative_to(self.root)
+        except ValueError:
+            return None
+        return rel.as_posix() if rel.parts else ""
+
+    def _walk(self, start: Path, rules: IgnoreRules) -> dict[str, tuple[int, int]]:
+        """Stat every indexable file under start: {relative path: (size, mtime_ns)}."""
+        found: dict[str, tuple[int, int]] = {}
+        for dirpath, dirnames, filenames in os.walk(start):
+            base = self._rel(Path(dirpath))
+            if base is None:
+                continue
+            prefix = f"{base}/" if base else ""
+            dirnames[:] = [
+                d
+                for d in dirnames
+                if d not in _ALWAYS_SKIP and not rules.ignored(prefix + d, is_dir=True)
+            ]
+            for name in filenames:
+                rel = prefix + name
+                if rules.ignored(rel):
+                    continue
+                try:
+                    st = os.stat(os.path.join(dirpath, name))
+                except OSError:
+                    continue
+                found[rel] = (st.st_size, st.st_mtime_ns)
+        return found
+
+    def _index_file(self, conn: sqlite3.Connection, rel: str, size: int, mtime_ns: int) -> None:
+        text = None
+        if size <= MAX_FILE_SIZE:
+            try:
+                data = (self.root / rel).read_bytes()
+            except OSError:
+                return
+            if b"\0" not in data[:_BINARY_SNIFF]:
+                text = data.decode("utf-8", errors="ignore")
+        row = conn.execute("SELECT id FROM files WHERE path = ?", (rel,)).fetchone()
+        if row:
+            file_id = row[0]
+            conn.execute("DELETE FROM grams WHERE file_id = ?", (file_id,))
+            conn.execute(
+                "UPDATE files SET size = ?, mtime_ns = ?, indexed = ? WHERE id = ?",
+                (size, mtime_ns, text is not None, file_id),
+            )
+        else:
+            file_id = conn.execute(
+                "INSERT INTO files (path, size, mtime_ns, indexed) VALUES (?, ?, ?, ?)",
+                (rel, size, mtime_ns, text is not None),
+            ).lastrowid
+        if text:
+            conn.executemany(
+                "INSERT INTO grams (gram, file_id) VALUES (?, ?)",
+                ((g, file_id) for g in trigrams(text)),
+            )
+
+    @staticmethod
+    def _subtree(rel: str) -> tuple[str, tuple[str, ...]]:
+        """WHERE clause for rel and everything under it ("" is the whole tree)."""
+        if not rel:
+            return "1", ()
+        # "0" sorts right after "/", so the range holds exactly rel/...
+        return "(path = ? OR path >= ? AND path < ?)", (rel, rel + "/", rel + "0")
+
+    def _remove(self, conn: sqlite3.Connection, rel: str) -> int:
+        """Drop rel and, if it was a directory, everything under it."""
+        where, params = self._subtree(rel)
+        ids = [r[0] for r in conn.execute(f"SELECT id FROM files WHERE {where}", params)]
+        for file_id in ids:
+            conn.execute("DELETE FROM grams WHERE file_id = ?", (file_id,))
+            conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+        return len(ids)
+
+    def reconcile(self, start: Path | None = None) -> dict[str, int]:
+        """Bring the index (or the subtree at start) in line with the disk.
+
+        Only files whose size or mtime changed are read. Returns
+        {"indexed", "removed", "files"}.
+        """
+        start = (start or self.root).resolve()
+        base = self._rel(start)
+        if base is None:
+            return {"indexed": 0, "removed": 0, "files": 0}
+        now = time.monotonic()
+        on_disk = self._walk(start, self._ignore_rules()) if start.is_dir() else {}
+        indexed = removed = 0
+        with self._lock, self._connect() as conn:
+            where, params = self._subtree(base)
+            stored = {
+                path: (size, mtime_ns)
+                for path, size, mtime_ns in conn.execute(
+                    f"SELECT path, size, mtime_ns FROM files WHERE {where}", params
+                )
+            }
+            for rel in stored.keys() - on_disk.keys():
+                removed += self._remove(conn, rel)
+            for rel, stat in on_disk.items():
+                if stored.get(rel) != stat:
+                    self._index_file(conn, rel, *stat)
+                    indexed += 1
+            self._reconciled[base] = now
+        if indexed or removed:
+            logger.info(
+                "file_index.reconciled",
+                {"root": str(self.root), "indexed": indexed, "removed": removed},
+            )
+        return {"indexed": indexed, "removed": removed, "files": len(on_disk)}
+
+    def ensure_fresh(self, start: Path | None = None, max_age: float | None = None) -> None:
+        """Reconcile the subtree at start unless it, or a directory above it,
+        was reconciled within the last max_age (default RECONCILE_TTL) seconds."""
+        max_age = RECONCILE_TTL if max_age is None else max_age
+        start = (start or self.root).resolve()
+        base = self._rel(start)
+        if base is None:
+            return
+        parts = base.split("/") if base else []
+        scopes = ["/".join(parts[:i]) for i in range(len(parts) + 1)]
+        now = time.monotonic()
+        with self._lock:
+            if any(now - self._reconciled.get(s, -max_age) < max_age for s in scopes):
+                return
+        self.reconcile(start)
+
+    def refresh(self, paths: Iterable[Path]) -> None:
+        """Re-index files, directories or now-missing paths after a change."""
+        for path in paths:
+            rel = self._rel(path)
+            if rel is None:
+                continue
+            if path.is_dir():
+                self.reconcile(path)
+                continue
+            with self._lock, self._connect() as conn:
+                if path.is_file() and not self._ignore_rules().ignored(rel):
+                    st = path.stat()
+                    self._index_file(conn, rel, st.st_size, st.st_mtime_ns)
+                else:
+                    self._remove(conn, rel)
+
+    def _candidates(self, conn: sqlite3.Connection, plan: Plan) -> set[int] | None:
+        """File ids that may satisfy plan; None means every file."""
+        kind, value = plan
+        if kind == "lit":
+            ids: set[int] | None = None
+            for gram in trigrams(value):
+                found = {
+                    r[0] for r in conn.execute("SELECT file_id FROM grams WHERE gram = ?", (gram,))
+                }
+                ids = found if ids is None else ids & found
+                if not ids:
+                    return set()
+            return ids
+        results = [self._candidates(conn, child) for child in value]
+        if kind == "and":
+            narrowed = [r for r in results if r is not None]
+            return set.intersection(*narrowed) if narrowed else None
+        union: set[int] = set()
+        for r in results:
+            if r is None:
+                return None
+            union |= r
+        return union
+
+    def search(
+        self,
+        regex: re.Pattern[str],
+        *,
+        under: str = "",
+        include: str | None = None,
+        exclude: IgnoreRules | None = None,
+    ) -> Iterator[FileMatch]:
+        """Yield matching lines from candidate files, in path order.
+
+        under limits the search to a root-relative directory; include is a
+        glob matched against paths relative to it (like rglob); exclude
+        drops paths matching .gitignore-style rules. Binary files and
+        files over MAX_FILE_SIZE are not searched.
+        """
+        plan = query_plan(regex.pattern, regex.flags)
+        with self._connect() as conn:
+            ids = self._candidates(conn, plan)
+            if ids is not None and not ids:
+                return
+            where, params = self._subtree(under)
+            rows = conn.execute(
+                f"SELECT id, path FROM files WHERE indexed = 1 AND {where} ORDER BY path", params
+            ).fetchall()
+
+        for file_id, rel in rows:
+            if ids is not None and file_id not in ids:
+                continue
+            local = rel[len(under) + 1 :] if under else rel
+            if include and not PurePosixPath(local).match(include):
+                continue
+            if exclude and exclude.ignored(local):
+                continue
+            try:
+                content = (self.root / rel).read_text(encoding="utf-8", errors="ignore")
+            except OSError:
+                continue
+            for line_num, line in enumerate(content.splitlines(), 1):
+                if regex.search(line):
+                    yield FileMatch(rel, line_num, line)
+
+
+_indexes: dict[str, FileIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def _index_db_path(paths: Any) -> Path:
+    files_dir: Path = paths.workspace_files_dir()
+    return files_dir.parent / ".search_index.db"
+
+
+def get_file_index(paths: Any) -> FileIndex:
+    """The (cached) index of a workspace's Files directory, given its DataPaths."""
+    db_path = _index_db_path(paths)
+    key = str(db_path)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = FileIndex(paths.workspace_files_dir(), db_path)
+        return _indexes[key]
+
+
+def refresh_index(paths: Any, targets: Iterable[Path]) -> None:
+    """Update a workspace's index after files_* changed targets.
+
+    A no-op until the index exists; the first search builds it.
+    """
+    if not _index_db_path(paths).exists():
+        return
+    get_file_index(paths).refresh(targets)
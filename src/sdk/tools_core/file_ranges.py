@@ -0,0 +1,229 @@
+"""Line-range reads, tails and in-place edits for large workspace files.
+
+files_read used to load and split a whole file to return a slice of it,
+and files_edit rewrote the whole file for every change. For files of
+LARGE_FILE_BYTES or more, the helpers here work on an mmap instead:
+
+- LineIndex records the newline count before each BLOCK-sized block of
+  the file (one pass of bytes.count, cached by path, size and mtime), so a
+  line number maps to its block with a bisect. Reading lines [a, a + n)
+  then scans at most one block plus the n lines themselves.
+- tail_lines walks back from the end of the file, and read_appended
+  returns complete lines written after a byte cursor, for follow mode.
+- replace_in_place overwrites same-length replacements in place; other
+  replacements stream the stretches between the matches into a temporary
+  file beside the original, which then replaces it atomically.
+
+Large files are split on "\\n" only (a trailing "\\r" is dropped), which
+matches str.splitlines() for ordinary text files.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager, suppress
+from dataclasses import dataclass
+from pathlib import Path
+
+LARGE_FILE_BYTES = 4 * 1024 * 1024
+BLOCK = 64 * 1024
+_READ_CHUNK = 16 * BLOCK
+_MAX_CACHED = 32
+
+
+@dataclass
+class LineIndex:
+    """Newline counts at every BLOCK boundary of one version of a file."""
+
+    size: int
+    mtime_ns: int
+    counts: array[int]  # counts[i] = newlines in bytes [0, i * BLOCK)
+    lines: int
+
+    @classmethod
+    def build(cls, path: Path) -> LineIndex:
+        st = path.stat()
+        counts = array("Q", [0])
+        newlines = 0
+        last = b""
+        with open(path, "rb") as f:
+            while chunk := f.read(_READ_CHUNK):
+                for start in range(0, len(chunk), BLOCK):
+                    newlines += chunk.count(b"\n", start, start + BLOCK)
+                    counts.append(newlines)
+                last = chunk[-1:]
+        lines = newlines + (1 if last and last != b"\n" else 0)
+        return cls(st.st_size, st.st_mtime_ns, counts, lines)
+
+    def line_start(self, mm: mmap.mmap, line: int) -> int:
+        """Byte offset where a 0-based line starts (the size if past the end)."""
+        if line <= 0:
+            return 0
+        if line > self.counts[-1]:
+            return self.size
+        block = bisect_left(self.counts, line) - 1
+        pos = block * BLOCK - 1
+        for _ in range(line - self.counts[block]):
+            pos = mm.find(b"\n", pos + 1)
+        return pos + 1
+
+
+_indexes: OrderedDict[str, LineIndex] = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def line_index(path: Path) -> LineIndex:
+    """The cached LineIndex of path, rebuilt when its size or mtime changes."""
+    st = path.stat()
+    key = str(path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None and (index.size, index.mtime_ns) == (st.st_size, st.st_mtime_ns):
+            _indexes.move_to_end(key)
+            return index
+    index = LineIndex.build(path)
+    with _indexes_lock:
+        _indexes[key] = index
+        _indexes.move_to_end(key)
+        while len(_indexes) > _MAX_CACHED:
+            _indexes.popitem(last=False)
+    return index
+
+
+@contextmanager
+def _mapped(path: Path, write: bool = False) -> Iterator[mmap.mmap]:
+    with open(path, "r+b" if write else "rb") as f:
+        access = mmap.ACCESS_WRITE if write else mmap.ACCESS_READ
+        with mmap.mmap(f.fileno(), 0, access=access) as mm:
+            yield mm
+
+
+def _decode(data: bytes) -> list[str]:
+    if not data:
+        return []
+    if data.endswith(b"\n"):
+        data = data[:-1]
+    return [
+        line[:-1] if line.endswith("\r") else line
+        for line in data.decode("utf-8", errors="replace").split("\n")
+    ]
+
+
+def read_lines(path: Path, offset: int, limit: int) -> tuple[list[str], int, int]:
+    """Lines [offset, offset + limit) of path, with the start line and total.
+
+    A negative offset counts back from the end of the file.
+    """
+    index = line_index(path)
+    if offset < 0:
+        offset = max(index.lines + offset, 0)
+    if index.size == 0 or limit <= 0 or offset >= index.lines:
+        return [], offset, index.lines
+    with _mapped(path) as mm:
+        start = index.line_start(mm, offset)
+        end = start - 1
+        for _ in range(limit):
+            end = mm.find(b"\n", end + 1)
+            if end < 0:
+                end = index.size
+                break
+        return _decode(mm[start : end + 1]), offset, index.lines
+
+
+def tail_lines(path: Path, count: int) -> tuple[list[str], int]:
+    """The last count lines of path, and the byte cursor after the last full line."""
+    size = path.stat().st_size
+    if size == 0:
+        return [], 0
+    with _mapped(path) as mm:
+        cursor = mm.rfind(b"\n") + 1
+        end = size
+        pos = end - 1 if mm[end - 1 : end] == b"\n" else end
+        for _ in range(count):
+            pos = mm.rfind(b"\n", 0, pos)
+            if pos < 0:
+                break
+        return _decode(mm[pos + 1 : end]), cursor
+
+
+def read_appended(path: Path, cursor: int, max_lines: int) -> tuple[list[str], int, bool]:
+    """Complete lines written after cursor: (lines, new cursor, truncated).
+
+    If the file shrank below cursor (rotated or rewritten) reading restarts
+    from the top and truncated is True. At most the last max_lines new
+    lines are returned; the cursor always moves past all of them.
+    """
+    size = path.stat().st_size
+    restarted = size < cursor
+    if restarted:
+        cursor = 0
+    if size == cursor:
+        return [], cursor, restarted
+    with _mapped(path) as mm:
+        end = mm.rfind(b"\n", cursor) + 1
+        if end <= cursor:
+            return [], cursor, restarted
+        pos = end - 1
+        for _ in range(max_lines):
+            pos = mm.rfind(b"\n", cursor, pos)
+            if pos < 0:
+                pos = cursor - 1
+                break
+        return _decode(mm[pos + 1 : end]), end, restarted
+
+
+def replace_in_place(path: Path, old: bytes, new: bytes) -> int:
+    """Replace every occurrence of old with new.
+
+    Same-length replacements overwrite the matches through the mmap. Any
+    other edit is written to a temporary file in the same directory and
+    renamed over path, so a crash leaves either the old or the new file.
+    Returns the number of replacements (0 leaves the file untouched).
+    """
+    if not old:
+        raise ValueError("old must not be empty")
+    with _mapped(path) as mm:
+        hits: list[int] = []
+        pos = mm.find(old)
+        while pos >= 0:
+            hits.append(pos)
+            pos = mm.find(old, pos + len(old))
+        if hits and len(new) != len(old):
+            _write_replaced(path, mm, hits, len(old), new)
+            return len(hits)
+    if not hits:
+        return 0
+
+    with _mapped(path, write=True) as mm:
+        for hit in hits:
+            mm[hit : hit + len(new)] = new
+        mm.flush()
+    return len(hits)
+
+
+def _write_replaced(path: Path, mm: mmap.mmap, hits: list[int], old_len: int, new: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f, memoryview(mm) as view:
+            start = 0
+            for hit in hits:
+                f.write(view[start:hit])
+                f.write(new)
+                start = hit + old_len
+            f.write(view[start:])
+            f.flush()
+            os.fsync(f.fileno())
+        shutil.copymode(path, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        with suppress(OSError):
+            os.unlink(tmp)
+        raise
@@ -2,10 +2,19 @@
 
 import re
 from collections import Counter
+from collections.abc import Generator, Iterator
+from itertools import islice
 from pathlib import Path
 
 from src.app_logging import get_logger
+from src.sdk.file_watcher import watch_workspace
 from src.sdk.tools import ToolAnnotations, tool
+from src.sdk.tools_core.file_index import (
+    MAX_FILE_SIZE,
+    FileMatch,
+    IgnoreRules,
+    get_file_index,
+)
 from src.storage.paths import get_paths
 
 logger = get_logger()
@@ -88,12 +97,69 @@ files_glob_search.annotations = ToolAnnotations(
 )
 
 
+def _scan_files(
+    target: Path, regex: re.Pattern[str], include: str | None, exclude: IgnoreRules
+) -> Iterator[FileMatch]:
+    """Unindexed search, for directories outside the workspace Files tree."""
+    for file_path in sorted(target.rglob(include or "*")):
+        if not file_path.is_file():
+            continue
+        rel = file_path.relative_to(target).as_posix()
+        if exclude and exclude.ignored(rel):
+            continue
+        try:
+            if file_path.stat().st_size > MAX_FILE_SIZE:
+                continue
+            content = file_path.read_text(encoding="utf-8", errors="ignore")
+        except OSError:
+            continue
+        for line_num, line in enumerate(content.splitlines(), 1):
+            if regex.search(line):
+                yield FileMatch(str(file_path), line_num, line)
+
+
+def search_files(
+    pattern: str,
+    path: str = ".",
+    include: str | None = None,
+    exclude: list[str] | None = None,
+    user_id: str = "default_user",
+    workspace_id: str = "personal",
+) -> Generator[FileMatch, None, None]:
+    """Yield regex matches as they are found; FileMatch paths are workspace-relative.
+
+    Searches under the workspace Files directory use the trigram index
+    (the searched subtree is reconciled with the disk first, at most once
+    per RECONCILE_TTL), honouring the workspace .gitignore.
+    Raises re.error for an invalid pattern and ValueError for a bad path.
+    """
+    regex = re.compile(pattern)
+    paths = get_paths(user_id, workspace_id=workspace_id)
+    root = paths.workspace_files_dir().resolve()
+    target = _resolve_path(path, user_id, workspace_id)
+    excludes = IgnoreRules(exclude or ())
+
+    if not target.is_relative_to(root):
+        yield from _scan_files(target, regex, include, excludes)
+        return
+
+    watch_workspace(paths.user_id, paths.workspace_id)
+    index = get_file_index(paths)
+    index.ensure_fresh(target if target.is_dir() else target.parent)
+    under = target.relative_to(root).as_posix()
+    yield from index.search(
+        regex, under="" if under == "." else under, include=include, exclude=excludes
+    )
+
+
 @tool
 def files_grep_search(
     pattern: str,
     path: str = ".",
     include: str | None = None,
     count: bool = False,
+    exclude: list[str] | None = None,
+    max_results: int = 100,
     user_id: str = "default_user",
     workspace_id: str = "personal",
 ) -> str:
@@ -104,6 +170,8 @@ def files_grep_search(
         path: Directory to search in (default: current dir)
         include: File pattern to filter (e.g., "*.py", "*.txt")
         count: If True, return only count of matches
+        exclude: .gitignore-style patterns to skip (e.g., ["node_modules/", "*.log"])
+        max_results: Stop after this many matching lines (default: 100)
         user_id: User identifier
         workspace_id: Workspace ID (defaults to current workspace)
 
@@ -111,56 +179,33 @@ def files_grep_search(
         Matching lines with context
     """
     try:
-        root = _get_root_path(user_id, workspace_id)
         target = _resolve_path(path, user_id, workspace_id)
 
         if not target.exists():
             return f"Directory not found: {path}"
 
         try:
-            regex = re.compile(pattern)
+            matches = search_files(pattern, path, include, exclude, user_id, workspace_id)
+            first = next(matches, None)
         except re.error as e:
             return f"Invalid regex: {e}"
 
-        matches = []
-        max_size = 10 * 1024 * 1024
-
-        for file_path in target.rglob(include or "*"):
-            if not file_path.is_file():
-                continue
-
-            try:
-                if file_path.stat().st_size > max_size:
-                    continue
-            except OSError:
-                continue
-
-            if not str(file_path).startswith(str(root)):
-                continue
-
-            try:
-                content = file_path.read_text(encoding="utf-8", errors="ignore")
-            except Exception:
-                continue
-
-            for line_num, line in enumerate(content.splitlines(), 1):
-                if regex.search(line):
-                    rel_path = file_path.relative_to(root)
-                    if count:
-                        matches.append(f"{rel_path}:{line_num}")
-                    else:
-                        matches.append(f"{rel_path}:{line_num}: {line[:200]}")
-
-        if not matches:
+        if first is None:
             return f"No matches for '{pattern}' in {path}"
 
         if count:
-            file_counts = Counter(m.split(":")[0] for m in matches)
+            file_counts = Counter(m.path for m in (first, *matches))
             result = [f"{k}: {v} matches" for k, v in file_counts.most_common()]
         else:
-            result = matches[:100]
-            if len(matches) > 100:
-                result.append(f"... and {len(matches) - 100} more matches")
+            limit = max(max_results, 1)
+            found = [first, *islice(matches, limit)]
+            result = [f"{m.path}:{m.line}: {m.text[:200]}" for m in found[:limit]]
+            if len(found) > limit:
+                result.append(
+                    f"... stopped after {limit} matches; narrow the pattern, path or "
+                    "include, or raise max_results"
+                )
+            matches.close()
 
         return "\n".join(["", *result, ""])
     except Exception as e:
@@ -1,18 +1,17 @@
 """File versioning system — SDK-native implementation."""
 
-import shutil
-from datetime import UTC, datetime, timedelta
 from pathlib import Path
 
 from src.app_logging import get_logger
 from src.sdk.tools import ToolAnnotations, tool
+from src.sdk.tools_core.version_store import VersionStore, get_version_store
 from src.storage.paths import get_paths
 
 logger = get_logger()
 
 
-def _get_version_root(user_id: str, workspace_id: str = "personal") -> Path:
-    return get_paths(user_id, workspace_id=workspace_id).versions_dir()
+def _get_store(user_id: str, workspace_id: str = "personal") -> VersionStore:
+    return get_version_store(get_paths(user_id, workspace_id=workspace_id))
 
 
 def _resolve_path(path: str | None, user_id: str, workspace_id: str = "personal") -> Path:
@@ -31,9 +30,10 @@ def _resolve_path(path: str | None, user_id: str, workspace_id: str = "personal"
     return resolved
 
 
-def _version_path(user_id: str, file_path: str, workspace_id: str = "personal") -> Path:
-    root = _get_version_root(user_id, workspace_id)
-    return root / file_path
+def _store_key(path: str, user_id: str, workspace_id: str = "personal") -> str:
+    """The workspace-relative POSIX path versions are recorded under."""
+    root_path = get_paths(user_id, workspace_id=workspace_id).workspace_files_dir().resolve()
+    return _resolve_path(path, user_id, workspace_id).relative_to(root_path).as_posix()
 
 
 def capture_version(user_id: str, file_path: str, new_content: str, workspace_id: str = "personal") -> str | None:
@@ -47,16 +47,11 @@ def capture_version(user_id: str, file_path: str, new_content: str, workspace_id
         if current_content == new_content:
             return None
 
-        ver_dir = _version_path(user_id, file_path, workspace_id)
-        ver_dir.mkdir(parents=True, exist_ok=True)
-
-        timestamp = datetime.now(UTC).strftime("%Y-%m-%dT%H-%M-%S")
-        version_file = ver_dir / timestamp
-
-        version_file.write_text(current_content, encoding="utf-8")
+        key = _store_key(file_path, user_id, workspace_id)
+        version = _get_store(user_id, workspace_id).capture(key, current_content)
 
-        logger.info("version_captured", {"path": file_path, "version": timestamp}, user_id=user_id)
-        return timestamp
+        logger.info("version_captured", {"path": file_path, "version": version}, user_id=user_id)
+        return version
     except Exception as e:
         logger.error("version_capture.error", {"path": file_path, "error": str(e)}, user_id=user_id)
         return None
@@ -75,20 +70,16 @@ def files_versions_list(path: str, user_id: str = "default_user", workspace_id:
         List of versions with timestamps
     """
     try:
-        ver_dir = _version_path(user_id, path, workspace_id)
-
-        if not ver_dir.exists():
-            return f"No versions found for: {path}"
-
-        versions = sorted(ver_dir.iterdir(), reverse=True)
+        versions = _get_store(user_id, workspace_id).versions(
+            _store_key(path, user_id, workspace_id)
+        )
 
         if not versions:
             return f"No versions found for: {path}"
 
         result = [f"Versions for: {path}", ""]
         for v in versions:
-            size = v.stat().st_size
-            result.append(f"{v.name}  ({size} bytes)")
+            result.append(f"{v['version']}  ({v['size']} bytes)")
 
         return "\n".join(result)
     except Exception as e:
@@ -115,15 +106,13 @@ def files_versions_restore(path: str, version: str, user_id: str = "default_user
         Success or error message
     """
     try:
-        ver_dir = _version_path(user_id, path, workspace_id)
-        version_file = ver_dir / version
-
-        if not version_file.exists():
+        content = _get_store(user_id, workspace_id).read(
+            _store_key(path, user_id, workspace_id), version
+        )
+        if content is None:
             return f"Version not found: {version}"
 
         target = _resolve_path(path, user_id, workspace_id)
-
-        content = version_file.read_text(encoding="utf-8")
         target.parent.mkdir(parents=True, exist_ok=True)
         target.write_text(content, encoding="utf-8")
 
@@ -155,20 +144,19 @@ def files_versions_delete(path: str, version: str | None = None, user_id: str =
         Success or error message
     """
     try:
-        ver_dir = _version_path(user_id, path, workspace_id)
+        store = _get_store(user_id, workspace_id)
+        key = _store_key(path, user_id, workspace_id)
 
-        if not ver_dir.exists():
+        if not store.versions(key):
             return f"No versions found for: {path}"
 
         if version:
-            version_file = ver_dir / version
-            if not version_file.exists():
+            if not store.delete(key, version):
                 return f"Version not found: {version}"
-            version_file.unlink()
             logger.info("version_deleted", {"path": path, "version": version}, user_id=user_id)
             return f"Deleted version {version} of {path}"
         else:
-            shutil.rmtree(ver_dir)
+            store.delete(key)
             logger.info("versions_deleted", {"path": path}, user_id=user_id)
             return f"Deleted all versions of {path}"
     except Exception as e:
@@ -180,14 +168,25 @@ files_versions_delete.annotations = ToolAnnotations(title="Delete File Version",
 
 
 @tool
-def files_versions_clean(user_id: str = "default_user", workspace_id: str = "personal") -> str:
+def files_versions_clean(
+    keep_last: int = 0,
+    max_age_days: int | None = None,
+    user_id: str = "default_user",
+    workspace_id: str = "personal",
+) -> str:
     """Clean up old versions based on retention policy.
 
+    Per file, the newest keep_last versions are always kept. Of the rest,
+    versions older than max_age_days (if given) are deleted, and the
+    remainder is thinned:
+
     Daily: keep all for 7 days
     Monthly: keep 1 per month for 12 months
     Yearly: keep 1 per year after that
 
     Args:
+        keep_last: Number of newest versions per file to always keep
+        max_age_days: Delete versions older than this many days (beyond keep_last)
         user_id: User identifier
         workspace_id: Workspace ID (defaults to current workspace)
 
@@ -195,56 +194,16 @@ def files_versions_clean(user_id: str = "default_user", workspace_id: str = "per
         Cleanup summary
     """
     try:
-        ver_root = _get_version_root(user_id, workspace_id)
-
-        if not ver_root.exists():
-            return "No versions to clean"
-
-        now = datetime.now(UTC)
-        deleted_count = 0
-
-        for file_dir in ver_root.rglob("*"):
-            if not file_dir.is_dir():
-                continue
-
-            versions = sorted(file_dir.iterdir())
-            if not versions:
-                continue
-
-            kept = []
-            monthly_versions: dict[str, datetime] = {}
-            yearly_versions: dict[str, datetime] = {}
-
-            for v in versions:
-                try:
-                    ts = datetime.strptime(v.name, "%Y-%m-%dT%H-%M-%S").replace(tzinfo=UTC)
-                    age = now - ts
-
-                    if age <= timedelta(days=7):
-                        kept.append(v)
-                    elif age <= timedelta(days=365):
-                        month_key = ts.strftime("%Y-%m")
-                        if month_key not in monthly_versions or ts > monthly_versions[month_key]:
-                            if month_key in monthly_versions:
-                                pass
-                            monthly_versions[month_key] = ts
-                            kept.append(v)
-                    else:
-                        year_key = ts.strftime("%Y")
-                        if year_key not in yearly_versions or ts > yearly_versions[year_key]:
-                            if year_key in yearly_versions:
-                                pass
-                            yearly_versions[year_key] = ts
-                            kept.append(v)
-
-                    if v not in kept:
-                        v.unlink()
-                        deleted_count += 1
-                except ValueError:
-                    continue
-
-        logger.info("versions_cleaned", {"deleted": deleted_count}, user_id=user_id)
-        return f"Cleaned up {deleted_count} old versions"
+        store = _get_store(user_id, workspace_id)
+        deleted_count = store.clean(keep_last=keep_last, max_age_days=max_age_days)
+        stats = store.stats()
+
+        logger.info("versions_cleaned", {"deleted": deleted_count, **stats}, user_id=user_id)
+        return (
+            f"Cleaned up {deleted_count} old versions "
+            f"({stats['versions']} versions of {stats['files']} files remain, "
+            f"{stats['stored_bytes']} bytes stored)"
+        )
     except Exception as e:
         logger.error("versions_clean.error", {"error": str(e)}, user_id=user_id)
         return f"Error: {e}"
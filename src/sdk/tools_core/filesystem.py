@@ -1,10 +1,18 @@
 """Filesystem tools — SDK-native implementation."""
 
+import time
 from contextvars import ContextVar
 from pathlib import Path
 
 from src.app_logging import get_logger
 from src.sdk.tools import ToolAnnotations, tool
+from src.sdk.tools_core.file_ranges import (
+    LARGE_FILE_BYTES,
+    read_appended,
+    read_lines,
+    replace_in_place,
+    tail_lines,
+)
 from src.storage.paths import get_paths
 
 logger = get_logger()
@@ -12,6 +20,9 @@ logger = get_logger()
 _current_user_id: ContextVar[str] = ContextVar("current_user_id", default="default_user")
 _current_workspace_id: ContextVar[str] = ContextVar("current_workspace_id", default="personal")
 
+_TAIL_MAX_WAIT = 30.0
+_TAIL_POLL = 0.25
+
 
 def set_user_id(user_id: str) -> None:
     _current_user_id.set(user_id)
@@ -25,6 +36,18 @@ def set_workspace_id(workspace_id: str) -> None:
     _current_workspace_id.set(workspace_id)
 
 
+def _refresh_search_index(user_id: str, workspace_id: str, *targets: Path) -> None:
+    """Tell the workspace's files_grep_search index that targets changed."""
+    if user_id == "default_user":
+        user_id = _current_user_id.get()
+    try:
+        from src.sdk.tools_core.file_index import refresh_index
+
+        refresh_index(get_paths(user_id, workspace_id=workspace_id), targets)
+    except Exception as e:
+        logger.warning("file_index.refresh_failed", {"error": str(e)}, user_id=user_id)
+
+
 def _resolve_path(path: str | None, user_id: str, workspace_id: str = "personal") -> Path:
     if user_id == "default_user":
         user_id = _current_user_id.get()
@@ -123,9 +146,12 @@ files_list.annotations = ToolAnnotations(title="List Files", read_only=True, ide
 def files_read(path: str, offset: int = 0, limit: int = 100, user_id: str = "default_user", workspace_id: str = "personal") -> str:
     """Read file content.
 
+    Only the requested lines are read, so large files (logs, exports) can be
+    paged through cheaply. Use files_tail to follow a growing file.
+
     Args:
         path: File path relative to user files
-        offset: Line number to start from (default: 0)
+        offset: Line number to start from (default: 0); negative counts from the end
         limit: Maximum number of lines to read (default: 100)
         user_id: User identifier
         workspace_id: Workspace ID (defaults to current workspace)
@@ -142,10 +168,14 @@ def files_read(path: str, offset: int = 0, limit: int = 100, user_id: str = "def
         if not target.is_file():
             return f"Not a file: {path}"
 
-        lines = target.read_text(encoding="utf-8").splitlines()
-
-        total = len(lines)
-        lines = lines[offset : offset + limit]
+        if target.stat().st_size >= LARGE_FILE_BYTES:
+            lines, offset, total = read_lines(target, offset, limit)
+        else:
+            lines = target.read_text(encoding="utf-8").splitlines()
+            total = len(lines)
+            if offset < 0:
+                offset = max(total + offset, 0)
+            lines = lines[offset : offset + limit]
 
         content = "\n".join(lines)
         return f"--- {path} ({offset}-{offset + len(lines)}/{total}) ---\n{content}"
@@ -157,6 +187,64 @@ def files_read(path: str, offset: int = 0, limit: int = 100, user_id: str = "def
 files_read.annotations = ToolAnnotations(title="Read File", read_only=True, idempotent=True)
 
 
+@tool
+def files_tail(
+    path: str,
+    lines: int = 50,
+    cursor: int | None = None,
+    wait_seconds: float = 0,
+    user_id: str = "default_user",
+    workspace_id: str = "personal",
+) -> str:
+    """Show the end of a file, or follow it as it grows.
+
+    Without a cursor, returns the last lines of the file. Every result ends its
+    header with a cursor; pass it back to get only the complete lines appended
+    since then, optionally waiting up to wait_seconds for new ones.
+
+    Args:
+        path: File path relative to user files
+        lines: Maximum number of lines to return (default: 50)
+        cursor: Cursor from a previous files_tail call, to follow the file
+        wait_seconds: When following, how long to wait for new lines (max 30)
+        user_id: User identifier
+        workspace_id: Workspace ID (defaults to current workspace)
+
+    Returns:
+        The lines with a header holding the next cursor, or an error message
+    """
+    try:
+        target = _resolve_path(path, user_id, workspace_id)
+
+        if not target.exists():
+            return f"File not found: {path}"
+
+        if not target.is_file():
+            return f"Not a file: {path}"
+
+        if cursor is None:
+            tail, next_cursor = tail_lines(target, lines)
+            header = f"last {len(tail)} lines"
+        else:
+            deadline = time.monotonic() + min(max(wait_seconds, 0), _TAIL_MAX_WAIT)
+            tail, next_cursor, restarted = read_appended(target, cursor, lines)
+            while not tail and time.monotonic() < deadline:
+                time.sleep(_TAIL_POLL)
+                tail, next_cursor, restarted = read_appended(target, next_cursor, lines)
+            header = f"{len(tail)} new lines"
+            if restarted:
+                header += ", file was truncated so reading restarted from the top"
+
+        content = "\n".join(tail)
+        return f"--- {path} ({header}, cursor={next_cursor}) ---\n{content}"
+    except Exception as e:
+        logger.error("files_tail.error", {"path": path, "error": str(e)}, user_id=user_id)
+        return f"Error: {e}"
+
+
+files_tail.annotations = ToolAnnotations(title="Tail File", read_only=True)
+
+
 @tool
 def files_write(path: str, content: str, user_id: str = "default_user", workspace_id: str = "personal") -> str:
     """Write content to a file (creates or overwrites).
@@ -194,6 +282,7 @@ def files_write(path: str, content: str, user_id: str = "default_user", workspac
 
         target.parent.mkdir(parents=True, exist_ok=True)
         target.write_text(content, encoding="utf-8")
+        _refresh_search_index(user_id, workspace_id, target)
 
         logger.info("files_write", {"path": str(target), "size": len(content)}, user_id=user_id)
         return f"Successfully wrote to {path}"
@@ -228,6 +317,18 @@ def files_edit(path: str, old: str, new: str, user_id: str = "default_user", wor
         if not target.is_file():
             return f"Not a file: {path}"
 
+        if target.stat().st_size >= LARGE_FILE_BYTES:
+            # Too large to keep in the version store, so say the edit can't be undone.
+            count = replace_in_place(target, old.encode("utf-8"), new.encode("utf-8"))
+            if not count:
+                return f"Text not found in file: {old[:50]}..."
+            _refresh_search_index(user_id, workspace_id, target)
+            logger.info("files_edit", {"path": str(target), "in_place": count}, user_id=user_id)
+            return (
+                f"Edited {path} ({count} replacement{'s' if count != 1 else ''}). "
+                "Warning: the file is too large to version, so this edit cannot be restored."
+            )
+
         content = target.read_text(encoding="utf-8")
 
         if old not in content:
@@ -240,6 +341,7 @@ def files_edit(path: str, old: str, new: str, user_id: str = "default_user", wor
         capture_version(user_id, path, new_content, workspace_id=workspace_id)
 
         target.write_text(new_content, encoding="utf-8")
+        _refresh_search_index(user_id, workspace_id, target)
 
         logger.info("files_edit", {"path": str(target)}, user_id=user_id)
         return f"Edited {path}"
@@ -277,6 +379,7 @@ def files_delete(path: str, user_id: str = "default_user", workspace_id: str = "
             shutil.rmtree(target)
         else:
             target.unlink()
+        _refresh_search_index(user_id, workspace_id, target)
 
         logger.info("files_delete", {"path": str(target)}, user_id=user_id)
         return f"Deleted {path}"
@@ -350,6 +453,7 @@ def files_rename(path: str, new_name: str, user_id: str = "default_user", worksp
             return f"Name already exists: {new_name}"
 
         target.rename(new_path)
+        _refresh_search_index(user_id, workspace_id, target, new_path)
 
         logger.info("files_rename", {"old": str(target), "new": str(new_path)}, user_id=user_id)
         return f"Renamed {path} to {new_name}"
@@ -0,0 +1,369 @@
+"""Process-wide pool of authenticated IMAP sessions.
+
+Every sync used to open a TLS connection and LOGIN from scratch, and an
+interval pass over many accounts could open as many connections to one
+provider as it had accounts there. ImapSessionPool keeps logged-in MailBox
+sessions per (user, account, credentials) and reuses them across folders and
+passes, with a cap on open connections per IMAP host. When a host is at its
+cap, an idle session for another account on that host is closed to make
+room; otherwise the caller waits up to acquire_timeout.
+
+Sessions idle for longer than idle_timeout are logged out; ones idle for
+more than NOOP_AFTER seconds are checked with NOOP before reuse. A session
+whose user raised is discarded rather than returned, since the connection
+may be mid-command.
+
+IMAP IDLE holds its connection for as long as it runs, so it never goes
+through the pool: ImapIdleWatcher keeps one dedicated connection and thread
+per watched folder.
+
+Usage:
+    with get_imap_pool().session(user_id, account) as mailbox:
+        mailbox.folder.set("INBOX")
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from src.sdk.tools_core.imap_sync import has_capability
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_PER_HOST = 4
+DEFAULT_IDLE_TIMEOUT = 600.0
+DEFAULT_ACQUIRE_TIMEOUT = 60.0
+NOOP_AFTER = 60.0
+
+# Re-issue IDLE before the 30 minute server timeout (RFC 2177).
+IDLE_TIMEOUT = 29 * 60.0
+IDLE_POLL_SECONDS = 5.0  # how long stop() may take to end an IDLE
+IDLE_RETRY_SECONDS = 60.0
+
+SessionKey = tuple[str, str, str]
+
+
+class ImapPoolTimeoutError(TimeoutError):
+    """No connection slot for the host became free within acquire_timeout."""
+
+
+@dataclass
+class ImapPoolConfig:
+    max_per_host: int = DEFAULT_MAX_PER_HOST
+    idle_timeout: float = DEFAULT_IDLE_TIMEOUT
+    acquire_timeout: float = DEFAULT_ACQUIRE_TIMEOUT
+
+
+@dataclass
+class _Session:
+    key: SessionKey
+    host: str
+    mailbox: Any
+    last_used: float = field(default_factory=time.monotonic)
+
+
+def _login(account: dict[str, Any]) -> Any:
+    from imap_tools import MailBox
+
+    return MailBox(account["imap_host"], account.get("imap_port", 993)).login(
+        account["email"], account["password"]
+    )
+
+
+def _credentials_hash(account: dict[str, Any]) -> str:
+    secret = f"{account.get('email', '')}\0{account.get('password', '')}"
+    return hashlib.sha256(secret.encode()).hexdigest()[:16]
+
+
+class ImapSessionPool:
+    """Reusable logged-in MailBox sessions, bounded per IMAP host."""
+
+    def __init__(
+        self,
+        config: ImapPoolConfig | None = None,
+        connect: Callable[[dict[str, Any]], Any] = _login,
+    ):
+        self.config = config or ImapPoolConfig()
+        self._connect = connect
+        self._idle: dict[SessionKey, list[_Session]] = {}
+        self._open: dict[str, int] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self.created = 0
+        self.reused = 0
+        self.waits = 0
+        self.evicted = 0
+
+    @contextmanager
+    def session(self, user_id: str, account: dict[str, Any]) -> Iterator[Any]:
+        """Check out a logged-in MailBox for the account for the block's duration."""
+        email = account.get("email")
+        host = account.get("imap_host")
+        if not email or not account.get("password") or not host:
+            raise ValueError(f"Account {account.get('id', '')} is missing credentials")
+
+        key: SessionKey = (user_id, str(account.get("id", email)), _credentials_hash(account))
+        sess = self._checkout(key, host, account)
+        healthy = False
+        try:
+            yield sess.mailbox
+            healthy = True
+        finally:
+            self._checkin(sess, healthy)
+
+    def _checkout(self, key: SessionKey, host: str, account: dict[str, Any]) -> _Session:
+        while True:
+            sess = self._reserve(key, host)
+            if sess is None:
+                try:
+                    mailbox = self._connect(account)
+                except BaseException:
+                    self._release_slot(host)
+                    raise
+                with self._cond:
+                    self.created += 1
+                return _Session(key, host, mailbox)
+            if time.monotonic() - sess.last_used < NOOP_AFTER or self._alive(sess):
+                return sess
+            self._discard(sess)
+
+    def _reserve(self, key: SessionKey, host: str) -> _Session | None:
+        """Pop an idle session for key, or take a connection slot (returns None)."""
+        deadline = time.monotonic() + self.config.acquire_timeout
+        evict: _Session | None = None
+        try:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("IMAP session pool is shut down")
+                    idle = self._idle.get(key)
+                    if idle:
+                        self.reused += 1
+                        return idle.pop()
+                    if self._open.get(host, 0) < self.config.max_per_host:
+                        self._open[host] = self._open.get(host, 0) + 1
+                        return None
+                    evict = self._oldest_idle(host)
+                    if evict is not None:
+                        # Hand the evicted session's slot straight to this caller.
+                        self.evicted += 1
+                        return None
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise ImapPoolTimeoutError(f"No IMAP connection slot free for {host}")
+                    self.waits += 1
+                    self._cond.wait(remaining)
+        finally:
+            if evict is not None:
+                self._logout(evict)
+
+    def _oldest_idle(self, host: str) -> _Session | None:
+        candidates = [s for sessions in self._idle.values() for s in sessions if s.host == host]
+        if not candidates:
+            return None
+        oldest = min(candidates, key=lambda s: s.last_used)
+        self._idle[oldest.key].remove(oldest)
+        return oldest
+
+    def _checkin(self, sess: _Session, healthy: bool) -> None:
+        if not healthy:
+            self._discard(sess)
+            return
+        sess.last_used = time.monotonic()
+        with self._cond:
+            if not self._closed:
+                self._idle.setdefault(sess.key, []).append(sess)
+                self._cond.notify()
+                return
+        self._discard(sess)
+
+    def _discard(self, sess: _Session) -> None:
+        self._logout(sess)
+        self._release_slot(sess.host)
+
+    def _release_slot(self, host: str) -> None:
+        with self._cond:
+            self._open[host] = max(0, self._open.get(host, 0) - 1)
+            self._cond.notify()
+
+    @staticmethod
+    def _alive(sess: _Session) -> bool:
+        try:
+            typ, _ = sess.mailbox.client.noop()
+            return bool(typ == "OK")
+        except Exception:
+            return False
+
+    @staticmethod
+    def _logout(sess: _Session) -> None:
+        try:
+            sess.mailbox.logout()
+        except Exception:
+            logger.debug("imap_pool.logout_failed", exc_info=True)
+
+    def prune(self) -> int:
+        """Log out sessions idle for longer than idle_timeout; returns how many."""
+        cutoff = time.monotonic() - self.config.idle_timeout
+        with self._cond:
+            expired = [
+                s for sessions in self._idle.values() for s in sessions if s.last_used < cutoff
+            ]
+            for sess in expired:
+                self._idle[sess.key].remove(sess)
+            self._idle = {k: v for k, v in self._idle.items() if v}
+        for sess in expired:
+            self._discard(sess)
+        return len(expired)
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            return {
+                "open": sum(self._open.values()),
+                "idle": sum(len(v) for v in self._idle.values()),
+                "hosts": len([h for h, n in self._open.items() if n]),
+                "created": self.created,
+                "reused": self.reused,
+                "waits": self.waits,
+                "evicted": self.evicted,
+            }
+
+    def close(self) -> None:
+        """Log out every idle session; sessions in use are closed on check-in."""
+        with self._cond:
+            self._closed = True
+            sessions = [s for v in self._idle.values() for s in v]
+            self._idle.clear()
+            self._cond.notify_all()
+        for sess in sessions:
+            self._discard(sess)
+
+
+class ImapIdleWatcher:
+    """IMAP IDLE on one folder, over its own connection and daemon thread.
+
+    on_change is called from the watcher thread after each change the
+    server reports. IDLE is polled in IDLE_POLL_SECONDS slices so stop()
+    takes effect promptly, and re-issued every IDLE_TIMEOUT. While paused()
+    is true the connection is closed. Connection errors are retried every
+    IDLE_RETRY_SECONDS; if the server lacks IDLE the thread ends with
+    supported set to False.
+    """
+
+    def __init__(
+        self,
+        account: dict[str, Any],
+        folder: str,
+        on_change: Callable[[], object],
+        *,
+        paused: Callable[[], bool] = lambda: False,
+        connect: Callable[[dict[str, Any]], Any] = _login,
+        timeout: float = IDLE_TIMEOUT,
+        poll_interval: float = IDLE_POLL_SECONDS,
+        retry_interval: float = IDLE_RETRY_SECONDS,
+        name: str = "imap-idle",
+    ):
+        self.account = account
+        self.folder = folder
+        self.supported: bool | None = None
+        self._on_change = on_change
+        self._paused = paused
+        self._connect = connect
+        self._timeout = timeout
+        self._poll_interval = poll_interval
+        self._retry_interval = retry_interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Ask the thread to end IDLE and log out; returns without waiting."""
+        self._stop.set()
+
+    def join(self, timeout: float | None = None) -> None:
+        self._thread.join(timeout)
+
+    def is_alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if self._paused():
+                self._stop.wait(self._retry_interval)
+                continue
+            try:
+                mailbox = self._connect(self.account)
+            except Exception:
+                logger.warning("imap_idle.connect_failed", exc_info=True)
+                self._stop.wait(self._retry_interval)
+                continue
+            try:
+                if not has_capability(mailbox, "IDLE"):
+                    self.supported = False
+                    return
+                self.supported = True
+                mailbox.folder.set(self.folder, readonly=True)
+                while not self._stop.is_set() and not self._paused():
+                    if self._idle_once(mailbox):
+                        self._on_change()
+            except Exception:
+                logger.warning("imap_idle.error", exc_info=True)
+                self._stop.wait(self._retry_interval)
+            finally:
+                try:
+                    mailbox.logout()
+                except Exception:
+                    logger.debug("imap_idle.logout_failed", exc_info=True)
+
+    def _idle_once(self, mailbox: Any) -> bool:
+        """Run one IDLE command until a change, the timeout or stop(); True on a change."""
+        deadline = time.monotonic() + self._timeout
+        with mailbox.idle as idle:
+            while not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                if idle.poll(timeout=min(self._poll_interval, remaining)):
+                    return True
+        return False
+
+
+_pool: ImapSessionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_imap_pool() -> ImapSessionPool:
+    """Return the process-wide ImapSessionPool, sized from EmailSyncConfig."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            config = ImapPoolConfig()
+            try:
+                from src.config import get_settings
+
+                sync_cfg = get_settings().email_sync
+                config = ImapPoolConfig(
+                    max_per_host=sync_cfg.max_connections_per_host,
+                    idle_timeout=sync_cfg.session_idle_seconds,
+                )
+            except Exception:
+                logger.debug("imap_pool.settings_unavailable", exc_info=True)
+            _pool = ImapSessionPool(config)
+        return _pool
+
+
+def shutdown_imap_pool() -> None:
+    """Log out pooled sessions (FastAPI lifespan exit)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
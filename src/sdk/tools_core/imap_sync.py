@@ -0,0 +1,758 @@
+"""Incremental IMAP folder sync.
+
+A sync pass works from UIDs instead of message bodies:
+
+1. STATUS the folder for UIDVALIDITY/UIDNEXT (plus HIGHESTMODSEQ when the
+   server supports CONDSTORE). If nothing moved since the last pass, a quick
+   sync stops here after one round trip. A changed UIDVALIDITY invalidates
+   every stored UID, so the folder's rows are dropped and synced again.
+2. UID SEARCH lists the server's UIDs (only those above the last seen UID
+   for a quick sync); the ones not already stored, checked against the
+   database a chunk at a time, are downloaded newest first, capped at
+   ``limit``. A quick sync still moves its cursor past the newest UID and
+   leaves what the cap skipped to the backfill.
+3. Missing UIDs stream through fetch -> parse -> insert -> ``on_rows`` in
+   pipelined batches: one UID FETCH per batch with BODY.PEEK so nothing is
+   marked \\Seen, and one transaction per batch that also threads it
+   (email_threads.thread_messages) and runs ``on_rows`` after the insert. Only one batch is in memory at a time.
+   With ``headers_first`` the first pass fetches headers only and a second
+   pass fills in the bodies.
+4. Flag changes on stored messages come from
+   UID FETCH 1:* (FLAGS) (CHANGEDSINCE <modseq>) with CONDSTORE, or from
+   UNSEEN/FLAGGED searches without it.
+
+A full sync is a resumable backfill: it walks the folder's UIDs downwards
+from FolderState.backfill_uid and moves that cursor below each batch in the
+batch's own transaction, so a pass stopped by ``limit``, an error or a
+restart carries on from the last committed batch.
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from email.parser import BytesHeaderParser
+from typing import Any
+
+from imap_tools import MailMessage
+from imap_tools.utils import encode_folder
+from sqlalchemy import bindparam, text
+
+from src.sdk.tools_core.email_threads import folder_thread_ids, refresh_threads, thread_messages
+
+DEFAULT_FETCH_BATCH = 50
+# UIDs checked against the emails table per query.
+EXISTS_CHUNK = 500
+# Weight of earlier passes in FolderState.activity (an exponential moving sum).
+ACTIVITY_DECAY = 0.5
+
+_STATUS_ITEM = re.compile(rb"(UIDVALIDITY|UIDNEXT|HIGHESTMODSEQ)\s+(\d+)")
+_FETCH_UID = re.compile(rb"UID\s+(\d+)")
+_FETCH_FLAGS = re.compile(rb"FLAGS\s+\(([^)]*)\)")
+_FETCH_MODSEQ = re.compile(rb"MODSEQ\s+\((\d+)\)")
+
+# An upsert rather than INSERT OR REPLACE so the emails_fts triggers see an
+# UPDATE (REPLACE would skip the delete trigger and leave stale index rows).
+_INSERT_EMAIL = text("""
+    INSERT INTO emails
+    (account_id, folder, message_id, rfc_message_id, from_addr, from_name,
+     to_addrs, cc_addrs, subject, body_text, timestamp,
+     in_reply_to, thread_references, is_forwarded,
+     read, flagged, has_attachments, attachments, tags, created_at, body_fetched)
+    VALUES
+    (:account_id, :folder, :message_id, :rfc_message_id, :from_addr, :from_name,
+     :to_addrs, :cc_addrs, :subject, :body_text, :timestamp,
+     :in_reply_to, :thread_references, :is_forwarded,
+     :read, :flagged, :has_attachments, :attachments, :tags, :created_at, :body_fetched)
+    ON CONFLICT (account_id, folder, message_id) DO UPDATE SET
+        rfc_message_id = excluded.rfc_message_id, from_addr = excluded.from_addr, from_name = excluded.from_name,
+        to_addrs = excluded.to_addrs, cc_addrs = excluded.cc_addrs,
+        subject = excluded.subject, body_text = excluded.body_text,
+        timestamp = excluded.timestamp, in_reply_to = excluded.in_reply_to,
+        thread_references = excluded.thread_references, is_forwarded = excluded.is_forwarded,
+        read = excluded.read, flagged = excluded.flagged,
+        has_attachments = excluded.has_attachments, attachments = excluded.attachments,
+        body_fetched = excluded.body_fetched
+""")
+
+_UPDATE_BODY = text("""
+    UPDATE emails
+    SET body_text = :body_text, has_attachments = :has_attachments,
+        attachments = :attachments, body_fetched = 1
+    WHERE account_id = :account_id AND folder = :folder AND message_id = :message_id
+""")
+
+_UPDATE_FLAGS = text("""
+    UPDATE emails SET read = :read, flagged = :flagged
+    WHERE account_id = :account_id AND folder = :folder AND message_id = :message_id
+""")
+
+
+@dataclass
+class SyncStats:
+    """What one folder sync pass did."""
+
+    account_id: str
+    folder: str
+    mode: str
+    server_uids: int = 0
+    missing: int = 0
+    rows_written: int = 0
+    bodies_written: int = 0
+    flags_updated: int = 0
+    threads_touched: int = 0
+    bytes_transferred: int = 0
+    fetch_batches: int = 0
+    uidvalidity_reset: bool = False
+    backfill_uid: int | None = None
+    backfill_remaining: int = 0
+    condstore: bool = False
+    unchanged: bool = False
+    newest_timestamp: int = 0
+    duration_ms: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class FolderState:
+    """Per-folder sync cursor persisted in folder_sync_state."""
+
+    uidvalidity: int | None = None
+    uidnext: int | None = None
+    highest_modseq: int | None = None
+    last_uid: int = 0
+    last_sync: int | None = None
+    last_change: int | None = None
+    activity: float = 0.0
+    # Full-sync cursor: UIDs at or below it are still to be backfilled.
+    # None = not started, 0 = done.
+    backfill_uid: int | None = None
+    backfill_fetched: int = 0
+
+    def record_pass(self, changes: int, now: int) -> None:
+        """Fold one pass's new/changed message count into the activity score."""
+        self.activity = self.activity * ACTIVITY_DECAY + changes
+        self.last_sync = now
+        if changes:
+            self.last_change = now
+
+
+class WireSizedMessage(MailMessage):
+    """MailMessage that records how many bytes its FETCH response took."""
+
+    def __init__(self, fetch_data: list[Any]) -> None:
+        super().__init__(fetch_data)
+        self.wire_size = sum(
+            len(part)
+            for item in fetch_data
+            for part in (item if isinstance(item, tuple) else (item,))
+            if isinstance(part, bytes)
+        )
+
+
+def _message_bytes(msg: Any) -> int:
+    wire = getattr(msg, "wire_size", None)
+    if wire is not None:
+        return int(wire)
+    return int(getattr(msg, "size_rfc822", 0) or 0)
+
+
+def has_capability(mailbox: Any, name: str) -> bool:
+    capabilities = getattr(mailbox.client, "capabilities", ()) or ()
+    return any(str(c).upper() == name for c in capabilities)
+
+
+def folder_status(mailbox: Any, folder: str, condstore: bool) -> dict[str, int]:
+    """STATUS the folder; imap_tools' folder.status() rejects HIGHESTMODSEQ."""
+    items = "UIDVALIDITY UIDNEXT" + (" HIGHESTMODSEQ" if condstore else "")
+    client = mailbox.client
+    typ, data = client._simple_command("STATUS", encode_folder(folder), f"({items})")
+    if typ != "OK":
+        raise RuntimeError(f"STATUS {folder} failed: {data}")
+    typ, data = client._untagged_response(typ, data, "STATUS")
+    status: dict[str, int] = {}
+    for line in data:
+        if isinstance(line, bytes):
+            status.update((k.decode(), int(v)) for k, v in _STATUS_ITEM.findall(line))
+    return status
+
+
+def changed_flags(mailbox: Any, modseq: int) -> list[tuple[str, tuple[str, ...], int | None]]:
+    """(uid, flags, modseq) for every message whose MODSEQ is above ``modseq``."""
+    typ, data = mailbox.client.uid("FETCH", "1:*", f"(UID FLAGS) (CHANGEDSINCE {modseq})")
+    if typ != "OK":
+        raise RuntimeError(f"UID FETCH CHANGEDSINCE failed: {data}")
+    changes = []
+    for line in data:
+        if isinstance(line, tuple):
+            line = line[0]
+        if not isinstance(line, bytes):
+            continue
+        uid = _FETCH_UID.search(line)
+        flags = _FETCH_FLAGS.search(line)
+        if not uid or not flags:
+            continue
+        mod = _FETCH_MODSEQ.search(line)
+        changes.append(
+            (
+                uid.group(1).decode(),
+                tuple(f.decode() for f in flags.group(1).split()),
+                int(mod.group(1)) if mod else None,
+            )
+        )
+    return changes
+
+
+_STATE_COLUMNS = (
+    "uidvalidity, uidnext, highest_modseq, last_uid, last_sync, last_change, activity, "
+    "backfill_uid, backfill_fetched"
+)
+
+
+def _state_from_row(row: Any) -> FolderState:
+    return FolderState(
+        row[0], row[1], row[2], row[3] or 0, row[4], row[5], row[6] or 0.0, row[7], row[8] or 0
+    )
+
+
+def load_state(conn: Any, account_id: str, folder: str) -> FolderState:
+    row = conn.execute(
+        text(
+            f"SELECT {_STATE_COLUMNS} FROM folder_sync_state "
+            "WHERE account_id = :account_id AND folder = :folder"
+        ),
+        {"account_id": account_id, "folder": folder},
+    ).fetchone()
+    if row is None:
+        return FolderState()
+    return _state_from_row(row)
+
+
+def load_folder_states(engine: Any, account_id: str) -> dict[str, FolderState]:
+    """Every synced folder's state for an account, keyed by folder name."""
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text(
+                f"SELECT folder, {_STATE_COLUMNS} FROM folder_sync_state "
+                "WHERE account_id = :account_id"
+            ),
+            {"account_id": account_id},
+        )
+        return {row[0]: _state_from_row(row[1:]) for row in rows}
+
+
+def save_state(conn: Any, account_id: str, folder: str, state: FolderState) -> None:
+    """Save the quick-sync cursor; the backfill cursor is saved by save_backfill."""
+    conn.execute(
+        text("""
+            INSERT INTO folder_sync_state
+            (account_id, folder, uidvalidity, uidnext, highest_modseq, last_uid,
+             last_sync, last_change, activity)
+            VALUES (:account_id, :folder, :uidvalidity, :uidnext, :highest_modseq, :last_uid,
+                    :last_sync, :last_change, :activity)
+            ON CONFLICT (account_id, folder) DO UPDATE SET
+                uidvalidity = excluded.uidvalidity, uidnext = excluded.uidnext,
+                highest_modseq = excluded.highest_modseq, last_uid = excluded.last_uid,
+                last_sync = excluded.last_sync, last_change = excluded.last_change,
+                activity = excluded.activity
+        """),
+        {
+            "account_id": account_id,
+            "folder": folder,
+            "uidvalidity": state.uidvalidity,
+            "uidnext": state.uidnext,
+            "highest_modseq": state.highest_modseq,
+            "last_uid": state.last_uid,
+            "last_sync": state.last_sync,
+            "last_change": state.last_change,
+            "activity": state.activity,
+        },
+    )
+
+
+def save_backfill(conn: Any, account_id: str, folder: str, state: FolderState) -> None:
+    conn.execute(
+        text("""
+            INSERT INTO folder_sync_state (account_id, folder, backfill_uid, backfill_fetched)
+            VALUES (:account_id, :folder, :backfill_uid, :backfill_fetched)
+            ON CONFLICT (account_id, folder) DO UPDATE SET
+                backfill_uid = excluded.backfill_uid,
+                backfill_fetched = excluded.backfill_fetched
+        """),
+        {
+            "account_id": account_id,
+            "folder": folder,
+            "backfill_uid": state.backfill_uid,
+            "backfill_fetched": state.backfill_fetched,
+        },
+    )
+
+
+_STORED_UIDS = text("""
+    SELECT message_id FROM emails
+    WHERE account_id = :account_id AND folder = :folder AND message_id IN :uids
+""").bindparams(bindparam("uids", expanding=True))
+
+
+def stored_uids(engine: Any, account_id: str, folder: str, uids: list[str]) -> set[str]:
+    """The subset of ``uids`` already stored, looked up EXISTS_CHUNK at a time."""
+    found: set[str] = set()
+    with engine.connect() as conn:
+        for chunk in _batches(uids, EXISTS_CHUNK):
+            found.update(
+                row[0]
+                for row in conn.execute(
+                    _STORED_UIDS, {"account_id": account_id, "folder": folder, "uids": chunk}
+                )
+            )
+    return found
+
+
+def _row(
+    email_data: dict[str, Any], account_id: str, folder: str, body_fetched: bool
+) -> dict[str, Any]:
+    return {
+        **email_data,
+        "rfc_message_id": email_data.get("rfc_message_id"),
+        "account_id": account_id,
+        "folder": folder,
+        "to_addrs": ",".join(email_data["to_addrs"]),
+        "cc_addrs": ",".join(email_data["cc_addrs"]),
+        "attachments": str(email_data["attachments"]),
+        "read": 1 if email_data["read"] else 0,
+        "flagged": 1 if email_data["flagged"] else 0,
+        "has_attachments": 1 if email_data["has_attachments"] else 0,
+        "is_forwarded": 1 if email_data.get("is_forwarded") else 0,
+        "tags": "",
+        "created_at": int(datetime.now(UTC).timestamp()),
+        "body_fetched": 1 if body_fetched else 0,
+    }
+
+
+def _batches(items: list[Any], size: int) -> list[list[Any]]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def _flag_values(flags: tuple[str, ...]) -> tuple[int, int]:
+    return (1 if "\\Seen" in flags else 0, 1 if "\\Flagged" in flags else 0)
+
+
+_THREAD_HEADERS = ("Message-ID", "In-Reply-To", "References")
+
+
+def fetch_thread_headers(
+    mailbox: Any, folder: str, uids: list[str]
+) -> dict[str, dict[str, str | None]]:
+    """Message-ID, In-Reply-To and References by UID, fetching only those headers."""
+    if not uids:
+        return {}
+    mailbox.folder.set(folder, readonly=True)
+    fields = " ".join(h.upper() for h in _THREAD_HEADERS)
+    typ, data = mailbox.client.uid(
+        "FETCH", ",".join(uids), f"(UID BODY.PEEK[HEADER.FIELDS ({fields})])"
+    )
+    if typ != "OK":
+        raise RuntimeError(f"UID FETCH headers failed: {data}")
+    parser = BytesHeaderParser()
+    found: dict[str, dict[str, str | None]] = {}
+    for item in data:
+        if not isinstance(item, tuple) or len(item) < 2:
+            continue
+        uid = _FETCH_UID.search(item[0])
+        if not uid:
+            continue
+        headers = parser.parsebytes(item[1])
+        values = [headers.get(name) for name in _THREAD_HEADERS]
+        message_id, in_reply_to, references = (
+            " ".join(str(v).split()) if v else None for v in values
+        )
+        found[uid.group(1).decode()] = {
+            "rfc_message_id": message_id,
+            "in_reply_to": in_reply_to,
+            "thread_references": references,
+        }
+    return found
+
+
+_STORED_FLAGS = text("""
+    SELECT message_id, read, flagged FROM emails
+    WHERE account_id = :account_id AND folder = :folder AND message_id IN :uids
+""").bindparams(bindparam("uids", expanding=True))
+
+
+def sync_flags(
+    mailbox: Any,
+    engine: Any,
+    account_id: str,
+    folder: str,
+    since_modseq: int | None,
+) -> int:
+    """Update read/flagged for stored messages whose flags changed on the server.
+
+    With ``since_modseq`` only messages changed after it are listed
+    (CONDSTORE) and looked up; otherwise the UNSEEN and FLAGGED UID sets are
+    compared against every stored row as it is read. Returns the number of
+    rows updated.
+    """
+    params = {"account_id": account_id, "folder": folder}
+    if since_modseq is not None:
+        current = {
+            uid: _flag_values(flags) for uid, flags, _ in changed_flags(mailbox, since_modseq)
+        }
+    else:
+        unseen = set(mailbox.uids("UNSEEN"))
+        flagged = set(mailbox.uids("FLAGGED"))
+
+    updates = []
+    with engine.connect() as conn:
+        if since_modseq is not None:
+            rows: Iterable[Any] = (
+                row
+                for chunk in _batches(list(current), EXISTS_CHUNK)
+                for row in conn.execute(_STORED_FLAGS, {**params, "uids": chunk})
+            )
+        else:
+            rows = conn.execute(
+                text(
+                    "SELECT message_id, read, flagged FROM emails "
+                    "WHERE account_id = :account_id AND folder = :folder"
+                ),
+                params,
+            )
+        for uid, read, flag in rows:
+            if since_modseq is not None:
+                new = current[uid]
+            else:
+                new = (0 if uid in unseen else 1, 1 if uid in flagged else 0)
+            if (read or 0, flag or 0) != new:
+                updates.append({**params, "message_id": uid, "read": new[0], "flagged": new[1]})
+    if updates:
+        with engine.begin() as conn:
+            conn.execute(_UPDATE_FLAGS, updates)
+    return len(updates)
+
+
+def fetch_stream(
+    mailbox: Any,
+    uids: list[str],
+    *,
+    batch_size: int,
+    headers_only: bool = False,
+    stats: SyncStats | None = None,
+) -> Iterator[Any]:
+    """Messages for ``uids`` in order, one pipelined UID FETCH per batch, fetched as consumed."""
+    for batch in _batches(uids, batch_size):
+        for msg in mailbox.fetch(
+            uid_list=batch, mark_seen=False, headers_only=headers_only, bulk=max(2, len(batch))
+        ):
+            if msg.uid is None:
+                continue
+            if stats is not None:
+                stats.bytes_transferred += _message_bytes(msg)
+            yield msg
+        if stats is not None:
+            stats.fetch_batches += 1
+
+
+def _parse_stream(
+    messages: Iterable[Any], to_dict: Any, account_id: str, folder: str, body_fetched: bool
+) -> Iterator[dict[str, Any]]:
+    for msg in messages:
+        yield _row(to_dict(msg), account_id, folder, body_fetched=body_fetched)
+
+
+def _chunked(rows: Iterable[dict[str, Any]], size: int) -> Iterator[list[dict[str, Any]]]:
+    batch: list[dict[str, Any]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# Called as on_rows(conn, rows) in the batch's transaction, after the insert.
+RowsHook = Callable[[Any, list[dict[str, Any]]], Any]
+
+
+def _write_rows(
+    engine: Any,
+    account_id: str,
+    folder: str,
+    rows: list[dict[str, Any]],
+    stats: SyncStats,
+    on_rows: RowsHook | None,
+    backfill: FolderState | None = None,
+) -> None:
+    """Insert, thread and hook one batch; with ``backfill``, its cursor moves in the same commit."""
+    with engine.begin() as conn:
+        conn.execute(_INSERT_EMAIL, rows)
+        stats.threads_touched += len(thread_messages(conn, account_id, rows))
+        if backfill is not None:
+            save_backfill(conn, account_id, folder, backfill)
+        if on_rows is not None:
+            on_rows(conn, rows)
+    stats.rows_written += len(rows)
+    stats.newest_timestamp = max(stats.newest_timestamp, *(r["timestamp"] for r in rows))
+
+
+def fill_bodies(
+    mailbox: Any,
+    engine: Any,
+    account_id: str,
+    folder: str,
+    *,
+    to_dict: Any,
+    limit: int = 100,
+    batch_size: int = DEFAULT_FETCH_BATCH,
+    stats: SyncStats | None = None,
+) -> int:
+    """Download bodies for rows stored headers-only, newest first."""
+    with engine.connect() as conn:
+        pending = [
+            row[0]
+            for row in conn.execute(
+                text(
+                    "SELECT message_id FROM emails WHERE account_id = :account_id "
+                    "AND folder = :folder AND body_fetched = 0 "
+                    "ORDER BY CAST(message_id AS INTEGER) DESC LIMIT :limit"
+                ),
+                {"account_id": account_id, "folder": folder, "limit": limit or -1},
+            )
+        ]
+    written = 0
+    messages = fetch_stream(mailbox, pending, batch_size=batch_size, stats=stats)
+    for rows in _chunked(_parse_stream(messages, to_dict, account_id, folder, True), batch_size):
+        with engine.begin() as conn:
+            conn.execute(_UPDATE_BODY, rows)
+        written += len(rows)
+    return written
+
+
+def _backfill(
+    mailbox: Any,
+    engine: Any,
+    account_id: str,
+    folder: str,
+    state: FolderState,
+    stats: SyncStats,
+    *,
+    to_dict: Any,
+    limit: int,
+    batch_size: int,
+    headers_first: bool,
+    on_rows: RowsHook | None,
+) -> list[int]:
+    """Download missing UIDs at or below the backfill cursor, newest first.
+
+    The folder is walked EXISTS_CHUNK UIDs at a time; the cursor moves below
+    each written batch and each fully handled chunk. Returns the UIDs
+    listed, newest first.
+    """
+    top = state.backfill_uid or None  # not started or finished: walk from the newest
+    listed = mailbox.uids("ALL" if top is None else f"UID 1:{top}")
+    uids = sorted((int(u) for u in listed if top is None or int(u) <= top), reverse=True)
+    stats.server_uids = len(uids)
+    if top is None:
+        state.backfill_fetched = 0
+
+    budget = limit or len(uids)
+    finished = True
+    for chunk in _batches(uids, EXISTS_CHUNK):
+        if budget <= 0:
+            finished = False
+            break
+        keys = [str(u) for u in chunk]
+        have = stored_uids(engine, account_id, folder, keys)
+        missing = [u for u in keys if u not in have]
+        stats.missing += len(missing)
+        take = missing[:budget]
+        messages = fetch_stream(
+            mailbox, take, batch_size=batch_size, headers_only=headers_first, stats=stats
+        )
+        parsed = _parse_stream(messages, to_dict, account_id, folder, not headers_first)
+        for rows in _chunked(parsed, batch_size):
+            state.backfill_uid = min(int(r["message_id"]) for r in rows) - 1
+            state.backfill_fetched += len(rows)
+            _write_rows(engine, account_id, folder, rows, stats, on_rows, backfill=state)
+        budget -= len(take)
+        if len(take) < len(missing):
+            finished = False
+            break
+        state.backfill_uid = chunk[-1] - 1
+        with engine.begin() as conn:
+            save_backfill(conn, account_id, folder, state)
+
+    if finished:
+        state.backfill_uid = 0
+        with engine.begin() as conn:
+            save_backfill(conn, account_id, folder, state)
+    stats.backfill_uid = state.backfill_uid
+    stats.backfill_remaining = sum(1 for u in uids if u <= (state.backfill_uid or 0))
+    return uids
+
+
+def sync_folder(
+    mailbox: Any,
+    engine: Any,
+    account_id: str,
+    folder: str,
+    *,
+    to_dict: Any,
+    mode: str = "new",
+    limit: int = 100,
+    batch_size: int = DEFAULT_FETCH_BATCH,
+    headers_first: bool = False,
+    on_rows: RowsHook | None = None,
+) -> SyncStats:
+    """Bring one folder's rows in ``emails`` up to date with the server.
+
+    ``mailbox`` is a logged-in imap_tools MailBox and ``to_dict`` converts
+    its messages to the dicts the email tools store. ``mode="new"`` only
+    looks above the last synced UID; ``mode="full"`` backfills older mail
+    from the folder's backfill cursor (see the module docstring). At most
+    ``limit`` messages are downloaded. ``on_rows`` is called with the
+    connection and each batch inside the batch's transaction, after the insert.
+    """
+    started = time.perf_counter()
+    stats = SyncStats(account_id=account_id, folder=folder, mode=mode)
+    batch_size = max(2, batch_size)
+    if hasattr(mailbox, "email_message_class"):
+        mailbox.email_message_class = WireSizedMessage
+
+    condstore = has_capability(mailbox, "CONDSTORE")
+    stats.condstore = condstore
+    status = folder_status(mailbox, folder, condstore)
+    uidvalidity = status.get("UIDVALIDITY")
+    uidnext = status.get("UIDNEXT")
+    modseq = status.get("HIGHESTMODSEQ")
+
+    with engine.begin() as conn:
+        state = load_state(conn, account_id, folder)
+        if state.uidvalidity is not None and state.uidvalidity != uidvalidity:
+            threads = folder_thread_ids(conn, account_id, folder)
+            conn.execute(
+                text("DELETE FROM emails WHERE account_id = :account_id AND folder = :folder"),
+                {"account_id": account_id, "folder": folder},
+            )
+            refresh_threads(conn, account_id, threads)
+            state = FolderState(activity=state.activity)
+            save_backfill(conn, account_id, folder, state)
+            stats.uidvalidity_reset = True
+
+    # UIDNEXT only moves when messages arrive; HIGHESTMODSEQ moves on any change.
+    no_new_mail = mode == "new" and state.uidnext is not None and state.uidnext == uidnext
+    now = int(datetime.now(UTC).timestamp())
+    if no_new_mail and condstore and state.highest_modseq == modseq:
+        state.record_pass(0, now)
+        with engine.begin() as conn:
+            save_state(conn, account_id, folder, state)
+        stats.unchanged = True
+        stats.duration_ms = (time.perf_counter() - started) * 1000
+        return stats
+
+    mailbox.folder.set(folder, readonly=True)
+
+    with engine.connect() as conn:
+        had_rows = (
+            conn.execute(
+                text(
+                    "SELECT 1 FROM emails WHERE account_id = :account_id AND folder = :folder "
+                    "LIMIT 1"
+                ),
+                {"account_id": account_id, "folder": folder},
+            ).fetchone()
+            is not None
+        )
+
+    backfill_moved = False
+    if mode == "full":
+        from_top = not state.backfill_uid
+        listed = _backfill(
+            mailbox,
+            engine,
+            account_id,
+            folder,
+            state,
+            stats,
+            to_dict=to_dict,
+            limit=limit,
+            batch_size=batch_size,
+            headers_first=headers_first,
+            on_rows=on_rows,
+        )
+        # A walk from the newest UID covered everything the quick cursor would;
+        # whatever it left is the backfill cursor's to resume.
+        if from_top:
+            last_uid, next_uid = max(state.last_uid, *listed, 0), uidnext
+        else:
+            last_uid, next_uid = state.last_uid, state.uidnext
+    else:
+        if no_new_mail:
+            server_uids: list[str] = []
+        elif state.last_uid:
+            # "n:*" always matches the highest UID, even when that is below n.
+            server_uids = [
+                u for u in mailbox.uids(f"UID {state.last_uid + 1}:*") if int(u) > state.last_uid
+            ]
+        else:
+            server_uids = mailbox.uids("ALL")
+        stats.server_uids = len(server_uids)
+
+        have = stored_uids(engine, account_id, folder, server_uids)
+        missing = sorted((u for u in server_uids if u not in have), key=int, reverse=True)
+        stats.missing = len(missing)
+        to_fetch = missing[:limit] if limit else missing
+        unfetched = missing[len(to_fetch) :]
+
+        messages = fetch_stream(
+            mailbox, to_fetch, batch_size=batch_size, headers_only=headers_first, stats=stats
+        )
+        parsed = _parse_stream(messages, to_dict, account_id, folder, not headers_first)
+        for rows in _chunked(parsed, batch_size):
+            _write_rows(engine, account_id, folder, rows, stats, on_rows)
+
+        # The quick cursor always moves past the newest UID. Older UIDs that
+        # ``limit`` skipped are left to the backfill (and its own limit): a
+        # finished or started backfill has its cursor raised to cover them,
+        # one not yet started walks from the newest UID anyway.
+        if unfetched and state.backfill_uid is not None:
+            state.backfill_uid = max(state.backfill_uid, max(int(u) for u in unfetched))
+            backfill_moved = True
+        last_uid = max(state.last_uid, *(int(u) for u in server_uids), 0)
+        next_uid = uidnext
+
+    if headers_first:
+        stats.bodies_written = fill_bodies(
+            mailbox,
+            engine,
+            account_id,
+            folder,
+            to_dict=to_dict,
+            limit=limit,
+            batch_size=batch_size,
+            stats=stats,
+        )
+
+    # Without a stored MODSEQ (first pass, or no CONDSTORE) compare every stored row.
+    since = state.highest_modseq if condstore else None
+    if had_rows and not (since is not None and since == modseq):
+        stats.flags_updated = sync_flags(mailbox, engine, account_id, folder, since)
+
+    state.uidvalidity, state.uidnext, state.highest_modseq = uidvalidity, next_uid, modseq
+    state.last_uid = last_uid
+    state.record_pass(stats.rows_written + stats.flags_updated, now)
+    with engine.begin() as conn:
+        save_state(conn, account_id, folder, state)
+        if backfill_moved:
+            save_backfill(conn, account_id, folder, state)
+            stats.backfill_uid = state.backfill_uid
+
+    stats.duration_ms = (time.perf_counter() - started) * 1000
+    return stats
@@ -76,6 +76,9 @@ def skills_load(
 
     skill = registry.get_skill(name)
     if not skill:
+        matches = [s["name"] for s in registry.search_skills(name, limit=3)]
+        if matches:
+            return f"Skill '{name}' not found. Closest matches: {', '.join(matches)}."
         available_names = [s["name"] for s in registry.get_all_skills()]
         return f"Skill '{name}' not found. Available skills: {', '.join(available_names) or 'none'}."
 
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import Any
 
 from src.sdk.loop import get_current_agent_loop
 from src.sdk.tool_index import (
@@ -60,6 +61,7 @@ def tool_reload() -> str:
     try:
         prev_names = set(loop._tool_index.list_all_names())
         loop._tool_index.clear()
+        rows: list[dict[str, Any]] = []
 
         # Index custom (TOOL.md) tools
         from src.sdk.tools_custom import find_tool_file, get_custom_tools, load_tool_meta
@@ -77,7 +79,7 @@ def tool_reload() -> str:
                             "install": meta.get("install", []),
                             "tool_dir": str(tool_file.parent),
                         }
-                loop._tool_index.index_tool(td, tool_type="custom", namespace="custom", reconstruct=reconstruct_data)
+                rows.append(ToolIndex.tool_row(td, tool_type="custom", namespace="custom", reconstruct=reconstruct_data))
                 custom_count += 1
 
         # Index MCP tools from the bridge
@@ -89,7 +91,7 @@ def tool_reload() -> str:
                     parts = td.name.split("__", 2)
                     server_name = parts[1] if len(parts) == 3 else ""
                     reconstruct = {"server_name": server_name, "mcp_tool_name": td.name}
-                    loop._tool_index.index_tool(td, tool_type="mcp", namespace=f"mcp__{server_name}", reconstruct=reconstruct)
+                    rows.append(ToolIndex.tool_row(td, tool_type="mcp", namespace=f"mcp__{server_name}", reconstruct=reconstruct))
                     mcp_count += 1
 
         # Index connector tools from the bridge
@@ -102,9 +104,11 @@ def tool_reload() -> str:
                 if not is_core_tool(td.name):
                     namespace = td.name.split("__")[0] if "__" in td.name else "connector"
                     reconstruct = {"namespace": namespace, "tool_name": td.name}
-                    loop._tool_index.index_tool(td, tool_type="connector", namespace=namespace, reconstruct=reconstruct)
+                    rows.append(ToolIndex.tool_row(td, tool_type="connector", namespace=namespace, reconstruct=reconstruct))
                     connector_count += 1
 
+        loop._tool_index.index_rows(rows)
+
         current_hashes = compute_source_hashes(
             user_tools_dir, workspace_tools_dir, mcp_config,
             connectkit_bridge=connectkit_bridge,
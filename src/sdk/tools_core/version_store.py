@@ -0,0 +1,373 @@
+"""Content-addressed, delta-compressed store for file versions.
+
+Each workspace keeps one SQLite file next to its Files directory with two
+tables: ``blobs`` holds every distinct content once, keyed by its SHA-256,
+and ``versions`` is the manifest mapping (path, version) to a blob.
+
+The newest version of a file is stored as a full (zlib) snapshot. When a
+newer one arrives, the previous snapshot is re-encoded as a reverse delta
+against it (RCS-style), so a long edit history of a large document costs
+roughly one copy plus the changed lines. Every SNAPSHOT_EVERY versions one
+is left full to bound the delta chain a restore has to walk, and a delta
+is only kept when it is smaller than the snapshot.
+
+Deltas are line-based: a list of ``[start, end]`` slices of the base
+text's lines and literal inserted strings, JSON-encoded and compressed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Any
+
+from src.app_logging import get_logger
+
+logger = get_logger()
+
+SNAPSHOT_EVERY = 10
+VERSION_FORMAT = "%Y-%m-%dT%H-%M-%S"
+
+Delta = list[Any]
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def make_delta(base: str, target: str) -> Delta:
+    """Line-level edit script that turns base into target."""
+    a = base.splitlines(keepends=True)
+    b = target.splitlines(keepends=True)
+    ops: Delta = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b).get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append("".join(b[j1:j2]))
+    return ops
+
+
+def apply_delta(base: str, ops: Delta) -> str:
+    lines = base.splitlines(keepends=True)
+    return "".join("".join(lines[op[0] : op[1]]) if isinstance(op, list) else op for op in ops)
+
+
+def _pack(value: Any) -> bytes:
+    raw = value.encode("utf-8") if isinstance(value, str) else json.dumps(value).encode()
+    return zlib.compress(raw)
+
+
+def _version_time(version: str) -> float | None:
+    try:
+        ts = datetime.strptime(version.split("_")[0], VERSION_FORMAT)
+    except ValueError:
+        return None
+    return ts.replace(tzinfo=UTC).timestamp()
+
+
+def thin(
+    created: list[float],
+    now: float,
+    keep_last: int = 0,
+    max_age_days: float | None = None,
+) -> list[bool]:
+    """Which of one file's versions (timestamps, newest first) to keep.
+
+    The newest keep_last are always kept. Past those, versions older than
+    max_age_days are dropped; the rest are thinned to everything from the
+    last 7 days, the newest per month for a year and the newest per year
+    after that.
+    """
+    keep: list[bool] = []
+    seen: set[str] = set()
+    for i, ts in enumerate(created):
+        age = timedelta(seconds=now - ts)
+        if i < keep_last:
+            keep.append(True)
+        elif max_age_days is not None and age > timedelta(days=max_age_days):
+            keep.append(False)
+        elif age <= timedelta(days=7):
+            keep.append(True)
+        else:
+            when = datetime.fromtimestamp(ts, UTC)
+            bucket = when.strftime("%Y-%m") if age <= timedelta(days=365) else when.strftime("%Y")
+            keep.append(bucket not in seen)
+            seen.add(bucket)
+    return keep
+
+
+class VersionStore:
+    """Versions of one workspace's files, stored in a SQLite file."""
+
+    def __init__(self, db_path: Path, legacy_dir: Path | None = None) -> None:
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        created = not db_path.exists()
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS blobs (
+                    hash TEXT PRIMARY KEY,
+                    base TEXT,
+                    data BLOB NOT NULL,
+                    size INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_blobs_base ON blobs(base);
+                CREATE TABLE IF NOT EXISTS versions (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    hash TEXT NOT NULL,
+                    UNIQUE (path, version)
+                );
+                CREATE INDEX IF NOT EXISTS idx_versions_hash ON versions(hash);
+            """)
+        if created and legacy_dir is not None and legacy_dir.is_dir():
+            self._import_legacy(legacy_dir)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """A connection that commits on success and is always closed."""
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # -- Blobs --
+
+    def _content(self, conn: sqlite3.Connection, digest: str) -> str:
+        """Materialize a blob by walking its delta chain to a snapshot."""
+        deltas: list[Delta] = []
+        while True:
+            row = conn.execute("SELECT base, data FROM blobs WHERE hash = ?", (digest,)).fetchone()
+            if row is None:
+                raise KeyError(f"Missing version blob {digest}")
+            base, data = row
+            raw = zlib.decompress(data).decode("utf-8")
+            if base is None:
+                break
+            deltas.append(json.loads(raw))
+            digest = base
+        for ops in reversed(deltas):
+            raw = apply_delta(raw, ops)
+        return raw
+
+    def _put_snapshot(self, conn: sqlite3.Connection, digest: str, content: str) -> None:
+        """Store content as a full snapshot, converting an existing delta."""
+        row = conn.execute("SELECT base FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        if row is not None and row[0] is None:
+            return
+        conn.execute(
+            "INSERT OR REPLACE INTO blobs (hash, base, data, size) VALUES (?, NULL, ?, ?)",
+            (digest, _pack(content), len(content.encode("utf-8"))),
+        )
+
+    def _encode_against(
+        self, conn: sqlite3.Connection, digest: str, content: str, base: str, base_content: str
+    ) -> None:
+        """Re-encode a snapshot as a delta against base, if that is smaller."""
+        delta = _pack(make_delta(base_content, content))
+        (full,) = conn.execute(
+            "SELECT length(data) FROM blobs WHERE hash = ?", (digest,)
+        ).fetchone()
+        if len(delta) < full:
+            conn.execute(
+                "UPDATE blobs SET base = ?, data = ? WHERE hash = ?", (base, delta, digest)
+            )
+
+    # -- Versions --
+
+    def _add(
+        self, conn: sqlite3.Connection, path: str, content: str, version: str, created_at: float
+    ) -> str:
+        digest = content_hash(content)
+        previous = conn.execute(
+            "SELECT hash, (SELECT COUNT(*) FROM versions WHERE path = ?) FROM versions "
+            "WHERE path = ? ORDER BY created_at DESC, id DESC LIMIT 1",
+            (path, path),
+        ).fetchone()
+        self._put_snapshot(conn, digest, content)
+        if previous is not None:
+            prev_hash, count = previous
+            base = conn.execute("SELECT base FROM blobs WHERE hash = ?", (prev_hash,)).fetchone()
+            if prev_hash != digest and base == (None,) and count % SNAPSHOT_EVERY:
+                prev_content = self._content(conn, prev_hash)
+                self._encode_against(conn, prev_hash, prev_content, digest, content)
+
+        unique, n = version, 1
+        while conn.execute(
+            "SELECT 1 FROM versions WHERE path = ? AND version = ?", (path, unique)
+        ).fetchone():
+            n += 1
+            unique = f"{version}_{n}"
+        conn.execute(
+            "INSERT INTO versions (path, version, created_at, hash) VALUES (?, ?, ?, ?)",
+            (path, unique, created_at, digest),
+        )
+        return unique
+
+    def capture(self, path: str, content: str, now: float | None = None) -> str:
+        """Record content as the newest version of path; returns the version id."""
+        now = time.time() if now is None else now
+        version = datetime.fromtimestamp(now, UTC).strftime(VERSION_FORMAT)
+        with self._lock, self._connect() as conn:
+            return self._add(conn, path, content, version, now)
+
+    def versions(self, path: str) -> list[dict[str, Any]]:
+        """A file's versions, newest first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT v.version, v.created_at, b.size FROM versions v "
+                "JOIN blobs b ON b.hash = v.hash WHERE v.path = ? "
+                "ORDER BY v.created_at DESC, v.id DESC",
+                (path,),
+            ).fetchall()
+        return [{"version": r[0], "created_at": r[1], "size": r[2]} for r in rows]
+
+    def read(self, path: str, version: str) -> str | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT hash FROM versions WHERE path = ? AND version = ?", (path, version)
+            ).fetchone()
+            return None if row is None else self._content(conn, row[0])
+
+    def delete(self, path: str, version: str | None = None) -> int:
+        """Delete one version of path, or all of them; returns how many."""
+        with self._lock, self._connect() as conn:
+            if version is None:
+                cursor = conn.execute("DELETE FROM versions WHERE path = ?", (path,))
+            else:
+                cursor = conn.execute(
+                    "DELETE FROM versions WHERE path = ? AND version = ?", (path, version)
+                )
+            self._collect(conn)
+            return cursor.rowcount
+
+    def clean(
+        self,
+        keep_last: int = 0,
+        max_age_days: float | None = None,
+        now: float | None = None,
+    ) -> int:
+        """Apply the retention policy (see thin) to every file; returns versions deleted."""
+        now = time.time() if now is None else now
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, path, created_at FROM versions ORDER BY path, created_at DESC, id DESC"
+            ).fetchall()
+            doomed: list[int] = []
+            start = 0
+            while start < len(rows):
+                end = start
+                while end < len(rows) and rows[end][1] == rows[start][1]:
+                    end += 1
+                group = rows[start:end]
+                keep = thin([r[2] for r in group], now, keep_last, max_age_days)
+                doomed += [r[0] for r, k in zip(group, keep, strict=True) if not k]
+                start = end
+            conn.executemany("DELETE FROM versions WHERE id = ?", [(i,) for i in doomed])
+            if doomed:
+                self._collect(conn)
+            return len(doomed)
+
+    def _collect(self, conn: sqlite3.Connection) -> None:
+        """Drop blobs no version uses, re-pointing live deltas that build on them."""
+        dead = {
+            r[0]
+            for r in conn.execute(
+                "SELECT hash FROM blobs WHERE hash NOT IN (SELECT hash FROM versions)"
+            )
+        }
+        if not dead:
+            return
+        bases = dict(conn.execute("SELECT hash, base FROM blobs WHERE base IS NOT NULL"))
+        orphans = [h for h, base in bases.items() if base in dead and h not in dead]
+        contents = {h: self._content(conn, h) for h in orphans}
+        for digest in orphans:
+            ancestor = bases[digest]
+            while ancestor in dead:
+                ancestor = bases.get(ancestor)
+            if ancestor is None:
+                self._put_snapshot(conn, digest, contents[digest])
+            else:
+                contents.setdefault(ancestor, self._content(conn, ancestor))
+                conn.execute(
+                    "UPDATE blobs SET base = ?, data = ? WHERE hash = ?",
+                    (ancestor, _pack(make_delta(contents[ancestor], contents[digest])), digest),
+                )
+        conn.executemany("DELETE FROM blobs WHERE hash = ?", [(h,) for h in dead])
+
+    def stats(self) -> dict[str, int]:
+        with self._connect() as conn:
+            versions, files = conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT path) FROM versions"
+            ).fetchone()
+            blobs, deltas, stored, size = conn.execute(
+                "SELECT COUNT(*), COUNT(base), COALESCE(SUM(length(data)), 0), "
+                "COALESCE(SUM(size), 0) FROM blobs"
+            ).fetchone()
+        return {
+            "files": files,
+            "versions": versions,
+            "blobs": blobs,
+            "deltas": deltas,
+            "stored_bytes": stored,
+            "content_bytes": size,
+        }
+
+    def _import_legacy(self, legacy_dir: Path) -> None:
+        """Move full-copy versions (<dir>/<file path>/<timestamp>) into the store."""
+        imported = 0
+        with self._lock, self._connect() as conn:
+            for dirpath, _, filenames in os.walk(legacy_dir):
+                rel = Path(dirpath).relative_to(legacy_dir).as_posix()
+                if rel == ".":
+                    continue
+                dated = sorted(
+                    (ts, name) for name in filenames if (ts := _version_time(name)) is not None
+                )
+                for ts, name in dated:
+                    try:
+                        content = (Path(dirpath) / name).read_text(encoding="utf-8")
+                    except (OSError, UnicodeDecodeError):
+                        continue
+                    self._add(conn, rel, content, name, ts)
+                    imported += 1
+        if imported:
+            for dirpath, _, filenames in os.walk(legacy_dir, topdown=False):
+                for name in filenames:
+                    if _version_time(name) is not None:
+                        (Path(dirpath) / name).unlink(missing_ok=True)
+                if Path(dirpath) != legacy_dir and not os.listdir(dirpath):
+                    os.rmdir(dirpath)
+            logger.info("versions.imported", {"count": imported, "store": str(self.db_path)})
+
+
+_stores: dict[str, VersionStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_version_store(paths: Any) -> VersionStore:
+    """The (cached) version store of a workspace, given its DataPaths."""
+    legacy_dir = paths.versions_dir()
+    db_path = legacy_dir.parent / ".versions.db"
+    key = str(db_path)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = VersionStore(db_path, legacy_dir)
+        return _stores[key]
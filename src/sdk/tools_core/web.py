@@ -81,7 +81,7 @@ def web_fetch(url: str) -> str:
 
 
 web_fetch.annotations = ToolAnnotations(
-    title="Web Fetch", read_only=True, idempotent=True, open_world=True
+    title="Web Fetch", read_only=True, idempotent=True, open_world=True, max_concurrency=8
 )
 
 
@@ -194,5 +194,5 @@ def web_search(query: str, limit: int = 10) -> str:
 
 
 web_search.annotations = ToolAnnotations(
-    title="Web Search", read_only=True, open_world=True
+    title="Web Search", read_only=True, open_world=True, max_concurrency=4
 )
@@ -1,5 +1,6 @@
 """Skills system for progressive disclosure."""
 
+from src.skills.catalog import SkillCatalog
 from src.skills.models import Skill, SkillMetadata, parse_skill_file, skill_to_system_prompt_entry
 from src.skills.registry import SkillRegistry, get_skill_registry
 from src.skills.storage import SkillStorage, SystemSkillStorage, UserSkillStorage
@@ -10,6 +11,7 @@ __all__ = [
     "parse_skill_file",
     "skill_to_system_prompt_entry",
     "SkillStorage",
+    "SkillCatalog",
     "SystemSkillStorage",
     "UserSkillStorage",
     "SkillRegistry",
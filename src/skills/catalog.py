@@ -0,0 +1,260 @@
+"""Cached skill catalog and ranked skill search.
+
+SkillStorage re-reads and re-parses every SKILL.md (YAML frontmatter
+included) on each call, and the registry is asked for all skills whenever
+a system prompt is built, a skill is loaded or /skills is listed.
+
+- SkillCatalog is a SkillStorage that keeps the parsed skills of its
+  directory in memory and in CATALOG_DB inside it, keyed by skill
+  directory and stamped with the SKILL.md mtime, ctime and size. Only
+  files whose stamp changed are parsed again, including after a restart.
+- Within CHECK_INTERVAL seconds of the last check the cached skills are
+  served without touching the filesystem. invalidate() (through
+  SkillRegistry.reload, used by the skills router, skills_reload and the
+  file watcher) makes the next call check.
+- SkillIndex ranks skills with SQLite FTS5 BM25 over name, description
+  and content, weighting the name and description above the body.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.app_logging import get_logger
+from src.skills.models import Skill, _is_valid_skill_name, parse_skill_file
+from src.skills.storage import SkillStorage
+
+logger = get_logger()
+
+CATALOG_DB = ".catalog.db"
+CHECK_INTERVAL = 2.0
+
+# BM25 weights of the FTS columns, in order: name, description, content.
+SEARCH_WEIGHTS = (10.0, 5.0, 1.0)
+_WORD = re.compile(r"\w+")
+
+Stamp = tuple[int, int, int]
+
+
+@dataclass(frozen=True)
+class _Entry:
+    """One skill directory: its SKILL.md stamp and parsed skill (None if invalid)."""
+
+    stamp: Stamp | None
+    skill: Skill | None
+    contained: bool = True
+
+
+def _stamp(skill_file: Path) -> Stamp | None:
+    try:
+        st = os.stat(skill_file)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_ctime_ns, st.st_size)
+
+
+class SkillCatalog(SkillStorage):
+    """SkillStorage whose parsed skills are cached by SKILL.md stamp."""
+
+    def __init__(self, base_dir: str | Path, persist: bool = True):
+        super().__init__(base_dir)
+        self.db_path = self.base_dir / CATALOG_DB if persist else None
+        self.generation = 0  # bumped whenever a skill is added, changed or removed
+        self._entries: dict[str, _Entry] | None = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Check the directory again on the next call."""
+        with self._lock:
+            self._checked = 0.0
+
+    def load_skills(self) -> list[Skill]:
+        return [
+            entry.skill
+            for name, entry in self._current().items()
+            if entry.skill is not None and entry.skill["name"] == name
+        ]
+
+    def load_skill(self, skill_name: str) -> Skill | None:
+        if not _is_valid_skill_name(skill_name):
+            return None
+        entry = self._current().get(skill_name)
+        if entry is None or not entry.contained:
+            return None
+        return entry.skill
+
+    def _current(self) -> dict[str, _Entry]:
+        with self._lock:
+            if self._entries is None or time.monotonic() - self._checked >= CHECK_INTERVAL:
+                self._refresh()
+                self._checked = time.monotonic()
+            assert self._entries is not None
+            return self._entries
+
+    def _refresh(self) -> None:
+        """Re-stat every skill directory, parsing only changed SKILL.md files."""
+        if self._entries is None:
+            self._entries = self._read_db()
+        entries: dict[str, _Entry] = {}
+        changed = False
+        if self.base_dir.is_dir():
+            with os.scandir(self.base_dir) as it:
+                for item in it:
+                    if not item.is_dir():
+                        continue
+                    skill_file = Path(item.path) / "SKILL.md"
+                    stamp = _stamp(skill_file)
+                    entry = self._entries.get(item.name)
+                    if entry is None or entry.stamp != stamp:
+                        entry = self._parse(skill_file, stamp)
+                        changed = True
+                    entries[item.name] = entry
+        if changed or entries.keys() != self._entries.keys():
+            self.generation += 1
+            self._write_db(entries)
+        self._entries = entries
+
+    def _parse(self, skill_file: Path, stamp: Stamp | None) -> _Entry:
+        if stamp is None:
+            return _Entry(None, None)
+        try:
+            skill = parse_skill_file(skill_file)
+        except (OSError, UnicodeDecodeError):
+            skill = None
+        contained = skill_file.resolve().is_relative_to(self.base_dir.resolve())
+        return _Entry(stamp, skill, contained)
+
+    # -- Persistence --
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """A connection that commits on success and is always closed."""
+        assert self.db_path is not None
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        try:
+            with conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS skills (
+                        dir TEXT PRIMARY KEY,
+                        mtime_ns INTEGER,
+                        ctime_ns INTEGER,
+                        size INTEGER,
+                        contained INTEGER NOT NULL,
+                        skill TEXT
+                    )
+                """)
+                yield conn
+        finally:
+            conn.close()
+
+    def _read_db(self) -> dict[str, _Entry]:
+        if self.db_path is None or not self.db_path.exists():
+            return {}
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT dir, mtime_ns, ctime_ns, size, contained, skill FROM skills"
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(
+                "skills.catalog_read_failed", {"path": str(self.db_path), "error": str(e)}
+            )
+            return {}
+        return {
+            name: _Entry(
+                (mtime, ctime, size) if mtime is not None else None,
+                json.loads(skill) if skill else None,
+                bool(contained),
+            )
+            for name, mtime, ctime, size, contained, skill in rows
+        }
+
+    def _write_db(self, entries: dict[str, _Entry]) -> None:
+        # Never create the skills directory just to hold the catalog.
+        if self.db_path is None or not self.base_dir.is_dir():
+            return
+        rows = [
+            (
+                name,
+                *(entry.stamp or (None, None, None)),
+                int(entry.contained),
+                json.dumps(entry.skill) if entry.skill else None,
+            )
+            for name, entry in entries.items()
+        ]
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM skills")
+                conn.executemany("INSERT INTO skills VALUES (?, ?, ?, ?, ?, ?)", rows)
+        except sqlite3.Error as e:
+            logger.warning(
+                "skills.catalog_write_failed", {"path": str(self.db_path), "error": str(e)}
+            )
+
+
+class SkillIndex:
+    """In-memory FTS5 index over one set of skills, ranked by BM25."""
+
+    def __init__(self, skills: list[Skill]):
+        self._skills = skills
+        self._names = [s["name"] for s in skills]
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = sqlite3.connect(":memory:", check_same_thread=False)
+        try:
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE skills_fts USING fts5("
+                "name, description, content, tokenize='porter unicode61')"
+            )
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: search() falls back to substrings.
+            self._conn.close()
+            self._conn = None
+            return
+        self._conn.executemany(
+            "INSERT INTO skills_fts(rowid, name, description, content) VALUES (?, ?, ?, ?)",
+            [
+                (i, s["name"], s.get("description", ""), s.get("content", ""))
+                for i, s in enumerate(skills)
+            ],
+        )
+
+    def search(self, query: str, limit: int | None = None) -> list[str]:
+        """Names of the skills matching any query word (as a prefix), best first."""
+        words = _WORD.findall(query.lower())
+        if not words:
+            return []
+        if self._conn is None:
+            needle = query.lower()
+            names = [
+                s["name"]
+                for s in self._skills
+                if needle in s["name"].lower()
+                or needle in s.get("description", "").lower()
+                or needle in s.get("content", "").lower()
+            ]
+            return names[:limit] if limit is not None else names
+
+        match = " OR ".join(f'"{w}"*' for w in words)
+        weights = ", ".join(str(w) for w in SEARCH_WEIGHTS)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT rowid FROM skills_fts WHERE skills_fts MATCH ? "
+                f"ORDER BY bm25(skills_fts, {weights}) LIMIT ?",
+                (match, -1 if limit is None else limit),
+            ).fetchall()
+        return [self._names[rowid] for (rowid,) in rows]
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -2,14 +2,14 @@
 
 Bundled seed skills (src/skills_seed/) are seeded to the user's skills directory on first
 run. After seeding, all skills live in user or workspace directories. Workspace skills
-override user skills by name.
+override user skills by name. Parsed skills are cached per directory by SkillCatalog.
 """
 
 import threading
 from pathlib import Path
 
+from src.skills.catalog import SkillCatalog, SkillIndex
 from src.skills.models import Skill, _is_valid_skill_name
-from src.skills.storage import SkillStorage
 
 _registries: dict[tuple[str, str], "SkillRegistry"] = {}
 _lock = threading.Lock()
@@ -23,9 +23,13 @@ def get_skill_registry(
     All code should use this factory instead of constructing SkillRegistry
     directly, to ensure a single cached instance per (user_id, workspace_id).
     """
+    from src.sdk.file_watcher import watch_workspace
+
     uid = user_id or "default_user"
     wid = workspace_id or "personal"
     cache_key = (uid, wid)
+    # Keeps the registry in step with SKILL.md edits made outside the app.
+    watch_workspace(uid, wid)
     with _lock:
         if cache_key not in _registries:
             _registries[cache_key] = SkillRegistry(
@@ -34,6 +38,33 @@ def get_skill_registry(
         return _registries[cache_key]
 
 
+def reload_skill_registries(user_id: str, workspace_id: str | None = None) -> None:
+    """Reload the cached registries of a user (or one of their workspaces)."""
+    with _lock:
+        registries = [
+            registry
+            for (uid, wid), registry in _registries.items()
+            if uid == user_id and workspace_id in (None, wid)
+        ]
+    for registry in registries:
+        registry.reload()
+
+
+def _scoped(skill: Skill, scope: str, workspace_id: str) -> Skill:
+    """A copy of a cached skill with its scope recorded in metadata."""
+    scoped = _copy(skill)
+    scoped["metadata"]["scope"] = scope
+    scoped["metadata"]["workspace_id"] = workspace_id
+    return scoped
+
+
+def _copy(skill: Skill) -> Skill:
+    """A copy callers may modify without touching the cached skill."""
+    copied = skill.copy()
+    copied["metadata"] = dict(skill.get("metadata", {}))
+    return copied
+
+
 def reset_skill_registries() -> None:
     """Clear all cached registries (useful for testing)."""
     with _lock:
@@ -61,16 +92,21 @@ class SkillRegistry:
         self.workspace_id = workspace_id
 
         self.skills_dir = Path(skills_dir) if skills_dir else paths.user_skills_dir()
-        self.storage = SkillStorage(self.skills_dir)
+        self.storage = SkillCatalog(self.skills_dir)
 
         if workspace_skills_dir:
             self.workspace_skills_dir = Path(workspace_skills_dir)
         else:
             self.workspace_skills_dir = paths.workspace_skills_dir()
 
-        self.ws_storage = SkillStorage(self.workspace_skills_dir)
+        self.ws_storage = SkillCatalog(self.workspace_skills_dir)
         self._loaded_skills: dict[str, int] = {}
         self._seeded = False
+        self._cache_lock = threading.Lock()
+        self._skills: list[Skill] | None = None
+        self._skills_key: tuple[int, int] = (0, 0)
+        self._index: SkillIndex | None = None
+        self._index_skills: list[Skill] | None = None
 
     def _seed_system_skills(self) -> None:
         """Copy bundled seed skills to user skills directory on first run."""
@@ -105,6 +141,8 @@ class SkillRegistry:
         """Reload all skills (clear cache, re-seed system skills)."""
         self._seeded = False
         self._loaded_skills.clear()
+        self.storage.invalidate()
+        self.ws_storage.invalidate()
 
     def mark_skill_loaded(self, skill_name: str) -> None:
         """Track that a skill has been loaded into context (increment count)."""
@@ -118,28 +156,27 @@ class SkillRegistry:
         """Get how many times a skill has been loaded (0 if never loaded)."""
         return self._loaded_skills.get(skill_name, 0)
 
+    def _merged_skills(self) -> list[Skill]:
+        """All skills with scope metadata, rebuilt only when a catalog changed."""
+        self._seed_system_skills()
+        user_skills = self.storage.load_skills()
+        ws_skills = self.ws_storage.load_skills()
+        key = (self.storage.generation, self.ws_storage.generation)
+        with self._cache_lock:
+            if self._skills is None or key != self._skills_key:
+                merged = {s["name"]: _scoped(s, "user", "") for s in user_skills}
+                for s in ws_skills:
+                    merged[s["name"]] = _scoped(s, "workspace", self.workspace_id)
+                self._skills = list(merged.values())
+                self._skills_key = key
+                if self._index is not None:
+                    self._index.close()
+                    self._index = None
+            return self._skills
+
     def get_all_skills(self) -> list[Skill]:
         """Get all available skills, merged (workspace overrides user by name)."""
-        self._seed_system_skills()
-        user_skills = {s["name"]: s for s in self.storage.load_skills()}
-
-        for s in user_skills.values():
-            if "metadata" not in s:
-                s["metadata"] = {}
-            s["metadata"]["scope"] = "user"
-            s["metadata"]["workspace_id"] = ""
-
-        ws_skills_raw = self.ws_storage.load_skills()
-        ws_skills = {}
-        for s in ws_skills_raw:
-            if "metadata" not in s:
-                s["metadata"] = {}
-            s["metadata"]["scope"] = "workspace"
-            s["metadata"]["workspace_id"] = self.workspace_id
-            ws_skills[s["name"]] = s
-
-        merged = {**user_skills, **ws_skills}
-        return list(merged.values())
+        return [_copy(s) for s in self._merged_skills()]
 
     def get_skill(self, skill_name: str) -> Skill | None:
         """Get a specific skill by name (workspace overrides user)."""
@@ -150,19 +187,11 @@ class SkillRegistry:
 
         ws_skill = self.ws_storage.load_skill(skill_name)
         if ws_skill:
-            if "metadata" not in ws_skill:
-                ws_skill["metadata"] = {}
-            ws_skill["metadata"]["scope"] = "workspace"
-            ws_skill["metadata"]["workspace_id"] = self.workspace_id
-            return ws_skill
+            return _scoped(ws_skill, "workspace", self.workspace_id)
 
         user_skill = self.storage.load_skill(skill_name)
         if user_skill:
-            if "metadata" not in user_skill:
-                user_skill["metadata"] = {}
-            user_skill["metadata"]["scope"] = "user"
-            user_skill["metadata"]["workspace_id"] = ""
-            return user_skill
+            return _scoped(user_skill, "user", "")
 
         return None
 
@@ -171,17 +200,22 @@ class SkillRegistry:
         skills = self.get_all_skills()
         return [s["name"] for s in skills]
 
-    def search_skills(self, query: str) -> list[Skill]:
-        """Search for skills matching a query string."""
-        query_lower = query.lower()
-        all_skills = self.get_all_skills()
-        return [
-            s
-            for s in all_skills
-            if query_lower in s["name"].lower()
-            or query_lower in s.get("description", "").lower()
-            or query_lower in s.get("content", "").lower()
-        ]
+    def search_skills(self, query: str, limit: int | None = None) -> list[Skill]:
+        """Skills matching any word of query, best first.
+
+        Ranked by BM25 over name, description and content (see SkillIndex).
+        """
+        skills = self._merged_skills()
+        # Search under the lock too, so a rebuild can't close the index mid-query.
+        with self._cache_lock:
+            if self._index is None or self._index_skills is not skills:
+                if self._index is not None:
+                    self._index.close()
+                self._index = SkillIndex(skills)
+                self._index_skills = skills
+            names = self._index.search(query, limit)
+        by_name = {s["name"]: s for s in skills}
+        return [_copy(by_name[name]) for name in names]
 
     def get_skill_descriptions(self, include_disabled: bool = False) -> list[str]:
         """Get formatted skill descriptions for system prompt.
@@ -1,5 +1,6 @@
 """Storage module for Executive Assistant."""
 
+from src.storage.async_messages import AsyncMessageStore, get_async_message_store
 from src.storage.messages import (
     Message,
     MessageStore,
@@ -13,6 +14,8 @@ __all__ = [
     "get_user_storage",
     "MessageStore",
     "get_message_store",
+    "AsyncMessageStore",
+    "get_async_message_store",
     "Message",
     "SearchResult",
 ]
@@ -0,0 +1,443 @@
+"""Non-blocking MessageStore facade for async callers.
+
+MessageStore is synchronous: every add_message opens a SQLite connection,
+writes the row plus its journal entries, then embeds the content and
+upserts it into Chroma before returning. Called from the WebSocket handler
+that stalls the event loop for every other connection.
+
+AsyncMessageStore keeps the same API as coroutines:
+
+    - writes go through one writer thread per store. It drains its queue,
+      inserts everything pending in one transaction (durable on commit),
+      resolves the callers' futures, and only then processes the journal,
+      so embeddings are computed in batches and never delay an await.
+    - reads run in a small thread pool on read-only SQLite connections
+      (WAL lets them proceed while the writer commits).
+
+The queue is FIFO, so awaiting a write also means every write queued
+before it is durable. add_message_nowait is the write-behind variant for
+rows nobody waits on (tool metadata, reasoning).
+
+Recent history is served from an in-memory ConversationWindow (see
+conversation_window.py) that is appended to as writes are queued, so a warm
+turn does no SQLite reads at all.
+
+Usage:
+    store = await get_async_message_store(user_id, workspace_id)
+    await store.add_message("user", text, metadata={"workspace_id": workspace_id})
+    history = await store.get_messages_with_summary(50, workspace_id=workspace_id)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import uuid
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any, TypeVar
+
+from src.storage.conversation_window import (
+    ConversationWindow,
+    ConversationWindowCache,
+    get_window_cache,
+)
+from src.storage.messages import Message, MessageStore, get_message_store
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH = 64
+DEFAULT_READ_CONNECTIONS = 4
+
+_T = TypeVar("_T")
+
+
+@dataclass
+class _PendingWrite:
+    row: dict[str, Any]
+    future: Future[str] = field(default_factory=Future)
+
+
+class ReadConnectionPool:
+    """Reusable read-only SQLite connections to one database file."""
+
+    def __init__(self, db_path: str, size: int = DEFAULT_READ_CONNECTIONS):
+        self.db_path = db_path
+        self.size = size
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._all: list[sqlite3.Connection] = []
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro", uri=True, timeout=30.0, check_same_thread=False
+        )
+        conn.execute("PRAGMA busy_timeout = 30000")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._open()
+            with self._lock:
+                self._all.append(conn)
+        try:
+            yield conn
+        finally:
+            if self._idle.qsize() < self.size:
+                self._idle.put(conn)
+            else:
+                with self._lock:
+                    self._all.remove(conn)
+                conn.close()
+
+    def query(self, sql: str, params: tuple[Any, ...] = ()) -> list[dict[str, Any]]:
+        with self.connection() as conn:
+            return [dict(r) for r in conn.execute(sql, params).fetchall()]
+
+    def close(self) -> None:
+        with self._lock:
+            conns, self._all = self._all, []
+        while not self._idle.empty():
+            self._idle.get_nowait()
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+class AsyncMessageStore:
+    """Async facade over MessageStore with a write-behind ingest thread."""
+
+    def __init__(
+        self,
+        store: MessageStore,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        read_connections: int = DEFAULT_READ_CONNECTIONS,
+        window_cache: ConversationWindowCache | None = None,
+    ):
+        self.store = store
+        self.windows = window_cache or get_window_cache()
+        self._window_key = (id(self), store.user_id, store.workspace_id)
+        self.max_batch = max_batch
+        self._db = store.core.db
+        self._reads = ReadConnectionPool(store.db_path, size=read_connections)
+        self._read_executor = ThreadPoolExecutor(
+            max_workers=read_connections, thread_name_prefix="msgstore-read"
+        )
+        self._queue: queue.Queue[_PendingWrite | None] = queue.Queue()
+        self._writer: threading.Thread | None = None
+        self._writer_lock = threading.Lock()
+        self._closed = False
+        self.batches = 0
+        self.written = 0
+        # Writes queued / committed so far; a window read from SQLite is only
+        # cached when no write was in flight while it was read.
+        self._enqueued = 0
+        self._committed = 0
+
+    # ── Writes ────────────────────────────────────────────────
+
+    def _ensure_writer(self) -> None:
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(
+                    target=self._writer_main,
+                    name=f"msgstore-writer-{self.store.user_id}",
+                    daemon=True,
+                )
+                self._writer.start()
+
+    def add_message_nowait(
+        self, role: str, content: str, metadata: dict[str, Any] | None = None
+    ) -> Future[str]:
+        """Queue a message and return immediately; the future resolves once it is committed."""
+        if self._closed:
+            raise RuntimeError("AsyncMessageStore is closed")
+        row = {
+            "id": str(uuid.uuid4())[:12],
+            "role": role,
+            "content": content or "(empty)",
+            "user_id": "",
+            "agent_id": "",
+            "session_id": "",
+            "metadata": json.dumps(metadata or {}),
+            "ts": datetime.now(UTC).isoformat(),
+        }
+        pending = _PendingWrite(row)
+        self._ensure_writer()
+        self._enqueued += 1
+        self._update_windows(row, pending.future)
+        self._queue.put(pending)
+        return pending.future
+
+    async def add_message(
+        self, role: str, content: str, metadata: dict[str, Any] | None = None
+    ) -> str:
+        """Queue a message and wait until it (and everything queued before it) is durable."""
+        return await asyncio.wrap_future(self.add_message_nowait(role, content, metadata))
+
+    async def add_summary_message(self, content: str) -> str:
+        return await self.add_message("summary", content)
+
+    async def flush(self) -> None:
+        """Wait until every queued write is durable."""
+        if self._writer is None:
+            return
+        pending = _PendingWrite({})
+        self._queue.put(pending)
+        await asyncio.wrap_future(pending.future)
+
+    def _writer_main(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    nxt = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                batch.append(nxt)
+            self._write_batch(batch)
+            if stop:
+                return
+
+    def _write_batch(self, batch: list[_PendingWrite]) -> None:
+        writes = [p for p in batch if p.row]
+        rows = [p.row for p in writes if p.row["content"].strip()]
+        errors: dict[int, Exception] = {}
+        try:
+            if rows:
+                self._db.insert_batch("messages", rows, sync=False)
+        except Exception:
+            logger.warning("msgstore.batch_insert_failed rows=%d", len(rows), exc_info=True)
+            errors = self._write_one_by_one(writes)
+        else:
+            self.written += len(rows)
+        # Counters first: a caller released by its future must already see them.
+        self.batches += 1
+        self._committed += len(writes)
+        for p in batch:
+            if id(p) in errors:
+                p.future.set_exception(errors[id(p)])
+            else:
+                p.future.set_result(p.row["id"] if p.row and p.row["content"].strip() else "")
+
+        # Rows are committed; embeddings and index sync happen after the
+        # callers have been released, in one pass for the whole batch.
+        if rows:
+            try:
+                self.store.process_journal()
+            except Exception:
+                logger.warning("msgstore.journal_failed", exc_info=True)
+
+    def _write_one_by_one(self, writes: list[_PendingWrite]) -> dict[int, Exception]:
+        """Insert writes individually; returns the failures keyed by id(write)."""
+        errors: dict[int, Exception] = {}
+        for p in writes:
+            try:
+                self._db.insert("messages", p.row, sync=False)
+                self.written += 1
+            except Exception as e:
+                errors[id(p)] = e
+        return errors
+
+    # ── History windows ───────────────────────────────────────
+
+    def _update_windows(self, row: dict[str, Any], future: Future[str]) -> None:
+        if row["role"] == "summary":
+            self.windows.invalidate(self._window_key)
+            return
+        if not row["content"].strip():
+            return
+        message = MessageStore.row_to_message(row)
+        workspace_id = (message.metadata or {}).get("workspace_id")
+        for key in self.windows.keys(self._window_key):
+            if key[1] is None or key[1] == workspace_id:
+                self.windows.append(key, message)
+        future.add_done_callback(self._invalidate_on_failure)
+
+    def _invalidate_on_failure(self, future: Future[str]) -> None:
+        if future.exception() is not None:
+            self.windows.invalidate(self._window_key)
+
+    def _load_window(self, limit: int, workspace_id: str | None) -> ConversationWindow | None:
+        key = (self._window_key, workspace_id)
+        generation = self.store.generation
+        window = self.windows.get(key, generation, limit)
+        if window is not None:
+            return window
+
+        enqueued = self._enqueued
+        if self._committed < enqueued:
+            return None
+        summaries = self._fetch(1, role="summary")
+        recent = self._fetch(limit, workspace_id=workspace_id)
+        window = ConversationWindow.build(
+            list(reversed(recent)), summaries[0] if summaries else None, limit, generation
+        )
+        if self._enqueued == enqueued and self.store.generation == generation:
+            self.windows.put(key, window)
+        return window
+
+    def _window_messages(self, limit: int, workspace_id: str | None) -> list[Message]:
+        if limit <= 0:
+            return []
+        window = self._load_window(limit, workspace_id)
+        if window is None:
+            return self._get_messages_with_summary(limit, workspace_id)
+        return window.messages(limit)
+
+    def _window_converted(
+        self, limit: int, workspace_id: str | None, convert: Callable[[list[Message]], list[Any]]
+    ) -> list[Any]:
+        window = self._load_window(limit, workspace_id) if limit > 0 else None
+        if window is None:
+            return convert(self._get_messages_with_summary(limit, workspace_id))
+        return window.converted(limit, convert)
+
+    # ── Reads ─────────────────────────────────────────────────
+
+    def _fetch(
+        self, limit: int, role: str | None = None, workspace_id: str | None = None
+    ) -> list[Message]:
+        where: list[str] = []
+        params: list[Any] = []
+        if role:
+            where.append("role = ?")
+            params.append(role)
+        if workspace_id:
+            where.append("json_extract(metadata, '$.workspace_id') = ?")
+            params.append(workspace_id)
+        rows = self._reads.query(
+            f"SELECT * FROM messages WHERE {' AND '.join(where) or '1=1'} "
+            "ORDER BY ts DESC LIMIT ?",
+            (*params, limit),
+        )
+        return [MessageStore.row_to_message(r) for r in rows]
+
+    def _get_messages_with_summary(self, limit: int, workspace_id: str | None) -> list[Message]:
+        if limit <= 0:
+            return []
+        summaries = self._fetch(1, role="summary")
+        recent = self._fetch(limit, workspace_id=workspace_id)
+        if not summaries:
+            return list(reversed(recent))
+        # Same shape as MessageStore.get_messages_with_summary.
+        result = [summaries[0]] + [m for m in recent if m.role != "summary"]
+        return result[:limit]
+
+    async def _read(self, fn: Callable[..., _T], *args: Any) -> _T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._read_executor, fn, *args)
+
+    async def get_messages_with_summary(
+        self, limit: int = 50, workspace_id: str | None = None
+    ) -> list[Message]:
+        key = (self._window_key, workspace_id)
+        window = self.windows.get(key, self.store.generation, limit) if limit > 0 else None
+        if window is not None:
+            return window.messages(limit)
+        return await self._read(self._window_messages, limit, workspace_id)
+
+    async def get_history(
+        self,
+        limit: int,
+        workspace_id: str | None,
+        convert: Callable[[list[Message]], list[Any]],
+    ) -> list[Any]:
+        """get_messages_with_summary passed through convert (e.g. to SDK Messages).
+
+        The converted list is memoized on the window until the next write,
+        so repeated calls within a turn (approval retries) are free.
+        """
+        key = (self._window_key, workspace_id)
+        window = self.windows.get(key, self.store.generation, limit) if limit > 0 else None
+        if window is not None:
+            return window.converted(limit, convert)
+        return await self._read(self._window_converted, limit, workspace_id, convert)
+
+    async def get_recent_messages(self, count: int = 100) -> list[Message]:
+        messages = await self._read(self._fetch, count)
+        return list(reversed(messages))
+
+    # ── Lifecycle ─────────────────────────────────────────────
+
+    def close(self, timeout: float | None = 30.0) -> None:
+        """Flush queued writes, stop the writer and release read connections."""
+        self._closed = True
+        writer = self._writer
+        if writer is not None and writer.is_alive():
+            self._queue.put(None)
+            writer.join(timeout)
+        self._read_executor.shutdown(wait=False)
+        self._reads.close()
+        self.windows.invalidate(self._window_key)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "batches": self.batches,
+            "written": self.written,
+            "windows": len(self.windows.keys(self._window_key)),
+        }
+
+
+_async_stores: dict[str, AsyncMessageStore] = {}
+_async_stores_lock = threading.Lock()
+
+
+def _get_or_create(user_id: str, workspace_id: str) -> AsyncMessageStore:
+    key = f"{user_id}:{workspace_id}:msgstore"
+    with _async_stores_lock:
+        store = _async_stores.get(key)
+        if store is None:
+            store = AsyncMessageStore(get_message_store(user_id, workspace_id))
+            _async_stores[key] = store
+        return store
+
+
+async def get_async_message_store(
+    user_id: str = "default_user", workspace_id: str = "personal"
+) -> AsyncMessageStore:
+    """Return the cached AsyncMessageStore, opening the underlying store off-loop."""
+    key = f"{user_id}:{workspace_id}:msgstore"
+    store = _async_stores.get(key)
+    if store is not None:
+        return store
+    return await asyncio.to_thread(_get_or_create, user_id, workspace_id)
+
+
+def clear_async_message_store(user_id: str, workspace_id: str) -> None:
+    """Flush and evict a cached AsyncMessageStore (e.g. after workspace deletion)."""
+    key = f"{user_id}:{workspace_id}:msgstore"
+    with _async_stores_lock:
+        store = _async_stores.pop(key, None)
+    if store is not None:
+        store.close()
+
+
+def shutdown_async_message_stores(timeout: float | None = 30.0) -> None:
+    """Flush every store's pending writes (FastAPI lifespan exit)."""
+    with _async_stores_lock:
+        stores = list(_async_stores.values())
+        _async_stores.clear()
+    for store in stores:
+        store.close(timeout)
@@ -0,0 +1,182 @@
+"""In-memory rolling windows of recent conversation history.
+
+Every WebSocket turn used to rebuild its context from disk: two or three
+fetches for get_messages_with_summary(50) plus a full conversion into SDK
+Messages, and the approval retry path did it again. A ConversationWindow
+keeps the last N rows for one (store, workspace filter) in memory; the
+AsyncMessageStore appends to it as it queues writes, so a turn only reads
+from SQLite when the window is cold.
+
+Windows are dropped when a summary is written, when the workspace is
+cleared or imported into (any write that bypasses AsyncMessageStore bumps
+MessageStore.generation), and by the LRU once the approximate memory
+budget is exceeded.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict, deque
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass, field
+from typing import Any
+
+from src.storage.messages import Message
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_MAX_WINDOWS = 512
+
+# Rough per-message overhead of the dataclass, datetime and dict objects.
+_MESSAGE_OVERHEAD = 256
+
+
+def estimate_size(message: Message) -> int:
+    """Approximate memory footprint of a cached message, in bytes."""
+    meta = json.dumps(message.metadata, default=str) if message.metadata else ""
+    return _MESSAGE_OVERHEAD + len(message.content or "") + len(meta)
+
+
+@dataclass
+class ConversationWindow:
+    """The last ``capacity`` rows matching one workspace filter, oldest first."""
+
+    capacity: int
+    rows: deque[Message]
+    summary: Message | None
+    generation: int
+    nbytes: int = 0
+    _converted: tuple[int, Callable[..., Any], list[Any]] | None = field(default=None, repr=False)
+
+    @classmethod
+    def build(
+        cls, rows: list[Message], summary: Message | None, capacity: int, generation: int
+    ) -> ConversationWindow:
+        window = cls(capacity, deque(rows[-capacity:] if capacity else []), summary, generation)
+        window.nbytes = sum(estimate_size(m) for m in window.rows)
+        if summary is not None:
+            window.nbytes += estimate_size(summary)
+        return window
+
+    def append(self, message: Message) -> int:
+        """Add a newly written row; returns the change in nbytes."""
+        before = self.nbytes
+        self.rows.append(message)
+        self.nbytes += estimate_size(message)
+        while len(self.rows) > self.capacity:
+            self.nbytes -= estimate_size(self.rows.popleft())
+        self._converted = None
+        return self.nbytes - before
+
+    def messages(self, limit: int) -> list[Message]:
+        """Same result as MessageStore.get_messages_with_summary(limit)."""
+        if limit <= 0:
+            return []
+        recent = list(self.rows)[-limit:]
+        if self.summary is None:
+            return recent
+        result = [self.summary] + [m for m in reversed(recent) if m.role != "summary"]
+        return result[:limit]
+
+    def converted(self, limit: int, convert: Callable[[list[Message]], list[Any]]) -> list[Any]:
+        """messages(limit) passed through convert, memoized until the next append."""
+        cached = self._converted
+        if cached is None or cached[0] != limit or cached[1] is not convert:
+            cached = (limit, convert, convert(self.messages(limit)))
+            self._converted = cached
+        return list(cached[2])
+
+
+class ConversationWindowCache:
+    """LRU of ConversationWindows bounded by count and approximate bytes."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, max_windows: int = DEFAULT_MAX_WINDOWS):
+        self.max_bytes = max_bytes
+        self.max_windows = max_windows
+        self._windows: OrderedDict[Hashable, ConversationWindow] = OrderedDict()
+        self._lock = threading.RLock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, generation: int, limit: int) -> ConversationWindow | None:
+        """Return a window that can serve ``limit`` rows and is not stale."""
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or window.generation != generation or window.capacity < limit:
+                if window is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._windows.move_to_end(key)
+            self.hits += 1
+            return window
+
+    def put(self, key: Hashable, window: ConversationWindow) -> None:
+        with self._lock:
+            if key in self._windows:
+                self._drop(key)
+            self._windows[key] = window
+            self.nbytes += window.nbytes
+            self._evict()
+
+    def append(self, key: Hashable, message: Message) -> None:
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                return
+            self.nbytes += window.append(message)
+            self._evict()
+
+    def keys(self, prefix: Hashable) -> list[tuple[Any, ...]]:
+        """Keys of the form (prefix, ...)."""
+        with self._lock:
+            return [k for k in self._windows if isinstance(k, tuple) and k[0] == prefix]
+
+    def invalidate(self, prefix: Hashable) -> None:
+        """Drop every window whose key starts with prefix."""
+        with self._lock:
+            for key in self.keys(prefix):
+                self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._windows.clear()
+            self.nbytes = 0
+
+    def _drop(self, key: Hashable) -> None:
+        window = self._windows.pop(key)
+        self.nbytes -= window.nbytes
+
+    def _evict(self) -> None:
+        while self._windows and (
+            self.nbytes > self.max_bytes or len(self._windows) > self.max_windows
+        ):
+            self._drop(next(iter(self._windows)))
+            self.evictions += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "windows": len(self._windows),
+                "bytes": self.nbytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_cache: ConversationWindowCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_window_cache() -> ConversationWindowCache:
+    """Return the process-wide ConversationWindowCache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ConversationWindowCache()
+        return _cache
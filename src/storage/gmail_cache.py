@@ -1,15 +1,19 @@
 """Gmail email cache using HybridDB.
 
-Fetches from Gmail API (via gws CLI), stores in HybridDB for
-keyed-by-message-id access + keyword/semantic/hybrid search.
+Fetches from Gmail API (via the gws CLI or an in-process HTTP client, see
+gmail_transport), stores in HybridDB for keyed-by-message-id access +
+keyword/semantic/hybrid search.
 
 Store path: data/users/{user_id}/gmail_cache/
-  app.db     — SQLite + FTS5 + journal
-  vectors/   — ChromaDB for semantic search
+  app.db           — SQLite + FTS5 + journal
+  vectors/         — ChromaDB for semantic search
+  sync_state.json  — Gmail historyId of the last complete sync
 """
 
 import json
 import subprocess
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, cast
@@ -18,11 +22,14 @@ from hybriddb import HybridDB, SearchMode
 
 from src.app_logging import get_logger
 from src.config import get_settings
+from src.storage.gmail_transport import GmailTransport, GwsCliTransport, default_transport
+from src.storage.hybrid_bulk import EMBEDDING_MODEL_NAME, BatchEmbedder, bulk_upsert, existing_rows
 from src.storage.paths import get_paths
 
 logger = get_logger()
 
 TABLE = "emails"
+_EMBEDDED_COLUMNS = ("snippet", "body")
 _JSON_FIELDS = {"labels", "headers", "to_addr", "attachments"}
 _LIST_FIELDS = {"to_addr", "labels"}
 
@@ -79,6 +86,25 @@ def _deserialize(value: Any, field_name: str) -> Any:
     return value
 
 
+def _to_row(email: dict[str, Any]) -> dict[str, Any]:
+    """Map a fetched email dict to a cache row."""
+    row: dict[str, Any] = {"message_id": email["message_id"]}
+    for name in (
+        "thread_id",
+        "from_addr",
+        "to_addr",
+        "subject",
+        "snippet",
+        "body",
+        "ts",
+        "labels",
+        "headers",
+        "attachments",
+    ):
+        row[name] = _serialize(email.get(name), name)
+    return row
+
+
 class GmailCache:
     """HybridDB-backed Gmail email cache."""
 
@@ -86,10 +112,14 @@ class GmailCache:
         self.user_id = user_id
         base_path = get_paths(user_id).gmail_cache_dir()
         base_path.mkdir(parents=True, exist_ok=True)
+        self.state_path = base_path / "sync_state.json"
 
         settings = get_settings()
+        self._embedder = BatchEmbedder()
         self.db = HybridDB(
             str(base_path),
+            embedding_fn=self._embedder,
+            embedding_model_name=EMBEDDING_MODEL_NAME,
             max_chroma_index_gb=settings.memory.messages.max_chroma_index_gb,
         )
         self.db.create_table(
@@ -124,20 +154,7 @@ class GmailCache:
             return None
 
         existing = self.db.query(TABLE, where="message_id = ?", params=(msg_id,), limit=1)
-
-        row = {
-            "message_id": msg_id,
-            "thread_id": _serialize(email.get("thread_id"), "thread_id"),
-            "from_addr": _serialize(email.get("from_addr"), "from_addr"),
-            "to_addr": _serialize(email.get("to_addr"), "to_addr"),
-            "subject": _serialize(email.get("subject"), "subject"),
-            "snippet": _serialize(email.get("snippet"), "snippet"),
-            "body": _serialize(email.get("body"), "body"),
-            "ts": _serialize(email.get("ts"), "ts"),
-            "labels": _serialize(email.get("labels"), "labels"),
-            "headers": _serialize(email.get("headers"), "headers"),
-            "attachments": _serialize(email.get("attachments"), "attachments"),
-        }
+        row = _to_row(email)
 
         if existing:
             row_id = cast(int, existing[0]["id"])
@@ -147,12 +164,17 @@ class GmailCache:
             return cast(int, self.db.insert(TABLE, row))
 
     def upsert_batch(self, emails: list[dict[str, Any]]) -> int:
-        """Insert or update multiple emails. Returns count upserted."""
-        count = 0
-        for email in emails:
-            if self.upsert(email) is not None:
-                count += 1
-        return count
+        """Insert or update multiple emails in one batch. Returns count upserted.
+
+        Existing rows are found with one SELECT ... IN, new rows go in one
+        transaction, unchanged rows are not rewritten, and the snippet/body
+        embeddings for the whole batch are computed in one model call.
+        """
+        rows = [_to_row(e) for e in emails if e.get("message_id")]
+        if len(rows) < len(emails):
+            logger.warning("gmail_upsert_no_id", {"skipped": len(emails) - len(rows)})
+        result = bulk_upsert(self.db, TABLE, "message_id", rows, self._embedder, _EMBEDDED_COLUMNS)
+        return sum(result.values())
 
     def get_by_message_id(self, message_id: str) -> EmailResult | None:
         """Get a single email by Gmail message_id."""
@@ -169,6 +191,45 @@ class GmailCache:
     def count(self) -> int:
         return cast(int, self.db.count(TABLE))
 
+    def cached_ids(self, message_ids: list[str]) -> set[str]:
+        """Return the subset of message_ids already in the cache."""
+        return set(self._row_ids(message_ids))
+
+    def _row_ids(self, message_ids: list[str]) -> dict[str, int]:
+        rows = existing_rows(self.db, TABLE, "message_id", message_ids, columns="id, message_id")
+        return {msg_id: r["id"] for msg_id, r in rows.items()}
+
+    def update_labels(self, labels: dict[str, list[str]]) -> int:
+        """Set the labels of cached emails by message_id. Returns rows updated."""
+        row_ids = self._row_ids(list(labels))
+        for msg_id, row_id in row_ids.items():
+            self.db.update(
+                TABLE, row_id, {"labels": _serialize(labels[msg_id], "labels")}, sync=False
+            )
+        if row_ids:
+            self.db.process_journal()
+        return len(row_ids)
+
+    def delete_message_ids(self, message_ids: list[str]) -> int:
+        """Remove cached emails by message_id. Returns rows deleted."""
+        row_ids = self._row_ids(message_ids)
+        for row_id in row_ids.values():
+            self.db.delete(TABLE, row_id, sync=False)
+        if row_ids:
+            self.db.process_journal()
+        return len(row_ids)
+
+    def load_sync_state(self) -> dict[str, Any]:
+        try:
+            return cast(dict[str, Any], json.loads(self.state_path.read_text()))
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def save_sync_state(self, state: dict[str, Any]) -> None:
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state))
+        tmp.replace(self.state_path)
+
     # -- Search --
 
     def search_keyword(self, query: str, limit: int = 10) -> list[EmailResult]:
@@ -285,6 +346,7 @@ class GmailCache:
         all_rows = self.db.query(TABLE, limit=100000)
         for r in all_rows:
             self.db.delete(TABLE, r["id"])
+        self.state_path.unlink(missing_ok=True)
 
     def stats(self) -> dict[str, Any]:
         return {
@@ -323,11 +385,21 @@ def get_gmail_cache(user_id: str = "default_user") -> GmailCache:
     return _stores[user_id]
 
 
-# -- Sync from Gmail API via gws CLI --
+# -- Sync from Gmail API --
 
-_GSW_FETCH_TIMEOUT = 30
 _LIST_PAGE_SIZE = 500
 _UPSERT_FLUSH = 25
+_FETCH_CONCURRENCY = 8
+_HISTORY_TYPES = ["messageAdded", "messageDeleted", "labelAdded", "labelRemoved"]
+
+
+@dataclass
+class HistoryChanges:
+    """Net mailbox changes since a historyId, keyed by Gmail message id."""
+
+    added: dict[str, str] = field(default_factory=dict)  # message_id -> thread_id
+    deleted: set[str] = field(default_factory=set)
+    labels: dict[str, list[str]] = field(default_factory=dict)
 
 
 def sync_emails(
@@ -336,17 +408,134 @@ def sync_emails(
     query: str | None = None,
     fetch_body: bool = True,
     progress: bool = True,
+    transport: GmailTransport | None = None,
+    concurrency: int | None = None,
 ) -> dict[str, Any]:
     """Sync emails from Gmail API into the cache.
 
-    Uses the gws CLI (must be installed and authenticated).
-    Auto-paginates through all matching results.
-
-    Returns dict with counts: {listed, fetched, upserted, errors}
+    After the first complete sync, unfiltered runs ask the Gmail history
+    API for changes since the stored historyId: new messages are fetched,
+    label changes and deletions are applied in place. Filtered runs (query)
+    and runs whose history has expired list matching messages instead,
+    auto-paginating up to max_results. Either way, message ids already in
+    the cache are not fetched again, and the rest are fetched `concurrency`
+    at a time over one transport (the gws CLI, or an in-process HTTP client
+    when GOOGLE_WORKSPACE_CLI_TOKEN is set).
+
+    Returns dict with counts:
+    {mode, listed, skipped, fetched, upserted, errors, deleted, labels_updated}
     """
     cache = get_gmail_cache(user_id)
+    if concurrency is None:
+        concurrency = _fetch_concurrency()
+    owns_transport = transport is None
+    gmail = transport or default_transport(concurrency)
+    try:
+        return _sync(cache, gmail, max_results, query, fetch_body, progress, concurrency)
+    finally:
+        if owns_transport:
+            gmail.close()
+
+
+def _fetch_concurrency() -> int:
+    try:
+        return max(1, get_settings().email.gmail_fetch_concurrency)
+    except Exception:
+        return _FETCH_CONCURRENCY
+
+
+def _sync(
+    cache: GmailCache,
+    gmail: GmailTransport,
+    max_results: int,
+    query: str | None,
+    fetch_body: bool,
+    progress: bool,
+    concurrency: int,
+) -> dict[str, Any]:
+    stats: dict[str, Any] = {
+        "mode": "list",
+        "listed": 0,
+        "skipped": 0,
+        "fetched": 0,
+        "upserted": 0,
+        "errors": 0,
+        "deleted": 0,
+        "labels_updated": 0,
+    }
+
+    # Take the historyId before listing so changes made during this sync are
+    # replayed next time (replays are cheap: cached ids are skipped).
+    history_id: str | None = None
+    changes: HistoryChanges | None = None
+    if not query:
+        profile = gmail.call("getProfile", {"userId": "me"})
+        history_id = str(profile["historyId"]) if profile and profile.get("historyId") else None
+        start = cache.load_sync_state().get("history_id")
+        if start and history_id:
+            changes = _list_history(gmail, start)
+
+    if changes is not None:
+        stats["mode"] = "history"
+        wanted = list(changes.added.items())
+        if changes.deleted:
+            stats["deleted"] = cache.delete_message_ids(sorted(changes.deleted))
+        if changes.labels:
+            relabel = {k: v for k, v in changes.labels.items() if k not in changes.added}
+            stats["labels_updated"] = cache.update_labels(relabel)
+    else:
+        listed = _list_messages(gmail, max_results, query)
+        if listed is None:
+            stats["errors"] = 1
+            return stats
+        wanted = [(m["id"], m.get("threadId", m["id"])) for m in listed]
+
+    stats["listed"] = len(wanted)
+    cached = cache.cached_ids([msg_id for msg_id, _ in wanted])
+    missing = [(msg_id, thread_id) for msg_id, thread_id in wanted if msg_id not in cached]
+    stats["skipped"] = len(wanted) - len(missing)
+    logger.info(
+        "gmail_sync_listed",
+        {"mode": stats["mode"], "total": len(wanted), "missing": len(missing)},
+        user_id=cache.user_id,
+    )
+
+    total = len(missing)
+    batch: list[dict[str, Any]] = []
+    done = 0
+    for email_data in _fetch_concurrently(gmail, missing, fetch_body, concurrency):
+        done += 1
+        if email_data:
+            batch.append(email_data)
+            stats["fetched"] += 1
+        else:
+            stats["errors"] += 1
+
+        if len(batch) >= _UPSERT_FLUSH:
+            stats["upserted"] += cache.upsert_batch(batch)
+            batch.clear()
+
+        if progress and done % 10 == 0:
+            print(f"  {done}/{total} ...", end="\r", flush=True)
+
+    if batch:
+        stats["upserted"] += cache.upsert_batch(batch)
+
+    if progress and total:
+        print(f"  {total}/{total} done.             ")
 
-    # -- Step 1: Paginate through all matching message IDs --
+    # Only advance past changes that were fully applied; a failed fetch is
+    # retried from the same historyId on the next run.
+    if history_id and not stats["errors"]:
+        cache.save_sync_state({"history_id": history_id})
+
+    return stats
+
+
+def _list_messages(
+    gmail: GmailTransport, max_results: int, query: str | None
+) -> list[dict[str, Any]] | None:
+    """Page through messages.list; None if the first page fails."""
     all_messages: list[dict[str, Any]] = []
     page_token: str | None = None
     pages = 0
@@ -354,77 +543,96 @@ def sync_emails(
     page_size = min(max_results, _LIST_PAGE_SIZE) if max_results > 0 else _LIST_PAGE_SIZE
 
     while True:
-        params: dict[str, Any] = {"userId": "me", "maxResults": min(page_size, _LIST_PAGE_SIZE)}
+        params: dict[str, Any] = {"userId": "me", "maxResults": page_size}
         if query:
             params["q"] = query
         if page_token:
             params["pageToken"] = page_token
 
-        list_json = _run_gws("gmail", "users", "messages", "list", params)
+        list_json = gmail.call("messages.list", params)
         pages += 1
 
         if list_json is None:
-            # Retry once if not the first page
             if pages == 1:
-                return {"listed": 0, "fetched": 0, "upserted": 0, "errors": 1}
+                return None
             break
 
-        messages = list_json.get("messages", [])
-        all_messages.extend(messages)
+        all_messages.extend(list_json.get("messages", []))
 
         page_token = list_json.get("nextPageToken")
         if not page_token or len(all_messages) >= max_results:
             break
 
-    if not all_messages:
-        return {"listed": 0, "fetched": 0, "upserted": 0, "errors": 0}
-
-    total = len(all_messages)
-    logger.info("gmail_sync_listed", {"total": total, "pages": pages})
-
-    # -- Step 2: Fetch details and upsert in batches --
-    fetched = 0
-    upserted = 0
-    errors = 0
-    batch: list[dict[str, Any]] = []
-
-    for i, msg in enumerate(all_messages):
-        msg_id = msg["id"]
-        thread_id = msg.get("threadId", msg_id)
-        email_data = _fetch_one_email(msg_id, thread_id, fetch_body)
-
-        if email_data:
-            batch.append(email_data)
-            fetched += 1
-        else:
-            errors += 1
-
-        # Flush batch periodically
-        if len(batch) >= _UPSERT_FLUSH:
-            upserted += cache.upsert_batch(batch)
-            batch.clear()
+    return all_messages[:max_results] if max_results > 0 else all_messages
 
-        if progress and (i + 1) % 10 == 0:
-            print(f"  {i + 1}/{total} ...", end="\r", flush=True)
 
-    # Flush remaining
-    if batch:
-        upserted += cache.upsert_batch(batch)
-
-    if progress:
-        print(f"  {total}/{total} done.             ")
+def _list_history(gmail: GmailTransport, start_history_id: str) -> HistoryChanges | None:
+    """Collect changes since start_history_id; None if history is unavailable.
 
-    cache.db.process_journal(limit=10000)
+    Gmail keeps roughly a week of history and answers 404 for older ids, in
+    which case the caller falls back to listing messages.
+    """
+    changes = HistoryChanges()
+    page_token: str | None = None
+    while True:
+        params: dict[str, Any] = {
+            "userId": "me",
+            "startHistoryId": start_history_id,
+            "historyTypes": _HISTORY_TYPES,
+            "maxResults": _LIST_PAGE_SIZE,
+        }
+        if page_token:
+            params["pageToken"] = page_token
+        page = gmail.call("history.list", params)
+        if page is None:
+            return None
 
-    return {"listed": total, "fetched": fetched, "upserted": upserted, "errors": errors}
+        for record in page.get("history", []):
+            for item in record.get("messagesAdded", []):
+                msg = item.get("message", {})
+                changes.added[msg["id"]] = msg.get("threadId", msg["id"])
+                changes.deleted.discard(msg["id"])
+            for item in record.get("messagesDeleted", []):
+                msg_id = item.get("message", {})["id"]
+                changes.added.pop(msg_id, None)
+                changes.labels.pop(msg_id, None)
+                changes.deleted.add(msg_id)
+            for key in ("labelsAdded", "labelsRemoved"):
+                for item in record.get(key, []):
+                    msg = item.get("message", {})
+                    if msg["id"] not in changes.deleted:
+                        changes.labels[msg["id"]] = msg.get("labelIds", [])
+
+        page_token = page.get("nextPageToken")
+        if not page_token:
+            return changes
+
+
+def _fetch_concurrently(
+    gmail: GmailTransport,
+    messages: list[tuple[str, str]],
+    fetch_body: bool,
+    concurrency: int,
+) -> Iterator[dict[str, Any] | None]:
+    """Yield fetched email dicts (None for failures) in completion order."""
+    if not messages:
+        return
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="gmail-fetch") as pool:
+        futures = [
+            pool.submit(_fetch_one_email, msg_id, thread_id, fetch_body, gmail)
+            for msg_id, thread_id in messages
+        ]
+        for future in as_completed(futures):
+            yield future.result()
 
 
 def _fetch_one_email(
     message_id: str,
     thread_id: str,
     fetch_body: bool = True,
+    transport: GmailTransport | None = None,
 ) -> dict[str, Any] | None:
-    """Fetch a single email's metadata (and optionally body) via gws."""
+    """Fetch a single email's metadata (and optionally body)."""
     meta_headers = ["From", "To", "Date", "Subject", "List-Unsubscribe", "List-Unsubscribe-Post"]
 
     params: dict[str, Any] = {
@@ -435,7 +643,7 @@ def _fetch_one_email(
     if not fetch_body:
         params["metadataHeaders"] = meta_headers
 
-    data = _run_gws("gmail", "users", "messages", "get", params)
+    data = (transport or GwsCliTransport()).call("messages.get", params)
     if data is None:
         return None
 
@@ -581,46 +789,3 @@ def _parse_address_list(raw: str) -> list[str]:
     except Exception:
         return [a.strip() for a in raw.split(",") if a.strip()]
 
-
-def _run_gws(
-    service: str,
-    resource: str,
-    sub_resource: str,
-    method: str,
-    params: dict[str, Any],
-) -> dict[str, Any] | None:
-    """Run a gws CLI command and return JSON output."""
-    cmd = [
-        "gws",
-        service,
-        resource,
-        sub_resource,
-        method,
-        "--params",
-        json.dumps(params),
-        "--format",
-        "json",
-    ]
-
-    try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=120,
-        )
-        if result.returncode != 0:
-            logger.error("gws_failed", {"exit": result.returncode, "stderr": result.stderr[:200]})
-            return None
-
-        # stderr contains "Using keyring backend: ...", stdout is JSON
-        return cast(dict[str, Any], json.loads(result.stdout))
-    except subprocess.TimeoutExpired:
-        logger.error("gws_timeout", {"reason": "subprocess timeout"})
-        return None
-    except json.JSONDecodeError as e:
-        logger.error("gws_json_error", {"error": str(e)})
-        return None
-    except Exception as e:
-        logger.error("gws_error", {"error": str(e)})
-        return None
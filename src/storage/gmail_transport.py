@@ -0,0 +1,155 @@
+"""Gmail API transports used by the Gmail cache sync.
+
+A transport runs one Gmail API method (relative to ``users``, e.g.
+``messages.get``, ``history.list``, ``getProfile``) and returns the decoded
+JSON response, or None on any failure. The sync pipeline only talks to this
+interface, so tests swap in a local fake.
+
+  GwsCliTransport    — one ``gws`` CLI process per call (no credentials needed
+                       here; gws uses its own stored login)
+  GmailHttpTransport — one in-process keep-alive HTTP client for the whole
+                       sync, authenticated with an OAuth access token
+
+default_transport() picks the HTTP client when an access token is available
+(GOOGLE_WORKSPACE_CLI_TOKEN, the same variable gws itself honours) and the
+CLI otherwise. Both are safe to call from several threads at once.
+"""
+
+import json
+import os
+import subprocess
+import time
+from typing import Any, Protocol, cast
+
+import httpx
+
+from src.app_logging import get_logger
+
+logger = get_logger()
+
+GMAIL_API = "https://gmail.googleapis.com/gmail/v1/users"
+TOKEN_ENV = "GOOGLE_WORKSPACE_CLI_TOKEN"
+CLI_TIMEOUT = 120
+HTTP_TIMEOUT = 30.0
+HTTP_RETRIES = 3
+
+# Gmail method -> path under /users/{userId}; "{id}" is filled from params.
+_HTTP_ROUTES = {
+    "getProfile": "profile",
+    "history.list": "history",
+    "messages.list": "messages",
+    "messages.get": "messages/{id}",
+}
+
+
+class GmailTransport(Protocol):
+    """Runs a Gmail API method and returns its JSON response (None on failure)."""
+
+    def call(self, method: str, params: dict[str, Any]) -> dict[str, Any] | None: ...
+
+    def close(self) -> None: ...
+
+
+class GwsCliTransport:
+    """Gmail calls through the ``gws`` CLI, one subprocess per call."""
+
+    def __init__(self, timeout: int = CLI_TIMEOUT):
+        self.timeout = timeout
+
+    def call(self, method: str, params: dict[str, Any]) -> dict[str, Any] | None:
+        cmd = [
+            "gws",
+            "gmail",
+            "users",
+            *method.split("."),
+            "--params",
+            json.dumps(params),
+            "--format",
+            "json",
+        ]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=self.timeout)
+            if result.returncode != 0:
+                logger.error(
+                    "gws_failed", {"exit": result.returncode, "stderr": result.stderr[:200]}
+                )
+                return None
+
+            # stderr contains "Using keyring backend: ...", stdout is JSON
+            return cast(dict[str, Any], json.loads(result.stdout))
+        except subprocess.TimeoutExpired:
+            logger.error("gws_timeout", {"reason": "subprocess timeout"})
+            return None
+        except json.JSONDecodeError as e:
+            logger.error("gws_json_error", {"error": str(e)})
+            return None
+        except Exception as e:
+            logger.error("gws_error", {"error": str(e)})
+            return None
+
+    def close(self) -> None:
+        pass
+
+
+class GmailHttpTransport:
+    """Gmail REST calls over one pooled keep-alive httpx client.
+
+    Rate-limit (429) and server (5xx) responses are retried with exponential
+    backoff; other errors are logged and return None.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        max_connections: int = 8,
+        timeout: float = HTTP_TIMEOUT,
+        client: httpx.Client | None = None,
+    ):
+        self._client = client or httpx.Client(
+            base_url=GMAIL_API,
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections, max_keepalive_connections=max_connections
+            ),
+        )
+
+    def call(self, method: str, params: dict[str, Any]) -> dict[str, Any] | None:
+        route = _HTTP_ROUTES.get(method)
+        if route is None:
+            logger.error("gmail_http_unsupported", {"method": method})
+            return None
+
+        query = dict(params)
+        user = query.pop("userId", "me")
+        path = f"/{user}/{route.format(id=query.pop('id', ''))}"
+
+        for attempt in range(HTTP_RETRIES):
+            try:
+                response = self._client.get(path, params=query)
+            except httpx.HTTPError as e:
+                logger.warning("gmail_http_error", {"method": method, "error": str(e)[:200]})
+            else:
+                if response.status_code == 200:
+                    return cast(dict[str, Any], response.json())
+                if response.status_code != 429 and response.status_code < 500:
+                    logger.error(
+                        "gmail_http_failed",
+                        {"method": method, "status": response.status_code},
+                    )
+                    return None
+            time.sleep(0.5 * 2**attempt)
+
+        logger.error("gmail_http_retries_exhausted", {"method": method})
+        return None
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def default_transport(max_connections: int = 8) -> GmailTransport:
+    """In-process HTTP client when an access token is set, else the gws CLI."""
+    token = os.environ.get(TOKEN_ENV, "")
+    if token:
+        return GmailHttpTransport(token, max_connections=max_connections)
+    return GwsCliTransport()
@@ -0,0 +1,155 @@
+"""Bulk upserts for HybridDB tables keyed by a unique column.
+
+HybridDB's single-row insert/update each open a transaction and, with
+sync=True, embed the row's LONGTEXT columns on the spot — one model call per
+column per row. bulk_upsert instead:
+
+  1. finds existing rows for the whole batch with one SELECT ... IN
+  2. inserts new rows with one insert_batch transaction
+  3. updates only the existing rows whose values actually changed
+  4. embeds every journalled document in one batched model call
+     (BatchEmbedder) and processes the journal once
+
+BatchEmbedder is passed to HybridDB as its embedding_fn. It calls the ONNX
+MiniLM model instance HybridDB loads once per process for its default
+embedding_fn (falling back the same way when it is unavailable), so vectors
+are identical and existing indexes stay valid; it just computes them many
+at a time.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Iterable
+from typing import Any
+
+from hybriddb import HybridDB
+from hybriddb.embedding import _get_default_ef, default_embedding_fn, hash_embedding
+
+from src.app_logging import get_logger
+
+logger = get_logger()
+
+# Label HybridDB persists for its default model; kept so stores opened with
+# a BatchEmbedder validate against indexes built without one.
+EMBEDDING_MODEL_NAME = "chroma:all-MiniLM-L6-v2"
+_ID_CHUNK = 500
+_JOURNAL_LIMIT = 5000
+
+
+class BatchEmbedder:
+    """HybridDB embedding_fn that serves vectors computed ahead in batches."""
+
+    def __init__(self) -> None:
+        self._ready: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def _load_model(self) -> Any:
+        """HybridDB's shared default model (None when it can't be loaded)."""
+        return _get_default_ef()
+
+    def prefetch(self, texts: Iterable[str]) -> int:
+        """Embed texts in one model call for the next journal pass; returns count."""
+        with self._lock:
+            pending = list(dict.fromkeys(t for t in texts if t and t not in self._ready))
+        if not pending:
+            return 0
+        model = self._load_model()
+        try:
+            if model is None:
+                raise RuntimeError("embedding model unavailable")
+            vectors = list(model(pending))
+        except Exception as e:
+            # default_embedding_fn falls back to hash_embedding in the same case;
+            # do it once for the batch instead of retrying the model per text.
+            logger.warning("batch_embed_failed", {"texts": len(pending), "error": str(e)[:200]})
+            vectors = [hash_embedding(t) for t in pending]
+        with self._lock:
+            for text, vector in zip(pending, vectors, strict=True):
+                self._ready[text] = [float(x) for x in vector]
+        return len(pending)
+
+    def __call__(self, text: str) -> list[float]:
+        with self._lock:
+            vector = self._ready.pop(text, None)
+        return vector if vector is not None else default_embedding_fn(text)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ready.clear()
+
+
+def existing_rows(
+    db: HybridDB, table: str, key: str, values: list[Any], columns: str = "*"
+) -> dict[Any, dict[str, Any]]:
+    """Map key values to their current rows, in chunks of SELECT ... IN."""
+    found: dict[Any, dict[str, Any]] = {}
+    for i in range(0, len(values), _ID_CHUNK):
+        chunk = values[i : i + _ID_CHUNK]
+        rows = db.read_query(
+            f"SELECT {columns} FROM {table} WHERE {key} IN ({', '.join('?' * len(chunk))})",
+            tuple(chunk),
+        )
+        found.update((r[key], r) for r in rows)
+    return found
+
+
+def _changed(stored: dict[str, Any], row: dict[str, Any]) -> bool:
+    # Column affinity turns "17" into 17 on the way in, so compare text forms.
+    for column, value in row.items():
+        current = stored.get(column)
+        if current != value and (current is None or value is None or str(current) != str(value)):
+            return True
+    return False
+
+
+def bulk_upsert(
+    db: HybridDB,
+    table: str,
+    key: str,
+    rows: list[dict[str, Any]],
+    embedder: BatchEmbedder | None = None,
+    longtext: Iterable[str] = (),
+) -> dict[str, int]:
+    """Insert or update rows by their unique key column with one journal pass.
+
+    Later rows win over earlier ones with the same key. Rows identical to
+    what is stored are skipped. longtext names the columns HybridDB embeds,
+    which are pre-embedded in one batch when an embedder is given.
+
+    Returns {"inserted", "updated", "unchanged"}.
+    """
+    by_key: dict[Any, dict[str, Any]] = {}
+    for row in rows:
+        if row.get(key):
+            by_key[row[key]] = row
+    if not by_key:
+        return {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    stored = existing_rows(db, table, key, list(by_key))
+    inserts = [row for k, row in by_key.items() if k not in stored]
+    updates = [
+        (stored[k]["id"], row)
+        for k, row in by_key.items()
+        if k in stored and _changed(stored[k], row)
+    ]
+
+    if embedder is not None:
+        written = inserts + [row for _, row in updates]
+        embedder.prefetch(str(row[c]) for row in written for c in longtext if row.get(c))
+
+    if inserts:
+        db.insert_batch(table, inserts, sync=False)
+    for row_id, row in updates:
+        db.update(table, row_id, row, sync=False)
+    if inserts or updates:
+        while db.process_journal(limit=_JOURNAL_LIMIT) >= _JOURNAL_LIMIT:
+            pass
+    if embedder is not None:
+        embedder.clear()
+
+    return {
+        "inserted": len(inserts),
+        "updated": len(updates),
+        "unchanged": len(by_key) - len(inserts) - len(updates),
+    }
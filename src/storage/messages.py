@@ -53,6 +53,9 @@ class MessageStore:
     def __init__(self, user_id: str, base_dir: Path | str | None = None, workspace_id: str = "personal"):
         self.user_id = user_id
         self.workspace_id = workspace_id
+        # Bumped after every write made through this object; cached history
+        # windows (see conversation_window.py) compare it to detect staleness.
+        self.generation = 0
         if base_dir is not None:
             base_path = Path(base_dir)
         else:
@@ -99,6 +102,34 @@ class MessageStore:
     def core(self) -> MemoryCore:
         return self._core
 
+    @property
+    def db_path(self) -> str:
+        """Path of the SQLite file holding the messages table."""
+        return str((self._core.db.path / "app.db").resolve())
+
+    def process_journal(self) -> int:
+        """Embed and index rows written with sync=False; returns entries processed."""
+        return int(self._core.db.process_journal())
+
+    @staticmethod
+    def row_to_message(row: dict[str, Any]) -> Message:
+        """Build a Message from a raw messages-table row."""
+        try:
+            ts = datetime.fromisoformat(row["ts"]) if row.get("ts") else None
+        except (ValueError, TypeError):
+            ts = None
+        try:
+            metadata = json.loads(row["metadata"]) if row.get("metadata") else {}
+        except (json.JSONDecodeError, TypeError):
+            metadata = {}
+        return Message(
+            id=row.get("id", ""),
+            ts=ts if ts is not None else datetime.now(UTC),
+            role=row.get("role", "user"),
+            content=row.get("content", ""),
+            metadata=metadata,
+        )
+
     @staticmethod
     def _migrate_id_column(base_path: Path) -> None:
         """Migrate messages.id from INTEGER PK to TEXT PK if needed.
@@ -238,12 +269,14 @@ class MessageStore:
 
     def add_message(self, role: str, content: str, metadata: dict[str, Any] | None = None) -> str:
         result = self._core.ingest(role, content or "(empty)", metadata=metadata)
+        self.generation += 1
         return result or ""
 
     def add_message_with_embedding(
         self, role: str, content: str, embedding: list[float], metadata: dict[str, Any] | None = None
     ) -> str:
         result = self._core.ingest(role, content or "(empty)", metadata=metadata, embedding=embedding)
+        self.generation += 1
         return result or ""
 
     @staticmethod
@@ -370,6 +403,7 @@ class MessageStore:
                 " AND json_extract(metadata, '$.workspace_id') = ?",
                 [workspace_id],
             )
+        self.generation += 1
         if self._core.db._chroma is not None:
             try:
                 memories = self._core.fetch(limit=10000, metadata={"workspace_id": workspace_id})
@@ -389,6 +423,7 @@ class MessageStore:
 
     def clear(self) -> None:
         self._core.clear()
+        self.generation += 1
 
 
 _stores: dict[str, MessageStore] = {}
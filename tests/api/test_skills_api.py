@@ -97,6 +97,20 @@ def test_list_returns_user_and_workspace_skills_with_scope_fields(client, skill_
     assert "is_system" not in skills["user-skill"]
 
 
+def test_list_with_query_returns_ranked_matches(client, skill_api_tmp):
+    user_root, workspace_root = skill_api_tmp
+    write_skill(user_root, "savanna", "Savanna wildlife", "Mentions a zebra once.")
+    write_skill(workspace_root, "zebra-stripes", "Draw zebra stripes")
+    write_skill(user_root, "notes", "Meeting notes")
+
+    r = client.get("/skills", params={"user_id": "u1", "workspace_id": "ws1", "q": "zebra"})
+    assert r.status_code == 200
+    assert [s["name"] for s in r.json()["skills"]] == ["zebra-stripes", "savanna"]
+
+    r = client.get("/skills", params={"user_id": "u1", "q": "zebra", "limit": 1})
+    assert [s["name"] for s in r.json()["skills"]] == ["zebra-stripes"]
+
+
 def test_detail_returns_full_content_and_metadata(client, skill_api_tmp):
     _, workspace_root = skill_api_tmp
     write_skill(workspace_root, "detail-skill", "Detail skill", "Detailed instructions")
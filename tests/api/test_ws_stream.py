@@ -0,0 +1,172 @@
+"""Tests for coalesced WebSocket stream framing."""
+
+import asyncio
+import json
+
+import pytest
+
+from src.http.ws_protocol import (
+    AuthMessage,
+    DeltaBatchMessage,
+    parse_client_message,
+    parse_server_message,
+)
+from src.http.ws_stream import StreamOptions, WsStreamWriter
+from src.sdk.messages import StreamChunk
+
+
+class _FakeWebSocket:
+    def __init__(self):
+        self.frames: list[dict] = []
+
+    async def send_text(self, data):
+        self.frames.append(json.loads(data))
+
+    async def send_bytes(self, data):
+        import msgpack
+
+        self.frames.append(msgpack.unpackb(data, raw=False))
+
+
+def _coalesced(**kwargs) -> StreamOptions:
+    return StreamOptions(stream_mode="coalesced", **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_default_mode_sends_one_frame_per_delta():
+    ws = _FakeWebSocket()
+    out = WsStreamWriter(ws, "w1")
+
+    await out.start()
+    await out.send_delta(StreamChunk.text_delta("a"))
+    await out.send_delta(StreamChunk.text_delta("b"))
+
+    assert ws.frames == [
+        {"type": "text_delta", "content": "a", "session_id": "", "workspace_id": "w1"},
+        {"type": "text_delta", "content": "b", "session_id": "", "workspace_id": "w1"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_coalesced_mode_merges_deltas_and_flushes_before_other_messages():
+    ws = _FakeWebSocket()
+    out = WsStreamWriter(ws, "w1", "s1", _coalesced(flush_interval=10))
+
+    await out.start()
+    for token in ("Hel", "lo"):
+        await out.send_delta(StreamChunk.text_delta(token))
+    await out.send_delta(StreamChunk.tool_input_delta("c1", '{"a"'))
+    await out.send_delta(StreamChunk.tool_input_delta("c1", ": 1}"))
+    await out.send_delta(StreamChunk.reasoning_delta("hmm"))
+    assert len(ws.frames) == 1
+
+    await out.send({"type": "done", "response": "Hello"})
+
+    assert ws.frames[0] == {"type": "stream_start", "session_id": "s1", "workspace_id": "w1"}
+    assert ws.frames[1] == {
+        "type": "delta_batch",
+        "items": [
+            {"type": "text_delta", "content": "Hello"},
+            {"type": "tool_input_delta", "content": '{"a": 1}', "call_id": "c1"},
+            {"type": "reasoning_delta", "content": "hmm"},
+        ],
+    }
+    assert ws.frames[2] == {"type": "done", "response": "Hello"}
+    assert isinstance(parse_server_message(ws.frames[1]), DeltaBatchMessage)
+
+
+@pytest.mark.asyncio
+async def test_coalesced_mode_flushes_on_size_and_time_budget():
+    ws = _FakeWebSocket()
+    out = WsStreamWriter(ws, "w1", options=_coalesced(flush_interval=0.01, max_buffer_chars=4))
+
+    await out.send_delta(StreamChunk.text_delta("abcd"))
+    assert [f["type"] for f in ws.frames] == ["delta_batch"]
+
+    await out.send_delta(StreamChunk.text_delta("e"))
+    await asyncio.sleep(0.05)
+    assert ws.frames[-1] == {"type": "delta_batch", "items": [{"type": "text_delta", "content": "e"}]}
+
+
+@pytest.mark.asyncio
+async def test_msgpack_encoding_sends_binary_frames():
+    pytest.importorskip("msgpack")
+    ws = _FakeWebSocket()
+    out = WsStreamWriter(ws, "w1", options=StreamOptions.negotiate("coalesced", "msgpack"))
+
+    await out.send_delta(StreamChunk.text_delta("hi"))
+    await out.flush()
+
+    assert ws.frames == [{"type": "delta_batch", "items": [{"type": "text_delta", "content": "hi"}]}]
+
+
+def test_negotiate_falls_back_to_json_without_msgpack(monkeypatch):
+    monkeypatch.setattr("src.http.ws_stream._msgpack", None)
+
+    options = StreamOptions.negotiate("coalesced", "msgpack")
+    assert options.encoding == "json"
+    assert "msgpack" in options.warning
+    assert StreamOptions.negotiate("coalesced", "json").warning is None
+
+
+def test_ws_auth_ok_reports_the_msgpack_fallback(client, monkeypatch):
+    monkeypatch.setattr("src.http.ws_stream._msgpack", None)
+
+    with client.websocket_connect("/ws/conversation") as websocket:
+        websocket.send_json({"type": "auth", "api_key": "", "encoding": "msgpack"})
+        auth_ok = websocket.receive_json()
+
+    assert (auth_ok["type"], auth_ok["encoding"]) == ("auth_ok", "json")
+    assert "msgpack" in auth_ok["warning"]
+
+
+def test_auth_message_negotiates_stream_mode():
+    msg = parse_client_message({"type": "auth", "api_key": "k", "stream_mode": "coalesced"})
+
+    assert isinstance(msg, AuthMessage)
+    assert msg.stream_mode == "coalesced"
+    assert msg.encoding == "json"
+
+
+def test_ws_coalesced_stream_end_to_end(client, monkeypatch, test_user_id):
+    async def fake_run_sdk_agent_stream(**kwargs):
+        yield StreamChunk.text_start()
+        for token in ("one ", "two ", "three"):
+            yield StreamChunk.text_delta(token)
+        yield StreamChunk.text_end()
+        yield StreamChunk.done("one two three")
+
+    monkeypatch.setattr("src.http.routers.ws.run_sdk_agent_stream", fake_run_sdk_agent_stream)
+
+    with client.websocket_connect("/ws/conversation") as websocket:
+        websocket.send_json({"type": "auth", "api_key": "", "stream_mode": "coalesced"})
+        assert websocket.receive_json()["stream_mode"] == "coalesced"
+        websocket.send_json(
+            {"type": "user_message", "content": "count", "user_id": test_user_id, "workspace_id": "ws-stream"}
+        )
+        frames = []
+        while True:
+            frame = websocket.receive_json()
+            frames.append(frame)
+            if frame["type"] == "done":
+                break
+
+    assert frames[0] == {"type": "stream_start", "session_id": frames[0]["session_id"], "workspace_id": "ws-stream"}
+    batches = [f for f in frames if f["type"] == "delta_batch"]
+    assert "".join(i["content"] for b in batches for i in b["items"]) == "one two three"
+    assert all("workspace_id" not in f for f in frames[1:])
+
+
+def test_ws_msgpack_encoding_applies_to_every_frame(client):
+    msgpack = pytest.importorskip("msgpack")
+
+    with client.websocket_connect("/ws/conversation") as websocket:
+        websocket.send_json({"type": "auth", "api_key": "", "encoding": "msgpack"})
+        assert msgpack.unpackb(websocket.receive_bytes())["type"] == "auth_ok"
+        websocket.send_json({"type": "ping"})
+        assert msgpack.unpackb(websocket.receive_bytes())["type"] == "pong"
+        websocket.send_json({"type": "bogus"})
+        assert msgpack.unpackb(websocket.receive_bytes())["code"] == "UNKNOWN_TYPE"
+        websocket.send_json({"type": "cancel"})
+        done = msgpack.unpackb(websocket.receive_bytes())
+        assert (done["type"], done["response"]) == ("done", "Cancelled")
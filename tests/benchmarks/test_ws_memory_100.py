@@ -13,12 +13,17 @@ Usage:
     uv run ea http &
     # Run test
     uv run python tests/benchmarks/test_ws_memory_100.py
+    # Same run with coalesced delta frames (see src/http/ws_stream.py)
+    WS_STREAM_MODE=coalesced uv run python tests/benchmarks/test_ws_memory_100.py
+    # ... and binary MessagePack frames (needs msgpack installed on both ends)
+    WS_STREAM_MODE=coalesced WS_ENCODING=msgpack uv run python tests/benchmarks/test_ws_memory_100.py
 """
 
 from __future__ import annotations
 
 import asyncio
 import json
+import os
 import time
 from dataclasses import dataclass, field
 from typing import Any
@@ -32,6 +37,18 @@ except ImportError:
 WS_URL = "ws://localhost:8080/ws/conversation"
 USER_ID = "ws_test_user"
 TIMEOUT_PER_TURN = 60
+STREAM_MODE = os.environ.get("WS_STREAM_MODE", "default")
+ENCODING = os.environ.get("WS_ENCODING", "json")
+API_KEY = os.environ.get("EA_API_KEY", "")
+
+
+def decode_frame(raw: str | bytes) -> dict[str, Any]:
+    """Decode a server frame: JSON text, or MessagePack when negotiated."""
+    if isinstance(raw, bytes):
+        import msgpack
+
+        return msgpack.unpackb(raw, raw=False)
+    return json.loads(raw)
 
 
 @dataclass
@@ -48,6 +65,8 @@ class TurnResult:
     response_text: str = ""
     event_types_received: list[str] = field(default_factory=list)
     elapsed_ms: float = 0.0
+    first_token_ms: float | None = None
+    frames: int = 0
     validation_passed: bool = False
     validation_detail: str = ""
 
@@ -197,13 +216,20 @@ async def run_single_turn(
         event_types: list[str] = []
 
         async for raw in ws:
-            if isinstance(raw, bytes):
-                raw = raw.decode()
-            data = json.loads(raw)
+            result.frames += 1
+            data = decode_frame(raw)
             evt_type = data.get("type", "unknown")
             event_types.append(evt_type)
 
-            if evt_type == "text_delta":
+            if evt_type == "delta_batch":
+                for item in data.get("items", []):
+                    if item.get("type") == "text_delta":
+                        if result.first_token_ms is None:
+                            result.first_token_ms = (time.monotonic() - start) * 1000
+                        text_parts.append(item.get("content", ""))
+            elif evt_type == "text_delta":
+                if result.first_token_ms is None:
+                    result.first_token_ms = (time.monotonic() - start) * 1000
                 text_parts.append(data.get("content", ""))
             elif evt_type == "text_start":
                 pass
@@ -262,6 +288,19 @@ async def run_all() -> list[TurnResult]:
         ping_timeout=60,
         close_timeout=30,
     ) as ws:
+        if STREAM_MODE != "default" or ENCODING != "json":
+            await ws.send(
+                json.dumps(
+                    {
+                        "type": "auth",
+                        "api_key": API_KEY,
+                        "stream_mode": STREAM_MODE,
+                        "encoding": ENCODING,
+                    }
+                )
+            )
+            ack = decode_frame(await ws.recv())
+            print(f"Stream mode: {ack.get('stream_mode')} ({ack.get('encoding')})")
         print(f"Connected! Running {len(INTERACTIONS)} interactions...\n")
 
         for idx, interaction in enumerate(INTERACTIONS, 1):
@@ -292,6 +331,9 @@ def print_report(results: list[TurnResult]) -> None:
     got_text = sum(1 for r in results if r.got_text)
     used_tools = sum(1 for r in results if r.got_tool_call)
     avg_ms = sum(r.elapsed_ms for r in results) / total if total else 0
+    first_tokens = [r.first_token_ms for r in results if r.first_token_ms is not None]
+    avg_first_ms = sum(first_tokens) / len(first_tokens) if first_tokens else 0
+    frames = sum(r.frames for r in results)
 
     print("\n" + "=" * 80)
     print("WS MEMORY INTEGRATION TEST — 100 INTERACTIONS")
@@ -303,6 +345,8 @@ def print_report(results: list[TurnResult]) -> None:
     print(f"Got text:   {got_text}/{total}")
     print(f"Used tools: {used_tools}/{total}")
     print(f"Avg latency: {avg_ms:.0f}ms")
+    print(f"Avg first token: {avg_first_ms:.0f}ms")
+    print(f"Frames received: {frames} ({STREAM_MODE} stream)")
 
     print("\n--- By Category ---")
     categories: dict[str, list[TurnResult]] = {}
@@ -390,6 +434,9 @@ async def main() -> None:
                     "got_text": r.got_text,
                     "tools": r.tool_names,
                     "elapsed_ms": r.elapsed_ms,
+                    "first_token_ms": r.first_token_ms,
+                    "frames": r.frames,
+                    "stream_mode": STREAM_MODE,
                 }
                 for r in results
             ],
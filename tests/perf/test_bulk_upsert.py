@@ -0,0 +1,134 @@
+"""HybridDB upsert benchmark — per-row upsert vs bulk_upsert, in rows/sec.
+
+Writes synthetic Gmail-cache rows (two LONGTEXT columns, so two embeddings
+per row) into a throwaway HybridDB table three ways:
+
+  per-row   the previous GmailCache.upsert loop: SELECT by message_id, then a
+            single-row insert/update that embeds and processes the journal
+  bulk      bulk_upsert: one SELECT ... IN, one insert_batch, one batched
+            embedding call and one journal pass per batch
+  re-sync   bulk_upsert of the same rows again (all unchanged, no writes)
+
+Usage:
+  uv run python tests/perf/test_bulk_upsert.py --rows 500
+  uv run python tests/perf/test_bulk_upsert.py --rows 2000 --batch 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from hybriddb import HybridDB
+
+from src.storage.hybrid_bulk import EMBEDDING_MODEL_NAME, BatchEmbedder, bulk_upsert
+
+TABLE = "emails"
+SCHEMA = {
+    "message_id": "TEXT",
+    "thread_id": "TEXT",
+    "from_addr": "TEXT",
+    "subject": "TEXT",
+    "snippet": "LONGTEXT",
+    "body": "LONGTEXT",
+    "ts": "INTEGER",
+}
+WORDS = (
+    "budget invoice meeting agenda contract renewal quarterly report travel "
+    "expense project deadline review launch roadmap hiring offer design"
+).split()
+
+
+def _rows(count: int) -> list[dict[str, Any]]:
+    rng = random.Random(0)
+    return [
+        {
+            "message_id": f"m{i}",
+            "thread_id": f"t{i // 3}",
+            "from_addr": f"{rng.choice(WORDS)}@example.com",
+            "subject": " ".join(rng.choices(WORDS, k=6)),
+            "snippet": " ".join(rng.choices(WORDS, k=20)),
+            "body": " ".join(rng.choices(WORDS, k=120)),
+            "ts": str(1_700_000_000 + i),
+        }
+        for i in range(count)
+    ]
+
+
+def _per_row(db: HybridDB, rows: list[dict[str, Any]]) -> None:
+    for row in rows:
+        existing = db.query(TABLE, where="message_id = ?", params=(row["message_id"],), limit=1)
+        if existing:
+            db.update(TABLE, existing[0]["id"], row)
+        else:
+            db.insert(TABLE, row)
+
+
+def _bulk(db: HybridDB, rows: list[dict[str, Any]], batch: int, embedder: BatchEmbedder) -> None:
+    for i in range(0, len(rows), batch):
+        bulk_upsert(db, TABLE, "message_id", rows[i : i + batch], embedder, ("snippet", "body"))
+
+
+def _rate(fn, count: int) -> dict[str, float]:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return {"seconds": elapsed, "rows_per_sec": count / elapsed if elapsed else 0.0}
+
+
+def run_benchmark(count: int, batch: int) -> dict[str, Any]:
+    rows = _rows(count)
+    results: dict[str, Any] = {"rows": count, "batch": batch}
+    with tempfile.TemporaryDirectory() as tmp:
+        db = HybridDB(str(Path(tmp) / "per_row"))
+        db.create_table(TABLE, SCHEMA)
+        results["per_row"] = _rate(lambda: _per_row(db, rows), count)
+
+        embedder = BatchEmbedder()
+        bulk_db = HybridDB(
+            str(Path(tmp) / "bulk"),
+            embedding_fn=embedder,
+            embedding_model_name=EMBEDDING_MODEL_NAME,
+        )
+        bulk_db.create_table(TABLE, SCHEMA)
+        results["bulk"] = _rate(lambda: _bulk(bulk_db, rows, batch, embedder), count)
+        results["resync"] = _rate(lambda: _bulk(bulk_db, rows, batch, embedder), count)
+        assert bulk_db.count(TABLE) == db.count(TABLE) == count
+    return results
+
+
+def print_results(results: dict[str, Any]) -> None:
+    print(f"\n{'=' * 80}")
+    print(f"  HybridDB Upsert Benchmark ({results['rows']} rows, batch {results['batch']})")
+    print(f"{'=' * 80}\n")
+    print(f"{'Path':<12} {'seconds':>10} {'rows/sec':>12}")
+    print("-" * 80)
+    for key in ("per_row", "bulk", "resync"):
+        r = results[key]
+        print(f"{key:<12} {r['seconds']:10.2f} {r['rows_per_sec']:12.1f}")
+    speedup = results["bulk"]["rows_per_sec"] / max(results["per_row"]["rows_per_sec"], 0.001)
+    print(f"\nBulk vs per-row: {speedup:.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HybridDB upsert benchmark")
+    parser.add_argument("--rows", type=int, default=500, help="Rows to upsert (default: 500)")
+    parser.add_argument("--batch", type=int, default=100, help="Bulk batch size (default: 100)")
+    parser.add_argument("--output", type=str, default="", help="Output JSON file path")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.rows, args.batch)
+    print_results(results)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Contact search benchmark — LIKE scan vs the contacts_fts trigram index.
+
+Fills a throwaway contacts database with synthetic contacts (first/last
+names, company and an address each, plus a skewed email_count), then times
+the same queries through the previous five-column LIKE scan and through
+search_contacts, which uses the trigram index and falls back to fuzzy
+candidates for typos. The LIKE scan finds nothing for the misspelt queries,
+so those rows measure the fuzzy path's cost, not a like-for-like result.
+
+Usage:
+  uv run python tests/perf/test_contact_search.py --contacts 100000
+  uv run python tests/perf/test_contact_search.py --contacts 10000 100000 --runs 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+from sqlalchemy import text
+
+from src.sdk.tools_core import contacts_storage
+
+FIRST = (
+    "james mary john patricia robert jennifer michael linda william elizabeth david "
+    "barbara richard susan joseph jessica thomas sarah charles karen christopher nancy "
+    "daniel lisa matthew betty anthony margaret mark sandra donald ashley steven kimberly"
+).split()
+LAST = (
+    "smith johnson williams brown jones garcia miller davis rodriguez martinez hernandez "
+    "lopez gonzalez wilson anderson thomas taylor moore jackson martin lee perez thompson "
+    "white harris sanchez clark ramirez lewis robinson walker young allen king wright"
+).split()
+COMPANIES = [f"{w}corp" for w in "acme globex initech umbrella hooli stark wayne".split()]
+EXACT = ["smith", "john", "acme", "mar sm", "williams@"]
+TYPOS = ["jonh", "willaims", "garica"]
+
+LIKE_SQL = text("""
+    SELECT id, email, name, first_name, last_name, company, phone, source, created_at
+    FROM contacts
+    WHERE name LIKE :pattern COLLATE NOCASE
+       OR email LIKE :pattern COLLATE NOCASE
+       OR company LIKE :pattern COLLATE NOCASE
+       OR first_name LIKE :pattern COLLATE NOCASE
+       OR last_name LIKE :pattern COLLATE NOCASE
+    ORDER BY name ASC
+    LIMIT :limit
+""")
+
+
+def _contacts(count: int, rng: random.Random):
+    for i in range(count):
+        first, last = rng.choice(FIRST), rng.choice(LAST)
+        yield {
+            "email": f"{first}.{last}{i}@{rng.choice(COMPANIES)}.com",
+            "name": f"{first.title()} {last.title()}",
+            "email_count": int(rng.paretovariate(1.2)),
+            "timestamp": 1_700_000_000 + i,
+        }
+
+
+def _populate(count: int) -> float:
+    """Ingest through save_contacts (so the triggers index as they go)."""
+    rng = random.Random(0)
+    batch: list[dict[str, Any]] = []
+    start = time.perf_counter()
+    for contact in _contacts(count, rng):
+        batch.append(contact)
+        if len(batch) == 5_000:
+            contacts_storage.save_contacts("bench", "acc", batch)
+            batch.clear()
+    if batch:
+        contacts_storage.save_contacts("bench", "acc", batch)
+    return time.perf_counter() - start
+
+
+def _index_bytes(engine: Any) -> int:
+    with engine.connect() as conn:
+        try:
+            rows = conn.execute(
+                text("SELECT SUM(pgsize) FROM dbstat WHERE name LIKE 'contacts_fts%'")
+            ).scalar()
+            return int(rows or 0)
+        except Exception:
+            return 0
+
+
+def _time(fn, runs: int) -> list[float]:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report_stats(name: str, values: list[float]) -> dict[str, Any]:
+    s = sorted(values)
+    return {
+        "name": name,
+        "count": len(s),
+        "p50": statistics.median(s),
+        "p95": s[int(len(s) * 0.95)] if len(s) > 1 else s[0],
+        "mean": statistics.mean(s),
+    }
+
+
+def run_benchmark(count: int, runs: int) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "contacts.db"
+        with (
+            patch.object(contacts_storage, "_engines", {}),
+            patch.object(contacts_storage, "get_db_path", return_value=str(db_path)),
+        ):
+            ingest_s = _populate(count)
+            engine = contacts_storage.get_engine("bench")
+
+            def like(query: str) -> None:
+                with engine.connect() as conn:
+                    conn.execute(LIKE_SQL, {"pattern": f"%{query}%", "limit": 20}).fetchall()
+
+            def search(query: str) -> None:
+                contacts_storage.search_contacts("bench", query, 20)
+
+            result: dict[str, Any] = {
+                "contacts": count,
+                "ingest_s": ingest_s,
+                "index_bytes": _index_bytes(engine),
+                "db_bytes": db_path.stat().st_size,
+            }
+            for key, name, fn, queries in (
+                ("like", "LIKE exact", like, EXACT),
+                ("fts", "trigram exact", search, EXACT),
+                ("like_typo", "LIKE typo (no hits)", like, TYPOS),
+                ("fuzzy", "trigram typo (fuzzy)", search, TYPOS),
+            ):
+                samples: list[float] = []
+                for query in queries:
+                    samples += _time(lambda q=query, fn=fn: fn(q), runs)
+                result[key] = report_stats(name, samples)
+            engine.dispose()
+            return result
+
+
+def print_results(results: list[dict[str, Any]]) -> None:
+    print(f"\n{'=' * 80}")
+    print(f"  Contact Search Benchmark ({len(EXACT)} exact + {len(TYPOS)} misspelt queries)")
+    print(f"{'=' * 80}\n")
+    print(f"{'Contacts':>9} {'Query (ms)':<28} {'p50':>8} {'p95':>8} {'mean':>9}")
+    print("-" * 80)
+    for r in results:
+        for key in ("like", "fts", "like_typo", "fuzzy"):
+            s = r[key]
+            print(
+                f"{r['contacts']:9d} {s['name']:<28} {s['p50']:8.2f} {s['p95']:8.2f} "
+                f"{s['mean']:9.2f}"
+            )
+        print(
+            f"{'':9} ingest {r['ingest_s']:.1f}s, "
+            f"index {r['index_bytes'] / 1e6:.1f} MB of {r['db_bytes'] / 1e6:.1f} MB"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Contact search benchmark")
+    parser.add_argument(
+        "--contacts",
+        type=int,
+        nargs="+",
+        default=[100_000],
+        help="Address book sizes (default: 100000)",
+    )
+    parser.add_argument("--runs", type=int, default=10, help="Runs per query (default: 10)")
+    parser.add_argument("--output", type=str, default="", help="Output JSON file path")
+    args = parser.parse_args()
+
+    results = [run_benchmark(count, args.runs) for count in args.contacts]
+    print_results(results)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""Email search benchmark — LIKE scan vs the FTS5 index.
+
+Fills a throwaway emails database with synthetic messages (subject, sender,
+recipients and a few hundred bytes of body each), then times the same
+queries through the previous LIKE scan over subject/from (which could not
+search bodies at all) and through search_emails on emails_fts. Also reports
+how long the initial index build takes and how much it adds to the file.
+
+Usage:
+  uv run python tests/perf/test_email_search_perf.py --rows 10000
+  uv run python tests/perf/test_email_search_perf.py --rows 10000 100000 1000000 --runs 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import create_engine, text
+
+from src.sdk.tools_core.email_db import init_db, search_emails
+
+TOPICS = (
+    "budget invoice meeting agenda contract renewal quarterly report travel "
+    "expense project deadline review launch roadmap hiring offer design "
+    "customer feedback release migration incident postmortem summary update "
+    "schedule lunch team planning forecast revenue pipeline onboarding"
+).split()
+# Mail vocabulary is Zipfian: a few words everywhere, a long tail of rare ones.
+VOCAB = [f"w{i}" for i in range(20_000)]
+for rank, word in zip((30, 200, 1_000, 5_000), ("meeting", "invoice", "quarterly", "postmortem")):
+    VOCAB[rank] = word
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCAB))]
+QUERIES = ["meeting", "invoice", "quarterly w2", "postmortem", "renew*", "zebra"]
+
+LIKE_SQL = text("""
+    SELECT message_id, from_addr, from_name, subject, timestamp,
+           read, flagged, has_attachments
+    FROM emails
+    WHERE account_id = :account_id
+      AND folder = :folder
+      AND (subject LIKE :query OR from_addr LIKE :query OR from_name LIKE :query)
+    ORDER BY timestamp DESC
+    LIMIT :limit
+""")
+
+
+def _rows(count: int, rng: random.Random):
+    for i in range(count):
+        sender = rng.choice(TOPICS)
+        yield {
+            "account_id": "acc",
+            "folder": "INBOX",
+            "message_id": str(i),
+            "from_addr": f"{sender}@example.com",
+            "from_name": sender.title(),
+            "to_addrs": "me@example.com",
+            "subject": " ".join(rng.choices(VOCAB, WEIGHTS, k=5)),
+            "body_text": " ".join(rng.choices(VOCAB, WEIGHTS, k=60)),
+            "timestamp": 1_700_000_000 + i,
+            "created_at": 0,
+        }
+
+
+def _populate(db_path: Path, count: int) -> tuple[Any, float]:
+    """Load rows without the index, then time the one-off rebuild."""
+    engine = create_engine(f"sqlite:///{db_path}")
+    init_db(engine)
+    rng = random.Random(0)
+    columns = list(next(_rows(1, rng)))
+    insert = text(
+        f"INSERT INTO emails ({', '.join(columns)}) VALUES ({', '.join(':' + c for c in columns)})"
+    )
+    with engine.begin() as conn:
+        for trigger in ("emails_fts_ai", "emails_fts_ad", "emails_fts_au"):
+            conn.execute(text(f"DROP TRIGGER {trigger}"))
+        batch: list[dict[str, Any]] = []
+        for row in _rows(count, rng):
+            batch.append(row)
+            if len(batch) == 10_000:
+                conn.execute(insert, batch)
+                batch.clear()
+        if batch:
+            conn.execute(insert, batch)
+    # init_db recreates the triggers; the rebuild is what a migrated DB pays once.
+    init_db(engine)
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO emails_fts(emails_fts) VALUES ('rebuild')"))
+        conn.execute(text("INSERT INTO emails_fts(emails_fts) VALUES ('optimize')"))
+    return engine, time.perf_counter() - start
+
+
+def _index_bytes(engine: Any) -> int:
+    with engine.connect() as conn:
+        try:
+            rows = conn.execute(
+                text("SELECT SUM(pgsize) FROM dbstat WHERE name LIKE 'emails_fts%'")
+            ).scalar()
+            return int(rows or 0)
+        except Exception:
+            return 0
+
+
+def _time(fn, runs: int) -> list[float]:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report_stats(name: str, values: list[float]) -> dict[str, Any]:
+    s = sorted(values)
+    return {
+        "name": name,
+        "count": len(s),
+        "p50": statistics.median(s),
+        "p95": s[int(len(s) * 0.95)] if len(s) > 1 else s[0],
+        "mean": statistics.mean(s),
+    }
+
+
+def run_benchmark(count: int, runs: int) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "emails.db"
+        engine, build_s = _populate(db_path, count)
+        like_ms: list[float] = []
+        fts_ms: list[float] = []
+        for query in QUERIES:
+            params = {"account_id": "acc", "folder": "INBOX", "limit": 20}
+            pattern = f"%{query.rstrip('*')}%"
+
+            def like(pattern=pattern, params=params):
+                with engine.connect() as conn:
+                    conn.execute(LIKE_SQL, {**params, "query": pattern}).fetchall()
+
+            like_ms += _time(like, runs)
+            fts_ms += _time(lambda q=query: search_emails(engine, q, limit=20), runs)
+        result = {
+            "rows": count,
+            "index_build_s": build_s,
+            "index_bytes": _index_bytes(engine),
+            "db_bytes": db_path.stat().st_size,
+            "like": report_stats("LIKE subject/from", like_ms),
+            "fts": report_stats("FTS5 subject/from/to/body", fts_ms),
+        }
+        engine.dispose()
+        return result
+
+
+def print_results(results: list[dict[str, Any]]) -> None:
+    print(f"\n{'=' * 80}")
+    print(f"  Email Search Benchmark ({len(QUERIES)} queries)")
+    print(f"{'=' * 80}\n")
+    print(f"{'Rows':>9} {'Query (ms)':<28} {'p50':>8} {'p95':>8} {'mean':>9}")
+    print("-" * 80)
+    for r in results:
+        for key in ("like", "fts"):
+            s = r[key]
+            print(
+                f"{r['rows']:9d} {s['name']:<28} {s['p50']:8.2f} {s['p95']:8.2f} {s['mean']:9.2f}"
+            )
+        print(
+            f"{'':9} index build {r['index_build_s']:.1f}s, "
+            f"index {r['index_bytes'] / 1e6:.1f} MB of {r['db_bytes'] / 1e6:.1f} MB"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Email search benchmark")
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000], help="Mailbox sizes (default: 10000)"
+    )
+    parser.add_argument("--runs", type=int, default=10, help="Runs per query (default: 10)")
+    parser.add_argument("--output", type=str, default="", help="Output JSON file path")
+    args = parser.parse_args()
+
+    results = [run_benchmark(count, args.runs) for count in args.rows]
+    print_results(results)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Large-file benchmark — whole-file read/split vs mmap line ranges.
+
+Writes a throwaway log of the requested size, then times reading 100 lines
+from its middle and from its end, and a one-line edit, both the previous
+way (read_text().splitlines() and a full rewrite) and through file_ranges
+(cached LineIndex, mmap range read, in-place replace). Building the
+LineIndex is timed once on its own; the range reads reuse it.
+
+Usage:
+  uv run python tests/perf/test_large_file_reads.py --mb 200
+  uv run python tests/perf/test_large_file_reads.py --mb 50 200 --runs 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from src.sdk.tools_core import file_ranges
+
+
+def _write_log(path: Path, mb: int) -> int:
+    line = "2026-03-16T10:30:00Z INFO request handled path=/api/items status=200 ms=12 id={}\n"
+    lines = 0
+    with open(path, "w") as f:
+        while f.tell() < mb * 1024 * 1024:
+            f.writelines(line.format(lines + i) for i in range(10_000))
+            lines += 10_000
+    return lines
+
+
+def _time(fn, runs: int) -> list[float]:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report_stats(name: str, values: list[float]) -> dict[str, Any]:
+    s = sorted(values)
+    return {
+        "name": name,
+        "count": len(s),
+        "p50": statistics.median(s),
+        "max": s[-1],
+        "mean": statistics.mean(s),
+    }
+
+
+def run_benchmark(mb: int, runs: int) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "app.log"
+        lines = _write_log(path, mb)
+        middle = lines // 2
+
+        def split_slice(offset: int) -> None:
+            path.read_text(encoding="utf-8").splitlines()[offset : offset + 100]
+
+        def full_rewrite() -> None:
+            text = path.read_text(encoding="utf-8")
+            path.write_text(text.replace(f"id={middle}\n", f"id={middle}!\n"), encoding="utf-8")
+
+        def in_place() -> None:
+            file_ranges.replace_in_place(
+                path, f"id={middle}\n".encode(), f"id={middle}!\n".encode()
+            )
+
+        start = time.perf_counter()
+        file_ranges.line_index(path)
+        index_ms = (time.perf_counter() - start) * 1000
+
+        result: dict[str, Any] = {"mb": mb, "lines": lines, "index_ms": index_ms}
+        for key, name, fn in (
+            ("split_middle", "read+split, middle", lambda: split_slice(middle)),
+            (
+                "range_middle",
+                "mmap range, middle",
+                lambda: file_ranges.read_lines(path, middle, 100),
+            ),
+            ("range_end", "mmap range, last 100", lambda: file_ranges.read_lines(path, -100, 100)),
+            ("tail", "tail_lines 100", lambda: file_ranges.tail_lines(path, 100)),
+            ("rewrite", "edit: full rewrite", full_rewrite),
+            ("in_place", "edit: in place", in_place),
+        ):
+            result[key] = report_stats(name, _time(fn, runs))
+        return result
+
+
+def print_results(results: list[dict[str, Any]]) -> None:
+    print(f"\n{'=' * 72}")
+    print("  Large File Range Benchmark (100-line reads, one-line edits)")
+    print(f"{'=' * 72}\n")
+    print(f"{'MB':>5} {'Operation (ms)':<26} {'p50':>10} {'max':>10} {'mean':>10}")
+    print("-" * 72)
+    for r in results:
+        for key in ("split_middle", "range_middle", "range_end", "tail", "rewrite", "in_place"):
+            s = r[key]
+            print(
+                f"{r['mb']:5d} {s['name']:<26} {s['p50']:10.2f} {s['max']:10.2f} {s['mean']:10.2f}"
+            )
+        print(f"{'':5} {r['lines']} lines, LineIndex built in {r['index_ms']:.0f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Large file range benchmark")
+    parser.add_argument(
+        "--mb", type=int, nargs="+", default=[200], help="File sizes in MB (default: 200)"
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Runs per operation (default: 5)")
+    parser.add_argument("--output", type=str, default="", help="Output JSON file path")
+    args = parser.parse_args()
+
+    results = [run_benchmark(mb, args.runs) for mb in args.mb]
+    print_results(results)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Parallel tool streaming benchmark — time-to-first-tool-result.
+
+Runs a mixed-latency batch (one slow tool + several fast ones) through
+AgentLoop.run_stream and reports when the first and last tool_result events
+reach the consumer. With completion-ordered streaming the first result
+arrives after the fastest tool, not after the slowest one.
+
+The "gather" baseline measures AgentLoop._execute_tool_batch, which only
+returns once every tool has finished — the latency every client saw before
+results were streamed as they complete.
+
+Usage:
+  uv run python tests/perf/test_tool_streaming.py --runs 10
+  uv run python tests/perf/test_tool_streaming.py --slow 2.0 --fast 0.05 --fast-count 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Any
+
+from src.sdk.loop import AgentLoop
+from src.sdk.messages import Message, StreamChunk, ToolCall
+from src.sdk.providers.base import LLMProvider, ModelInfo
+from src.sdk.state import AgentState
+from src.sdk.tools import ToolAnnotations, ToolDefinition, tool
+
+
+class _BatchProvider(LLMProvider):
+    """Emits one batch of tool calls, then a final answer."""
+
+    def __init__(self, calls: list[ToolCall]):
+        self.calls = calls
+        self._turn = 0
+
+    async def chat(self, messages, tools=None, model=None, **kwargs):  # type: ignore[no-untyped-def]
+        return Message.assistant(content="Done")
+
+    async def _stream(self):  # type: ignore[no-untyped-def]
+        turn, self._turn = self._turn, self._turn + 1
+        if turn == 0:
+            for tc in self.calls:
+                yield StreamChunk.tool_input_start(tool=tc.name, call_id=tc.id, args=tc.arguments)
+                yield StreamChunk.tool_input_end(tool=tc.name, call_id=tc.id)
+        else:
+            yield StreamChunk.text_delta(content="Done")
+        yield StreamChunk.done()
+
+    def chat_stream(self, messages, tools=None, model=None, **kwargs):  # type: ignore[no-untyped-def]
+        return self._stream()
+
+    def count_tokens(self, text: str, model: str | None = None) -> int:
+        return max(1, len(text) // 4)
+
+    def get_model_info(self, model: str) -> ModelInfo:
+        return ModelInfo(id=model, name=model, provider_id="bench")
+
+    @property
+    def provider_id(self) -> str:
+        return "bench"
+
+
+def _make_tools(slow_s: float, fast_s: float) -> list[ToolDefinition]:
+    @tool
+    def slow_fetch(url: str = "") -> str:
+        """Blocking slow tool (e.g. web_fetch)."""
+        time.sleep(slow_s)
+        return f"fetched:{url}"
+
+    @tool
+    def fast_lookup(query: str = "") -> str:
+        """Blocking fast tool (e.g. todos_list)."""
+        time.sleep(fast_s)
+        return f"found:{query}"
+
+    for t in (slow_fetch, fast_lookup):
+        t.annotations = ToolAnnotations(read_only=True)
+    return [slow_fetch, fast_lookup]
+
+
+def _make_calls(fast_count: int) -> list[ToolCall]:
+    calls = [ToolCall(id="slow", name="slow_fetch", arguments={"url": "example.com"})]
+    calls += [
+        ToolCall(id=f"fast{i}", name="fast_lookup", arguments={"query": str(i)})
+        for i in range(fast_count)
+    ]
+    return calls
+
+
+async def _measure_streaming(slow_s: float, fast_s: float, fast_count: int) -> tuple[float, float]:
+    calls = _make_calls(fast_count)
+    loop = AgentLoop(provider=_BatchProvider(calls), tools=_make_tools(slow_s, fast_s))
+    first = last = 0.0
+    start = time.perf_counter()
+    async for chunk in loop.run_stream([Message.user("bench")]):
+        if chunk.type == "tool_result":
+            last = (time.perf_counter() - start) * 1000
+            first = first or last
+    return first, last
+
+
+async def _measure_gather(slow_s: float, fast_s: float, fast_count: int) -> float:
+    calls = _make_calls(fast_count)
+    loop = AgentLoop(provider=_BatchProvider(calls), tools=_make_tools(slow_s, fast_s))
+    start = time.perf_counter()
+    await loop._execute_tool_batch(calls, AgentState())
+    return (time.perf_counter() - start) * 1000
+
+
+def report_stats(name: str, values: list[float]) -> dict[str, Any]:
+    s = sorted(values)
+    return {
+        "name": name,
+        "count": len(s),
+        "p50": statistics.median(s),
+        "p95": s[int(len(s) * 0.95)] if len(s) > 1 else s[0],
+        "mean": statistics.mean(s),
+        "min": s[0],
+        "max": s[-1],
+    }
+
+
+async def run_benchmark(runs: int, slow_s: float, fast_s: float, fast_count: int) -> dict[str, Any]:
+    first_ms: list[float] = []
+    last_ms: list[float] = []
+    gather_ms: list[float] = []
+    for _ in range(runs):
+        first, last = await _measure_streaming(slow_s, fast_s, fast_count)
+        first_ms.append(first)
+        last_ms.append(last)
+        gather_ms.append(await _measure_gather(slow_s, fast_s, fast_count))
+    return {
+        "streaming_first_result": report_stats("streaming: time to first tool_result", first_ms),
+        "streaming_last_result": report_stats("streaming: time to last tool_result", last_ms),
+        "gather_first_result": report_stats("gather: time to first tool_result", gather_ms),
+    }
+
+
+def print_results(results: dict[str, Any], slow_s: float, fast_s: float, fast_count: int) -> None:
+    print(f"\n{'=' * 80}")
+    print(f"  Tool Streaming Benchmark (1 x {slow_s}s + {fast_count} x {fast_s}s)")
+    print(f"{'=' * 80}\n")
+    print(f"{'Metric (ms)':<45} {'p50':>8} {'p95':>8} {'mean':>9} {'n':>5}")
+    print("-" * 80)
+    for stats in results.values():
+        print(
+            f"{stats['name']:<45} {stats['p50']:8.1f} {stats['p95']:8.1f} "
+            f"{stats['mean']:9.1f} {stats['count']:5d}"
+        )
+    speedup = results["gather_first_result"]["p50"] / max(
+        results["streaming_first_result"]["p50"], 0.001
+    )
+    print(f"\nTime-to-first-tool-result improvement (p50): {speedup:.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Parallel tool streaming benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Number of runs (default: 5)")
+    parser.add_argument("--slow", type=float, default=1.0, help="Slow tool latency in seconds")
+    parser.add_argument("--fast", type=float, default=0.05, help="Fast tool latency in seconds")
+    parser.add_argument("--fast-count", type=int, default=5, help="Number of fast tools")
+    parser.add_argument("--output", type=str, default="", help="Output JSON file path")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args.runs, args.slow, args.fast, args.fast_count))
+    print_results(results, args.slow, args.fast, args.fast_count)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
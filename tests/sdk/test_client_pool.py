@@ -0,0 +1,99 @@
+"""ProviderClientPool tests — client sharing across providers and loops."""
+
+import asyncio
+
+import pytest
+
+from src.sdk.providers.anthropic import AnthropicProvider
+from src.sdk.providers.client_pool import ClientPoolConfig, ProviderClientPool
+from src.sdk.providers.openai import OpenAIProvider
+
+
+@pytest.mark.asyncio
+async def test_same_key_reuses_client():
+    pool = ProviderClientPool()
+    a = pool.get_client("openai", "https://api.example.com/v1/", "sk-1")
+    b = pool.get_client("openai", "https://api.example.com/v1", "sk-1")
+
+    assert a is b
+    assert pool.stats()["created"] == 1
+    assert pool.stats()["reused"] == 1
+    await pool.aclose()
+
+
+@pytest.mark.asyncio
+async def test_different_key_or_host_gets_own_client():
+    pool = ProviderClientPool()
+    base = pool.get_client("openai", "https://api.example.com/v1", "sk-1")
+
+    assert pool.get_client("openai", "https://api.example.com/v1", "sk-2") is not base
+    assert pool.get_client("openai", "https://other.example.com/v1", "sk-1") is not base
+    assert pool.get_client("anthropic", "https://api.example.com/v1", "sk-1") is not base
+    await pool.aclose()
+
+
+def test_clients_are_pooled_per_event_loop():
+    pool = ProviderClientPool()
+
+    async def get():
+        return pool.get_client("gemini", "https://g.example.com")
+
+    first = asyncio.run(get())
+    second = asyncio.run(get())
+
+    assert first is not second
+
+
+def test_outside_loop_returns_unpooled_client():
+    pool = ProviderClientPool()
+    pool.get_client("gemini", "https://g.example.com")
+
+    assert pool.stats()["created"] == 0
+
+
+@pytest.mark.asyncio
+async def test_aclose_closes_clients():
+    pool = ProviderClientPool()
+    client = pool.get_client("gemini", "https://g.example.com")
+    await pool.aclose()
+
+    assert client.is_closed
+    assert pool.stats()["clients"] == 0
+    assert pool.get_client("gemini", "https://g.example.com") is not client
+    await pool.aclose()
+
+
+def test_http2_disabled_when_configured_off():
+    assert ProviderClientPool(ClientPoolConfig(http2=False)).http2 is False
+
+
+@pytest.mark.asyncio
+async def test_providers_share_pooled_clients():
+    one = AnthropicProvider(api_key="k", base_url="https://anthropic.example.com")
+    two = AnthropicProvider(api_key="k", base_url="https://anthropic.example.com")
+    assert one._get_client() is two._get_client()
+
+    a = OpenAIProvider(api_key="k", base_url="https://openai.example.com/v1")
+    b = OpenAIProvider(api_key="k", base_url="https://openai.example.com/v1")
+    assert a._client._client is b._client._client
+    assert a._client is a._client
+
+
+@pytest.mark.asyncio
+async def test_openai_provider_resolves_pooled_client_once(monkeypatch):
+    from src.sdk.providers import openai as openai_provider
+
+    pool = ProviderClientPool()
+    monkeypatch.setattr(openai_provider, "get_client_pool", lambda: pool)
+    provider = OpenAIProvider(api_key="k", base_url="https://openai.example.com/v1")
+
+    first = provider._client
+    for _ in range(3):
+        assert provider._client is first
+    assert pool.stats()["created"] == 1
+    assert pool.stats()["reused"] == 0
+
+    await pool.aclose()
+    assert provider._client is not first
+    assert pool.stats()["created"] == 2
+    await pool.aclose()
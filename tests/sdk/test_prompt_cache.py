@@ -0,0 +1,123 @@
+"""Prompt caching tests — stable prefix layout, breakpoints, cache accounting."""
+
+import pytest
+
+from src.sdk.loop import AgentLoop, CostTracker
+from src.sdk.messages import Message, Usage
+from src.sdk.prompt_cache import mark_cache_breakpoints, merge_leading_system
+from src.sdk.providers.anthropic import AnthropicProvider
+from src.sdk.state import AgentState
+from src.sdk.tools import tool
+from tests.sdk.test_sdk_loop import MockProvider
+
+
+@tool
+def lookup(query: str) -> str:
+    """Look something up."""
+    return query
+
+
+SUMMARY = Message.system("## Conversation Summary\n\nearlier talk")
+
+
+def test_system_prompt_stays_separate_from_summary():
+    loop = AgentLoop(provider=MockProvider(), system_prompt="You are helpful.")
+    state = AgentState(messages=[SUMMARY, Message.user("hi")])
+
+    prepared = loop._prepare_messages(state)
+
+    assert prepared[0].content == "You are helpful."
+    assert prepared[1] is not SUMMARY
+    assert prepared[1].content == SUMMARY.content
+    assert [m.cache_breakpoint for m in prepared] == [True, True, False]
+    assert not SUMMARY.cache_breakpoint
+
+
+def test_prompt_already_present_is_not_duplicated():
+    loop = AgentLoop(provider=MockProvider(), system_prompt="You are helpful.")
+    state = AgentState(messages=[Message.system("You are helpful."), Message.user("hi")])
+
+    prepared = loop._prepare_messages(state)
+
+    assert [m.role for m in prepared] == ["system", "user"]
+
+
+def test_stored_summary_is_marked():
+    messages = [
+        Message.system("prompt"),
+        Message.user("[SUMMARY OF PREVIOUS CONVERSATION]\nold"),
+        Message.user("new"),
+    ]
+
+    marked = mark_cache_breakpoints(messages)
+
+    assert [m.cache_breakpoint for m in marked] == [True, True, False]
+
+
+def test_cache_breakpoint_is_not_serialized():
+    msg = Message.system("prompt").model_copy(update={"cache_breakpoint": True})
+    assert "cache_breakpoint" not in msg.model_dump()
+
+
+def test_merge_leading_system_keeps_prompt_prefix():
+    merged = merge_leading_system([Message.system("prompt"), SUMMARY, Message.user("hi")])
+
+    assert len(merged) == 2
+    assert merged[0].content == f"prompt\n\n{SUMMARY.content}"
+
+
+def test_anthropic_payload_places_breakpoints():
+    provider = AnthropicProvider(api_key="k")
+    messages = mark_cache_breakpoints([Message.system("prompt"), SUMMARY, Message.user("hi")])
+
+    payload = provider._build_payload(messages, [lookup], "claude")
+
+    assert payload["system"][0] == {
+        "type": "text",
+        "text": "prompt",
+        "cache_control": {"type": "ephemeral"},
+    }
+    assert payload["system"][1]["cache_control"] == {"type": "ephemeral"}
+    assert payload["tools"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert payload["messages"] == [{"role": "user", "content": "hi"}]
+
+
+def test_anthropic_payload_without_caching():
+    provider = AnthropicProvider(api_key="k", prompt_caching=False)
+    messages = mark_cache_breakpoints([Message.system("prompt"), SUMMARY, Message.user("hi")])
+
+    payload = provider._build_payload(messages, [lookup], "claude")
+
+    assert payload["system"] == f"prompt\n\n{SUMMARY.content}"
+    assert "cache_control" not in payload["tools"][-1]
+
+
+def test_anthropic_usage_counts_cached_input():
+    usage = AnthropicProvider._parse_usage(
+        {"input_tokens": 10, "cache_read_input_tokens": 80, "cache_creation_input_tokens": 10}
+    )
+    assert usage.input_tokens == 100
+    assert usage.cache_read_tokens == 80
+
+
+def test_cost_tracker_cache_hit_ratio():
+    tracker = CostTracker()
+    tracker.add(Usage(input_tokens=1000, cache_read_tokens=0, cache_creation_tokens=800))
+    tracker.add(Usage(input_tokens=1000, cache_read_tokens=800))
+
+    assert tracker.total_cache_read_tokens == 800
+    assert tracker.total_cache_creation_tokens == 800
+    assert tracker.cache_hit_ratio == pytest.approx(0.4)
+
+
+@pytest.mark.asyncio
+async def test_run_records_cache_usage():
+    provider = MockProvider(
+        [Message.assistant("ok", usage=Usage(input_tokens=100, cache_read_tokens=60))]
+    )
+    loop = AgentLoop(provider=provider, system_prompt="You are helpful.")
+
+    await loop.run([Message.user("hi")])
+
+    assert loop.cost_tracker.cache_hit_ratio == pytest.approx(0.6)
+    assert provider._last_messages[0].cache_breakpoint
@@ -4,6 +4,7 @@ These tests use a MockProvider that returns predetermined responses,
 so they run without any real LLM service.
 """
 
+import asyncio
 import json
 import time
 
@@ -1097,6 +1098,74 @@ class TestParallelToolExecution:
         tool_result_chunks = [c for c in chunks if c.type == "tool_result"]
         assert len(tool_result_chunks) == 2
 
+    async def test_streaming_yields_in_completion_order(self):
+        """Fast tools are streamed before a slow one; state keeps call order."""
+
+        @tool
+        async def slow_fetch(url: str = "") -> str:
+            """Slow async tool."""
+            await asyncio.sleep(0.3)
+            return f"fetched:{url}"
+
+        slow_fetch.annotations = ToolAnnotations(read_only=True)
+
+        calls = [
+            ToolCall(id="c1", name="slow_fetch", arguments={"url": "x"}),
+            ToolCall(id="c2", name="echo", arguments={"text": "a"}),
+            ToolCall(id="c3", name="add", arguments={"a": 1, "b": 2}),
+        ]
+        provider = MockProvider(
+            responses=[Message.assistant(content="", tool_calls=calls), Message.assistant(content="Done")]
+        )
+        loop = AgentLoop(provider=provider, tools=[slow_fetch, echo, add])
+
+        arrivals: dict[str, float] = {}
+        start = time.perf_counter()
+        chunks = []
+        async for chunk in loop.run_stream([Message.user("Mixed")]):
+            chunks.append(chunk)
+            if chunk.type == "tool_result":
+                arrivals[chunk.call_id] = time.perf_counter() - start
+
+        order = [c.call_id for c in chunks if c.type == "tool_result"]
+        assert order[-1] == "c1"
+        assert arrivals["c2"] < 0.2
+        assert arrivals["c3"] < 0.2
+
+        tool_msgs = [m for m in loop.state.messages if m.role == "tool"]
+        assert [m.tool_call_id for m in tool_msgs] == ["c1", "c2", "c3"]
+
+    async def test_streaming_emits_tool_progress(self):
+        """Long-running parallel tools emit tool_progress events."""
+
+        @tool
+        async def long_task() -> str:
+            """Long async tool."""
+            await asyncio.sleep(0.35)
+            return "finished"
+
+        long_task.annotations = ToolAnnotations(read_only=True)
+
+        provider = MockProvider(
+            responses=[
+                Message.assistant(
+                    content="", tool_calls=[ToolCall(id="c1", name="long_task", arguments={})]
+                ),
+                Message.assistant(content="Done"),
+            ]
+        )
+        loop = AgentLoop(provider=provider, tools=[long_task], tool_progress_interval=0.1)
+
+        chunks = [c async for c in loop.run_stream([Message.user("Long")])]
+        progress = [c for c in chunks if c.type == "tool_progress"]
+        assert len(progress) >= 2
+        assert all(c.call_id == "c1" for c in progress)
+        assert progress[-1].elapsed_ms >= progress[0].elapsed_ms
+        assert progress[0].to_ws_message()["type"] == "tool_progress"
+
+        types = [c.type for c in chunks]
+        assert types.index("tool_progress") < types.index("tool_result")
+
 
 class TestUsageTracking:
     """Tests for usage extraction from provider responses and CostTracker integration."""
@@ -119,3 +119,94 @@ Seeded body
     registry.reload()
 
     assert "seeded-skill" not in registry.list_skills()
+
+
+def _write(root, name, description, body):
+    skill_dir = root / name
+    skill_dir.mkdir(parents=True, exist_ok=True)
+    (skill_dir / "SKILL.md").write_text(
+        f"---\nname: {name}\ndescription: {description}\n---\n{body}\n", encoding="utf-8"
+    )
+
+
+def test_catalog_parses_only_changed_skills_and_persists(tmp_path, monkeypatch):
+    """Parsed skills are reused until their SKILL.md changes, across instances."""
+    from src.skills import catalog as catalog_mod
+    from src.skills.catalog import SkillCatalog
+
+    parsed = []
+    real_parse = catalog_mod.parse_skill_file
+    monkeypatch.setattr(
+        catalog_mod, "parse_skill_file", lambda p: parsed.append(p.parent.name) or real_parse(p)
+    )
+    _write(tmp_path, "alpha", "Alpha skill", "Alpha body")
+    _write(tmp_path, "beta", "Beta skill", "Beta body")
+
+    catalog = SkillCatalog(tmp_path)
+    assert sorted(s["name"] for s in catalog.load_skills()) == ["alpha", "beta"]
+    assert sorted(parsed) == ["alpha", "beta"]
+
+    _write(tmp_path, "beta", "Beta skill, edited", "Beta body")
+    catalog.load_skills()
+    assert len(parsed) == 2  # within CHECK_INTERVAL nothing is re-checked
+
+    catalog.invalidate()
+    assert catalog.load_skill("beta")["description"] == "Beta skill, edited"
+    assert sorted(parsed) == ["alpha", "beta", "beta"]
+
+    reopened = SkillCatalog(tmp_path)
+    assert reopened.load_skill("alpha")["content"] == "Alpha body"
+    assert len(parsed) == 3
+
+
+def test_search_skills_ranks_name_and_description_above_content(tmp_path, monkeypatch):
+    """search_skills returns BM25-ranked matches across user and workspace skills."""
+    monkeypatch.chdir(tmp_path)  # no bundled seed skills
+    user_dir = tmp_path / "user"
+    ws_dir = tmp_path / "ws"
+    _write(user_dir, "pdf-export", "Export documents to PDF", "Use the renderer.")
+    _write(user_dir, "invoices", "Create invoices", "Attach the invoice as a pdf file.")
+    _write(ws_dir, "notes", "Meeting notes", "Summarize the meeting.")
+
+    registry = SkillRegistry(skills_dir=user_dir, workspace_skills_dir=ws_dir)
+
+    assert [s["name"] for s in registry.search_skills("pdf")] == ["pdf-export", "invoices"]
+    assert [s["name"] for s in registry.search_skills("pdf", limit=1)] == ["pdf-export"]
+    assert [s["name"] for s in registry.search_skills("summarizing meetings")] == ["notes"]
+    assert registry.search_skills("notes")[0]["metadata"]["scope"] == "workspace"
+    assert registry.search_skills("") == []
+
+    _write(user_dir, "pdf-merge", "Merge PDF files", "Combine pages.")
+    registry.reload()
+    assert {s["name"] for s in registry.search_skills("pdf", limit=2)} == {
+        "pdf-export",
+        "pdf-merge",
+    }
+
+
+def test_skill_index_substring_fallback_ignores_case():
+    """Without FTS5, search() matches query substrings case-insensitively."""
+    from src.skills.catalog import SkillIndex
+
+    index = SkillIndex(
+        [
+            {"name": "PDF-Export", "description": "", "content": ""},
+            {"name": "notes", "description": "Meeting notes", "content": "No PDFs here"},
+            {"name": "other", "description": "", "content": ""},
+        ]
+    )
+    index.close()  # what a SQLite build without FTS5 leaves behind
+
+    assert index.search("pdf") == ["PDF-Export", "notes"]
+
+
+def test_get_all_skills_returns_copies_of_cached_skills(tmp_path, monkeypatch):
+    """Mutating a returned skill does not leak into later calls."""
+    monkeypatch.chdir(tmp_path)
+    _write(tmp_path / "user", "alpha", "Alpha skill", "Body")
+    registry = SkillRegistry(skills_dir=tmp_path / "user", workspace_skills_dir=tmp_path / "ws")
+
+    registry.get_all_skills()[0]["metadata"]["scope"] = "tampered"
+
+    assert registry.get_all_skills()[0]["metadata"]["scope"] == "user"
+    assert registry.get_skill("alpha")["metadata"]["scope"] == "user"
@@ -110,6 +110,24 @@ def test_skills_load_not_found_returns_error(tmp_path, monkeypatch):
     assert "not found" in result.lower()
 
 
+def test_skills_load_not_found_suggests_ranked_matches(tmp_path, monkeypatch):
+    from src.sdk.tools_core import skills as skills_tools
+
+    monkeypatch.chdir(tmp_path)
+    user_dir = tmp_path / "user-skills"
+    _write_skill(user_dir, "pdf-export", "Export documents to PDF", "Body")
+    _write_skill(user_dir, "notes", "Meeting notes", "Body")
+    registry = SkillRegistry(skills_dir=user_dir, workspace_skills_dir=tmp_path / "ws")
+
+    monkeypatch.setattr(skills_tools, "get_skill_registry", lambda **kwargs: registry)
+
+    result = skills_tools.skills_load.invoke(
+        {"name": "pdf", "user_id": "test", "workspace_id": "ws1"}
+    )
+
+    assert result == "Skill 'pdf' not found. Closest matches: pdf-export."
+
+
 def test_skills_reload_refreshes_after_adding_skill(tmp_path, monkeypatch):
     from src.sdk.tools_core import skills as skills_tools
 
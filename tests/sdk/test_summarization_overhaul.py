@@ -120,6 +120,252 @@ def test_split_messages_preserves_system_messages():
     assert any(m.role == "system" for m in recent)
 
 
+# -- token cache / ledger --
+
+
+def test_token_cache_counts_each_message_once():
+    from src.sdk.middleware_summarization import SummarizationMiddleware
+
+    mw = SummarizationMiddleware()
+    messages = [_msg("user", "hello there"), _msg("tool", "output " * 50)]
+
+    first = mw._total_tokens(messages)
+    second = mw._total_tokens(messages)
+
+    assert first == second
+    stats = mw.token_cache_stats()
+    assert stats["misses"] == 2
+    assert stats["hits"] == 2
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_token_cache_keys_on_content_not_identity():
+    from src.sdk.middleware_summarization import SummarizationMiddleware
+
+    mw = SummarizationMiddleware()
+    mw._count_message_tokens(_msg("user", "same text"))
+    mw._count_message_tokens(_msg("user", "same text"))
+    mw._count_message_tokens(_msg("assistant", "same text"))
+
+    assert mw.token_cache_stats()["hits"] == 1
+    assert mw.token_cache_stats()["misses"] == 2
+
+
+def test_token_cache_is_bounded():
+    from src.sdk.middleware_summarization import TokenCountCache
+
+    cache = TokenCountCache(maxsize=2)
+    for text in ("a", "b", "c"):
+        cache.get_or_count(_msg("user", text), lambda m: 1)
+
+    assert cache.stats()["size"] == 2
+
+
+def test_failed_encoding_load_is_not_retried(monkeypatch):
+    from src.sdk import middleware_summarization
+    from src.sdk.middleware_summarization import SummarizationMiddleware
+
+    attempts = []
+
+    def broken(name):
+        attempts.append(name)
+        raise OSError("offline")
+
+    monkeypatch.setattr(middleware_summarization.tiktoken, "get_encoding", broken)
+    mw = SummarizationMiddleware()
+
+    assert mw.count_tokens("a" * 40) == mw.count_tokens("b" * 40) > 0
+    assert attempts == ["cl100k_base"]
+
+
+def test_ledger_only_counts_new_messages():
+    from src.sdk.middleware_summarization import SummarizationMiddleware
+    from src.sdk.state import AgentState
+
+    mw = SummarizationMiddleware()
+    state = AgentState(messages=[_msg("user", f"message {i}") for i in range(10)])
+    mw._sync_ledger(state)
+    lookups = mw.token_cache.hits + mw.token_cache.misses
+
+    state.add_message(_msg("assistant", "reply"))
+    ledger = mw._sync_ledger(state)
+
+    assert mw.token_cache.hits + mw.token_cache.misses == lookups + 1
+    assert ledger.prefix == mw._prefix_sums(state.messages)
+
+
+def test_ledger_resyncs_after_history_rewrite():
+    from src.sdk.middleware_summarization import SummarizationMiddleware
+    from src.sdk.state import AgentState
+
+    mw = SummarizationMiddleware()
+    state = AgentState(messages=[_msg("user", f"message {i}") for i in range(6)])
+    mw._sync_ledger(state)
+
+    state.messages = [Message.system("summary"), *state.messages[4:]]
+    ledger = mw._sync_ledger(state)
+
+    assert ledger.prefix == mw._prefix_sums(state.messages)
+    assert len(ledger.pruned_prefix) == len(state.messages) + 1
+
+
+def test_keep_boundary_matches_linear_scan():
+    from src.sdk.middleware_summarization import SummarizationMiddleware
+
+    mw = SummarizationMiddleware()
+    messages = [_msg("user", "word " * n) for n in (40, 5, 80, 10, 30, 60, 5)]
+    prefix = mw._prefix_sums(messages)
+
+    for keep in range(0, prefix[-1] + 10, 7):
+        recent, expected = 0, None
+        for i in range(len(messages) - 1, -1, -1):
+            t = mw._count_message_tokens(messages[i])
+            if recent + t > keep and i < len(messages) - 1:
+                expected = i + 1
+                break
+            recent += t
+        assert mw._keep_boundary(prefix, keep) == expected
+
+
+@pytest.mark.asyncio
+async def test_abefore_model_uses_pruned_total_from_ledger():
+    from src.sdk.middleware_summarization import SummarizationMiddleware
+    from src.sdk.state import AgentState
+
+    mw = SummarizationMiddleware(trigger_tokens=10, keep_tokens=50)
+    seen: list[str] = []
+
+    async def summary(text: str) -> str:
+        seen.append(text)
+        return "summary " * 50
+
+    mw._generate_summary = summary
+    state = AgentState(
+        messages=[
+            _msg("user", "old question"),
+            _msg("tool", "huge output " * 2000, tool_call_id="tc1"),
+            _msg("user", "recent " * 20),
+            _msg("assistant", "answer " * 20),
+        ]
+    )
+
+    result = await mw.abefore_model(state)
+
+    assert result is not None
+    assert "[pruned:" in seen[0]
+    assert "huge output" not in seen[0]
+    assert result["messages"][-1].content == "answer " * 20
+
+
+# -- rolling / background summaries --
+
+
+@pytest.mark.asyncio
+async def test_existing_summary_is_merged_not_stacked():
+    from src.sdk.middleware_summarization import SummarizationMiddleware
+    from src.sdk.state import AgentState
+
+    mw = SummarizationMiddleware(trigger_tokens=10, keep_tokens=50)
+    seen: list[str] = []
+
+    async def summary(text: str) -> str:
+        seen.append(text)
+        return "merged summary " * 30
+
+    mw._generate_summary = summary
+    state = AgentState(
+        messages=[
+            Message.system("## Conversation Summary\n\nuser likes tea"),
+            _msg("user", "old question " * 30),
+            _msg("assistant", "old answer " * 30),
+            _msg("user", "recent " * 20),
+        ]
+    )
+
+    result = await mw.abefore_model(state)
+
+    assert result is not None
+    assert "<previous_summary>\nuser likes tea" in seen[0]
+    summaries = [m for m in result["messages"] if "Conversation Summary" in m.content]
+    assert len(summaries) == 1
+
+
+@pytest.mark.asyncio
+async def test_background_summary_swapped_in_on_later_call():
+    import asyncio
+
+    from src.sdk.middleware_summarization import SummarizationMiddleware
+    from src.sdk.state import AgentState
+
+    mw = SummarizationMiddleware(
+        trigger_tokens=10000, keep_tokens=30, background=True, soft_trigger_tokens=50
+    )
+    release = asyncio.Event()
+
+    async def summary(text: str) -> str:
+        await release.wait()
+        return "background summary " * 30
+
+    mw._generate_summary = summary
+    state = AgentState(
+        messages=[
+            _msg("user", "old question " * 30),
+            _msg("assistant", "old answer " * 30),
+            _msg("user", "recent " * 20),
+        ]
+    )
+
+    # Crossing the soft watermark starts the job without blocking.
+    assert await mw.abefore_model(state) is None
+    assert mw._pending is not None
+
+    state.add_message(_msg("assistant", "reply"))
+    assert await mw.abefore_model(state) is None
+
+    release.set()
+    await asyncio.sleep(0)
+    result = await mw.abefore_model(state)
+
+    assert result is not None
+    assert result["messages"][0].content.startswith("## Conversation Summary")
+    assert result["messages"][-1].content == "reply"
+    assert mw._pending is None
+
+
+@pytest.mark.asyncio
+async def test_background_summary_dropped_when_history_rewritten():
+    from src.sdk.middleware_summarization import SummarizationMiddleware
+    from src.sdk.state import AgentState
+
+    mw = SummarizationMiddleware(
+        trigger_tokens=10000, keep_tokens=30, background=True, soft_trigger_tokens=50
+    )
+
+    async def summary(text: str) -> str:
+        return "background summary " * 30
+
+    mw._generate_summary = summary
+    state = AgentState(
+        messages=[
+            _msg("user", "old question " * 30),
+            _msg("assistant", "old answer " * 30),
+            _msg("user", "recent " * 20),
+        ]
+    )
+    assert await mw.abefore_model(state) is None
+    await mw._pending.task
+
+    stale_job = mw._pending.job
+    state.messages = [_msg("user", "different " * 30), *state.messages[1:]]
+
+    # The finished summary no longer covers this history; a fresh job starts.
+    assert await mw.abefore_model(state) is None
+    assert mw._pending is not None
+    assert mw._pending.job is not stale_job
+    assert "different" in mw._pending.job.conversation_text
+    mw._cancel_background()
+
+
 # -- force_summarize --
 
 
@@ -0,0 +1,203 @@
+"""ToolExecutor tests — off-loop execution, per-tool limits, AgentLoop routing."""
+
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from src.sdk.loop import AgentLoop
+from src.sdk.messages import Message, ToolCall
+from src.sdk.tool_executor import ToolExecutor, ToolExecutorConfig, ToolTimeoutError
+from src.sdk.tools import ToolAnnotations, tool
+from tests.sdk.test_sdk_loop import MockProvider
+
+
+@tool
+def thread_probe() -> str:
+    """Return the ident of the executing thread."""
+    return str(threading.get_ident())
+
+
+@tool
+def blocking_read(query: str = "x") -> str:
+    """Blocking read-only tool (time.sleep, not asyncio.sleep)."""
+    time.sleep(0.2)
+    return f"read:{query}"
+
+
+blocking_read.annotations = ToolAnnotations(read_only=True)
+
+
+@tool
+def single_flight(query: str = "x") -> str:
+    """Blocking tool limited to one in-flight call."""
+    time.sleep(0.1)
+    return f"single:{query}"
+
+
+single_flight.annotations = ToolAnnotations(read_only=True, max_concurrency=1)
+
+
+@tool
+def sleepy(seconds: float = 1.0) -> str:
+    """Sleep longer than its timeout."""
+    time.sleep(seconds)
+    return "woke"
+
+
+sleepy.annotations = ToolAnnotations(timeout_seconds=0.1)
+
+
+@tool
+def pid_probe() -> str:
+    """Return the pid of the executing process."""
+    return str(os.getpid())
+
+
+pid_probe.annotations = ToolAnnotations(cpu_bound=True)
+
+
+@pytest.fixture
+def executor():
+    ex = ToolExecutor(ToolExecutorConfig(max_threads=8, max_processes=1))
+    yield ex
+    ex.shutdown()
+
+
+class TestToolExecutor:
+    async def test_sync_tool_runs_off_loop_thread(self, executor):
+        result = await executor.run(thread_probe, {})
+        assert result != str(threading.get_ident())
+
+    async def test_async_tool_awaited_directly(self, executor):
+        @tool
+        async def async_probe() -> str:
+            """Async probe."""
+            return str(threading.get_ident())
+
+        result = await executor.run(async_probe, {})
+        assert result == str(threading.get_ident())
+
+    async def test_sync_tools_overlap(self, executor):
+        start = time.perf_counter()
+        results = await asyncio.gather(*[executor.run(blocking_read, {"query": str(i)}) for i in range(4)])
+        elapsed = time.perf_counter() - start
+        assert results == ["read:0", "read:1", "read:2", "read:3"]
+        assert elapsed < 0.6, f"4 x 0.2s blocking calls should overlap (took {elapsed:.2f}s)"
+
+    async def test_event_loop_stays_responsive(self, executor):
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await executor.run(blocking_read, {})
+        task.cancel()
+        assert ticks >= 5
+
+    async def test_max_concurrency_serializes(self, executor):
+        start = time.perf_counter()
+        await asyncio.gather(*[executor.run(single_flight, {"query": str(i)}) for i in range(3)])
+        elapsed = time.perf_counter() - start
+        assert elapsed >= 0.3
+
+    async def test_timeout_from_annotations(self, executor):
+        with pytest.raises(ToolTimeoutError):
+            await executor.run(sleepy, {"seconds": 0.5})
+
+    async def test_default_timeout(self):
+        ex = ToolExecutor(ToolExecutorConfig(default_timeout_seconds=0.05))
+        try:
+            with pytest.raises(ToolTimeoutError):
+                await ex.run(blocking_read, {})
+        finally:
+            ex.shutdown()
+
+    async def test_cpu_bound_runs_in_process_pool(self, executor):
+        result = await executor.run(pid_probe, {})
+        assert result != str(os.getpid())
+
+    async def test_cpu_bound_local_function_falls_back_to_threads(self, executor):
+        @tool
+        def local_pid() -> str:
+            """Not importable by a child process."""
+            return str(os.getpid())
+
+        local_pid.annotations = ToolAnnotations(cpu_bound=True)
+        assert await executor.run(local_pid, {}) == str(os.getpid())
+
+    def test_execution_hints_not_sent_to_llm(self):
+        fmt = single_flight.to_openai_format()
+        assert fmt["function"]["annotations"] == {
+            "read_only": True,
+            "destructive": False,
+            "idempotent": False,
+            "open_world": False,
+        }
+
+
+class TestAgentLoopRouting:
+    async def test_parallel_sync_tools_overlap_in_loop(self):
+        provider = MockProvider(
+            responses=[
+                Message.assistant(
+                    content="",
+                    tool_calls=[
+                        ToolCall(id=f"c{i}", name="blocking_read", arguments={"query": str(i)})
+                        for i in range(4)
+                    ],
+                ),
+                Message.assistant(content="Done"),
+            ]
+        )
+        loop = AgentLoop(provider=provider, tools=[blocking_read])
+
+        start = time.perf_counter()
+        result = await loop.run([Message.user("Parallel")])
+        elapsed = time.perf_counter() - start
+
+        tool_res = [m for m in result if m.role == "tool"]
+        assert [m.content for m in tool_res] == ["read:0", "read:1", "read:2", "read:3"]
+        assert elapsed < 0.6
+
+    async def test_timeout_surfaces_as_tool_error(self):
+        provider = MockProvider(
+            responses=[
+                Message.assistant(
+                    content="",
+                    tool_calls=[ToolCall(id="c1", name="sleepy", arguments={"seconds": 0.5})],
+                ),
+                Message.assistant(content="Done"),
+            ]
+        )
+        loop = AgentLoop(provider=provider, tools=[sleepy])
+        result = await loop.run([Message.user("Sleep")])
+
+        tool_res = [m for m in result if m.role == "tool"]
+        assert "timed out" in tool_res[0].content
+
+    async def test_current_loop_visible_in_worker_thread(self):
+        from src.sdk.loop import get_current_agent_loop
+
+        @tool
+        def loop_probe() -> str:
+            """Report whether the current AgentLoop is visible."""
+            return "yes" if get_current_agent_loop() is not None else "no"
+
+        provider = MockProvider(
+            responses=[
+                Message.assistant(
+                    content="", tool_calls=[ToolCall(id="c1", name="loop_probe", arguments={})]
+                ),
+                Message.assistant(content="Done"),
+            ]
+        )
+        loop = AgentLoop(provider=provider, tools=[loop_probe])
+        result = await loop.run([Message.user("Probe")])
+        assert [m.content for m in result if m.role == "tool"] == ["yes"]
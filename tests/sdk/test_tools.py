@@ -1,9 +1,8 @@
 """Tests for SDK tool system — @tool decorator, ToolDefinition, ToolRegistry."""
 
-
 import pytest
 
-from src.sdk.tools import ToolDefinition, ToolRegistry, tool
+from src.sdk.tools import ToolAnnotations, ToolDefinition, ToolRegistry, tool
 
 # ─── @tool decorator ───
 
@@ -318,3 +317,71 @@ class TestToolRegistry:
         assert len(result) == 1
         assert result[0]["name"] == "time_get"
         assert "input_schema" in result[0]
+
+
+class TestToolSchemaCache:
+    def test_tool_format_is_memoized(self):
+        @tool
+        def time_get(user_id: str = "default_user") -> str:
+            """Get time."""
+            return "3pm"
+
+        assert time_get.to_openai_format() is time_get.to_openai_format()
+        assert time_get.to_anthropic_format() is time_get.to_anthropic_format()
+
+    def test_field_assignment_invalidates(self):
+        @tool
+        def time_get(user_id: str = "default_user") -> str:
+            """Get time."""
+            return "3pm"
+
+        before = time_get.to_openai_format()
+        time_get.annotations = ToolAnnotations(read_only=True)
+        after = time_get.to_openai_format()
+
+        assert after is not before
+        assert after["function"]["annotations"]["read_only"] is True
+
+    def test_model_copy_does_not_share_cache(self):
+        @tool
+        def time_get(user_id: str = "default_user") -> str:
+            """Get time."""
+            return "3pm"
+
+        time_get.to_anthropic_format()
+        renamed = time_get.model_copy(update={"name": "clock"})
+
+        assert renamed.to_anthropic_format()["name"] == "clock"
+        assert time_get.to_anthropic_format()["name"] == "time_get"
+
+    def test_registry_schemas_cached_until_tools_change(self):
+        registry = ToolRegistry()
+
+        @tool
+        def time_get(user_id: str = "default_user") -> str:
+            """Get time."""
+            return "3pm"
+
+        @tool
+        def date_get(user_id: str = "default_user") -> str:
+            """Get date."""
+            return "today"
+
+        registry.register(time_get)
+        first = registry.schemas("openai")
+        assert registry.schemas("openai") is first
+
+        registry.register(date_get)
+        assert registry.version == 2
+        assert [s["function"]["name"] for s in registry.schemas("openai")] == [
+            "time_get",
+            "date_get",
+        ]
+
+        cached = registry.schemas("anthropic")
+        date_get.description = "Get today's date."
+        assert registry.schemas("anthropic") is not cached
+        assert registry.schemas("anthropic")[1]["description"] == "Get today's date."
+
+        registry.remove("time_get")
+        assert [s["name"] for s in registry.to_anthropic_format()] == ["date_get"]
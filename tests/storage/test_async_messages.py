@@ -0,0 +1,112 @@
+"""Tests for AsyncMessageStore (write-behind writer + read-only pool)."""
+
+from __future__ import annotations
+
+import tempfile
+
+import pytest
+
+from src.storage.async_messages import AsyncMessageStore
+from src.storage.messages import MessageStore
+
+
+def _store(**kwargs) -> AsyncMessageStore:
+    temp_dir = tempfile.TemporaryDirectory()
+    sync_store = MessageStore("test_user", base_dir=temp_dir.name)
+    sync_store._temp_dir = temp_dir
+    return AsyncMessageStore(sync_store, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_awaited_write_is_durable_and_readable() -> None:
+    store = _store()
+
+    msg_id = await store.add_message("user", "hello", metadata={"workspace_id": "personal"})
+
+    assert msg_id != ""
+    # Visible through the synchronous store as well as the read pool.
+    assert [m.content for m in store.store.get_recent_messages(1)] == ["hello"]
+    recent = await store.get_recent_messages(1)
+    assert recent[0].id == msg_id
+    assert recent[0].metadata == {"workspace_id": "personal"}
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_nowait_writes_are_batched_and_ordered() -> None:
+    store = _store()
+
+    for i in range(5):
+        store.add_message_nowait("tool", f"tool-{i}")
+    await store.add_message("assistant", "final")
+
+    messages = await store.get_recent_messages(10)
+    assert [m.content for m in messages] == [*(f"tool-{i}" for i in range(5)), "final"]
+    assert store.stats()["written"] == 6
+    assert store.stats()["batches"] < 6
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_get_messages_with_summary_matches_sync_store() -> None:
+    store = _store()
+    await store.add_message("user", "before", metadata={"workspace_id": "w1"})
+    await store.add_summary_message("summary")
+    for i in range(5):
+        await store.add_message("user", f"after-{i}", metadata={"workspace_id": "w1"})
+
+    for limit, workspace_id in [(2, None), (50, None), (3, "w1"), (0, None)]:
+        got = await store.get_messages_with_summary(limit, workspace_id=workspace_id)
+        want = store.store.get_messages_with_summary(limit, workspace_id=workspace_id)
+        assert [m.id for m in got] == [m.id for m in want]
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_empty_content_is_stored_as_placeholder() -> None:
+    store = _store()
+
+    msg_id = await store.add_message("tool", "")
+
+    assert msg_id != ""
+    assert (await store.get_recent_messages(1))[0].content == "(empty)"
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_close_flushes_pending_writes() -> None:
+    store = _store()
+    futures = [store.add_message_nowait("user", f"m-{i}") for i in range(3)]
+
+    store.close()
+
+    assert all(f.done() and f.result() for f in futures)
+    assert store.store.count_messages() == 3
+    with pytest.raises(RuntimeError):
+        store.add_message_nowait("user", "late")
+
+
+def test_counters_are_updated_before_futures_resolve() -> None:
+    store = _store()
+    seen = []
+
+    future = store.add_message_nowait("user", "hello")
+    future.add_done_callback(lambda f: seen.append((store.written, store._committed)))
+    future.result(timeout=10)
+
+    assert seen == [(1, 1)]
+    store.close()
+
+
+def test_failed_batch_falls_back_to_single_inserts(monkeypatch) -> None:
+    store = _store()
+
+    def fail_batch(*args, **kwargs):
+        raise RuntimeError("batch failed")
+
+    monkeypatch.setattr(store._db, "insert_batch", fail_batch)
+    ids = [store.add_message_nowait("user", f"m{i}") for i in range(3)]
+
+    assert [f.result(timeout=10) != "" for f in ids] == [True] * 3
+    assert store.written == 3
+    store.close()
@@ -0,0 +1,129 @@
+"""Tests for the in-memory conversation window cache."""
+
+from __future__ import annotations
+
+import tempfile
+from datetime import UTC, datetime
+
+import pytest
+
+from src.sdk.runner import _messages_from_conversation
+from src.storage.async_messages import AsyncMessageStore
+from src.storage.conversation_window import ConversationWindow, ConversationWindowCache
+from src.storage.messages import Message, MessageStore
+
+
+def _msg(i: int, role: str = "user", content: str | None = None) -> Message:
+    return Message(id=str(i), ts=datetime.now(UTC), role=role, content=content or f"m-{i}")
+
+
+def _store() -> AsyncMessageStore:
+    temp_dir = tempfile.TemporaryDirectory()
+    sync_store = MessageStore("test_user", base_dir=temp_dir.name)
+    sync_store._temp_dir = temp_dir
+    return AsyncMessageStore(sync_store, window_cache=ConversationWindowCache())
+
+
+def test_window_keeps_last_capacity_rows() -> None:
+    window = ConversationWindow.build([_msg(i) for i in range(3)], None, capacity=3, generation=0)
+
+    window.append(_msg(3))
+
+    assert [m.id for m in window.messages(3)] == ["1", "2", "3"]
+    assert [m.id for m in window.messages(2)] == ["2", "3"]
+
+
+def test_window_memoizes_conversion_until_append() -> None:
+    window = ConversationWindow.build([_msg(0)], None, capacity=5, generation=0)
+    calls: list[int] = []
+
+    def convert(messages: list[Message]) -> list[str]:
+        calls.append(len(messages))
+        return [m.content for m in messages]
+
+    first = window.converted(5, convert)
+    first.append("mutated by caller")
+    assert window.converted(5, convert) == ["m-0"]
+    window.append(_msg(1))
+    assert window.converted(5, convert) == ["m-0", "m-1"]
+    assert calls == [1, 2]
+
+
+def test_cache_evicts_least_recently_used_over_budget() -> None:
+    big = "x" * 1000
+    cache = ConversationWindowCache(max_bytes=4000)
+    for key in ("a", "b", "c"):
+        cache.put(key, ConversationWindow.build([_msg(0, content=big)], None, 5, 0))
+    cache.get("a", 0, 5)
+    cache.put("d", ConversationWindow.build([_msg(0, content=big)], None, 5, 0))
+
+    assert cache.get("b", 0, 5) is None
+    assert cache.get("a", 0, 5) is not None
+    assert cache.stats()["evictions"] >= 1
+    assert cache.nbytes <= 4000
+
+
+def test_cache_misses_on_stale_generation_or_small_capacity() -> None:
+    cache = ConversationWindowCache()
+    cache.put("k", ConversationWindow.build([_msg(0)], None, 5, generation=1))
+
+    assert cache.get("k", 1, 10) is None
+    cache.put("k", ConversationWindow.build([_msg(0)], None, 5, generation=1))
+    assert cache.get("k", 2, 5) is None
+    assert cache.stats()["windows"] == 0
+
+
+@pytest.mark.asyncio
+async def test_warm_window_serves_history_without_store_reads() -> None:
+    store = _store()
+    await store.add_message("user", "first", metadata={"workspace_id": "w"})
+    await store.get_messages_with_summary(50, workspace_id="w")
+
+    queries: list[str] = []
+    original = store._reads.query
+    store._reads.query = lambda sql, params=(): queries.append(sql) or original(sql, params)
+
+    await store.add_message("assistant", "second", metadata={"workspace_id": "w"})
+    await store.add_message("user", "other", metadata={"workspace_id": "elsewhere"})
+    history = await store.get_messages_with_summary(50, workspace_id="w")
+
+    assert [m.content for m in history] == ["first", "second"]
+    assert queries == []
+    assert [m.id for m in history] == [
+        m.id for m in store.store.get_messages_with_summary(50, workspace_id="w")
+    ]
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_summary_and_sync_writes_invalidate_window() -> None:
+    store = _store()
+    await store.add_message("user", "first", metadata={"workspace_id": "w"})
+    await store.get_messages_with_summary(50, workspace_id="w")
+
+    await store.add_summary_message("the summary")
+    history = await store.get_messages_with_summary(50, workspace_id="w")
+    assert [m.content for m in history] == ["the summary", "first"]
+
+    store.store.add_message("user", "imported", metadata={"workspace_id": "w"})
+    history = await store.get_messages_with_summary(50, workspace_id="w")
+    assert [m.content for m in history] == ["the summary", "imported", "first"]
+
+    store.store.delete_messages_for_workspace("w")
+    history = await store.get_messages_with_summary(50, workspace_id="w")
+    assert [m.content for m in history] == ["the summary"]
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_get_history_returns_sdk_messages() -> None:
+    store = _store()
+    await store.add_message("user", "hi", metadata={"workspace_id": "w"})
+    await store.add_message("assistant", "hello", metadata={"workspace_id": "w"})
+
+    first = await store.get_history(50, "w", _messages_from_conversation)
+    second = await store.get_history(50, "w", _messages_from_conversation)
+
+    assert [(m.role, m.content) for m in first] == [("user", "hi"), ("assistant", "hello")]
+    assert first == second and first is not second
+    store.close()
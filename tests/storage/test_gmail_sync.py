@@ -0,0 +1,219 @@
+"""Tests for the Gmail cache sync pipeline, using a local fake transport."""
+
+from __future__ import annotations
+
+import base64
+import threading
+import time
+import types
+from typing import Any
+
+import httpx
+import pytest
+
+import src.storage.gmail_cache as gmail_cache
+from src.storage.gmail_transport import GmailHttpTransport
+
+
+class FakeGmail:
+    """In-memory Gmail: messages, a history log, and call accounting."""
+
+    def __init__(self, count: int = 0, delay: float = 0.0):
+        self.labels: dict[str, list[str]] = {}
+        self.history: list[dict[str, Any]] = []
+        self.history_id = 100
+        self.expired = False
+        self.failing: set[str] = set()
+        self.delay = delay
+        self.calls: list[tuple[str, dict[str, Any]]] = []
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        for i in range(count):
+            self.add(f"m{i}", record=False)
+
+    def add(self, msg_id: str, labels: list[str] | None = None, record: bool = True) -> None:
+        self.labels[msg_id] = labels or ["INBOX"]
+        if record:
+            self._record({"messagesAdded": [{"message": {"id": msg_id, "threadId": msg_id}}]})
+
+    def relabel(self, msg_id: str, labels: list[str]) -> None:
+        self.labels[msg_id] = labels
+        self._record({"labelsAdded": [{"message": {"id": msg_id, "labelIds": labels}}]})
+
+    def delete(self, msg_id: str) -> None:
+        del self.labels[msg_id]
+        self._record({"messagesDeleted": [{"message": {"id": msg_id}}]})
+
+    def _record(self, entry: dict[str, Any]) -> None:
+        self.history_id += 1
+        self.history.append({"id": str(self.history_id), **entry})
+
+    def call(self, method: str, params: dict[str, Any]) -> dict[str, Any] | None:
+        self.calls.append((method, params))
+        if method == "getProfile":
+            return {"historyId": str(self.history_id)}
+        if method == "messages.list":
+            return {"messages": [{"id": m, "threadId": m} for m in self.labels]}
+        if method == "history.list":
+            if self.expired:
+                return None
+            start = int(params["startHistoryId"])
+            return {"history": [h for h in self.history if int(h["id"]) > start]}
+        if method == "messages.get":
+            return self._get(params["id"])
+        raise AssertionError(method)
+
+    def _get(self, msg_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if msg_id in self.failing:
+                return None
+            body = base64.urlsafe_b64encode(f"body of {msg_id}".encode()).decode()
+            return {
+                "id": msg_id,
+                "labelIds": self.labels[msg_id],
+                "snippet": f"snippet {msg_id}",
+                "payload": {
+                    "mimeType": "text/plain",
+                    "headers": [
+                        {"name": "Subject", "value": f"subject {msg_id}"},
+                        {"name": "From", "value": "a@example.com"},
+                    ],
+                    "body": {"data": body},
+                },
+            }
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def gets(self) -> list[str]:
+        return [p["id"] for m, p in self.calls if m == "messages.get"]
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        gmail_cache,
+        "get_paths",
+        lambda uid: types.SimpleNamespace(gmail_cache_dir=lambda: tmp_path),
+    )
+    monkeypatch.setattr(gmail_cache, "_stores", {})
+    return gmail_cache.get_gmail_cache("u")
+
+
+def _sync(gmail: FakeGmail, **kwargs: Any) -> dict[str, Any]:
+    kwargs.setdefault("max_results", 100)
+    return gmail_cache.sync_emails("u", transport=gmail, progress=False, **kwargs)
+
+
+def test_first_sync_fetches_everything_then_skips_cached_ids(cache) -> None:
+    gmail = FakeGmail(5)
+
+    stats = _sync(gmail)
+
+    assert stats["mode"] == "list"
+    assert stats["fetched"] == stats["upserted"] == 5
+    assert cache.count() == 5
+    assert cache.get_by_message_id("m3").subject == "subject m3"
+    assert cache.load_sync_state() == {"history_id": "100"}
+
+    gmail.calls.clear()
+    stats = _sync(gmail, query="in:inbox")
+
+    assert stats["listed"] == stats["skipped"] == 5
+    assert gmail.gets() == []
+
+
+def test_incremental_sync_applies_history(cache) -> None:
+    gmail = FakeGmail(3)
+    _sync(gmail)
+    gmail.add("m9")
+    gmail.relabel("m0", ["INBOX", "STARRED"])
+    gmail.delete("m1")
+    gmail.calls.clear()
+
+    stats = _sync(gmail)
+
+    assert stats["mode"] == "history"
+    assert gmail.gets() == ["m9"]
+    assert not any(m == "messages.list" for m, _ in gmail.calls)
+    assert stats["labels_updated"] == 1 and stats["deleted"] == 1
+    assert cache.get_by_message_id("m0").labels == ["INBOX", "STARRED"]
+    assert cache.get_by_message_id("m1") is None
+    assert cache.get_by_message_id("m9") is not None
+    assert cache.load_sync_state() == {"history_id": str(gmail.history_id)}
+
+
+def test_expired_history_falls_back_to_listing(cache) -> None:
+    gmail = FakeGmail(2)
+    _sync(gmail)
+    gmail.add("m7")
+    gmail.expired = True
+    gmail.calls.clear()
+
+    stats = _sync(gmail)
+
+    assert stats["mode"] == "list"
+    assert stats["skipped"] == 2
+    assert gmail.gets() == ["m7"]
+
+
+def test_failed_fetch_keeps_history_cursor(cache) -> None:
+    gmail = FakeGmail(1)
+    _sync(gmail)
+    gmail.add("m5")
+    gmail.failing.add("m5")
+
+    stats = _sync(gmail)
+
+    assert stats["errors"] == 1
+    assert cache.load_sync_state() == {"history_id": "100"}
+
+    gmail.failing.clear()
+    stats = _sync(gmail)
+
+    assert stats["fetched"] == 1
+    assert cache.get_by_message_id("m5") is not None
+
+
+def test_fetches_are_bounded_concurrent(cache) -> None:
+    gmail = FakeGmail(12, delay=0.05)
+
+    _sync(gmail, concurrency=4)
+
+    assert gmail.max_in_flight == 4
+    assert cache.count() == 12
+
+
+def test_http_transport_routes_and_retries(monkeypatch) -> None:
+    monkeypatch.setattr("src.storage.gmail_transport.time.sleep", lambda s: None)
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        if len(seen) == 1:
+            return httpx.Response(429)
+        return httpx.Response(200, json={"id": "abc"})
+
+    client = httpx.Client(
+        base_url="https://gmail.test/users", transport=httpx.MockTransport(handler)
+    )
+    transport = GmailHttpTransport("token", client=client)
+
+    data = transport.call(
+        "messages.get",
+        {"userId": "me", "id": "abc", "format": "metadata", "metadataHeaders": ["From", "To"]},
+    )
+
+    assert data == {"id": "abc"}
+    assert len(seen) == 2
+    assert seen[-1].url.path == "/users/me/messages/abc"
+    assert seen[-1].url.params.get_list("metadataHeaders") == ["From", "To"]
+    assert transport.call("drafts.list", {}) is None
@@ -0,0 +1,101 @@
+"""Tests for HybridDB bulk upserts and batched embeddings."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from hybriddb import HybridDB
+from hybriddb.embedding import hash_embedding
+
+from src.storage.hybrid_bulk import EMBEDDING_MODEL_NAME, BatchEmbedder, bulk_upsert
+
+
+class _CountingModel:
+    def __init__(self) -> None:
+        self.calls: list[list[str]] = []
+
+    def __call__(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(list(texts))
+        return [[float(len(t))] * 384 for t in texts]
+
+
+@pytest.fixture
+def model() -> _CountingModel:
+    return _CountingModel()
+
+
+@pytest.fixture
+def embedder(model, monkeypatch) -> BatchEmbedder:
+    embedder = BatchEmbedder()
+    monkeypatch.setattr(embedder, "_load_model", lambda: model)
+    return embedder
+
+
+@pytest.fixture
+def db(tmp_path: Path, embedder: BatchEmbedder) -> HybridDB:
+    db = HybridDB(str(tmp_path), embedding_fn=embedder, embedding_model_name=EMBEDDING_MODEL_NAME)
+    db.create_table("docs", {"key": "TEXT", "title": "TEXT", "body": "LONGTEXT", "n": "INTEGER"})
+    return db
+
+
+def _upsert(db: HybridDB, embedder: BatchEmbedder, rows: list[dict]) -> dict[str, int]:
+    return bulk_upsert(db, "docs", "key", rows, embedder, ("body",))
+
+
+def test_partitions_inserts_updates_and_unchanged(db, embedder) -> None:
+    _upsert(
+        db, embedder, [{"key": f"k{i}", "title": "t", "body": f"b{i}", "n": "1"} for i in range(3)]
+    )
+
+    result = _upsert(
+        db,
+        embedder,
+        [
+            {"key": "k0", "title": "t", "body": "b0", "n": "1"},
+            {"key": "k1", "title": "changed", "body": "b1", "n": "1"},
+            {"key": "k3", "title": "t", "body": "old", "n": "1"},
+            {"key": "k3", "title": "t", "body": "b3", "n": "1"},
+        ],
+    )
+
+    assert result == {"inserted": 1, "updated": 1, "unchanged": 1}
+    rows = {r["key"]: r for r in db.query("docs")}
+    assert rows["k1"]["title"] == "changed"
+    assert rows["k3"]["body"] == "b3"
+    assert db.count("docs") == 4
+    assert db.journal_status("docs")["pending"] == 0
+
+
+def test_embeds_each_batch_in_one_model_call(db, embedder, model) -> None:
+    rows = [{"key": f"k{i}", "title": "t", "body": f"body {i}", "n": "1"} for i in range(20)]
+
+    _upsert(db, embedder, rows)
+
+    assert model.calls == [[f"body {i}" for i in range(20)]]
+    assert embedder._ready == {}
+
+
+def test_unchanged_batch_does_no_writes(db, embedder, monkeypatch) -> None:
+    rows = [{"key": "k", "title": "t", "body": "b", "n": "7"}]
+    _upsert(db, embedder, rows)
+    monkeypatch.setattr(db, "update", lambda *a, **k: pytest.fail("unchanged row rewritten"))
+
+    assert _upsert(db, embedder, rows)["unchanged"] == 1
+
+
+def test_unavailable_model_falls_back_to_hash_embedding(monkeypatch) -> None:
+    embedder = BatchEmbedder()
+    monkeypatch.setattr(embedder, "_load_model", lambda: None)
+
+    assert embedder.prefetch(["alpha beta", "alpha beta", ""]) == 1
+    assert embedder("alpha beta") == hash_embedding("alpha beta")
+
+
+def test_embedders_share_hybriddb_default_model(model, monkeypatch):
+    import hybriddb.embedding
+
+    monkeypatch.setattr(hybriddb.embedding, "_default_ef", model)
+
+    assert BatchEmbedder()._load_model() is model
+    assert BatchEmbedder()._load_model() is model
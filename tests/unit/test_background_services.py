@@ -41,3 +41,133 @@ class TestEmailSyncRateLimiting:
         from src.sdk.tools_core.email_sync import RATE_LIMIT_COOLDOWN
 
         assert isinstance(RATE_LIMIT_COOLDOWN, dict)
+
+
+class TestEmailSyncScheduler:
+    """Tests for the concurrent interval sync scheduler."""
+
+    @pytest.fixture(autouse=True)
+    def _clean_state(self, monkeypatch):
+        from src.sdk.tools_core import email_sync
+
+        monkeypatch.setattr(email_sync, "SYNC_METRICS", {})
+        monkeypatch.setattr(email_sync, "RATE_LIMIT_COOLDOWN", {})
+
+    @staticmethod
+    def _accounts():
+        hosts = {"a1": "imap.a.com", "a2": "imap.a.com", "a3": "imap.a.com", "b1": "imap.b.com"}
+        return {
+            account_id: {"id": account_id, "name": account_id, "imap_host": host, "folders": []}
+            for account_id, host in hosts.items()
+        }
+
+    @pytest.mark.asyncio
+    async def test_sync_all_accounts_bounds_connections_per_host(self, monkeypatch):
+        import asyncio
+
+        from src.sdk.tools_core import email_sync
+
+        monkeypatch.setattr(email_sync.SETTINGS.email_sync, "max_connections_per_host", 1)
+        monkeypatch.setattr(email_sync.SETTINGS.email_sync, "max_workers", 4)
+        accounts = self._accounts()
+        running: dict[str, int] = {}
+        peak: dict[str, int] = {}
+        peak_total = 0
+
+        async def fake_sync(user_id, account_id, folder, mode, limit):
+            nonlocal peak_total
+            host = accounts[account_id]["imap_host"]
+            running[host] = running.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), running[host])
+            peak_total = max(peak_total, sum(running.values()))
+            await asyncio.sleep(0.01)
+            running[host] -= 1
+            return 1
+
+        with (
+            patch("src.storage.user.get_all_user_ids", return_value=["u1"]),
+            patch.object(email_sync, "_load_accounts", return_value=accounts),
+            patch.object(email_sync, "_due_folders", return_value=["INBOX"]),
+            patch.object(email_sync, "_sync_emails", side_effect=fake_sync) as mock_sync,
+        ):
+            await email_sync._sync_all_accounts()
+
+        assert mock_sync.call_count == 4
+        assert peak == {"imap.a.com": 1, "imap.b.com": 1}
+        assert peak_total == 2
+        assert set(email_sync.SYNC_METRICS) == {"u1:a1", "u1:a2", "u1:a3", "u1:b1"}
+        assert all(m["last_success"] for m in email_sync.SYNC_METRICS.values())
+        assert email_sync.get_sync_metrics()["accounts"] == 4
+
+    @pytest.mark.asyncio
+    async def test_sync_all_accounts_skips_cooldown(self):
+        import time
+
+        from src.sdk.tools_core import email_sync
+
+        email_sync.RATE_LIMIT_COOLDOWN["u1:a1"] = time.time() + 60
+        accounts = {"a1": self._accounts()["a1"]}
+
+        with (
+            patch("src.storage.user.get_all_user_ids", return_value=["u1"]),
+            patch.object(email_sync, "_load_accounts", return_value=accounts),
+            patch.object(email_sync, "_sync_emails") as mock_sync,
+        ):
+            await email_sync._sync_all_accounts()
+
+        mock_sync.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_idle_push_watches_at_most_idle_max_accounts(self, monkeypatch):
+        import asyncio
+
+        from src.sdk.tools_core import email_sync
+
+        monkeypatch.setattr(email_sync.SETTINGS.email_sync, "idle_push", True)
+        monkeypatch.setattr(email_sync.SETTINGS.email_sync, "idle_max_accounts", 2)
+        monkeypatch.setattr(email_sync, "_idle_tasks", {})
+        monkeypatch.setattr(email_sync, "_running", True)
+        watched: list[str] = []
+
+        async def fake_watch(user_id, account_id, account):
+            watched.append(account_id)
+            await asyncio.sleep(60)
+
+        with (
+            patch("src.storage.user.get_all_user_ids", return_value=["u1"]),
+            patch.object(email_sync, "_load_accounts", return_value=self._accounts()),
+            patch.object(email_sync, "_due_folders", return_value=[]),
+            patch.object(email_sync, "_watch_idle", side_effect=fake_watch),
+        ):
+            await email_sync._sync_all_accounts()
+            await asyncio.sleep(0)
+            await email_sync.stop_interval_sync()
+
+        assert watched == ["a1", "a2"]
+
+    def test_due_folders_orders_by_activity_and_skips_quiet_folders(self, tmp_path):
+        import time
+
+        from sqlalchemy import create_engine, text
+
+        from src.sdk.tools_core import email_sync
+        from src.sdk.tools_core.email_db import init_db
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'email.db'}")
+        init_db(engine)
+        last_sync = int(time.time()) - email_sync.SETTINGS.email_sync.interval_minutes * 60 - 1
+        with engine.begin() as conn:
+            for folder, activity in (("Work", 3.0), ("Receipts", 1.0), ("Archive", 0.0)):
+                conn.execute(
+                    text(
+                        "INSERT INTO folder_sync_state (account_id, folder, last_sync, activity) "
+                        "VALUES ('a1', :folder, :last_sync, :activity)"
+                    ),
+                    {"folder": folder, "last_sync": last_sync, "activity": activity},
+                )
+        account = {"folders": ["Archive", "Receipts", "INBOX", "Work", "New"]}
+
+        with patch.object(email_sync, "_get_engine", return_value=engine):
+            folders = email_sync._due_folders("u1", "a1", account)
+
+        assert folders == ["INBOX", "Work", "Receipts", "New"]
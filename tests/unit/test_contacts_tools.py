@@ -9,6 +9,18 @@ TEST_USER_ID = "test_contacts_user"
 _MOCK = "src.sdk.tools_core.contacts"
 
 
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    """contacts_storage backed by a throwaway database."""
+    from src.sdk.tools_core import contacts_storage
+
+    monkeypatch.setattr(contacts_storage, "_engines", {})
+    monkeypatch.setattr(
+        contacts_storage, "get_db_path", lambda user_id: str(tmp_path / "contacts.db")
+    )
+    return contacts_storage
+
+
 class TestContactsList:
     """Tests for contacts_list tool."""
 
@@ -275,3 +287,171 @@ class TestContactsStorageFunctions:
         first, last = parse_name_from_email("john.doe@gmail.com")
         assert first == "John"
         assert last == "Doe"
+
+    def test_save_contacts_batches_dedups_and_accumulates_stats(self, storage):
+        """A batch is merged by address and upserted; stats add up across batches."""
+        batch = [
+            {"email": "Ann@X.com", "received_count": 1, "email_count": 1, "timestamp": 20},
+            {"email": "ann@x.com", "name": "Ann Lee", "email_count": 1, "timestamp": 10},
+            {"email": "bob@x.com", "sent_count": 1, "email_count": 1, "timestamp": 15},
+        ]
+        assert storage.save_contacts(TEST_USER_ID, "acc", batch) == 2
+
+        later = [
+            {
+                "email": "ann@x.com",
+                "name": "Other",
+                "sent_count": 1,
+                "email_count": 1,
+                "timestamp": 30,
+            }
+        ]
+        assert storage.save_contacts(TEST_USER_ID, "acc", later) == 0
+
+        ann = storage.get_contact(TEST_USER_ID, email="ann@x.com")
+        assert ann["name"] == "Ann Lee"
+        assert (ann["first_name"], ann["last_name"]) == ("Ann", "Lee")
+        assert (ann["email_count"], ann["sent_count"], ann["received_count"]) == (3, 1, 1)
+        assert (ann["first_seen"], ann["last_seen"]) == (10, 30)
+        assert ann["emails"] == [{"email": "ann@x.com", "is_primary": True}]
+        assert storage.get_contacts_count(TEST_USER_ID) == 2
+
+    def test_unique_index_migration_merges_duplicates(self, storage, tmp_path):
+        """Pre-existing duplicate email contacts are collapsed before the index is built."""
+        from sqlalchemy import create_engine, text
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'contacts.db'}")
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "CREATE TABLE contacts (id TEXT PRIMARY KEY, email TEXT NOT NULL, name TEXT, "
+                    "first_name TEXT, last_name TEXT, company TEXT, phone TEXT, "
+                    "source TEXT DEFAULT 'email', email_account TEXT, created_at INTEGER NOT NULL, "
+                    "updated_at INTEGER)"
+                )
+            )
+            for contact_id in ("a", "b"):
+                conn.execute(
+                    text(
+                        "INSERT INTO contacts (id, email, created_at) VALUES (:id, 'dup@x.com', 0)"
+                    ),
+                    {"id": contact_id},
+                )
+            conn.execute(text("CREATE TABLE contact_tags (contact_id TEXT NOT NULL, tag TEXT)"))
+            conn.execute(
+                text(
+                    "INSERT INTO contact_tags VALUES "
+                    "('a', 'work'), ('b', 'work'), ('b', 'vip'), ('b', 'vip')"
+                )
+            )
+
+        storage.save_contacts(TEST_USER_ID, "acc", [{"email": "dup@x.com", "email_count": 1}])
+
+        with engine.connect() as conn:
+            rows = conn.execute(text("SELECT id, email_count FROM contacts")).fetchall()
+            tags = conn.execute(text("SELECT contact_id, tag FROM contact_tags")).fetchall()
+        assert rows == [("a", 1)]
+        assert sorted(tags) == [("a", "vip"), ("a", "work")]
+
+    def test_email_sync_extracts_contacts_per_batch(self, storage, tmp_path):
+        """Sync rows become contacts; copies of a stored message aren't counted twice."""
+        from sqlalchemy import create_engine, text
+
+        from src.sdk.tools_core import email_sync
+        from src.sdk.tools_core.email_db import init_db
+
+        email_engine = create_engine(f"sqlite:///{tmp_path / 'email.db'}")
+        init_db(email_engine)
+
+        def row(uid, message_id, sender, to, folder="INBOX"):
+            return {
+                "folder": folder,
+                "message_id": uid,
+                "rfc_message_id": message_id,
+                "from_addr": sender,
+                "from_name": sender.split("@")[0].title(),
+                "to_addrs": to,
+                "cc_addrs": "",
+                "timestamp": int(uid),
+            }
+
+        insert = text(
+            "INSERT INTO emails (account_id, folder, message_id, rfc_message_id, timestamp, "
+            "created_at) VALUES ('acc', :folder, :message_id, :rfc_message_id, :timestamp, 0)"
+        )
+        with email_engine.begin() as conn:
+            conn.execute(insert, row("9", "<3@x>", "ann@x.com", "me@x.com", folder="Archive"))
+        rows = [
+            row("1", "<1@x>", "ann@x.com", "me@x.com,bob@x.com"),
+            row("2", "<2@x>", "me@x.com", "ann@x.com"),
+            row("3", "<2@x>", "me@x.com", "ann@x.com"),
+            row("4", "<3@x>", "ann@x.com", "me@x.com"),
+        ]
+        with email_engine.begin() as conn:
+            conn.execute(insert, rows)
+            email_sync._extract_contacts(conn, TEST_USER_ID, "acc", "Me@x.com", rows)
+
+        # A batch retried after its contacts were saved (emails rolled back) adds nothing.
+        with email_engine.begin() as conn:
+            email_sync._extract_contacts(conn, TEST_USER_ID, "acc", "Me@x.com", rows)
+
+        ann = storage.get_contact(TEST_USER_ID, email="ann@x.com")
+        assert (ann["email_count"], ann["sent_count"], ann["received_count"]) == (2, 1, 1)
+        assert storage.get_contact(TEST_USER_ID, email="me@x.com") is None
+        assert storage.get_contact(TEST_USER_ID, email="bob@x.com")["email_count"] == 1
+
+
+class TestContactSearchIndex:
+    """Tests for the contacts_fts trigram index behind search_contacts."""
+
+    @pytest.fixture
+    def contacts(self, storage):
+        storage.save_contacts(
+            TEST_USER_ID,
+            "acc",
+            [
+                {"email": "john.smith@acme.com", "name": "John Smith", "email_count": 2},
+                {"email": "jsmith@globex.com", "name": "Jane Smith", "email_count": 40},
+                {"email": "johanna@initech.com", "name": "Johanna Berg", "email_count": 1},
+                {"email": "bob@acme.com", "name": "Bob Jones", "email_count": 5},
+            ],
+        )
+        return storage
+
+    def _search(self, storage, query, limit=20):
+        return [
+            (c["email"], c["match"]) for c in storage.search_contacts(TEST_USER_ID, query, limit)
+        ]
+
+    def test_substring_match_ranks_frequent_contacts_first(self, contacts):
+        assert self._search(contacts, "smith") == [
+            ("jsmith@globex.com", "exact"),
+            ("john.smith@acme.com", "exact"),
+        ]
+        assert self._search(contacts, "ACME bob") == [("bob@acme.com", "exact")]
+        assert sorted(self._search(contacts, "jo")) == [
+            ("bob@acme.com", "exact"),
+            ("johanna@initech.com", "exact"),
+            ("john.smith@acme.com", "exact"),
+        ]
+
+    def test_typos_fall_back_to_fuzzy_matches(self, contacts):
+        assert self._search(contacts, "Jonh") == [
+            ("john.smith@acme.com", "fuzzy"),
+            ("bob@acme.com", "fuzzy"),
+        ]
+        assert self._search(contacts, "jahn smiht") == [("john.smith@acme.com", "fuzzy")]
+        assert self._search(contacts, "zzyzx") == []
+
+    def test_index_follows_updates_and_deletes(self, contacts):
+        contacts.update_contact(TEST_USER_ID, email="bob@acme.com", name="Robert Jones")
+        assert self._search(contacts, "robert") == [("bob@acme.com", "exact")]
+        assert self._search(contacts, "bob jones") == [("bob@acme.com", "exact")]
+
+        contacts.delete_contact(TEST_USER_ID, email="bob@acme.com")
+        assert self._search(contacts, "jones") == []
+        assert contacts.rebuild_search_index(TEST_USER_ID) == 3
+        assert self._search(contacts, "berg") == [("johanna@initech.com", "exact")]
+
+    def test_single_letter_query_scans(self, contacts):
+        assert self._search(contacts, "J", limit=1) == [("jsmith@globex.com", "exact")]
@@ -0,0 +1,196 @@
+"""Unit tests for the trigger-maintained email counters."""
+
+import time
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from src.sdk.tools_core.email_db import (
+    delete_account,
+    email_counter_totals,
+    get_email_counters,
+    init_db,
+)
+from src.sdk.tools_core.imap_sync import _INSERT_EMAIL
+
+NOW = int(time.time())
+
+
+def _email(uid, folder="INBOX", ts=NOW, read=0, flagged=0, has_attachments=0):
+    return {
+        "account_id": "acc",
+        "folder": folder,
+        "message_id": uid,
+        "rfc_message_id": None,
+        "from_addr": "a@example.com",
+        "from_name": "A",
+        "to_addrs": "me@example.com",
+        "cc_addrs": "",
+        "subject": "hi",
+        "body_text": "body",
+        "timestamp": ts,
+        "in_reply_to": None,
+        "thread_references": None,
+        "is_forwarded": 0,
+        "read": read,
+        "flagged": flagged,
+        "has_attachments": has_attachments,
+        "attachments": None,
+        "tags": None,
+        "created_at": 0,
+        "body_fetched": 1,
+    }
+
+
+def _counts(engine):
+    return {
+        row["folder"]: {k: row[k] for k in ("total", "unread", "flagged", "recent")}
+        for row in get_email_counters(engine)
+    }
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'email.db'}")
+    init_db(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO accounts (id, name, email, password, imap_host, smtp_host, "
+                "provider, folders, created_at) "
+                "VALUES ('acc', 'Work', 'me@example.com', '', 'imap', 'smtp', 'custom', "
+                "'INBOX', 0)"
+            )
+        )
+    return engine
+
+
+class TestCounterTriggers:
+    def test_sync_upserts_and_flag_changes(self, engine):
+        with engine.begin() as conn:
+            conn.execute(
+                _INSERT_EMAIL,
+                [
+                    _email("1", flagged=1),
+                    _email("2", ts=NOW - 3 * 86400, has_attachments=1),
+                    _email("3", folder="Sent", read=1),
+                ],
+            )
+        assert _counts(engine) == {
+            "INBOX": {"total": 2, "unread": 2, "flagged": 1, "recent": 1},
+            "Sent": {"total": 1, "unread": 0, "flagged": 0, "recent": 1},
+        }
+
+        # Re-syncing unchanged rows is a no-op; changed flags move their counts.
+        with engine.begin() as conn:
+            conn.execute(
+                _INSERT_EMAIL, [_email("1", flagged=1), _email("2", ts=NOW - 3 * 86400, read=1)]
+            )
+        assert email_counter_totals(engine) == {
+            "total": 3,
+            "unread": 1,
+            "flagged": 1,
+            "with_attachments": 0,
+            "recent": 2,
+            "recent_unread": 1,
+            "accounts": 1,
+        }
+
+    def test_email_get_marks_read(self, engine):
+        from src.sdk.tools_core.email import email_get
+
+        with engine.begin() as conn:
+            conn.execute(_INSERT_EMAIL, [_email("1"), _email("2")])
+
+        with (
+            patch("src.sdk.tools_core.email.get_engine", return_value=engine),
+            patch("src.sdk.tools_core.email.get_account_id_by_name", return_value="acc"),
+        ):
+            email_get.invoke({"account_name": "Work", "email_id": "1", "user_id": "u"})
+
+        assert _counts(engine)["INBOX"]["unread"] == 1
+
+    def test_deletes_and_account_removal(self, engine):
+        with engine.begin() as conn:
+            conn.execute(_INSERT_EMAIL, [_email("1"), _email("2")])
+            conn.execute(text("DELETE FROM emails WHERE message_id = '1'"))
+        assert _counts(engine)["INBOX"] == {"total": 1, "unread": 1, "flagged": 0, "recent": 1}
+
+        with patch("src.sdk.tools_core.email_db.get_engine", return_value=engine):
+            delete_account("u", "acc")
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM email_counters")).scalar() == 0
+            assert conn.execute(text("SELECT COUNT(*) FROM email_counter_hours")).scalar() == 0
+
+    def test_existing_mail_is_counted_on_upgrade(self, engine):
+        with engine.begin() as conn:
+            conn.execute(_INSERT_EMAIL, [_email("1", flagged=1), _email("2", read=1)])
+            for trigger in ("email_counters_ai", "email_counters_ad", "email_counters_au"):
+                conn.execute(text(f"DROP TRIGGER {trigger}"))
+            conn.execute(text("DROP TABLE email_counters"))
+            conn.execute(text("DROP TABLE email_counter_hours"))
+
+        init_db(engine)
+
+        assert _counts(engine) == {"INBOX": {"total": 2, "unread": 1, "flagged": 1, "recent": 2}}
+
+
+class TestCounterConsumers:
+    async def test_companion_and_turn_context_read_counters(self, engine):
+        from src.sdk import runner
+        from src.sdk.companion_scheduler import _email_counts
+        from src.sdk.messages import Message
+
+        with engine.begin() as conn:
+            conn.execute(_INSERT_EMAIL, [_email("1", flagged=1), _email("2", read=1)])
+
+        history = [Message.user("hi"), Message.assistant("hello"), Message.user("any news?")]
+        with (
+            patch("src.sdk.tools_core.email_db.get_engine", return_value=engine),
+            patch("src.sdk.tools_core.email_db.get_read_engine", return_value=engine),
+        ):
+            counts = _email_counts("u")
+            sent = await runner._with_turn_context("u", history)
+
+        assert (counts["unread"], counts["flagged"], counts["recent"]) == (1, 1, 2)
+        # Only the newest user message carries the counts; the history is untouched.
+        assert [m.content for m in sent[:2]] == ["hi", "hello"]
+        assert history[2].content == "any news?"
+        context, _, question = str(sent[2].content).rpartition("\n\n")
+        assert question == "any news?"
+        assert "1 unread across 1 account(s), 1 flagged" in context
+        assert "2 received in the last 24h (1 unread)" in context
+
+    def test_read_engine_is_cached_and_never_creates_the_database(self, engine, tmp_path):
+        from src.sdk.tools_core import email_db
+
+        missing = str(tmp_path / "missing.db")
+        existing = str(engine.url.database)
+        with patch.object(email_db, "get_db_path", return_value=missing):
+            assert email_db.get_read_engine("u") is None
+        assert not (tmp_path / "missing.db").exists()
+
+        with (
+            patch.object(email_db, "get_db_path", return_value=existing),
+            patch.object(email_db, "init_db") as init,
+        ):
+            first = email_db.get_read_engine("u")
+            assert email_db.get_read_engine("u") is first
+        init.assert_not_called()
+        assert email_counter_totals(first)["accounts"] == 0
+        email_db._read_engines.pop(existing).dispose()
+
+    def test_system_prompt_has_no_mailbox_counts(self, engine):
+        from src.sdk import runner
+
+        with engine.begin() as conn:
+            conn.execute(_INSERT_EMAIL, [_email("1")])
+
+        with (
+            patch("src.sdk.tools_core.email_db.get_engine", return_value=engine),
+            patch("src.sdk.tools_core.email_db.get_db_path", return_value=str(engine.url.database)),
+        ):
+            prompt = runner._get_system_prompt("u")
+
+        assert "unread across" not in prompt
@@ -0,0 +1,153 @@
+"""Unit tests for the FTS5 email search index."""
+
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from src.sdk.tools_core.email_db import build_fts_query, init_db, search_emails
+
+
+def _insert(conn, message_id, subject="", body="", folder="INBOX", timestamp=1, **extra):
+    row = {
+        "account_id": "acc",
+        "folder": folder,
+        "message_id": message_id,
+        "from_addr": "sender@example.com",
+        "from_name": "Sender",
+        "to_addrs": "me@example.com",
+        "subject": subject,
+        "body_text": body,
+        "timestamp": timestamp,
+        "created_at": 0,
+        **extra,
+    }
+    conn.execute(
+        text(f"INSERT INTO emails ({', '.join(row)}) VALUES ({', '.join(':' + k for k in row)})"),
+        row,
+    )
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'email.db'}")
+    init_db(engine)
+    return engine
+
+
+def _ids(rows):
+    return [r["message_id"] for r in rows]
+
+
+class TestBuildFtsQuery:
+    def test_words_are_quoted_and_anded(self):
+        assert build_fts_query("quarterly report") == '"quarterly" "report"'
+
+    def test_phrases_prefixes_and_or(self):
+        assert build_fts_query('"board meeting" OR invoi*') == '"board meeting" OR "invoi"*'
+
+    def test_fts_syntax_is_treated_as_text(self):
+        assert build_fts_query('subject:x NEAR( "a""b"') == '"subject:x" "NEAR(" "a" "b"'
+        assert build_fts_query("OR OR") == ""
+        assert build_fts_query('"" *') == ""
+
+
+class TestSearchEmails:
+    def test_matches_body_and_ranks_subject_hits_first(self, engine):
+        with engine.begin() as conn:
+            _insert(conn, "1", subject="Lunch", body="the budget numbers are in", timestamp=5)
+            _insert(conn, "2", subject="Budget review", body="see attached", timestamp=1)
+            _insert(conn, "3", subject="Other", body="nothing here", timestamp=9)
+
+        rows = search_emails(engine, "budget")
+
+        assert _ids(rows) == ["2", "1"]
+        assert rows[0]["snippet"] == "[Budget] review"
+        assert "[budget]" in rows[1]["snippet"]
+
+    def test_prefix_and_filters(self, engine):
+        with engine.begin() as conn:
+            _insert(conn, "1", subject="Invoice 42", timestamp=100)
+            _insert(conn, "2", subject="Invoices due", folder="Archive", timestamp=200)
+            _insert(conn, "3", subject="Invoicing policy", timestamp=300)
+
+        assert set(_ids(search_emails(engine, "invoic*"))) == {"1", "2", "3"}
+        assert set(_ids(search_emails(engine, "invoic*", folder="INBOX"))) == {"1", "3"}
+        assert _ids(search_emails(engine, "invoic*", since=150, until=300)) == ["2"]
+        assert search_emails(engine, "invoic*", account_id="other") == []
+
+    def test_index_follows_updates_upserts_and_deletes(self, engine):
+        from src.sdk.tools_core.imap_sync import _INSERT_EMAIL
+
+        with engine.begin() as conn:
+            _insert(conn, "1", subject="Draft agenda")
+            conn.execute(text("UPDATE emails SET subject = 'Final agenda' WHERE message_id = '1'"))
+        assert _ids(search_emails(engine, "final")) == ["1"]
+        assert search_emails(engine, "draft") == []
+
+        row = {
+            "account_id": "acc",
+            "folder": "INBOX",
+            "message_id": "1",
+            "rfc_message_id": None,
+            "from_addr": "a@example.com",
+            "from_name": "",
+            "to_addrs": "",
+            "cc_addrs": "",
+            "subject": "Rescheduled agenda",
+            "body_text": "",
+            "timestamp": 1,
+            "in_reply_to": None,
+            "thread_references": None,
+            "is_forwarded": 0,
+            "read": 0,
+            "flagged": 0,
+            "has_attachments": 0,
+            "attachments": "[]",
+            "tags": "",
+            "created_at": 0,
+            "body_fetched": 1,
+        }
+        with engine.begin() as conn:
+            conn.execute(_INSERT_EMAIL, [row])
+        assert search_emails(engine, "final") == []
+        assert _ids(search_emails(engine, "rescheduled")) == ["1"]
+
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM emails"))
+        assert search_emails(engine, "agenda") == []
+        with engine.connect() as conn:
+            integrity = "INSERT INTO emails_fts(emails_fts, rank) VALUES ('integrity-check', 1)"
+            conn.execute(text(integrity))
+
+    def test_existing_mail_is_indexed_when_index_is_created(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        init_db(engine)
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE emails_fts"))
+            for trigger in ("emails_fts_ai", "emails_fts_ad", "emails_fts_au"):
+                conn.execute(text(f"DROP TRIGGER {trigger}"))
+            _insert(conn, "1", subject="Synced before search existed")
+
+        init_db(engine)
+
+        assert _ids(search_emails(engine, "synced")) == ["1"]
+
+
+class TestEmailSearchTool:
+    def test_searches_all_folders_with_date_filter(self, engine):
+        from src.sdk.tools_core.email import email_search
+
+        with engine.begin() as conn:
+            _insert(conn, "7", subject="Contract renewal", folder="Legal", timestamp=1_700_000_000)
+
+        with patch("src.sdk.tools_core.email.get_engine", return_value=engine):
+            result = email_search.invoke(
+                {"query": "renewal", "folder": "", "since": "2023-01-01", "user_id": "u"}
+            )
+            bad_date = email_search.invoke({"query": "renewal", "since": "01/01", "user_id": "u"})
+
+        assert "Found 1 emails" in result
+        assert "(Legal)" in result
+        assert "[renewal]" in result
+        assert "YYYY-MM-DD" in bad_date
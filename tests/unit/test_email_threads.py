@@ -0,0 +1,198 @@
+"""Unit tests for the email thread index."""
+
+from unittest.mock import patch
+
+import pytest
+from imap_tools import MailMessage
+from sqlalchemy import create_engine, text
+
+from src.sdk.tools_core.email_db import delete_account, init_db
+from src.sdk.tools_core.email_sync import _email_to_dict
+from src.sdk.tools_core.email_threads import (
+    backfill_threads,
+    get_thread,
+    message_ids,
+    subject_key,
+    thread_messages,
+)
+
+DAY = 24 * 3600
+
+
+def _row(uid, mid=None, subject="Budget", ts=1_700_000_000, folder="INBOX", **extra):
+    return {
+        "account_id": "acc",
+        "folder": folder,
+        "message_id": uid,
+        "rfc_message_id": f"<{mid}>" if mid else None,
+        "from_addr": f"{uid}@example.com",
+        "to_addrs": "Me <me@example.com>",
+        "subject": subject,
+        "body_text": f"body {uid}",
+        "timestamp": ts,
+        "created_at": 0,
+        **extra,
+    }
+
+
+def _store(engine, *rows, thread=True):
+    with engine.begin() as conn:
+        for row in rows:
+            conn.execute(
+                text(
+                    f"INSERT INTO emails ({', '.join(row)}) "
+                    f"VALUES ({', '.join(':' + k for k in row)})"
+                ),
+                row,
+            )
+        if thread:
+            thread_messages(conn, "acc", rows)
+
+
+def _threads(engine):
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT message_id, thread_id FROM emails ORDER BY message_id"))
+        return {r[0]: r[1] for r in rows}
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'email.db'}")
+    init_db(engine)
+    return engine
+
+
+class TestParsing:
+    def test_message_ids(self):
+        assert message_ids("<a@x> <b@x>\r\n\t<a@x>") == ["a@x", "b@x"]
+        assert message_ids("bare@x") == ["bare@x"]
+        assert message_ids(None) == []
+
+    def test_subject_key_strips_reply_prefixes(self):
+        assert subject_key("Re: FWD: re[2]:  Budget  Q3") == "budget q3"
+        assert subject_key("Reply needed") == "reply needed"
+
+    def test_to_dict_captures_threading_headers(self):
+        msg = MailMessage.from_bytes(
+            b"Message-ID: <c@x>\r\nIn-Reply-To: <b@x>\r\nReferences: <a@x>\r\n <b@x>\r\n"
+            b"Subject: Re: hi\r\n\r\nbody"
+        )
+        data = _email_to_dict(msg)
+        assert data["rfc_message_id"] == "<c@x>"
+        assert data["in_reply_to"] == "<b@x>"
+        assert data["thread_references"] == "<a@x> <b@x>"
+
+
+class TestThreadMessages:
+    def test_replies_join_their_parent_in_any_order(self, engine):
+        _store(engine, _row("3", "c", "Re: Budget", ts=3, thread_references="<a> <b>"))
+        _store(engine, _row("1", "a", ts=1), _row("2", "b", "Re: Budget", ts=2, in_reply_to="<a>"))
+
+        threads = _threads(engine)
+        assert len(set(threads.values())) == 1
+
+        thread, messages = get_thread(engine, "acc", threads["1"])
+        assert [m["message_id"] for m in messages] == ["1", "2", "3"]
+        assert thread["subject"] == "Budget"
+        assert thread["message_count"] == 3
+        assert thread["unread_count"] == 3
+        assert (thread["first_activity"], thread["last_activity"]) == (1, 3)
+        assert "me@example.com" in thread["participants"]
+
+    def test_message_citing_two_threads_merges_them(self, engine):
+        _store(engine, _row("1", "a", "Plan", ts=1), _row("2", "b", "Other", ts=5))
+        assert len(set(_threads(engine).values())) == 2
+
+        _store(engine, _row("3", "c", "Re: Plan", ts=9, thread_references="<a> <b>"))
+
+        threads = _threads(engine)
+        assert len(set(threads.values())) == 1
+        with engine.connect() as conn:
+            rows = conn.execute(text("SELECT thread_id, message_count FROM threads")).fetchall()
+        assert rows == [(threads["1"], 3)]
+
+    def test_reply_subject_without_references_joins_recent_thread(self, engine):
+        _store(engine, _row("1", "a", "Offsite", ts=0))
+        _store(engine, _row("2", "b", "RE: offsite", ts=DAY))
+        _store(engine, _row("3", "c", "Re: Offsite", ts=90 * DAY))
+        _store(engine, _row("4", "d", "Offsite", ts=DAY))
+
+        threads = _threads(engine)
+        assert threads["2"] == threads["1"]
+        assert threads["3"] != threads["1"]
+        assert threads["4"] != threads["1"]
+
+    def test_copies_in_several_folders_count_once(self, engine):
+        _store(engine, _row("1", "a"), _row("9", "a", folder="All Mail", read=1))
+
+        threads = _threads(engine)
+        thread, messages = get_thread(engine, "acc", threads["1"])
+        assert threads["1"] == threads["9"]
+        assert thread["message_count"] == 1
+        assert thread["unread_count"] == 0
+        assert [m["folder"] for m in messages] == ["INBOX"]
+
+    def test_delete_account_drops_threads(self, engine):
+        _store(engine, _row("1", "a"))
+        with patch("src.sdk.tools_core.email_db.get_engine", return_value=engine):
+            delete_account("u", "acc")
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM threads")).scalar() == 0
+            assert conn.execute(text("SELECT COUNT(*) FROM thread_links")).scalar() == 0
+
+
+class TestBackfill:
+    def test_fetches_missing_headers_then_threads_oldest_first(self, engine):
+        _store(engine, _row("1", ts=1), _row("2", subject="Budget ok", ts=2), thread=False)
+        fetched = []
+
+        def fetch_headers(folder, uids):
+            fetched.append((folder, sorted(uids)))
+            server = {
+                "1": {"rfc_message_id": "<a>"},
+                "2": {"rfc_message_id": "<b>", "in_reply_to": "<a>"},
+            }
+            return {uid: server[uid] for uid in uids}
+
+        stats = backfill_threads(engine, "acc", fetch_headers=fetch_headers, batch_size=1)
+
+        assert fetched == [("INBOX", ["1"]), ("INBOX", ["2"])]
+        assert stats == {"headers_fetched": 2, "threaded": 2, "threads": 1}
+        assert len(set(_threads(engine).values())) == 1
+        assert backfill_threads(engine, "acc", fetch_headers=fetch_headers)["threaded"] == 0
+        assert len(fetched) == 2
+
+
+class TestEmailThreadTool:
+    def test_returns_thread_from_any_message(self, engine):
+        from src.sdk.tools_core.email import email_thread
+
+        _store(
+            engine,
+            _row("1", "a", ts=1_700_000_000),
+            _row(
+                "2",
+                "b",
+                "Re: Budget",
+                ts=1_700_000_100,
+                in_reply_to="<a>",
+                body_text="Approved.\n> body 1",
+            ),
+        )
+
+        with (
+            patch("src.sdk.tools_core.email.get_engine", return_value=engine),
+            patch("src.sdk.tools_core.email.get_account_id_by_name", return_value="acc"),
+        ):
+            result = email_thread.invoke({"account_name": "Work", "email_id": "2", "user_id": "u"})
+            latest = email_thread.invoke(
+                {"account_name": "Work", "email_id": "2", "limit": 1, "user_id": "u"}
+            )
+            missing = email_thread.invoke({"account_name": "Work", "email_id": "7", "user_id": "u"})
+
+        assert "Thread: Budget" in result
+        assert "Messages: 2 (2 unread)" in result
+        assert result.index("body 1") < result.index("Approved.")
+        assert "> body 1" not in result
+        assert "showing the last 1" in latest and "body 1" not in latest
+        assert "not found" in missing
@@ -0,0 +1,122 @@
+"""Unit tests for the workspace trigram file index."""
+
+import os
+import re
+
+import pytest
+
+from src.sdk.tools_core.file_index import FileIndex, IgnoreRules, query_plan
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "Files"
+    (root / "src").mkdir(parents=True)
+    (root / "src" / "app.py").write_text("def handler():\n    return fetch_invoice(42)\n")
+    (root / "src" / "util.py").write_text("def helper():\n    pass\n")
+    (root / "notes.md").write_text("Invoice #42 is overdue\n")
+    (root / "logo.png").write_bytes(b"\x89PNG\0\0fetch_invoice")
+    return root
+
+
+@pytest.fixture
+def index(tree, tmp_path):
+    index = FileIndex(tree, tmp_path / "index.db")
+    index.reconcile()
+    return index
+
+
+def _search(index, pattern, flags=0, **kwargs):
+    return [(m.path, m.line) for m in index.search(re.compile(pattern, flags), **kwargs)]
+
+
+class TestQueryPlan:
+    def test_literals_alternation_and_optional_parts(self):
+        assert query_plan(r"fetch_\w+\(") == ("lit", "fetch_")
+        assert query_plan(r"def (handler|helper)\(") == (
+            "and",
+            [("lit", "def "), ("or", [("lit", "handler"), ("lit", "helper")])],
+        )
+        assert query_plan(r"^import\b") == ("lit", "import")
+        assert query_plan(r"(?:abc)?xy") == ("and", [])
+        assert query_plan(r"foo|.*") == ("and", [])
+
+    def test_repeats_escapes_and_groups(self):
+        # One copy of a repeated character ends a run and one starts the next.
+        assert query_plan(r"abc+def") == ("and", [("lit", "abc"), ("lit", "cdef")])
+        assert query_plan(r"(foo){0,2}barbaz") == ("lit", "barbaz")
+        assert query_plan(r"\d{2,}xyz[]abc]qqq") == ("and", [("lit", "xyz"), ("lit", "qqq")])
+        assert query_plan(r"(?P<n>hello)\s+wor\x6cd") == (
+            "and",
+            [("lit", "hello"), ("lit", "world")],
+        )
+        assert query_plan(r"(?#note)hello(?=xyz)") == ("lit", "hello")
+        assert query_plan("abc def", re.VERBOSE) == ("and", [])
+        assert query_plan("(unclosed") == ("and", [])
+
+    def test_case_insensitive_non_ascii_is_not_narrowed(self):
+        assert query_plan("straße", re.IGNORECASE) == ("and", [])
+        assert query_plan("straße") == ("lit", "straße")
+        assert query_plan("(?i)straße") == ("and", [])
+        assert query_plan("(?i:straße)abc") == ("lit", "abc")
+
+
+class TestIgnoreRules:
+    def test_gitignore_semantics(self):
+        rules = IgnoreRules(
+            ["# comment", "*.log", "build/", "/top.txt", "docs/**/*.tmp", "!keep.log"]
+        )
+        assert rules.ignored("a/b/debug.log")
+        assert not rules.ignored("keep.log")
+        assert rules.ignored("build", is_dir=True)
+        assert rules.ignored("build/out.js")
+        assert not rules.ignored("build")
+        assert rules.ignored("top.txt") and not rules.ignored("sub/top.txt")
+        assert rules.ignored("docs/x/y/z.tmp") and not rules.ignored("z.tmp")
+
+
+class TestFileIndex:
+    def test_prefilter_and_verification(self, index):
+        assert _search(index, r"fetch_invoice\(") == [("src/app.py", 2)]
+        assert _search(index, "INVOICE", re.IGNORECASE) == [
+            ("notes.md", 1),
+            ("src/app.py", 2),
+        ]
+        assert _search(index, r"def (handler|helper)") == [("src/app.py", 1), ("src/util.py", 1)]
+        assert _search(index, r"\d+") == [("notes.md", 1), ("src/app.py", 2)]
+
+    def test_filters(self, index):
+        assert _search(index, "def", under="src", include="util.*") == [("src/util.py", 1)]
+        assert _search(index, "def", exclude=IgnoreRules(["app.py"])) == [("src/util.py", 1)]
+
+    def test_reconcile_reads_only_changed_files(self, index, tree):
+        app = tree / "src" / "app.py"
+        app.write_text("def handler():\n    return fetch_receipt(42)\n")
+        os.utime(app, ns=(1, 1))
+        (tree / "notes.md").unlink()
+        (tree / "new.txt").write_text("fetch_receipt later\n")
+
+        assert index.reconcile() == {"indexed": 2, "removed": 1, "files": 4}
+        assert index.reconcile()["indexed"] == 0
+        assert _search(index, "fetch_receipt") == [("new.txt", 1), ("src/app.py", 2)]
+        assert _search(index, "invoice", re.IGNORECASE) == []
+
+    def test_ensure_fresh_walks_only_the_subtree_within_ttl(self, index, tree):
+        (tree / "src" / "new.py").write_text("def fresh():\n")
+        (tree / "late.md").write_text("def late():\n")
+
+        # The fixture just reconciled the whole tree, which covers src too.
+        index.ensure_fresh(tree / "src", max_age=60)
+        assert _search(index, "def (fresh|late)") == []
+
+        index.ensure_fresh(tree / "src", max_age=0)
+        assert _search(index, "def (fresh|late)") == [("src/new.py", 1)]
+
+    def test_refresh_paths_and_gitignore(self, index, tree):
+        (tree / "src").rename(tree / "lib")
+        index.refresh([tree / "src", tree / "lib"])
+        assert _search(index, "def helper") == [("lib/util.py", 1)]
+
+        (tree / ".gitignore").write_text("lib/\n")
+        index.reconcile()
+        assert _search(index, "def helper") == []
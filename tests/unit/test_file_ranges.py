@@ -0,0 +1,150 @@
+"""Unit tests for mmap-backed line ranges, tails and in-place edits."""
+
+import os
+import random
+
+import pytest
+
+from src.sdk.tools_core import file_ranges
+from src.sdk.tools_core.file_ranges import (
+    line_index,
+    read_appended,
+    read_lines,
+    replace_in_place,
+    tail_lines,
+)
+
+
+@pytest.fixture(autouse=True)
+def small_blocks(monkeypatch):
+    """Shrink the index block so small fixtures span many blocks."""
+    monkeypatch.setattr(file_ranges, "BLOCK", 64)
+    monkeypatch.setattr(file_ranges, "_READ_CHUNK", 256)
+    file_ranges._indexes.clear()
+
+
+def _log(tmp_path, lines, trailing_newline=True):
+    text = "\n".join(lines) + ("\n" if trailing_newline else "")
+    path = tmp_path / "app.log"
+    path.write_bytes(text.encode())
+    return path, text
+
+
+class TestReadLines:
+    @pytest.mark.parametrize("trailing_newline", [True, False])
+    def test_matches_splitlines(self, tmp_path, trailing_newline):
+        rng = random.Random(1)
+        lines = ["x" * rng.randint(0, 150) + f" {i}" for i in range(300)]
+        lines[7] = ""
+        path, text = _log(tmp_path, lines, trailing_newline)
+        expected = text.splitlines()
+
+        for offset, limit in [(0, 10), (1, 1), (57, 40), (295, 10), (299, 1), (300, 5), (-5, 3)]:
+            got, start, total = read_lines(path, offset, limit)
+            begin = offset if offset >= 0 else len(expected) + offset
+            assert (got, start, total) == (expected[begin : begin + limit], begin, len(expected))
+
+    def test_crlf_and_index_cache(self, tmp_path):
+        path = tmp_path / "win.txt"
+        path.write_bytes(b"one\r\ntwo\r\nthree")
+        assert read_lines(path, 1, 5) == (["two", "three"], 1, 3)
+
+        index = line_index(path)
+        assert line_index(path) is index
+        path.write_bytes(b"one\r\ntwo\r\nthree\r\nfour\r\n")
+        assert line_index(path) is not index
+        assert read_lines(path, -1, 5) == (["four"], 3, 4)
+
+
+class TestTail:
+    def test_tail_and_follow(self, tmp_path):
+        path, _ = _log(tmp_path, [f"line {i}" for i in range(100)])
+
+        lines, cursor = tail_lines(path, 3)
+        assert lines == ["line 97", "line 98", "line 99"]
+        assert read_appended(path, cursor, 10) == ([], cursor, False)
+
+        with open(path, "a") as f:
+            f.write("line 100\nline 101\npartial")
+        lines, cursor, restarted = read_appended(path, cursor, 10)
+        assert (lines, restarted) == (["line 100", "line 101"], False)
+
+        with open(path, "a") as f:
+            f.write(" done\n")
+        assert read_appended(path, cursor, 10)[0] == ["partial done"]
+
+        path.write_text("rotated\n")
+        assert read_appended(path, cursor, 10) == (["rotated"], 8, True)
+
+
+class TestReplaceInPlace:
+    @pytest.mark.parametrize("new", ["ERR", "ERROR!!", "E", ""])
+    def test_matches_str_replace(self, tmp_path, new):
+        text = "".join(f"{'ERR' if i % 7 == 0 else 'ok'} event {i}\n" for i in range(200))
+        path = tmp_path / "big.log"
+        path.write_text(text)
+
+        assert replace_in_place(path, b"ERR", new.encode()) == text.count("ERR")
+        assert path.read_text() == text.replace("ERR", new)
+
+    def test_resize_replaces_the_file_atomically(self, tmp_path):
+        path = tmp_path / "big.log"
+        path.write_text("a ERR b ERR c\n")
+        path.chmod(0o640)
+        assert replace_in_place(path, b"ERR", b"ERROR") == 2
+        assert path.read_text() == "a ERROR b ERROR c\n"
+        assert os.stat(path).st_mode & 0o777 == 0o640
+        assert [p.name for p in tmp_path.iterdir()] == ["big.log"]
+
+    def test_missing_text_leaves_file_untouched(self, tmp_path):
+        path = tmp_path / "big.log"
+        path.write_text("hello\n")
+        mtime = os.stat(path).st_mtime_ns
+        assert replace_in_place(path, b"absent", b"x") == 0
+        assert os.stat(path).st_mtime_ns == mtime
+
+
+class TestLargeFileTools:
+    @pytest.fixture
+    def workspace(self, tmp_path, monkeypatch):
+        from src.storage.paths import DataPaths
+
+        def mock_get_paths(user_id="default_user", workspace_id="personal"):
+            return DataPaths(ea_root=str(tmp_path), user_id=user_id, workspace_id=workspace_id)
+
+        monkeypatch.setattr("src.sdk.tools_core.filesystem.get_paths", mock_get_paths)
+        monkeypatch.setattr("src.sdk.tools_core.filesystem.LARGE_FILE_BYTES", 1024)
+        return mock_get_paths("u").workspace_files_dir()
+
+    def test_read_edit_and_tail(self, workspace):
+        from src.sdk.tools_core.filesystem import files_edit, files_read, files_tail
+
+        (workspace / "app.log").write_text("".join(f"event {i}\n" for i in range(500)))
+
+        result = files_read.invoke({"path": "app.log", "offset": 250, "limit": 2, "user_id": "u"})
+        assert result == "--- app.log (250-252/500) ---\nevent 250\nevent 251"
+
+        assert (
+            files_edit.invoke(
+                {"path": "app.log", "old": "event 250\n", "new": "EVENT 250!\n", "user_id": "u"}
+            )
+            == "Edited app.log (1 replacement). "
+            "Warning: the file is too large to version, so this edit cannot be restored."
+        )
+        assert "EVENT 250!" in files_read.invoke(
+            {"path": "app.log", "offset": 250, "limit": 1, "user_id": "u"}
+        )
+
+        tail = files_tail.invoke({"path": "app.log", "lines": 1, "user_id": "u"})
+        header, body = tail.split("\n", 1)
+        assert body == "event 499"
+        cursor = int(header.split("cursor=")[1].rstrip(") -"))
+
+        with open(workspace / "app.log", "a") as f:
+            f.write("event 500\n")
+        follow = files_tail.invoke(
+            {"path": "app.log", "cursor": cursor, "wait_seconds": 1, "user_id": "u"}
+        )
+        assert follow.startswith("--- app.log (1 new lines, cursor=") and follow.endswith(
+            "event 500"
+        )
@@ -0,0 +1,151 @@
+"""Unit tests for the shared filesystem watcher."""
+
+import asyncio
+import re
+from pathlib import Path
+
+import pytest
+from watchfiles import Change
+
+from src.sdk.file_watcher import FileEvent, FileWatcher, _watch_roots, classify
+from src.storage.paths import DataPaths
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return DataPaths(ea_root=str(tmp_path), user_id="watcher_user", workspace_id="personal")
+
+
+@pytest.fixture
+def watcher(paths):
+    watcher = FileWatcher(get_paths=lambda **_: paths, debounce_ms=50, poll_delay_ms=50)
+    yield watcher
+    watcher.close()
+
+
+async def _collect(queue, count, timeout=5.0):
+    events = []
+    async with asyncio.timeout(timeout):
+        while len(events) < count:
+            events.append(await queue.get())
+    return events
+
+
+class TestClassify:
+    def test_categories_and_batch_merging(self, paths):
+        roots = _watch_roots(paths)
+        files = paths.workspace_files_dir().resolve()
+        skills = paths.user_skills_dir().resolve()
+        tools = paths.workspace_tools_dir().resolve()
+        changes = [
+            (Change.added, str(files / "notes" / "a.md")),
+            (Change.modified, str(files / "notes" / "a.md")),
+            (Change.modified, str(files / "b.md")),
+            (Change.deleted, str(files / "b.md")),
+            (Change.modified, str(skills / "triage" / "SKILL.md")),
+            (Change.added, str(skills / "triage" / "notes.txt")),
+            (Change.added, str(tools / "jq" / "TOOL.md")),
+            (Change.added, str(tools / ".index" / "tools.db")),
+            (Change.added, "/elsewhere/file.txt"),
+        ]
+        assert sorted(classify(roots, changes), key=lambda e: (e.category, e.path)) == [
+            FileEvent("skills", "triage", "modified"),
+            FileEvent("tools", "jq", "created"),
+            FileEvent("workspace", "b.md", "deleted"),
+            FileEvent("workspace", "notes/a.md", "created"),
+        ]
+
+
+class TestFileWatcher:
+    async def test_subscribers_share_one_watch(self, watcher, paths):
+        batches = []
+        watcher.add_listener(lambda p, events: batches.append((p, events)))
+        files = paths.workspace_files_dir()
+
+        async with (
+            watcher.subscribe("watcher_user", "personal") as first,
+            watcher.subscribe("watcher_user", "personal") as second,
+        ):
+            assert watcher.watching() == [("watcher_user", "personal")]
+            await asyncio.sleep(0.3)
+            (files / "report.md").write_text("draft")
+
+            expected = FileEvent("workspace", "report.md", "created")
+            assert expected in await _collect(first, 1)
+            assert expected in await _collect(second, 1)
+            assert batches and batches[0][0] is paths
+
+        assert watcher.watching() == []
+
+    async def test_polling_mode_reports_skill_changes(self, paths):
+        watcher = FileWatcher(
+            get_paths=lambda **_: paths, debounce_ms=50, poll_delay_ms=50, force_polling=True
+        )
+        try:
+            async with watcher.subscribe("watcher_user", "personal") as queue:
+                await asyncio.sleep(0.3)
+                skill = Path(paths.user_skills_dir()) / "triage"
+                skill.mkdir()
+                (skill / "SKILL.md").write_text("---\nname: triage\n---\n")
+
+                assert FileEvent("skills", "triage", "created") in await _collect(queue, 1)
+        finally:
+            watcher.close()
+
+    async def test_cache_watch_runs_without_subscribers_until_idle(self, watcher, paths):
+        batches = []
+        watcher.add_listener(lambda p, events: batches.append(events))
+        files = paths.workspace_files_dir()
+
+        watcher.ensure_watching("watcher_user", "personal")
+        async with watcher.subscribe("watcher_user", "personal"):
+            pass
+        # A subscriber leaving doesn't stop a watch the caches still use.
+        assert watcher.watching() == [("watcher_user", "personal")]
+
+        await asyncio.sleep(0.3)
+        (files / "report.md").write_text("draft")
+        async with asyncio.timeout(5):
+            while not batches:
+                await asyncio.sleep(0.05)
+        assert FileEvent("workspace", "report.md", "created") in batches[0]
+
+        watcher.idle_timeout = 0
+        async with watcher.subscribe("watcher_user", "personal"):
+            pass
+        assert watcher.watching() == []
+
+    def test_watch_workspace_is_a_no_op_without_the_process_watcher(self, monkeypatch):
+        from src.sdk import file_watcher
+
+        monkeypatch.setattr(file_watcher, "_watcher", None)
+        file_watcher.watch_workspace("watcher_user", "personal")
+        assert file_watcher._watcher is None
+
+
+class TestListeners:
+    def test_workspace_events_refresh_search_index(self, paths):
+        from src.sdk.file_watcher import refresh_search_index
+        from src.sdk.tools_core.file_index import get_file_index
+
+        files = paths.workspace_files_dir()
+        (files / "a.txt").write_text("alpha\n")
+        index = get_file_index(paths)
+        index.reconcile()
+
+        (files / "a.txt").write_text("beta\n")
+        refresh_search_index(paths, [FileEvent("workspace", "a.txt", "modified")])
+
+        assert [m.line for m in index.search(re.compile("beta"))] == [1]
+
+    def test_tool_events_invalidate_index_hashes(self, paths):
+        from src.sdk.file_watcher import invalidate_tool_index
+
+        hashes = paths.user_tools_dir() / ".index" / ".index_hashes.json"
+        hashes.parent.mkdir(parents=True)
+        hashes.write_text("{}")
+
+        invalidate_tool_index(paths, [FileEvent("workspace", "a.txt", "modified")])
+        assert hashes.exists()
+        invalidate_tool_index(paths, [FileEvent("tools", "jq", "created")])
+        assert not hashes.exists()
@@ -277,3 +277,50 @@ class TestFilesGrepSearch:
             {"pattern": "NONEXISTENT", "path": ".", "user_id": TEST_USER_ID}
         )
         assert "no matches" in result.lower() or result.strip() == ""
+
+    def test_files_grep_search_excludes_and_max_results(self, user_workspace):
+        """Test exclude patterns and the max_results short-circuit."""
+        from src.sdk.tools_core.file_search import files_grep_search
+
+        (user_workspace / "logs").mkdir()
+        (user_workspace / "logs" / "run.log").write_text("TODO: ignored\n")
+        (user_workspace / "a.txt").write_text("TODO: one\nTODO: two\nTODO: three\n")
+
+        result = files_grep_search.invoke(
+            {"pattern": "TODO", "exclude": ["logs/"], "max_results": 2, "user_id": TEST_USER_ID}
+        )
+        assert "a.txt:1: TODO: one" in result
+        assert "a.txt:2: TODO: two" in result
+        assert "three" not in result and "run.log" not in result
+        assert "stopped after 2 matches" in result
+
+        counts = files_grep_search.invoke(
+            {"pattern": "TODO", "count": True, "exclude": ["*.log"], "user_id": TEST_USER_ID}
+        )
+        assert counts.strip() == "a.txt: 3 matches"
+
+    def test_files_grep_search_follows_file_tools_and_external_edits(
+        self, user_workspace, monkeypatch
+    ):
+        """Test the index tracks files_* changes and edits made outside the tools."""
+        from src.sdk.tools_core import file_index
+        from src.sdk.tools_core.file_search import files_grep_search
+        from src.sdk.tools_core.filesystem import files_delete, files_rename, files_write
+
+        def grep(pattern):
+            return files_grep_search.invoke({"pattern": pattern, "user_id": TEST_USER_ID})
+
+        files_write.invoke({"path": "plan.md", "content": "launch date", "user_id": TEST_USER_ID})
+        assert "plan.md:1: launch date" in grep("launch")
+
+        files_rename.invoke({"path": "plan.md", "new_name": "roadmap.md", "user_id": TEST_USER_ID})
+        assert "roadmap.md:1" in grep("launch") and "plan.md" not in grep("launch")
+
+        # Outside edits show up once the last walk is older than RECONCILE_TTL.
+        (user_workspace / "external.txt").write_text("launch party")
+        assert "external.txt" not in grep("launch")
+        monkeypatch.setattr(file_index, "RECONCILE_TTL", 0)
+        assert "external.txt:1: launch party" in grep("launch")
+
+        files_delete.invoke({"path": "roadmap.md", "user_id": TEST_USER_ID})
+        assert "roadmap.md" not in grep("launch")
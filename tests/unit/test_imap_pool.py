@@ -0,0 +1,268 @@
+"""Unit tests for the pooled IMAP sessions."""
+
+import threading
+
+import pytest
+
+from src.sdk.tools_core.imap_pool import (
+    ImapIdleWatcher,
+    ImapPoolConfig,
+    ImapPoolTimeoutError,
+    ImapSessionPool,
+)
+
+
+class _FakeClient:
+    capabilities = ("IMAP4REV1", "IDLE")
+
+    def __init__(self):
+        self.alive = True
+
+    def noop(self):
+        if not self.alive:
+            raise OSError("socket closed")
+        return "OK", [b""]
+
+
+class _FakeIdle:
+    """Reports a change on the given poll calls (1-based); otherwise times out."""
+
+    def __init__(self, changes=()):
+        self.changes = set(changes)
+        self.polls = 0
+        self.commands = 0
+
+    def __enter__(self):
+        self.commands += 1
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def poll(self, timeout):
+        self.polls += 1
+        return [b"* 3 EXISTS"] if self.polls in self.changes else []
+
+
+class _FakeMailBox:
+    def __init__(self, account):
+        self.account = account
+        self.client = _FakeClient()
+        self.logged_out = False
+        self.idle = _FakeIdle()
+        self.folder = self
+
+    def set(self, folder, readonly=False):
+        self.selected = folder
+
+    def logout(self):
+        self.logged_out = True
+
+
+def _account(account_id, host="imap.example.com"):
+    return {
+        "id": account_id,
+        "email": f"{account_id}@example.com",
+        "password": "pw",
+        "imap_host": host,
+    }
+
+
+def _pool(max_per_host=2, acquire_timeout=0.05):
+    logins = []
+
+    def connect(account):
+        mailbox = _FakeMailBox(account)
+        logins.append(mailbox)
+        return mailbox
+
+    pool = ImapSessionPool(
+        ImapPoolConfig(max_per_host=max_per_host, acquire_timeout=acquire_timeout), connect
+    )
+    return pool, logins
+
+
+class TestImapSessionPool:
+    def test_reuses_session_for_same_account(self):
+        pool, logins = _pool()
+
+        with pool.session("u", _account("a")) as first:
+            pass
+        with pool.session("u", _account("a")) as second:
+            pass
+
+        assert first is second
+        assert len(logins) == 1
+        assert pool.stats()["reused"] == 1
+
+    def test_new_password_gets_new_session(self):
+        pool, logins = _pool()
+        account = _account("a")
+        with pool.session("u", account):
+            pass
+
+        with pool.session("u", {**account, "password": "changed"}):
+            pass
+
+        assert len(logins) == 2
+
+    def test_host_limit_evicts_idle_session_of_other_account(self):
+        pool, logins = _pool(max_per_host=1)
+        with pool.session("u", _account("a")):
+            pass
+
+        with pool.session("u", _account("b")) as mailbox:
+            assert mailbox.account["id"] == "b"
+
+        assert logins[0].logged_out
+        assert pool.stats()["open"] == 1
+        assert pool.stats()["evicted"] == 1
+
+    def test_host_limit_blocks_until_timeout_when_all_busy(self):
+        pool, _ = _pool(max_per_host=1)
+
+        with pool.session("u", _account("a")):
+            with pytest.raises(ImapPoolTimeoutError):
+                with pool.session("u", _account("b")):
+                    pass
+            with pool.session("u", _account("c", host="other.example.com")):
+                pass
+
+    def test_waiter_gets_slot_released_by_another_thread(self):
+        pool, _ = _pool(max_per_host=1, acquire_timeout=5)
+        release = threading.Event()
+
+        def hold():
+            with pool.session("u", _account("a")):
+                release.wait()
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        try:
+            while pool.stats()["open"] == 0:
+                pass
+            threading.Timer(0.05, release.set).start()
+            with pool.session("u", _account("b")) as mailbox:
+                assert mailbox.account["id"] == "b"
+        finally:
+            release.set()
+            holder.join()
+        assert pool.stats()["waits"] >= 1
+
+    def test_session_that_raised_is_discarded(self):
+        pool, logins = _pool()
+
+        with pytest.raises(RuntimeError):
+            with pool.session("u", _account("a")):
+                raise RuntimeError("connection reset")
+        with pool.session("u", _account("a")):
+            pass
+
+        assert logins[0].logged_out
+        assert len(logins) == 2
+        assert pool.stats()["open"] == 1
+
+    def test_stale_session_is_replaced_after_failed_noop(self, monkeypatch):
+        pool, logins = _pool()
+        with pool.session("u", _account("a")):
+            pass
+        logins[0].client.alive = False
+        monkeypatch.setattr("src.sdk.tools_core.imap_pool.NOOP_AFTER", 0)
+
+        with pool.session("u", _account("a")) as mailbox:
+            assert mailbox is logins[1]
+
+    def test_missing_credentials(self):
+        pool, _ = _pool()
+
+        with pytest.raises(ValueError, match="missing credentials"):
+            with pool.session("u", {"id": "a", "email": "a@example.com"}):
+                pass
+
+    def test_prune_and_close_log_out_idle_sessions(self):
+        pool, logins = _pool()
+        with pool.session("u", _account("a")):
+            pass
+        pool.config.idle_timeout = 0
+
+        assert pool.prune() == 1
+        assert logins[0].logged_out
+        pool.close()
+        with pytest.raises(RuntimeError, match="shut down"):
+            with pool.session("u", _account("a")):
+                pass
+
+
+class TestImapIdleWatcher:
+    def _watcher(self, mailbox, on_change, **kwargs):
+        return ImapIdleWatcher(
+            _account("a"),
+            "INBOX",
+            on_change,
+            connect=lambda account: mailbox,
+            poll_interval=0,
+            retry_interval=0.01,
+            **kwargs,
+        )
+
+    def test_reports_changes_on_its_own_connection_until_stopped(self):
+        mailbox = _FakeMailBox(_account("a"))
+        mailbox.idle = _FakeIdle(changes={2, 3})
+        seen = threading.Event()
+        changes = []
+
+        def on_change():
+            changes.append(mailbox.idle.polls)
+            if len(changes) == 2:
+                seen.set()
+
+        watcher = self._watcher(mailbox, on_change)
+        watcher.start()
+        assert seen.wait(5)
+        watcher.stop()
+        watcher.join(5)
+
+        assert not watcher.is_alive()
+        assert changes == [2, 3]
+        assert mailbox.selected == "INBOX" and mailbox.logged_out
+        # IDLE is re-issued after each change.
+        assert mailbox.idle.commands >= 3
+
+    def test_reissues_idle_at_the_timeout(self):
+        mailbox = _FakeMailBox(_account("a"))
+        watcher = self._watcher(mailbox, lambda: None, timeout=0.01)
+        watcher.start()
+        for _ in range(500):
+            if mailbox.idle.commands >= 3:
+                break
+            threading.Event().wait(0.01)
+        watcher.stop()
+        watcher.join(5)
+        assert mailbox.idle.commands >= 3
+        assert not watcher.is_alive()
+
+    def test_ends_when_server_lacks_idle(self):
+        mailbox = _FakeMailBox(_account("a"))
+        mailbox.client.capabilities = ("IMAP4REV1",)
+        watcher = self._watcher(mailbox, lambda: None)
+        watcher.start()
+        watcher.join(5)
+
+        assert watcher.supported is False
+        assert mailbox.logged_out and mailbox.idle.polls == 0
+
+    def test_stays_disconnected_while_paused(self):
+        connects = []
+        watcher = ImapIdleWatcher(
+            _account("a"),
+            "INBOX",
+            lambda: None,
+            paused=lambda: True,
+            connect=connects.append,
+            retry_interval=0.01,
+        )
+        watcher.start()
+        threading.Event().wait(0.05)
+        watcher.stop()
+        watcher.join(5)
+        assert connects == []
@@ -0,0 +1,279 @@
+"""Unit tests for incremental IMAP folder sync."""
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from src.sdk.tools_core.email_db import init_db
+from src.sdk.tools_core.email_sync import _email_to_dict
+from src.sdk.tools_core.imap_sync import WireSizedMessage, sync_folder
+
+
+def _raw(uid: int, body: str = "") -> bytes:
+    return (
+        f"From: Sender <s@example.com>\r\nTo: me@example.com\r\n"
+        f"Subject: message {uid}\r\nDate: Mon, 1 Jan 2024 00:00:{uid % 60:02d} +0000\r\n"
+        f"\r\n{body or f'body {uid}'}\r\n"
+    ).encode()
+
+
+class _FakeClient:
+    def __init__(self, server):
+        self.server = server
+        self.capabilities = ("IMAP4REV1", "CONDSTORE") if server.condstore else ("IMAP4REV1",)
+        self.commands: list[str] = []
+
+    def _simple_command(self, name, *args):
+        self.commands.append(name)
+        s = self.server
+        items = f"UIDVALIDITY {s.uidvalidity} UIDNEXT {max(s.messages, default=0) + 1}"
+        if s.condstore:
+            items += f" HIGHESTMODSEQ {s.modseq}"
+        return "OK", [f'"INBOX" ({items})'.encode()]
+
+    def _untagged_response(self, typ, data, name):
+        return typ, data
+
+    def uid(self, command, *args):
+        self.commands.append(f"UID {command} {' '.join(args)}")
+        since = int(args[1].split("CHANGEDSINCE ")[1].rstrip(")"))
+        lines = [
+            f"{uid} (UID {uid} FLAGS ({' '.join(flags)}) MODSEQ ({mod}))".encode()
+            for uid, (flags, mod) in self.server.messages.items()
+            if mod > since
+        ]
+        return "OK", lines
+
+
+class _FakeFolder:
+    def __init__(self, mailbox):
+        self.mailbox = mailbox
+
+    def set(self, folder, readonly=False):
+        self.mailbox.selected = (folder, readonly)
+
+
+class _FakeServer:
+    def __init__(self, uids, condstore=True):
+        self.condstore = condstore
+        self.uidvalidity = 1
+        self.modseq = 10
+        self.messages: dict[int, tuple[tuple[str, ...], int]] = {u: ((), 1) for u in uids}
+
+    def set_flags(self, uid, *flags):
+        self.modseq += 1
+        self.messages[uid] = (flags, self.modseq)
+
+
+class _FakeMailBox:
+    def __init__(self, server):
+        self.server = server
+        self.client = _FakeClient(server)
+        self.folder = _FakeFolder(self)
+        self.selected = None
+        self.fetches: list[dict] = []
+
+    def uids(self, criteria="ALL"):
+        flags = {"UNSEEN": "\\Seen", "FLAGGED": "\\Flagged"}
+        uids = sorted(self.server.messages)
+        if criteria.startswith("UID "):
+            low = int(criteria[4:].split(":")[0])
+            uids = [u for u in uids if u >= low] or uids[-1:]
+        elif criteria == "UNSEEN":
+            uids = [u for u in uids if flags[criteria] not in self.server.messages[u][0]]
+        elif criteria == "FLAGGED":
+            uids = [u for u in uids if flags[criteria] in self.server.messages[u][0]]
+        return [str(u) for u in uids]
+
+    def fetch(self, *, uid_list, mark_seen=True, headers_only=False, bulk=False):
+        self.fetches.append(
+            {"uids": list(uid_list), "mark_seen": mark_seen, "headers_only": headers_only}
+        )
+        for uid in uid_list:
+            raw = _raw(int(uid))
+            if headers_only:
+                raw = raw.split(b"\r\n\r\n")[0] + b"\r\n\r\n"
+            flags = " ".join(self.server.messages[int(uid)][0])
+            head = f"{uid} (UID {uid} FLAGS ({flags}) RFC822.SIZE {len(_raw(int(uid)))} BODY[] {{{len(raw)}}}"
+            yield WireSizedMessage([(head.encode(), raw), b")"])
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'email.db'}")
+    init_db(engine)
+    return engine
+
+
+def _sync(mailbox, engine, **kwargs):
+    kwargs.setdefault("batch_size", 2)
+    return sync_folder(mailbox, engine, "acc", "INBOX", to_dict=_email_to_dict, **kwargs)
+
+
+def _rows(engine):
+    with engine.connect() as conn:
+        result = conn.execute(
+            text("SELECT message_id, read, flagged, body_text, body_fetched FROM emails")
+        )
+        return {r[0]: tuple(r[1:]) for r in result}
+
+
+class TestIncrementalSync:
+    def test_downloads_only_missing_uids_in_batches(self, engine):
+        mailbox = _FakeMailBox(_FakeServer([1, 2, 3, 4, 5]))
+
+        stats = _sync(mailbox, engine, mode="full", limit=100)
+
+        assert stats.rows_written == 5
+        assert stats.fetch_batches == 3
+        assert stats.bytes_transferred > 0
+        assert mailbox.selected == ("INBOX", True)
+        assert [f["uids"] for f in mailbox.fetches] == [["5", "4"], ["3", "2"], ["1"]]
+        assert all(f["mark_seen"] is False for f in mailbox.fetches)
+
+        mailbox.server.messages[6] = ((), 11)
+        mailbox.fetches.clear()
+        stats = _sync(mailbox, engine, mode="new")
+
+        assert [f["uids"] for f in mailbox.fetches] == [["6"]]
+        assert stats.rows_written == 1
+        assert set(_rows(engine)) == {"1", "2", "3", "4", "5", "6"}
+
+    def test_unchanged_folder_costs_one_status(self, engine):
+        mailbox = _FakeMailBox(_FakeServer([1, 2]))
+        _sync(mailbox, engine)
+        mailbox.client.commands.clear()
+
+        stats = _sync(mailbox, engine)
+
+        assert stats.unchanged
+        assert mailbox.client.commands == ["STATUS"]
+
+    def test_limit_leaves_older_uids_to_the_backfill(self, engine):
+        mailbox = _FakeMailBox(_FakeServer([1, 2, 3]))
+        _sync(mailbox, engine, mode="full", limit=10)
+        assert _backfill_state(engine)[0] == 0
+
+        mailbox.server.messages.update({u: ((), 1) for u in range(4, 9)})
+        stats = _sync(mailbox, engine, limit=2)
+        assert set(_rows(engine)) == {"1", "2", "3", "7", "8"}
+        assert stats.backfill_uid == 6
+
+        # The next quick sync starts above UID 8 instead of re-listing the folder.
+        mailbox.server.messages[9] = ((), 1)
+        mailbox.fetches.clear()
+        _sync(mailbox, engine, limit=2)
+        assert [f["uids"] for f in mailbox.fetches] == [["9"]]
+
+        _sync(mailbox, engine, mode="full", limit=10)
+        assert set(_rows(engine)) == {str(u) for u in range(1, 10)}
+        assert _backfill_state(engine)[0] == 0
+
+    def test_condstore_flag_changes_update_stored_rows(self, engine):
+        server = _FakeServer([1, 2, 3])
+        mailbox = _FakeMailBox(server)
+        _sync(mailbox, engine)
+        assert _rows(engine)["2"][:2] == (0, 0)
+
+        server.set_flags(2, "\\Seen", "\\Flagged")
+        stats = _sync(mailbox, engine)
+
+        assert stats.flags_updated == 1
+        assert stats.rows_written == 0
+        assert _rows(engine)["2"][:2] == (1, 1)
+        assert any("CHANGEDSINCE 10" in c for c in mailbox.client.commands)
+
+    def test_flag_changes_without_condstore_use_searches(self, engine):
+        server = _FakeServer([1, 2], condstore=False)
+        mailbox = _FakeMailBox(server)
+        _sync(mailbox, engine)
+
+        server.set_flags(1, "\\Seen")
+        stats = _sync(mailbox, engine)
+
+        assert stats.flags_updated == 1
+        assert _rows(engine)["1"][:2] == (1, 0)
+
+    def test_uidvalidity_change_resyncs_folder(self, engine):
+        server = _FakeServer([1, 2])
+        mailbox = _FakeMailBox(server)
+        _sync(mailbox, engine)
+
+        server.uidvalidity = 2
+        server.messages = {7: ((), 1)}
+        stats = _sync(mailbox, engine)
+
+        assert stats.uidvalidity_reset
+        assert set(_rows(engine)) == {"7"}
+
+    def test_headers_first_then_bodies(self, engine):
+        mailbox = _FakeMailBox(_FakeServer([1, 2, 3]))
+
+        stats = _sync(mailbox, engine, headers_first=True)
+
+        assert [f["headers_only"] for f in mailbox.fetches] == [True, True, False, False]
+        assert stats.rows_written == 3
+        assert stats.bodies_written == 3
+        body, fetched = _rows(engine)["3"][2:]
+        assert body.strip() == "body 3" and fetched == 1
+
+
+def _backfill_state(engine):
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT backfill_uid, backfill_fetched FROM folder_sync_state")
+        ).fetchone()
+
+
+class TestResumableBackfill:
+    def test_full_sync_resumes_from_cursor(self, engine):
+        mailbox = _FakeMailBox(_FakeServer([1, 2, 3, 4, 5]))
+
+        stats = _sync(mailbox, engine, mode="full", limit=2)
+
+        assert set(_rows(engine)) == {"4", "5"}
+        assert _backfill_state(engine) == (3, 2)
+        assert stats.backfill_remaining == 3
+
+        mailbox.fetches.clear()
+        stats = _sync(mailbox, engine, mode="full", limit=10)
+
+        assert [f["uids"] for f in mailbox.fetches] == [["3", "2"], ["1"]]
+        assert set(_rows(engine)) == {"1", "2", "3", "4", "5"}
+        assert _backfill_state(engine) == (0, 5)
+        assert stats.backfill_uid == 0 and stats.backfill_remaining == 0
+
+    def test_interrupted_backfill_keeps_committed_batches(self, engine):
+        mailbox = _FakeMailBox(_FakeServer([1, 2, 3, 4, 5]))
+
+        def failing(msg):
+            if msg.uid == "2":
+                raise ConnectionError("dropped")
+            return _email_to_dict(msg)
+
+        with pytest.raises(ConnectionError):
+            sync_folder(mailbox, engine, "acc", "INBOX", to_dict=failing, mode="full", batch_size=2)
+
+        assert set(_rows(engine)) == {"4", "5"}
+        assert _backfill_state(engine) == (3, 2)
+
+        mailbox.fetches.clear()
+        _sync(mailbox, engine, mode="full")
+
+        assert [f["uids"] for f in mailbox.fetches] == [["3", "2"], ["1"]]
+        assert set(_rows(engine)) == {"1", "2", "3", "4", "5"}
+
+    def test_hook_runs_in_the_batch_transaction_after_insert(self, engine):
+        mailbox = _FakeMailBox(_FakeServer([1, 2, 3]))
+        seen = []
+
+        def hook(conn, rows):
+            stored = conn.execute(text("SELECT COUNT(*) FROM emails")).scalar()
+            seen.append(([r["message_id"] for r in rows], stored))
+            if len(seen) == 2:
+                raise RuntimeError("hook failed")
+
+        with pytest.raises(RuntimeError):
+            _sync(mailbox, engine, mode="full", on_rows=hook)
+
+        assert seen == [(["3", "2"], 2), (["1"], 3)]
+        assert set(_rows(engine)) == {"2", "3"}
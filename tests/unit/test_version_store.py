@@ -0,0 +1,157 @@
+"""Unit tests for the content-addressed file version store."""
+
+import sqlite3
+
+import pytest
+
+from src.sdk.tools_core.version_store import (
+    SNAPSHOT_EVERY,
+    VersionStore,
+    apply_delta,
+    make_delta,
+    thin,
+)
+
+DAY = 86400
+NOW = 1_800_000_000.0
+
+
+def _doc(revision: int, lines: int = 400) -> str:
+    body = [f"line {i}: the quarterly report paragraph {i}\n" for i in range(lines)]
+    body[revision % lines] = f"line edited in revision {revision}\n"
+    return "".join(body)
+
+
+def _base(store, path, version):
+    """The delta base of a version's blob (None for a full snapshot)."""
+    with sqlite3.connect(store.db_path) as conn:
+        return conn.execute(
+            "SELECT b.base FROM versions v JOIN blobs b ON b.hash = v.hash "
+            "WHERE v.path = ? AND v.version = ?",
+            (path, version),
+        ).fetchone()[0]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return VersionStore(tmp_path / "versions.db")
+
+
+class TestDelta:
+    def test_round_trip(self):
+        base = "a\nb\nc\nd"
+        for target in ("a\nB\nc\nd", "", "x\n" + base, "a\nd\nno newline"):
+            assert apply_delta(base, make_delta(base, target)) == target
+
+
+class TestThin:
+    def test_keep_last_age_and_buckets(self):
+        created = [NOW - d * DAY for d in (0, 1, 10, 12, 40, 400, 420, 800)]
+        assert thin(created, NOW) == [True, True, True, False, True, True, False, True]
+        assert thin(created, NOW, keep_last=4, max_age_days=30) == [True] * 4 + [False] * 4
+        assert thin(created, NOW, max_age_days=0.5) == [True] + [False] * 7
+
+
+class TestVersionStore:
+    def test_same_second_versions_and_dedupe(self, store):
+        v1 = store.capture("a.md", "one", now=NOW)
+        v2 = store.capture("a.md", "two", now=NOW)
+        v3 = store.capture("b.md", "one", now=NOW)
+
+        assert v2 == f"{v1}_2" and v3 == v1
+        assert [v["version"] for v in store.versions("a.md")] == [v2, v1]
+        assert store.read("a.md", v1) == "one" and store.read("a.md", v2) == "two"
+        assert store.stats()["blobs"] == 2
+
+    def test_reverse_deltas_with_periodic_snapshots(self, store):
+        versions = [store.capture("report.md", _doc(i), now=NOW + i) for i in range(25)]
+
+        stats = store.stats()
+        assert stats["blobs"] == 25
+        assert stats["deltas"] == 25 - 1 - 25 // SNAPSHOT_EVERY
+        assert stats["stored_bytes"] < stats["content_bytes"] / 5
+        assert _base(store, "report.md", versions[-1]) is None
+        for i, version in enumerate(versions):
+            assert store.read("report.md", version) == _doc(i)
+
+    def test_reverting_content_keeps_chains_acyclic(self, store):
+        a, b = _doc(1), _doc(2)
+        versions = [store.capture("f.md", text, now=NOW + i) for i, text in enumerate([a, b, a])]
+
+        assert _base(store, "f.md", versions[2]) is None
+        assert [store.read("f.md", v) for v in versions] == [a, b, a]
+
+    def test_delete_and_clean_keep_remaining_versions_readable(self, store):
+        versions = [store.capture("f.md", _doc(i), now=NOW - (30 - i) * DAY) for i in range(30)]
+
+        assert store.delete("f.md", versions[-5]) == 1
+        assert store.delete("f.md", "missing") == 0
+        deleted = store.clean(keep_last=3, now=NOW)
+
+        remaining = [v["version"] for v in store.versions("f.md")]
+        assert deleted == 29 - len(remaining)
+        assert remaining[:3] == [versions[-1], versions[-2], versions[-3]]
+        assert store.stats()["blobs"] == len(remaining)
+        for version in remaining:
+            assert store.read("f.md", version) == _doc(versions.index(version))
+
+        assert store.delete("f.md") == len(remaining)
+        assert store.stats() == {
+            "files": 0,
+            "versions": 0,
+            "blobs": 0,
+            "deltas": 0,
+            "stored_bytes": 0,
+            "content_bytes": 0,
+        }
+
+    def test_imports_legacy_full_copies(self, tmp_path):
+        legacy = tmp_path / ".versions"
+        (legacy / "notes" / "plan.md").mkdir(parents=True)
+        (legacy / "notes" / "plan.md" / "2026-03-16T10-30-00").write_text("old")
+        (legacy / "notes" / "plan.md" / "2026-03-17T09-00-00").write_text("newer")
+
+        store = VersionStore(tmp_path / ".versions.db", legacy)
+
+        assert [v["version"] for v in store.versions("notes/plan.md")] == [
+            "2026-03-17T09-00-00",
+            "2026-03-16T10-30-00",
+        ]
+        assert store.read("notes/plan.md", "2026-03-16T10-30-00") == "old"
+        assert list(legacy.iterdir()) == []
+
+
+class TestVersioningTools:
+    @pytest.fixture
+    def workspace(self, tmp_path, monkeypatch):
+        from src.storage.paths import DataPaths
+
+        def mock_get_paths(user_id="default_user", workspace_id="personal"):
+            return DataPaths(ea_root=str(tmp_path), user_id=user_id, workspace_id=workspace_id)
+
+        monkeypatch.setattr("src.sdk.tools_core.filesystem.get_paths", mock_get_paths)
+        monkeypatch.setattr("src.sdk.tools_core.file_versioning.get_paths", mock_get_paths)
+        return mock_get_paths("u").workspace_files_dir()
+
+    def test_edits_list_restore_and_clean(self, workspace):
+        from src.sdk.tools_core.file_versioning import (
+            files_versions_clean,
+            files_versions_list,
+            files_versions_restore,
+        )
+        from src.sdk.tools_core.filesystem import files_edit, files_write
+
+        files_write.invoke({"path": "doc.md", "content": "draft one", "user_id": "u"})
+        files_edit.invoke({"path": "doc.md", "old": "one", "new": "two", "user_id": "u"})
+        files_edit.invoke({"path": "doc.md", "old": "two", "new": "three", "user_id": "u"})
+
+        listing = files_versions_list.invoke({"path": "doc.md", "user_id": "u"})
+        versions = [line.split()[0] for line in listing.splitlines()[2:]]
+        assert len(versions) == 2 and "(9 bytes)" in listing
+
+        files_versions_restore.invoke({"path": "doc.md", "version": versions[-1], "user_id": "u"})
+        assert (workspace / "doc.md").read_text() == "draft one"
+
+        result = files_versions_clean.invoke({"keep_last": 1, "max_age_days": 0, "user_id": "u"})
+        assert result.startswith("Cleaned up 1 old versions")
+        assert len(files_versions_list.invoke({"path": "doc.md", "user_id": "u"}).splitlines()) == 3